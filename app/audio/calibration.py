@@ -0,0 +1,255 @@
+"""
+Host calibration for local Whisper.
+
+Times candidate model sizes, compute types and cpu_threads / num_workers
+settings on reference clips and stores, per model size, the fastest
+settings found. The largest model whose best real-time factor meets
+STT_RTF_TARGET becomes the default for WHISPER_MODEL=auto.
+
+Reference clips are your own recordings when available (the WAV files
+the CLI leaves in .tmp_audio, or --clips DIR), otherwise a few seconds of
+synthetic speech-like audio so the command always runs.
+
+Run (again) with:
+    python -m app.audio.calibration [--rtf-target 0.3] [--clips DIR]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_FILE = Path(".models/stt_calibration.json")
+CALIBRATION_VERSION = 1
+SAMPLE_RATE = 16000
+
+MODEL_SIZES = ("tiny", "base", "small", "medium")
+COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+MAX_CLIPS = 5
+
+
+@dataclass
+class WhisperSettings:
+    """How to construct the local WhisperModel."""
+    model_size: str
+    compute_type: str = "int8"
+    cpu_threads: int = 0  # 0 = library default
+    num_workers: int = 1
+    rtf: Optional[float] = None  # measured seconds of compute per second of audio
+    source: str = "default"  # default, config, calibration
+
+
+def host_fingerprint() -> Dict[str, object]:
+    """Calibration is only valid on the machine it was measured on."""
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "node": platform.node(),
+    }
+
+
+def default_thread_counts() -> List[int]:
+    cpus = os.cpu_count() or 1
+    return sorted({max(1, cpus // 4), max(1, cpus // 2), cpus})
+
+
+def synthetic_clips(count: int = 3, seconds: float = 3.0) -> List[np.ndarray]:
+    """Harmonic, syllable-modulated tones: keeps the decoder busy like speech does."""
+    rng = np.random.default_rng(7)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    clips = []
+    for _ in range(count):
+        f0 = rng.uniform(100, 220)
+        syllables = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t), 0, None)
+        audio = sum(np.sin(2 * np.pi * f0 * h * t) / h for h in range(1, 8)) * syllables
+        clips.append((audio / np.abs(audio).max() * 0.3).astype(np.float32))
+    return clips
+
+
+def load_clips(directory: Optional[Path] = None, limit: int = MAX_CLIPS) -> List[np.ndarray]:
+    """Most recent WAV recordings in `directory` (default .tmp_audio), or synthetic clips."""
+    directory = Path(directory or ".tmp_audio")
+    clips = []
+    if directory.exists():
+        import soundfile as sf
+        from app.audio.cloud_stt import resample, to_mono
+
+        paths = sorted(directory.glob("*.wav"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in paths[:limit]:
+            try:
+                audio, rate = sf.read(str(path), dtype="float32", always_2d=True)
+            except Exception as e:
+                logger.warning(f"Skipping {path}: {e}")
+                continue
+            clips.append(resample(to_mono(audio), rate, SAMPLE_RATE))
+    if not clips:
+        logger.info("No reference recordings found; using synthetic clips.")
+        clips = synthetic_clips()
+    return clips
+
+
+def _whisper_factory(model_size: str, compute_type: str, cpu_threads: int, num_workers: int):
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_size, device="cpu", compute_type=compute_type,
+                        cpu_threads=cpu_threads, num_workers=num_workers)
+
+
+def _decode(model, audio: np.ndarray) -> None:
+    segments, _ = model.transcribe(audio, language="en", beam_size=1)
+    for _ in segments:  # decoding is lazy
+        pass
+
+
+def measure_rtf(model, clips: Sequence[np.ndarray], num_workers: int = 1) -> float:
+    """Wall time per second of audio, decoding `num_workers` clips at a time."""
+    _decode(model, clips[0][:SAMPLE_RATE])  # warm-up
+    audio_s = sum(len(c) for c in clips) / SAMPLE_RATE
+    start = time.perf_counter()
+    if num_workers > 1:
+        with ThreadPoolExecutor(num_workers) as pool:
+            list(pool.map(lambda c: _decode(model, c), clips))
+    else:
+        for clip in clips:
+            _decode(model, clip)
+    return (time.perf_counter() - start) / audio_s
+
+
+def calibrate(
+    clips: Sequence[np.ndarray],
+    rtf_target: float,
+    model_sizes: Sequence[str] = MODEL_SIZES,
+    compute_types: Sequence[str] = COMPUTE_TYPES,
+    thread_counts: Optional[Sequence[int]] = None,
+    worker_counts: Sequence[int] = (1,),
+    model_factory: Callable = _whisper_factory,
+    report: Callable[[str], None] = print,
+) -> dict:
+    """
+    Time every candidate and return the calibration record.
+
+    Sizes are tried smallest first; once a size cannot meet the target
+    with any settings, larger ones are skipped.
+    """
+    thread_counts = list(thread_counts or default_thread_counts())
+    best: Dict[str, WhisperSettings] = {}
+    results = []
+    for size in model_sizes:
+        for compute_type in compute_types:
+            for threads in thread_counts:
+                for workers in worker_counts:
+                    try:
+                        model = model_factory(size, compute_type, threads, workers)
+                        rtf = measure_rtf(model, clips, workers)
+                    except Exception as e:
+                        report(f"  {size:<8}{compute_type:<14}threads={threads:<3}workers={workers}: failed ({e})")
+                        continue
+                    finally:
+                        model = None
+                    results.append({"model_size": size, "compute_type": compute_type,
+                                    "cpu_threads": threads, "num_workers": workers, "rtf": round(rtf, 4)})
+                    report(f"  {size:<8}{compute_type:<14}threads={threads:<3}workers={workers}: RTF {rtf:.3f}")
+                    if size not in best or rtf < best[size].rtf:
+                        best[size] = WhisperSettings(size, compute_type, threads, workers, round(rtf, 4), "calibration")
+        if size not in best or best[size].rtf > rtf_target:
+            break
+
+    meeting = [s for s in best.values() if s.rtf <= rtf_target]
+    if meeting:
+        choice = meeting[-1]
+    elif best:
+        choice = min(best.values(), key=lambda s: s.rtf)
+        report(f"No model meets RTF {rtf_target}; using the fastest ({choice.model_size}).")
+    else:
+        raise RuntimeError("Calibration failed: no candidate could be loaded")
+
+    return {
+        "version": CALIBRATION_VERSION,
+        "host": host_fingerprint(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rtf_target": rtf_target,
+        "clips_s": round(sum(len(c) for c in clips) / SAMPLE_RATE, 2),
+        "choice": asdict(choice),
+        "best_per_size": {size: asdict(s) for size, s in best.items()},
+        "results": results,
+    }
+
+
+def save_calibration(record: dict, path: Path = CALIBRATION_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, indent=2))
+
+
+def load_calibration(path: Path = CALIBRATION_FILE) -> Optional[dict]:
+    """The stored calibration, or None if missing, unreadable or from another host."""
+    try:
+        record = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Failed to read STT calibration {path}: {e}")
+        return None
+    if record.get("version") != CALIBRATION_VERSION or record.get("host") != host_fingerprint():
+        logger.info("STT calibration was made on a different host; ignoring it.")
+        return None
+    return record
+
+
+def resolve_whisper_settings(model_size: str, path: Path = CALIBRATION_FILE) -> WhisperSettings:
+    """
+    Settings for WHISPER_MODEL=`model_size`.
+
+    "auto" takes the calibrated choice (or "base" if uncalibrated); an
+    explicit size still gets its calibrated compute type and threads.
+    """
+    record = load_calibration(path)
+    if model_size == "auto":
+        if record:
+            return WhisperSettings(**record["choice"])
+        return WhisperSettings("base")
+    if record and model_size in record.get("best_per_size", {}):
+        return WhisperSettings(**record["best_per_size"][model_size])
+    return WhisperSettings(model_size, source="config")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate local Whisper settings for this machine")
+    parser.add_argument("--rtf-target", type=float, help="max seconds of compute per second of audio")
+    parser.add_argument("--clips", type=Path, help="directory of reference WAV recordings")
+    parser.add_argument("--models", default=",".join(MODEL_SIZES[:3]), help="comma-separated model sizes")
+    parser.add_argument("--compute-types", default="int8,int8_float32")
+    parser.add_argument("--threads", help="comma-separated cpu_threads values")
+    parser.add_argument("--workers", default="1", help="comma-separated num_workers values")
+    args = parser.parse_args()
+
+    from app.config import load_config
+
+    rtf_target = args.rtf_target or load_config().stt_rtf_target
+    clips = load_clips(args.clips)
+    print(f"Calibrating on {len(clips)} clip(s), {sum(len(c) for c in clips) / SAMPLE_RATE:.1f}s of audio, "
+          f"target RTF {rtf_target}")
+    record = calibrate(
+        clips,
+        rtf_target,
+        model_sizes=args.models.split(","),
+        compute_types=args.compute_types.split(","),
+        thread_counts=[int(t) for t in args.threads.split(",")] if args.threads else None,
+        worker_counts=[int(w) for w in args.workers.split(",")],
+    )
+    save_calibration(record)
+    choice = record["choice"]
+    print(f"Selected {choice['model_size']} ({choice['compute_type']}, {choice['cpu_threads']} threads, "
+          f"{choice['num_workers']} worker(s), RTF {choice['rtf']}); saved to {CALIBRATION_FILE}")
+
+
+if __name__ == "__main__":
+    main()
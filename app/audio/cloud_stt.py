@@ -0,0 +1,163 @@
+"""
+Upload path for the cloud (Groq) speech-to-text provider.
+
+Whisper works on 16 kHz mono, so any extra channels or sample rate are
+wasted upload. Audio is downmixed and resampled before it leaves the
+machine and encoded in memory: FLAC is lossless at roughly half the size
+of 16-bit PCM, Opus is lossy but around a tenth. Requests go through one
+long-lived AsyncGroq client, so the event loop is never blocked and the
+HTTPS connection is pooled and reused across utterances.
+"""
+import asyncio
+import importlib.util
+import io
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SAMPLE_RATE = 16000
+# format name -> (soundfile format, subtype, upload filename)
+UPLOAD_FORMATS = {
+    "flac": ("FLAC", "PCM_16", "audio.flac"),
+    "opus": ("OGG", "OPUS", "audio.ogg"),
+    "wav": ("WAV", "PCM_16", "audio.wav"),
+}
+
+
+@dataclass
+class UploadStats:
+    """Size and timing of one cloud STT request."""
+    format: str
+    payload_bytes: int
+    pcm_bytes: int  # what 16-bit PCM at the original rate/channels would have cost
+    encode_ms: float
+    upload_ms: float
+
+
+def to_mono(audio: np.ndarray) -> np.ndarray:
+    """Average the channels of a (frames, channels) array."""
+    if audio.ndim == 1:
+        return audio
+    return audio.mean(axis=1, dtype=np.float32)
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Band-limited (FFT) resampling of a mono float32 signal."""
+    if src_rate == dst_rate or audio.size == 0:
+        return audio
+    n_out = max(1, int(round(len(audio) * dst_rate / src_rate)))
+    spectrum = np.fft.rfft(audio)
+    bins = n_out // 2 + 1
+    if bins <= len(spectrum):
+        spectrum = spectrum[:bins]
+    else:
+        spectrum = np.concatenate([spectrum, np.zeros(bins - len(spectrum), dtype=spectrum.dtype)])
+    out = np.fft.irfft(spectrum, n_out) * (n_out / len(audio))
+    return out.astype(np.float32)
+
+
+def encode_audio(audio: np.ndarray, sample_rate: int, fmt: str = "flac") -> Tuple[bytes, str]:
+    """Encode a mono float32 clip in memory; returns (payload, upload filename)."""
+    import soundfile as sf
+
+    container, subtype, filename = UPLOAD_FORMATS[fmt]
+    if fmt == "opus" and sample_rate not in (8000, 12000, 16000, 24000, 48000):
+        raise ValueError(f"Opus does not support {sample_rate} Hz")
+    buf = io.BytesIO()
+    sf.write(buf, np.clip(audio, -1.0, 1.0), sample_rate, format=container, subtype=subtype)
+    return buf.getvalue(), filename
+
+
+def load_audio(audio_input: Union[str, bytes, np.ndarray], sample_rate: int) -> Tuple[np.ndarray, int]:
+    """Path, raw int16 bytes or float32 array -> (float32 array, sample rate). Blocking."""
+    if isinstance(audio_input, str):
+        import soundfile as sf
+        audio, rate = sf.read(audio_input, dtype="float32", always_2d=True)
+        return audio, rate
+    if isinstance(audio_input, bytes):
+        return np.frombuffer(audio_input, dtype=np.int16).astype(np.float32) / 32768.0, sample_rate
+    return np.asarray(audio_input, dtype=np.float32), sample_rate
+
+
+class CloudTranscriber:
+    """Async Groq transcription client with compressed, 16 kHz mono uploads."""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        model: str = "whisper-large-v3",
+        upload_format: str = "flac",
+        base_url: Optional[str] = None,
+        timeout: float = 30.0,
+    ):
+        if importlib.util.find_spec("groq") is None:
+            raise ImportError("No module named 'groq'")
+        if upload_format not in UPLOAD_FORMATS:
+            logger.warning(f"Unknown STT upload format '{upload_format}', using flac.")
+            upload_format = "flac"
+        self.model = model
+        self.upload_format = upload_format
+        self._client_options = dict(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=1)
+        self._client = None
+
+    def warm_up(self) -> None:
+        """Build the client now (blocking) instead of inside the first request."""
+        self.client
+
+    @property
+    def client(self):
+        """AsyncGroq client, built on first use: importing groq takes a few hundred ms."""
+        if self._client is None:
+            from groq import AsyncGroq
+            self._client = AsyncGroq(**self._client_options)
+        return self._client
+
+    def prepare(self, audio_input: Union[str, bytes, np.ndarray], sample_rate: int) -> Tuple[bytes, str, int]:
+        """Load, downmix, resample and encode (blocking). Returns (payload, filename, pcm_bytes)."""
+        audio, rate = load_audio(audio_input, sample_rate)
+        pcm_bytes = audio.size * 2
+        audio = resample(to_mono(audio), rate, UPLOAD_SAMPLE_RATE)
+        payload, filename = encode_audio(audio, UPLOAD_SAMPLE_RATE, self.upload_format)
+        return payload, filename, pcm_bytes
+
+    async def transcribe(self, audio_input: Union[str, bytes, np.ndarray], sample_rate: int) -> str:
+        text, _ = await self.transcribe_with_stats(audio_input, sample_rate)
+        return text
+
+    async def transcribe_with_stats(self, audio_input: Union[str, bytes, np.ndarray],
+                                    sample_rate: int) -> Tuple[str, UploadStats]:
+        """The transcript and this request's UploadStats (concurrent requests each get their own)."""
+        start = time.perf_counter()
+        payload, filename, pcm_bytes = await asyncio.to_thread(self.prepare, audio_input, sample_rate)
+        encoded = time.perf_counter()
+
+        transcription = await self.client.audio.transcriptions.create(
+            file=(filename, payload),
+            model=self.model,
+            language="en",
+            response_format="text",
+        )
+        done = time.perf_counter()
+
+        stats = UploadStats(
+            format=self.upload_format,
+            payload_bytes=len(payload),
+            pcm_bytes=pcm_bytes,
+            encode_ms=(encoded - start) * 1000,
+            upload_ms=(done - encoded) * 1000,
+        )
+        logger.info(
+            f"Groq STT upload: {len(payload)} bytes {self.upload_format} "
+            f"({len(payload) / max(1, pcm_bytes):.0%} of PCM), "
+            f"encode {stats.encode_ms:.0f} ms, upload {stats.upload_ms:.0f} ms"
+        )
+        return str(transcription).strip(), stats
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
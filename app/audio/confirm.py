@@ -0,0 +1,185 @@
+"""
+Fast yes/no recognition for voice confirmations.
+
+A confirmation reply is one or two words, so the command pipeline (a fixed
+recording window, then the main Whisper model with the git-vocabulary
+prompt) spends almost all of its time waiting. Here the reply is endpointed
+as soon as the speaker stops and classified by the cheapest recognizer
+available:
+
+1. enrolled "yes"/"no" keyword templates (log-mel DTW, ~1 ms), see
+   `python -m app.audio.wakeword enroll --phrase yes`;
+2. a tiny Whisper model decoding greedily, primed with yes/no words and
+   limited to a few output tokens;
+3. the main Transcriber, if the tiny model can't be loaded.
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.audio.wakeword import LogMelExtractor, TemplateKeywordModel, template_dir
+
+logger = logging.getLogger(__name__)
+
+YES_WORDS = {"yes", "yeah", "yep", "yup", "sure", "ok", "okay", "confirm", "affirmative", "correct"}
+NO_WORDS = {"no", "nope", "nah", "stop", "cancel", "abort", "don't", "wait", "negative"}
+YES_PHRASES = ("do it", "go ahead")
+NO_PHRASES = ("do not", "hold on", "not now")
+
+# Primes the tiny model towards the answers we expect
+CONFIRM_PROMPT = "Yes. No. Sure. Okay. Cancel. Stop. Go ahead."
+MAX_REPLY_TOKENS = 6
+# Best keyword score must beat the other answer by this much
+KEYWORD_MARGIN = 0.05
+
+
+def interpret_yes_no(text: str) -> Optional[bool]:
+    """
+    Map a transcript to True (yes), False (no) or None (unclear).
+
+    Matches whole words, so "know" isn't a "no" and "token" isn't an "ok".
+    Refusals win over approvals: "no, don't do it" is a no.
+    """
+    words = re.findall(r"[a-z']+", text.lower().replace("’", "'"))
+    padded = f" {' '.join(words)} "
+    if NO_WORDS.intersection(words) or any(f" {p} " in padded for p in NO_PHRASES):
+        return False
+    if YES_WORDS.intersection(words) or any(f" {p} " in padded for p in YES_PHRASES):
+        return True
+    return None
+
+
+def load_confirmation_keywords() -> Dict[bool, TemplateKeywordModel]:
+    """Enrolled "yes"/"no" templates, or {} unless both have been recorded."""
+    models = {}
+    for answer, phrase in ((True, "yes"), (False, "no")):
+        directory = template_dir(phrase)
+        if not directory.exists() or not any(directory.glob("*.npy")):
+            return {}
+        try:
+            models[answer] = TemplateKeywordModel.load(directory)
+        except Exception as e:
+            logger.error(f"Failed to load '{phrase}' templates: {e}")
+            return {}
+    return models
+
+
+class ConfirmationListener:
+    """Records one short reply and turns it into a yes/no answer."""
+
+    def __init__(self, config, recorder, transcriber=None, max_s: float = 3.0, models=None):
+        self.config = config
+        self.recorder = recorder
+        self.transcriber = transcriber
+        self.sample_rate = config.audio.sample_rate
+        self.silence_ms = config.audio.confirm_silence_ms
+        self.model_size = config.audio.confirm_whisper_model
+        self.threshold = config.audio.wake_word_threshold
+        self.max_s = max_s
+        # Optional ModelManager: the tiny model is then unloaded while idle
+        self.models = models
+        self.keywords = load_confirmation_keywords()
+        self.extractor = LogMelExtractor(self.sample_rate)
+        self._tiny = None
+        self._tiny_failed = False
+        # How the last reply was recognized, for logging/metrics
+        self.last_text = ""
+        self.last_method = ""
+        self.last_latency_ms = 0.0
+
+    def warm_up(self) -> None:
+        """Load the tiny model ahead of the first confirmation (blocking)."""
+        if not self.keywords:
+            self._tiny_model()
+
+    def _load_tiny(self):
+        from faster_whisper import WhisperModel
+        logger.info(f"Loading confirmation model '{self.model_size}'...")
+        return WhisperModel(self.model_size, device="cpu", compute_type="int8", cpu_threads=2)
+
+    def _tiny_model(self):
+        if self._tiny is None and not self._tiny_failed:
+            try:
+                if self.models is not None:
+                    handle = self.models.register("confirm", self._load_tiny)
+                    self.models.get("confirm")
+                    self._tiny = handle
+                else:
+                    self._tiny = self._load_tiny()
+            except ImportError:
+                logger.error("faster-whisper library not installed. Please install 'faster-whisper'.")
+                self._tiny_failed = True
+            except Exception as e:
+                logger.error(f"Failed to load confirmation model '{self.model_size}': {e}")
+                self._tiny_failed = True
+        return self._tiny
+
+    def match_keywords(self, audio: np.ndarray) -> Optional[bool]:
+        """Answer from the enrolled templates, or None if neither is a clear match."""
+        if not self.keywords or audio.size == 0:
+            return None
+        feats = self.extractor.features(audio)
+        if len(feats) < 2:
+            return None
+        scores = {answer: model.score(feats) for answer, model in self.keywords.items()}
+        best = max(scores, key=scores.get)
+        if scores[best] >= self.threshold and scores[best] - scores[not best] >= KEYWORD_MARGIN:
+            return best
+        return None
+
+    def tiny_text(self, audio: np.ndarray) -> Optional[str]:
+        """Greedy, prompt-restricted decode with the tiny model; None if it isn't available."""
+        model = self._tiny_model()
+        if model is None:
+            return None
+        segments, _ = model.transcribe(
+            audio,
+            language="en",
+            beam_size=1,
+            temperature=0.0,
+            initial_prompt=CONFIRM_PROMPT,
+            without_timestamps=True,
+            condition_on_previous_text=False,
+            max_new_tokens=MAX_REPLY_TOKENS,
+        )
+        return " ".join(segment.text for segment in segments).strip()
+
+    async def recognize(self, audio: np.ndarray) -> Optional[bool]:
+        """Classify an already-recorded reply (mono float32 at the recorder's rate)."""
+        answer = self.match_keywords(audio)
+        if answer is not None:
+            self.last_text, self.last_method = ("yes" if answer else "no"), "keywords"
+            return answer
+
+        text = await asyncio.to_thread(self.tiny_text, audio)
+        self.last_method = self.model_size
+        if text is None and self.transcriber is not None:
+            text = (await self.transcriber.transcribe(audio)).text
+            self.last_method = "transcriber"
+        self.last_text = (text or "").strip()
+        return interpret_yes_no(self.last_text)
+
+    async def listen(self) -> Optional[bool]:
+        """
+        Record until the reply ends, then classify it.
+
+        Returns None when nothing was said or the answer was unclear.
+        """
+        audio_path = await self.recorder.listen_until_silence(
+            silence_ms=self.silence_ms, max_s=self.max_s
+        )
+        if not audio_path:
+            self.last_text, self.last_method, self.last_latency_ms = "", "", 0.0
+            return None
+        start = time.perf_counter()
+        answer = await self.recognize(np.array(self.recorder.last_audio()))
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Confirmation {answer} from {self.last_text!r} via {self.last_method} "
+            f"in {self.last_latency_ms:.0f} ms"
+        )
+        return answer
@@ -0,0 +1,110 @@
+"""
+Whisper decoding profiles and command-vocabulary biasing.
+
+Voice commands are short and come from a narrow vocabulary, so most clips
+decode fine greedily. In "auto" mode the Transcriber decodes with the
+"fast" profile first and only re-decodes with a wider beam when Whisper's
+average log-probability says it was unsure and the latency budget allows.
+"""
+import logging
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.tool_specs import TOOL_SPECS
+
+logger = logging.getLogger(__name__)
+
+# Below this mean avg_logprob the greedy transcript is considered unreliable.
+LOGPROB_RETRY_THRESHOLD = -0.6
+MAX_PROMPT_BRANCHES = 15
+
+
+@dataclass(frozen=True)
+class DecodingProfile:
+    name: str
+    beam_size: int
+    temperature: Tuple[float, ...]  # fallback schedule used when a decode fails thresholds
+    default_rtf: float  # rough seconds of compute per second of audio (CPU, int8, "base")
+
+    def options(self) -> dict:
+        return {
+            "beam_size": self.beam_size,
+            "best_of": self.beam_size,
+            "temperature": list(self.temperature),
+        }
+
+
+PROFILES: Dict[str, DecodingProfile] = {
+    "fast": DecodingProfile("fast", 1, (0.0,), 0.10),
+    "balanced": DecodingProfile("balanced", 3, (0.0, 0.2, 0.4), 0.25),
+    "accurate": DecodingProfile("accurate", 5, (0.0, 0.2, 0.4, 0.6, 0.8, 1.0), 0.45),
+}
+
+# Escalation order for low-confidence greedy results, most accurate first.
+ESCALATION = ("accurate", "balanced")
+
+
+class ProfileSelector:
+    """Tracks observed real-time factors and picks a retry profile that fits the budget."""
+
+    def __init__(self, latency_target_ms: int, smoothing: float = 0.3):
+        self.latency_target_s = latency_target_ms / 1000.0
+        self.smoothing = smoothing
+        self.rtf: Dict[str, float] = {name: p.default_rtf for name, p in PROFILES.items()}
+
+    def calibrate(self, greedy_rtf: float) -> None:
+        """Scale the default estimates to a measured greedy real-time factor (see calibration.py)."""
+        scale = greedy_rtf / PROFILES["fast"].default_rtf
+        self.rtf = {name: p.default_rtf * scale for name, p in PROFILES.items()}
+
+    def observe(self, profile: str, clip_s: float, elapsed_s: float) -> None:
+        if clip_s <= 0:
+            return
+        measured = elapsed_s / clip_s
+        self.rtf[profile] += self.smoothing * (measured - self.rtf[profile])
+
+    def estimate_s(self, profile: str, clip_s: float) -> float:
+        return self.rtf[profile] * clip_s
+
+    def escalation(self, clip_s: float, spent_s: float) -> Optional[DecodingProfile]:
+        """Most accurate profile whose estimated cost fits in what is left of the budget."""
+        remaining = self.latency_target_s - spent_s
+        for name in ESCALATION:
+            if self.estimate_s(name, clip_s) <= remaining:
+                return PROFILES[name]
+        return None
+
+
+def tool_vocabulary() -> List[str]:
+    """Spoken forms of the registered tools ("stash push", "smart commit push", ...)."""
+    words = {name.split(".", 1)[-1].replace("_", " ") for name in TOOL_SPECS}
+    words.update(phrase for spec in TOOL_SPECS.values() for phrase in spec.phrases)
+    return sorted(words)
+
+
+def list_branches(timeout: float = 2.0, cwd: Optional[str] = None) -> List[str]:
+    """Local branch names of the repository in `cwd` (default: the working directory), or []."""
+    try:
+        proc = subprocess.run(
+            ["git", "branch", "--format=%(refname:short)"],
+            capture_output=True, text=True, timeout=timeout, cwd=cwd,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Could not list branches for STT prompt: {e}")
+        return []
+    if proc.returncode != 0:
+        return []
+    return [b.strip() for b in proc.stdout.splitlines() if b.strip()]
+
+
+def build_hotword_prompt(branches: Sequence[str] = ()) -> str:
+    """
+    initial_prompt that biases Whisper towards git vocabulary and branch names.
+
+    Kept short: Whisper only attends to the last ~224 prompt tokens.
+    """
+    prompt = "Git voice commands: " + ", ".join(tool_vocabulary()) + "."
+    if branches:
+        prompt += " Branches: " + ", ".join(list(branches)[:MAX_PROMPT_BRANCHES]) + "."
+    return prompt
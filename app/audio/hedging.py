@@ -0,0 +1,60 @@
+"""
+Latency history for hedged speech-to-text.
+
+In STT_PROVIDER=hedged mode local faster-whisper starts decoding at once
+and the Groq request is fired in parallel, or after a hedge delay when
+local decoding is usually the faster of the two. The delay comes from
+each provider's recent latencies: if the cloud's median beats the local
+median the race starts immediately, otherwise the cloud request only goes
+out once local decoding has run longer than its STT_HEDGE_PERCENTILE
+latency (a classic hedged request).
+"""
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import numpy as np
+
+LOCAL = "local"
+CLOUD = "cloud"
+# Below this many samples per provider, race both right away
+MIN_SAMPLES = 5
+
+
+class LatencyHistory:
+    """Sliding window of per-provider latencies (seconds)."""
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, provider: str, seconds: float) -> None:
+        self._samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+
+    def observe_cancelled(self, provider: str, elapsed: float) -> None:
+        """
+        Record a request that lost the race and was cancelled.
+
+        Its real latency is only known to be at least `elapsed`, so it is
+        kept only when it says the provider is slower than it looked;
+        otherwise losers would drag the history towards zero.
+        """
+        median = self.percentile(provider, 0.5)
+        if median is None or elapsed > median:
+            self.observe(provider, elapsed)
+
+    def count(self, provider: str) -> int:
+        return len(self._samples.get(provider, ()))
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        samples = self._samples.get(provider)
+        if not samples:
+            return None
+        return float(np.quantile(np.fromiter(samples, dtype=float), q))
+
+    def hedge_delay_s(self, q: float = 0.9) -> float:
+        """How long local decoding may run before the cloud request is fired."""
+        if self.count(LOCAL) < MIN_SAMPLES or self.count(CLOUD) < MIN_SAMPLES:
+            return 0.0
+        if self.percentile(CLOUD, 0.5) <= self.percentile(LOCAL, 0.5):
+            return 0.0
+        return self.percentile(LOCAL, q)
@@ -1,11 +1,14 @@
+import asyncio
 import logging
 import time
 import uuid
 import os
 from pathlib import Path
-import sounddevice as sd
-import soundfile as sf
+from typing import Optional
 from app.core.models import AppConfig
+from app.audio.ring_buffer import AudioRingBuffer
+from app.audio.vad import Endpointer, VADResult, trim_silence
+from app.audio.wakeword import WakeWordDetector
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -24,50 +27,150 @@ class AudioRecorder:
         self.tmp_dir.mkdir(exist_ok=True)
         
         self._stream = None
-        self._frames = []
+        # Preallocated once and reused: the callback must not allocate.
+        self.buffer = AudioRingBuffer.for_duration(
+            self.audio_config.max_recording_s, self.sample_rate, self.channels
+        )
+        # Recordings keep their start: audio past the buffer is dropped, not the oldest.
+        # Wake-word listening runs indefinitely and lets the ring wrap instead.
+        self._keep_start = True
+        self.truncated_samples = 0
+        # Silence trimming result for the most recent recording (None if VAD is off)
+        self.last_vad: Optional[VADResult] = None
+
+    def warm_up(self) -> None:
+        """
+        Import the audio libraries now (blocking) rather than when recording starts.
+
+        sounddevice initialises PortAudio on import, which would otherwise
+        delay the first recording.
+        """
+        try:
+            import sounddevice  # noqa: F401
+            import soundfile  # noqa: F401
+        except (ImportError, OSError) as e:
+            logger.error(f"Audio libraries unavailable: {e}")
 
-    def start_recording(self):
+    def _callback(self, indata, frames, time, status):
+        if status:
+            self.buffer.xruns += 1
+        if self._keep_start:
+            room = self.buffer.capacity - self.buffer.total_written
+            if frames > room:
+                self.truncated_samples += frames - max(room, 0)
+                if room <= 0:
+                    return
+                indata = indata[:room]
+        self.buffer.write(indata)
+
+    def start_recording(self, keep_start: bool = True):
         """Starts recording audio in the background."""
         if self._stream:
             self.stop_recording()
             
-        self._frames = []
-        
-        def callback(indata, frames, time, status):
-            if status:
-                logger.warning(status)
-            self._frames.append(indata.copy())
+        self.buffer.reset()
+        self._keep_start = keep_start
+        self.truncated_samples = 0
 
+        import sounddevice as sd
         self._stream = sd.InputStream(
             samplerate=self.sample_rate,
             channels=self.channels,
-            callback=callback
+            dtype="float32",
+            callback=self._callback
         )
         self._stream.start()
         logger.info("Recording started...")
 
+    def cancel_recording(self) -> None:
+        """Stop the input stream without saving anything."""
+        if self._stream:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
     def stop_recording(self) -> str:
         """Stops recording and saves to file."""
         if not self._stream:
             return ""
             
+        self.last_vad = None
         self._stream.stop()
         self._stream.close()
         self._stream = None
         logger.info("Recording stopped.")
         
-        if not self._frames:
+        if not self.buffer.total_written:
             logger.warning("No audio recorded.")
             return ""
 
-        # Concatenate all blocks
-        recording = np.concatenate(self._frames, axis=0)
+        if self.buffer.xruns:
+            logger.warning(f"Audio input reported {self.buffer.xruns} over/underflow(s).")
+        if self.truncated_samples:
+            logger.warning(
+                f"Recording reached the {self.audio_config.max_recording_s}s limit (MAX_RECORDING_S); "
+                f"the last {self.truncated_samples / self.sample_rate:.2f}s were not recorded."
+            )
+
+        # View of the buffered audio (copies only if the ring wrapped)
+        recording = self.buffer.read()
+        if self.audio_config.vad_enabled:
+            vad = trim_silence(recording, self.sample_rate)
+            self.last_vad = vad
+            if not vad.is_speech:
+                logger.info(f"No speech detected in {vad.original_s:.2f}s; dropping recording.")
+                return ""
+            recording = recording[vad.start:vad.end]
+            logger.info(f"VAD kept {vad.kept_s:.2f}s of {vad.original_s:.2f}s")
         
         # Save to file
         filename = f"cmd_{uuid.uuid4()}.wav"
         filepath = self.tmp_dir / filename
         
+        import soundfile as sf
         sf.write(str(filepath), recording, self.sample_rate)
         logger.info(f"Saved audio to {filepath}")
         
         return str(filepath)
+
+    def last_audio(self) -> np.ndarray:
+        """Mono view of the most recent recording, silence-trimmed if VAD ran."""
+        if self.last_vad is None:
+            return self.buffer.mono()
+        base = self.buffer.oldest_available
+        return self.buffer.mono(base + self.last_vad.start, base + self.last_vad.end)
+
+    async def listen_until_silence(self, poll_s: float = 0.05, silence_ms: Optional[int] = None,
+                                   max_s: Optional[float] = None) -> str:
+        """
+        Record a single utterance, stopping once the speaker goes quiet.
+
+        Ends after `silence_ms` (default AudioConfig.silence_ms) of trailing
+        silence, after `max_s` seconds, or when the buffer
+        (AudioConfig.max_recording_s) is full. Returns the saved path, or "" if
+        nothing but silence was heard.
+        """
+        endpointer = Endpointer(self.sample_rate, silence_ms=silence_ms or self.audio_config.silence_ms)
+        limit = self.buffer.capacity
+        if max_s is not None:
+            limit = min(limit, int(max_s * self.sample_rate))
+        self.start_recording()
+        cursor = 0
+        try:
+            while self.buffer.total_written < limit:
+                await asyncio.sleep(poll_s)
+                end = self.buffer.total_written
+                if endpointer.update(self.buffer.mono(cursor, end)):
+                    break
+                cursor = end
+        finally:
+            path = self.stop_recording()
+        return path
+
+    async def wait_for_wake_word(self, detector: WakeWordDetector) -> float:
+        """Listen (without saving) until `detector` hears the wake word; returns its score."""
+        self.start_recording(keep_start=False)
+        try:
+            return await detector.wait(self.buffer)
+        finally:
+            self.cancel_recording()
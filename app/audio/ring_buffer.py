@@ -0,0 +1,147 @@
+"""
+Preallocated single-producer ring buffer for live audio.
+
+The sounddevice callback writes blocks into a fixed NumPy array instead of
+appending per-block copies to a list, so the audio thread never allocates.
+Consumers (STT, VAD, wake word) read through zero-copy views while
+recording is still running.
+"""
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size circular buffer of float32 frames shaped (capacity, channels).
+
+    Positions are absolute sample counts since the last reset(), so a consumer
+    can remember "where it was" and ask for everything written since then.
+    There is exactly one writer (the audio callback); readers never block it.
+    The writer only publishes `_write_pos` after the samples are in place,
+    which makes reads safe without a lock under the GIL.
+    """
+
+    def __init__(self, capacity: int, channels: int = 1, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self._data = np.zeros((self.capacity, self.channels), dtype=dtype)
+        self._write_pos = 0
+        self.overflow_samples = 0
+        self.xruns = 0
+
+    @classmethod
+    def for_duration(cls, seconds: float, sample_rate: int, channels: int = 1) -> "AudioRingBuffer":
+        """Size a buffer to hold `seconds` of audio at `sample_rate`."""
+        return cls(int(seconds * sample_rate), channels)
+
+    def reset(self) -> None:
+        """Forget all written audio. The underlying array is reused."""
+        self._write_pos = 0
+        self.overflow_samples = 0
+        self.xruns = 0
+
+    @property
+    def total_written(self) -> int:
+        """Absolute number of samples written since reset()."""
+        return self._write_pos
+
+    @property
+    def oldest_available(self) -> int:
+        """Absolute position of the oldest sample still held in the buffer."""
+        return max(0, self._write_pos - self.capacity)
+
+    def __len__(self) -> int:
+        return min(self._write_pos, self.capacity)
+
+    def write(self, block: np.ndarray) -> None:
+        """
+        Copy a block of frames into the buffer.
+
+        Called from the audio callback: no allocation, at most two slice
+        assignments. When the buffer is full the oldest samples are
+        overwritten and counted in `overflow_samples`.
+        """
+        n = block.shape[0]
+        if n == 0:
+            return
+        if block.ndim == 1:
+            block = block.reshape(-1, 1)
+
+        # Samples held (or about to be) that fall out of the buffer
+        self.overflow_samples += max(0, self._write_pos + n - self.capacity - self.oldest_available)
+        if n > self.capacity:
+            # Only the newest `capacity` samples survive; they go where they would have landed.
+            skipped = n - self.capacity
+            block = block[skipped:]
+            self._write_pos += skipped
+            n = self.capacity
+
+        start = self._write_pos % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self._data[start:end] = block
+        else:
+            first = self.capacity - start
+            self._data[start:] = block[:first]
+            self._data[:end - self.capacity] = block[first:]
+        self._write_pos += n
+
+    def _clamp(self, start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+        end = self._write_pos if end is None else min(end, self._write_pos)
+        start = self.oldest_available if start is None else max(start, self.oldest_available)
+        return start, max(start, end)
+
+    def segments(self, start: Optional[int] = None, end: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Return zero-copy views covering absolute positions [start, end).
+
+        The range is clamped to what is still held in the buffer. The result
+        is one view, or two when the range wraps around the end of the array.
+        """
+        start, end = self._clamp(start, end)
+        if start == end:
+            return []
+        s = start % self.capacity
+        e = s + (end - start)
+        if e <= self.capacity:
+            return [self._data[s:e]]
+        return [self._data[s:], self._data[:e - self.capacity]]
+
+    def read(self, start: Optional[int] = None, end: Optional[int] = None,
+             out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return audio for [start, end) as a contiguous array.
+
+        When the range does not wrap this is a view (no copy). Otherwise the
+        two segments are copied into `out` (or a fresh array).
+        """
+        parts = self.segments(start, end)
+        if not parts:
+            return self._data[:0]
+        if len(parts) == 1 and out is None:
+            return parts[0]
+        total = sum(p.shape[0] for p in parts)
+        if out is None:
+            out = np.empty((total, self.channels), dtype=self._data.dtype)
+        offset = 0
+        for part in parts:
+            out[offset:offset + part.shape[0]] = part
+            offset += part.shape[0]
+        return out[:total]
+
+    def latest(self, n: int) -> np.ndarray:
+        """Return the most recent `n` samples (see read())."""
+        return self.read(self._write_pos - n)
+
+    def mono(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Return [start, end) as a 1-D float32 signal, averaging channels if needed."""
+        audio = self.read(start, end)
+        if self.channels == 1:
+            return audio[:, 0]
+        return audio.mean(axis=1, dtype=np.float32)
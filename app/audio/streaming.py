@@ -0,0 +1,142 @@
+"""
+Streaming (incremental) transcription on top of Transcriber.
+
+While the user is still speaking, overlapping windows of the live ring
+buffer are decoded in the background. Words that two consecutive
+hypotheses agree on (LocalAgreement-2) are committed and the audio behind
+them is never decoded again, so when recording stops only the short
+uncommitted tail is left to finalize.
+"""
+import asyncio
+import logging
+import re
+from typing import Callable, List, Optional, Tuple
+
+from app.audio.ring_buffer import AudioRingBuffer
+from app.audio.stt import Transcriber
+from app.audio.vad import trim_silence
+from app.core.models import STTResult
+
+logger = logging.getLogger(__name__)
+
+Word = Tuple[str, float, float]  # (text, start_s, end_s) relative to the decoded window
+PartialCallback = Callable[[str, str], None]  # (committed_text, tentative_text)
+
+
+def _norm(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def agreed_prefix(previous: List[Word], current: List[Word]) -> int:
+    """Number of leading words on which both hypotheses agree."""
+    n = 0
+    for (a, _, _), (b, _, _) in zip(previous, current):
+        if _norm(a) != _norm(b):
+            break
+        n += 1
+    return n
+
+
+class StreamingTranscriber:
+    """
+    Decodes the recorder's ring buffer while recording is in progress.
+
+    Usage:
+        stream = StreamingTranscriber(transcriber, recorder.buffer, sample_rate)
+        stream.start()
+        ...  # user speaks
+        result = await stream.finish()
+    """
+
+    def __init__(
+        self,
+        transcriber: Transcriber,
+        buffer: AudioRingBuffer,
+        sample_rate: int,
+        hop_s: float = 1.0,
+        on_partial: Optional[PartialCallback] = None,
+        trim_tail: bool = True,
+    ):
+        self.transcriber = transcriber
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+        self.hop_s = hop_s
+        self.on_partial = on_partial
+        self.trim_tail = trim_tail
+
+        self.committed: List[str] = []
+        self._commit_pos = 0  # absolute sample position of the first uncommitted sample
+        self._hypothesis: List[Word] = []
+        self._decoded_until = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @property
+    def committed_text(self) -> str:
+        return " ".join(self.committed).strip()
+
+    def start(self) -> None:
+        """Begin background decoding of the live buffer."""
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        min_new = int(self.hop_s * self.sample_rate)
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.hop_s)
+                break
+            except asyncio.TimeoutError:
+                pass
+            if self.buffer.total_written - self._decoded_until < min_new:
+                continue
+            try:
+                await self._step()
+            except Exception as e:
+                logger.warning(f"Streaming decode step failed: {e}")
+
+    async def _decode_from_commit(self, trim: bool = False) -> Tuple[List[Word], int]:
+        end = self.buffer.total_written
+        # Copy out of the ring: the callback keeps writing while we decode.
+        audio = self.buffer.mono(self._commit_pos, end).copy()
+        if trim:
+            vad = trim_silence(audio, self.sample_rate)
+            if not vad.is_speech:
+                return [], end
+            audio = vad.audio
+        words = await asyncio.to_thread(self.transcriber.decode_words, audio)
+        return words, end
+
+    async def _step(self) -> None:
+        words, end = await self._decode_from_commit()
+        self._decoded_until = end
+
+        n = agreed_prefix(self._hypothesis, words)
+        if n:
+            stable = words[:n]
+            self.committed.extend(w for w, _, _ in stable)
+            # Advance past the last committed word; later windows start there.
+            self._commit_pos += int(stable[-1][2] * self.sample_rate)
+        tentative = words[n:]
+        self._hypothesis = tentative
+
+        if self.on_partial:
+            self.on_partial(self.committed_text, " ".join(w for w, _, _ in tentative))
+
+    async def finish(self) -> STTResult:
+        """Stop background decoding and finalize the uncommitted tail."""
+        if self._task:
+            # Let an in-flight window finish rather than racing it on the model.
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+        try:
+            # Trailing silence after the last word is not worth decoding
+            tail, _ = await self._decode_from_commit(trim=self.trim_tail)
+        except Exception as e:
+            logger.error(f"Streaming finalize failed: {e}")
+            tail = []
+
+        text = " ".join(self.committed + [w for w, _, _ in tail]).strip()
+        logger.info(f"Streaming transcript: {text!r} ({len(self.committed)} words committed early)")
+        return STTResult(text=text)
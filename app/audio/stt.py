@@ -1,112 +1,335 @@
+import asyncio
 import logging
-import io
 import os
-from typing import Union
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
+from app.audio.cloud_stt import CloudTranscriber
+from app.audio.calibration import resolve_whisper_settings
+from app.audio.hedging import CLOUD, LOCAL, LatencyHistory
+from app.audio.decoding import (
+    LOGPROB_RETRY_THRESHOLD,
+    PROFILES,
+    DecodingProfile,
+    ProfileSelector,
+    build_hotword_prompt,
+    list_branches,
+)
+from app.core.model_manager import ModelManager
 from app.core.models import AppConfig, STTResult
+from app.core.tracing import traced
+from app.core.workers import WorkerPool
 
 logger = logging.getLogger(__name__)
 
+WHISPER_SAMPLE_RATE = 16000
+
+# Repository whose branch names go into the hotword prompt (None = working
+# directory). The daemon sets it per request for the calling client's repo.
+current_repo: ContextVar[Optional[str]] = ContextVar("current_repo", default=None)
+
 class Transcriber:
     """Handles speech-to-text transcription."""
     
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, pool: Optional[WorkerPool] = None,
+                 models: Optional[ModelManager] = None):
         self.config = config
+        # When set, faster-whisper runs in these worker processes instead
+        self.pool = pool
+        # When set, the in-process model is evicted while idle and reloaded on demand
+        self.models = models
         self.provider = config.stt_provider
         self.model_size = config.whisper_model
-        self.groq_client = None
+        self.cloud: Optional[CloudTranscriber] = None
         self.whisper_model = None
+        self.profile = config.stt_profile
+        self.selector = ProfileSelector(config.stt_latency_target_ms)
+        self._hotword_prompt: Optional[str] = None
+        self._repo_hotword_prompts: Dict[str, str] = {}
+        # Per-provider latencies, used to time the cloud request in hedged mode
+        self.latency = LatencyHistory()
+        # Model size and compute settings, from the host calibration if there is one
+        self.whisper_settings = resolve_whisper_settings(config.whisper_model)
+        if self.whisper_settings.rtf is not None:
+            self.selector.calibrate(self.whisper_settings.rtf)
         
         logger.info(f"Initializing Transcriber with provider: {self.provider}")
         
-        if self.provider == "groq":
+        if self.provider in ("groq", "hedged"):
             try:
-                from groq import Groq
-                self.groq_client = Groq(api_key=config.groq_api_key)
+                self.cloud = CloudTranscriber(config.groq_api_key, upload_format=config.stt_upload_format)
             except ImportError:
                 logger.error("Groq library not installed. Please install 'groq'.")
             except Exception as e:
                 logger.error(f"Failed to initialize Groq client: {e}")
                 
-        elif self.provider == "faster-whisper":
+        if self.provider in ("faster-whisper", "hedged") and self.pool is not None:
+            logger.info(f"faster-whisper hosted by '{self.pool.name}' pool ({self.pool.size} workers).")
+
+        elif self.provider in ("faster-whisper", "hedged"):
+            try:
+                self.model_size = self.whisper_settings.model_size
+                if self.models is not None:
+                    # Loaded by warm_up() in the background, or on the first decode
+                    self.whisper_model = self.models.register("whisper", self._load_whisper)
+                else:
+                    self.whisper_model = self._load_whisper()
+                    logger.info("faster-whisper model loaded.")
+            except ImportError:
+                logger.error("faster-whisper library not installed. Please install 'faster-whisper'.")
+            except Exception as e:
+                logger.error(f"Failed to initialize faster-whisper: {e}")
+
+    def warm_up(self) -> None:
+        """
+        Load the local model and build the cloud client now (blocking).
+
+        Meant for a background thread at startup, so the first command
+        doesn't pay for it. A model that can't be loaded is dropped, as it
+        would have been at construction.
+        """
+        if self.cloud is not None:
             try:
-                from faster_whisper import WhisperModel
-                # Use CPU by default for broader compatibility
-                device = "cpu" 
-                compute_type = "int8"
-                logger.info(f"Loading faster-whisper model '{self.model_size}' on {device}...")
-                self.whisper_model = WhisperModel(self.model_size, device=device, compute_type=compute_type)
+                self.cloud.warm_up()
+            except Exception as e:
+                logger.error(f"Failed to initialize Groq client: {e}")
+                self.cloud = None
+        if self.models is not None and self.whisper_model is not None:
+            try:
+                self.models.get("whisper")
                 logger.info("faster-whisper model loaded.")
             except ImportError:
                 logger.error("faster-whisper library not installed. Please install 'faster-whisper'.")
+                self.whisper_model = None
             except Exception as e:
                 logger.error(f"Failed to initialize faster-whisper: {e}")
+                self.whisper_model = None
+
+    def _load_whisper(self):
+        from faster_whisper import WhisperModel
+        # Use CPU by default for broader compatibility
+        device = "cpu"
+        settings = self.whisper_settings
+        logger.info(
+            f"Loading faster-whisper model '{settings.model_size}' on {device} "
+            f"({settings.compute_type}, {settings.cpu_threads or 'default'} threads, from {settings.source})..."
+        )
+        return WhisperModel(
+            settings.model_size,
+            device=device,
+            compute_type=settings.compute_type,
+            cpu_threads=settings.cpu_threads,
+            num_workers=settings.num_workers,
+        )
+
+    @property
+    def has_local(self) -> bool:
+        return self.whisper_model is not None or self.pool is not None
+
+    @property
+    def supports_streaming(self) -> bool:
+        """Incremental decoding needs a local model (see app.audio.streaming)."""
+        return self.provider in ("faster-whisper", "hedged") and self.has_local
+
+    @property
+    def hotword_prompt(self) -> str:
+        """initial_prompt biasing Whisper to tool names and local branches (built lazily)."""
+        repo = current_repo.get()
+        if repo is not None:
+            if repo not in self._repo_hotword_prompts:
+                self._repo_hotword_prompts[repo] = build_hotword_prompt(list_branches(cwd=repo))
+            return self._repo_hotword_prompts[repo]
+        if self._hotword_prompt is None:
+            self._hotword_prompt = build_hotword_prompt(list_branches())
+        return self._hotword_prompt
+
+    def refresh_hotwords(self) -> None:
+        """Rebuild the prompt, e.g. after a branch was created or switched."""
+        self._hotword_prompt = None
+        self._repo_hotword_prompts.pop(current_repo.get(), None)
+
+    def _whisper_decode(self, audio: np.ndarray, profile: DecodingProfile) -> Tuple[str, float]:
+        """Decode with one profile; returns (text, mean segment avg_logprob)."""
+        # Enforce English to avoid hallucinations
+        segments, info = self.whisper_model.transcribe(
+            audio, language="en", initial_prompt=self.hotword_prompt, **profile.options()
+        )
+        # Convert segments generator to list for logging
+        segments_list = list(segments)
+        logger.info(f"Raw whisper segments ({profile.name}): {segments_list}")
+        text = " ".join([segment.text for segment in segments_list]).strip()
+        language = info.language if hasattr(info, 'language') else 'unknown'
+        language_probability = info.language_probability if hasattr(info, 'language_probability') else 0.0
+        logger.info(f"Final text: {text!r}, language: {language}, probability: {language_probability}")
+        if not segments_list:
+            return text, 0.0
+        return text, float(np.mean([segment.avg_logprob for segment in segments_list]))
+
+    def _timed_decode(self, audio: np.ndarray, profile: DecodingProfile) -> Tuple[str, float]:
+        start = time.perf_counter()
+        text, logprob = self._whisper_decode(audio, profile)
+        self.selector.observe(profile.name, len(audio) / WHISPER_SAMPLE_RATE, time.perf_counter() - start)
+        return text, logprob
+
+    def _whisper_text(self, audio: Union[str, np.ndarray]) -> str:
+        """
+        Run faster-whisper on a path or 16 kHz float32 array.
 
-    async def transcribe(self, audio_input: Union[str, bytes]) -> STTResult:
+        With a fixed profile this is a single decode. In "auto" mode the clip
+        is decoded greedily first and only re-decoded with a wider beam when
+        the mean log-probability is low and the estimated cost of the retry
+        still fits STT_LATENCY_TARGET_MS.
+        """
+        if isinstance(audio, str):
+            from faster_whisper import decode_audio
+            audio = decode_audio(audio, sampling_rate=WHISPER_SAMPLE_RATE)
+
+        if self.profile in PROFILES:
+            return self._timed_decode(audio, PROFILES[self.profile])[0]
+
+        start = time.perf_counter()
+        text, logprob = self._timed_decode(audio, PROFILES["fast"])
+        if logprob >= LOGPROB_RETRY_THRESHOLD:
+            return text
+
+        clip_s = len(audio) / WHISPER_SAMPLE_RATE
+        retry = self.selector.escalation(clip_s, time.perf_counter() - start)
+        if retry is None:
+            logger.info(f"Low confidence ({logprob:.2f}) but no time left for a retry.")
+            return text
+        logger.info(f"Low confidence ({logprob:.2f}); retrying with '{retry.name}' profile.")
+        retry_text, retry_logprob = self._timed_decode(audio, retry)
+        return retry_text if retry_logprob >= logprob else text
+
+    def decode_words(self, audio: np.ndarray) -> List[Tuple[str, float, float]]:
+        """
+        Decode a float32 mono array into (word, start_s, end_s) tuples.
+
+        Blocking; used by StreamingTranscriber from a worker thread. Greedy
+        decoding keeps the per-window cost low since windows are re-decoded.
+        """
+        if not self.supports_streaming or audio.size == 0:
+            return []
+        if self.pool is not None:
+            return self.pool.call_sync("decode_words", audio=audio)
+        segments, _ = self.whisper_model.transcribe(
+            audio,
+            beam_size=1,
+            language="en",
+            initial_prompt=self.hotword_prompt,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+        )
+        words = []
+        for segment in segments:
+            for word in segment.words or []:
+                words.append((word.word.strip(), float(word.start), float(word.end)))
+        return words
+
+    async def _run_whisper(self, audio: Union[str, np.ndarray]) -> str:
+        """Decode off the event loop: in a worker process if pooled, else on a thread."""
+        if self.pool is None:
+            return await asyncio.to_thread(self._whisper_text, audio)
+        if isinstance(audio, str):
+            return await self.pool.call("whisper_text", audio)
+        return await self.pool.call("whisper_text", audio=audio)
+
+    async def _local_text(self, audio_input: Union[str, bytes, np.ndarray]) -> str:
+        if isinstance(audio_input, bytes):
+            # faster-whisper expects float32 numpy array
+            audio_input = np.frombuffer(audio_input, dtype=np.int16).astype(np.float32) / 32768.0
+        # faster-whisper accepts file path directly
+        return await self._run_whisper(audio_input)
+
+    async def _local_result(self, audio_input: Union[str, bytes, np.ndarray]) -> STTResult:
+        return STTResult(text=await self._local_text(audio_input), provider="faster-whisper")
+
+    async def _cloud_result(self, audio_input: Union[str, bytes, np.ndarray]) -> STTResult:
+        # Downmixed, resampled and compressed before upload
+        text, upload = await self.cloud.transcribe_with_stats(audio_input, self.config.audio.sample_rate)
+        return STTResult(text=text, provider="groq", upload_bytes=upload.payload_bytes,
+                         upload_ms=round(upload.upload_ms, 1))
+
+    async def _timed(self, provider: str, coro):
+        start = time.perf_counter()
+        result = await coro
+        self.latency.observe(provider, time.perf_counter() - start)
+        return result
+
+    async def _transcribe_hedged(self, audio_input: Union[str, bytes, np.ndarray]) -> STTResult:
+        """
+        Race local faster-whisper against Groq and keep the first non-empty result.
+
+        Local decoding starts at once; the cloud request follows after
+        LatencyHistory.hedge_delay_s(), or immediately if local fails or
+        comes back empty first. The loser is cancelled (a local decode in
+        a thread or worker runs to completion, but its result is dropped).
+        """
+        if not self.cloud:
+            text = await self._timed(LOCAL, self._local_text(audio_input))
+            return STTResult(text=text, provider="faster-whisper")
+        if not self.has_local:
+            return await self._timed(CLOUD, self._cloud_result(audio_input))
+
+        started = {LOCAL: time.perf_counter()}
+        tasks = {LOCAL: asyncio.create_task(self._timed(LOCAL, self._local_result(audio_input)))}
+        delay = self.latency.hedge_delay_s(self.config.stt_hedge_percentile)
+        if delay > 0:
+            await asyncio.wait([tasks[LOCAL]], timeout=delay)
+
+        failed = set()
+        try:
+            while True:
+                for provider, task in tasks.items():
+                    if not task.done() or provider in failed:
+                        continue
+                    if task.exception() is not None:
+                        failed.add(provider)
+                        logger.error(f"Hedged STT: {provider} failed: {task.exception()}")
+                    elif task.result().text:
+                        elapsed = time.perf_counter() - started[LOCAL]
+                        logger.info(f"Hedged STT won by {provider} after {elapsed:.2f}s")
+                        return task.result()
+                if CLOUD not in tasks:
+                    started[CLOUD] = time.perf_counter()
+                    tasks[CLOUD] = asyncio.create_task(self._timed(CLOUD, self._cloud_result(audio_input)))
+                pending = [t for t in tasks.values() if not t.done()]
+                if not pending:
+                    return STTResult(text="")
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for provider, task in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    self.latency.observe_cancelled(provider, time.perf_counter() - started[provider])
+
+    @traced("stt.transcribe")
+    async def transcribe(self, audio_input: Union[str, bytes, np.ndarray]) -> STTResult:
         """
         Transcribes audio to text.
-        Accepts file path (str) or raw audio bytes.
+        Accepts file path (str), raw int16 audio bytes or a float32 array.
         Returns STTResult object with .text attribute.
         """
         text = ""
         
-        if not audio_input:
+        if audio_input is None or len(audio_input) == 0:
             logger.warning("Empty audio input received.")
             return STTResult(text="")
 
+        if isinstance(audio_input, str) and not os.path.exists(audio_input):
+            logger.error(f"Audio file not found: {audio_input}")
+            return STTResult(text="")
+
         try:
-            if self.provider == "groq" and self.groq_client:
-                # Handle file path
-                if isinstance(audio_input, str) and os.path.exists(audio_input):
-                    with open(audio_input, "rb") as f:
-                        transcription = self.groq_client.audio.transcriptions.create(
-                            file=(os.path.basename(audio_input), f.read()),
-                            model="whisper-large-v3",
-                            response_format="text"
-                        )
-                        text = str(transcription).strip()
-                # Handle bytes (legacy/fallback)
-                elif isinstance(audio_input, bytes):
-                    # Wrap bytes in a named buffer for Groq
-                    # Note: Groq might require a valid WAV header
-                    import soundfile as sf
-                    audio_array = np.frombuffer(audio_input, dtype=np.int16)
-                    wav_io = io.BytesIO()
-                    sf.write(wav_io, audio_array, self.config.audio.sample_rate, format='WAV')
-                    wav_io.seek(0)
-                    wav_io.name = "audio.wav"
-                    
-                    transcription = self.groq_client.audio.transcriptions.create(
-                        file=(wav_io.name, wav_io.read()),
-                        model="whisper-large-v3",
-                        response_format="text"
-                    )
-                    text = str(transcription).strip()
+            if self.provider == "hedged" and (self.cloud or self.has_local):
+                return await self._transcribe_hedged(audio_input)
+
+            elif self.provider == "groq" and self.cloud:
+                return await self._timed(CLOUD, self._cloud_result(audio_input))
             
-            elif self.provider == "faster-whisper" and self.whisper_model:
-                if isinstance(audio_input, str):
-                    # faster-whisper accepts file path directly
-                    # Enforce English to avoid hallucinations
-                    segments, info = self.whisper_model.transcribe(audio_input, beam_size=5, language="en")
-                    # Convert segments generator to list for logging
-                    segments_list = list(segments)
-                    logger.info(f"Raw whisper segments: {segments_list}")
-                    text = " ".join([segment.text for segment in segments_list]).strip()
-                    language = info.language if hasattr(info, 'language') else 'unknown'
-                    language_probability = info.language_probability if hasattr(info, 'language_probability') else 0.0
-                    logger.info(f"Final text: {text!r}, language: {language}, probability: {language_probability}")
-                elif isinstance(audio_input, bytes):
-                    # faster-whisper expects float32 numpy array
-                    audio_array = np.frombuffer(audio_input, dtype=np.int16).astype(np.float32) / 32768.0
-                    # Enforce English to avoid hallucinations
-                    segments, info = self.whisper_model.transcribe(audio_array, beam_size=5, language="en")
-                    # Convert segments generator to list for logging
-                    segments_list = list(segments)
-                    logger.info(f"Raw whisper segments: {segments_list}")
-                    text = " ".join([segment.text for segment in segments_list]).strip()
-                    language = info.language if hasattr(info, 'language') else 'unknown'
-                    language_probability = info.language_probability if hasattr(info, 'language_probability') else 0.0
-                    logger.info(f"Final text: {text!r}, language: {language}, probability: {language_probability}")
+            elif self.provider == "faster-whisper" and self.has_local:
+                text = await self._timed(LOCAL, self._local_text(audio_input))
             
             else:
                 logger.error("No valid STT provider configured or initialized.")
@@ -0,0 +1,177 @@
+"""
+Energy / zero-crossing voice activity detection.
+
+Everything is vectorized over fixed-size frames of the recorder's NumPy
+buffers, so trimming a 10 s clip costs well under a millisecond. Used to
+cut leading/trailing silence before Whisper, to drop silence-only
+recordings, and (via Endpointer) to end an utterance automatically.
+
+The thresholds are not calibrated per microphone, so trimming errs towards
+keeping audio: a clip is only dropped when nothing in it rises clearly
+above its own noise floor, and a quiet or doubtful one goes to Whisper
+whole.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+FRAME_MS = 20
+MARGIN_DB = 12.0  # speech must be this far above the noise floor...
+MIN_THRESHOLD_DB = -55.0  # ...but never quieter than this (dBFS)
+MAX_THRESHOLD_DB = -45.0  # and speech from a quiet mic always counts, even in noisy rooms
+ENDPOINT_MAX_THRESHOLD_DB = -35.0  # higher for Endpointer, or a loud room never goes quiet
+ZCR_THRESHOLD = 0.25  # unvoiced consonants ("s", "f") are quiet but noisy...
+FRICATIVE_MARGIN_DB = 3.0  # ...yet still above the floor (white noise has a high ZCR too)
+SILENT_RANGE_DB = 6.0  # a clip whose loudest frame is this close to its floor is silence
+PRE_ROLL_MS = 300  # context kept before the first speech frame (soft word onsets)
+
+
+@dataclass
+class VADResult:
+    """Speech region found in a clip. `audio` is a view, not a copy."""
+    audio: np.ndarray
+    start: int  # first kept sample
+    end: int  # one past the last kept sample
+    sample_rate: int
+    is_speech: bool
+    total_samples: int
+
+    @property
+    def original_s(self) -> float:
+        return self.total_samples / self.sample_rate
+
+    @property
+    def kept_s(self) -> float:
+        return (self.end - self.start) / self.sample_rate
+
+    @property
+    def trimmed_s(self) -> float:
+        """Seconds of audio the STT model no longer has to decode."""
+        return self.original_s - self.kept_s
+
+
+def _frames(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    n = len(audio) // frame_len
+    return audio[:n * frame_len].reshape(n, frame_len)
+
+
+def frame_energy_db(frames: np.ndarray) -> np.ndarray:
+    """RMS level of each frame in dBFS."""
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+def zero_crossing_rate(frames: np.ndarray) -> np.ndarray:
+    """Fraction of sign changes per frame."""
+    return np.mean(np.diff(np.signbit(frames), axis=1), axis=1)
+
+
+def speech_threshold_db(noise_floor_db: float, max_db: float = MAX_THRESHOLD_DB) -> float:
+    return float(np.clip(noise_floor_db + MARGIN_DB, MIN_THRESHOLD_DB, max_db))
+
+
+def _classify(frames: np.ndarray):
+    """Per-frame speech mask, frame energies and the clip's noise floor."""
+    energy = frame_energy_db(frames)
+    noise_floor = float(np.percentile(energy, 10))
+    threshold = speech_threshold_db(noise_floor)
+    loud = energy > threshold
+    quiet = max(threshold - 6.0, noise_floor + FRICATIVE_MARGIN_DB)
+    fricative = (energy > quiet) & (zero_crossing_rate(frames) > ZCR_THRESHOLD)
+    return loud | fricative, energy, noise_floor
+
+
+def speech_mask(audio: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Boolean speech/non-speech decision per frame of a mono float32 signal."""
+    frames = _frames(audio, max(1, sample_rate * frame_ms // 1000))
+    if len(frames) == 0:
+        return np.zeros(0, dtype=bool)
+    return _classify(frames)[0]
+
+
+def is_clearly_silent(energy: np.ndarray, noise_floor_db: float) -> bool:
+    """True if no frame is audible, or none stands out from the noise floor."""
+    if energy.size == 0:
+        return True
+    peak = float(energy.max())
+    return peak < MIN_THRESHOLD_DB or peak - noise_floor_db < SILENT_RANGE_DB
+
+
+def trim_silence(
+    audio: np.ndarray,
+    sample_rate: int,
+    pad_ms: int = 200,
+    min_speech_ms: int = 120,
+    frame_ms: int = FRAME_MS,
+    pre_roll_ms: int = PRE_ROLL_MS,
+) -> VADResult:
+    """
+    Cut leading and trailing silence from a mono clip.
+
+    `pre_roll_ms` of context is kept before the speech so soft word onsets
+    are not clipped, and `pad_ms` after it. Only clearly silent clips are
+    reported with is_speech=False and an empty view; one with less than
+    `min_speech_ms` of detected speech that is still audibly above its noise
+    floor is kept whole, untrimmed.
+    """
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    frame_len = max(1, sample_rate * frame_ms // 1000)
+    frames = _frames(audio, frame_len)
+    if len(frames) == 0:
+        return VADResult(audio[:0], 0, 0, sample_rate, False, len(audio))
+    mask, energy, noise_floor = _classify(frames)
+    voiced = np.flatnonzero(mask)
+
+    if voiced.size * frame_ms < min_speech_ms:
+        if is_clearly_silent(energy, noise_floor):
+            return VADResult(audio[:0], 0, 0, sample_rate, False, len(audio))
+        return VADResult(audio, 0, len(audio), sample_rate, True, len(audio))
+
+    start = max(0, int(voiced[0]) * frame_len - sample_rate * pre_roll_ms // 1000)
+    pad = sample_rate * pad_ms // 1000
+    end = min(len(audio), (int(voiced[-1]) + 1) * frame_len + pad)
+    return VADResult(audio[start:end], start, end, sample_rate, True, len(audio))
+
+
+class Endpointer:
+    """
+    Streaming end-of-utterance detector for listen-until-silence mode.
+
+    Feed it successive chunks of live audio; `update()` returns True once
+    speech has been heard and has been followed by `silence_ms` of quiet.
+    The noise floor adapts downward immediately and upward slowly, so a
+    running fan does not count as speech but the user's voice does.
+    """
+
+    def __init__(self, sample_rate: int, silence_ms: int = 800, min_speech_ms: int = 200,
+                 frame_ms: int = FRAME_MS):
+        self.frame_len = max(1, sample_rate * frame_ms // 1000)
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.noise_floor_db: Optional[float] = None
+        self.speech_frames = 0
+        self.trailing_silence = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    @property
+    def heard_speech(self) -> bool:
+        return self.speech_frames >= self.min_speech_frames
+
+    def update(self, chunk: np.ndarray) -> bool:
+        audio = np.concatenate([self._pending, chunk]) if self._pending.size else chunk
+        frames = _frames(audio, self.frame_len)
+        self._pending = audio[len(frames) * self.frame_len:].copy()
+
+        for energy in frame_energy_db(frames) if len(frames) else ():
+            if self.noise_floor_db is None or energy < self.noise_floor_db:
+                self.noise_floor_db = float(energy)
+            else:
+                self.noise_floor_db += 0.05  # ~2.5 dB/s upward drift at 20 ms frames
+            if energy > speech_threshold_db(self.noise_floor_db, ENDPOINT_MAX_THRESHOLD_DB):
+                self.speech_frames += 1
+                self.trailing_silence = 0
+            else:
+                self.trailing_silence += 1
+        return self.heard_speech and self.trailing_silence >= self.silence_frames
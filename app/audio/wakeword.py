@@ -0,0 +1,301 @@
+"""
+Always-on wake word detection ("hey git").
+
+Streaming log-mel features are computed with NumPy over the recorder's
+ring buffer and scored against a tiny keyword model every `hop_ms`.
+Windows without speech energy are skipped before any scoring, so an idle
+listener costs a few percent of one core.
+
+Two keyword models are supported:
+- TemplateKeywordModel: a handful of enrolled recordings of the wake word,
+  matched with a slope-constrained, row-vectorized DTW (no extra deps).
+- OnnxKeywordModel: any ONNX classifier taking (1, frames, n_mels) log-mel
+  input and returning a keyword probability (needs `onnxruntime`).
+
+Enroll templates with:
+    python -m app.audio.wakeword enroll
+    python -m app.audio.wakeword enroll --phrase yes   # voice confirmations
+"""
+import argparse
+import asyncio
+import logging
+import re
+from pathlib import Path
+from typing import List, Optional, Protocol
+
+import numpy as np
+
+from app.audio.ring_buffer import AudioRingBuffer
+from app.audio.vad import frame_energy_db, speech_threshold_db
+
+logger = logging.getLogger(__name__)
+
+WAKEWORD_DIR = Path(".models/wakeword")
+
+
+def mel_filterbank(sample_rate: int, n_fft: int, n_mels: int,
+                   fmin: float = 20.0, fmax: Optional[float] = None) -> np.ndarray:
+    """Triangular mel filters, shape (n_mels, n_fft // 2 + 1)."""
+    fmax = fmax or sample_rate / 2
+
+    def hz_to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def mel_to_hz(m):
+        return 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2)
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    hz = mel_to_hz(mels)
+    lower, center, upper = hz[:-2, None], hz[1:-1, None], hz[2:, None]
+    up = (bins[None, :] - lower) / (center - lower)
+    down = (upper - bins[None, :]) / (upper - center)
+    return np.maximum(0.0, np.minimum(up, down)).astype(np.float32)
+
+
+class LogMelExtractor:
+    """Incremental log-mel spectrogram: feed any number of samples, get whole frames back."""
+
+    def __init__(self, sample_rate: int = 16000, n_mels: int = 40,
+                 win_ms: int = 25, hop_ms: int = 10, n_fft: int = 512):
+        self.sample_rate = sample_rate
+        self.win = sample_rate * win_ms // 1000
+        self.hop = sample_rate * hop_ms // 1000
+        self.n_fft = n_fft
+        self.n_mels = n_mels
+        self.window = np.hanning(self.win).astype(np.float32)
+        self.filters = mel_filterbank(sample_rate, n_fft, n_mels)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def reset(self) -> None:
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        audio = np.concatenate([self._pending, samples]) if self._pending.size else samples
+        if len(audio) < self.win:
+            self._pending = np.array(audio, dtype=np.float32)
+            return np.zeros((0, self.n_mels), dtype=np.float32)
+        n = 1 + (len(audio) - self.win) // self.hop
+        frames = np.lib.stride_tricks.sliding_window_view(audio, self.win)[::self.hop][:n]
+        power = np.abs(np.fft.rfft(frames * self.window, n=self.n_fft)) ** 2
+        self._pending = np.array(audio[n * self.hop:], dtype=np.float32)
+        return np.log(power @ self.filters.T + 1e-6).astype(np.float32)
+
+    def features(self, audio: np.ndarray) -> np.ndarray:
+        """Log-mel of a whole clip (does not touch the streaming state)."""
+        return LogMelExtractor(self.sample_rate, self.n_mels, n_fft=self.n_fft).process(audio)
+
+
+def _normalize(feats: np.ndarray) -> np.ndarray:
+    """
+    Per-frame spectral shape: remove each frame's mean log energy (so loudness
+    doesn't matter) and scale rows to unit length for cosine scoring.
+    """
+    feats = feats - feats.mean(axis=1, keepdims=True)
+    # Constant extra dimension so flat (silent) frames still compare as equal
+    feats = np.hstack([feats, np.full((len(feats), 1), 0.1, dtype=feats.dtype)])
+    return feats / np.linalg.norm(feats, axis=1, keepdims=True)
+
+
+def dtw_similarity(template: np.ndarray, window: np.ndarray) -> float:
+    """
+    Subsequence DTW between a (normalized) template and a feature window.
+
+    Each template frame advances the window by 0-2 frames, which lets every
+    row of the cost matrix be computed as a single vectorized min. Returns
+    1 - mean cosine distance along the best path (1.0 = identical).
+    """
+    cost = 1.0 - template @ window.T  # (T, W) cosine distance
+    acc = cost[0].copy()  # free start anywhere in the window
+    inf = np.full(2, np.inf, dtype=acc.dtype)
+    for row in cost[1:]:
+        shifted = np.concatenate([inf, acc])
+        acc = row + np.minimum(np.minimum(shifted[2:], shifted[1:-1]), shifted[:-2])
+    return float(1.0 - acc.min() / len(template))
+
+
+class KeywordModel(Protocol):
+    window_frames: int
+
+    def score(self, feats: np.ndarray) -> float:
+        """Keyword likelihood in [0, 1] for the newest `window_frames` of log-mel."""
+
+
+class TemplateKeywordModel:
+    """Matches the live window against a few enrolled recordings of the wake word."""
+
+    def __init__(self, templates: List[np.ndarray]):
+        if not templates:
+            raise ValueError("At least one wake word template is required")
+        self.templates = [_normalize(t) for t in templates]
+        self.window_frames = int(max(len(t) for t in templates) * 1.5)
+
+    @classmethod
+    def load(cls, directory: Path) -> "TemplateKeywordModel":
+        files = sorted(Path(directory).glob("*.npy"))
+        return cls([np.load(f) for f in files])
+
+    def score(self, feats: np.ndarray) -> float:
+        window = _normalize(feats)
+        return max(dtw_similarity(t, window) for t in self.templates)
+
+
+class OnnxKeywordModel:
+    """Wraps a small ONNX keyword classifier (input: 1 x frames x n_mels)."""
+
+    def __init__(self, path: str, window_frames: int = 150):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.window_frames = window_frames
+
+    def score(self, feats: np.ndarray) -> float:
+        out = self.session.run(None, {self.input_name: feats[None].astype(np.float32)})[0]
+        return float(np.ravel(out)[-1])
+
+
+class WakeWordDetector:
+    """
+    Scores the newest features every `hop_ms` and reports a detection when
+    the keyword model's score reaches `threshold`.
+    """
+
+    def __init__(self, model: KeywordModel, sample_rate: int = 16000, threshold: float = 0.6,
+                 hop_ms: int = 100, refractory_s: float = 1.5):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.hop_s = hop_ms / 1000.0
+        self.extractor = LogMelExtractor(sample_rate)
+        self.hop_frames = max(1, hop_ms // 10)
+        self.refractory_frames = int(refractory_s * 100)
+        self._history = np.zeros((0, self.extractor.n_mels), dtype=np.float32)
+        self._speech_frames_left = 0  # frames until the last speech leaves the window
+        self._noise_floor_db: Optional[float] = None
+        self._since_score = 0
+        self._cooldown = 0
+        self.scored_windows = 0
+
+    def reset(self) -> None:
+        self.extractor.reset()
+        self._history = self._history[:0]
+        self._since_score = 0
+
+    def _has_speech(self, samples: np.ndarray) -> bool:
+        frame_len = self.sample_rate // 50
+        frames = samples[:len(samples) // frame_len * frame_len].reshape(-1, frame_len)
+        if not len(frames):
+            return False
+        energy = frame_energy_db(frames)
+        floor = float(energy.min())
+        if self._noise_floor_db is None or floor < self._noise_floor_db:
+            self._noise_floor_db = floor
+        else:
+            self._noise_floor_db += 0.1
+        return bool((energy > speech_threshold_db(self._noise_floor_db)).any())
+
+    def process(self, samples: np.ndarray) -> Optional[float]:
+        """Feed new mono samples; returns the score if the wake word was just detected."""
+        feats = self.extractor.process(samples)
+        if not len(feats):
+            return None
+        window = self.model.window_frames
+        self._history = np.concatenate([self._history, feats])[-window:]
+        if self._has_speech(samples):
+            self._speech_frames_left = window
+        else:
+            self._speech_frames_left = max(0, self._speech_frames_left - len(feats))
+        self._since_score += len(feats)
+        self._cooldown = max(0, self._cooldown - len(feats))
+
+        if self._since_score < self.hop_frames or len(self._history) < window // 2:
+            return None
+        self._since_score = 0
+        # Cheap gate: nothing to score unless someone spoke within the window
+        if self._cooldown or not self._speech_frames_left:
+            return None
+
+        self.scored_windows += 1
+        score = self.model.score(self._history)
+        if score >= self.threshold:
+            self._cooldown = self.refractory_frames
+            logger.info(f"Wake word detected (score {score:.2f})")
+            return score
+        return None
+
+    async def wait(self, buffer: AudioRingBuffer) -> float:
+        """Poll the live ring buffer until the wake word is heard."""
+        self.reset()
+        cursor = buffer.total_written
+        while True:
+            await asyncio.sleep(self.hop_s)
+            end = buffer.total_written
+            cursor = max(cursor, buffer.oldest_available)
+            score = self.process(buffer.mono(cursor, end))
+            cursor = end
+            if score is not None:
+                return score
+
+
+def _slug(phrase: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", phrase.lower()).strip("-") or "wakeword"
+
+
+def load_keyword_model(config) -> Optional[KeywordModel]:
+    """ONNX model from AudioConfig.wake_word_model, else enrolled templates, else None."""
+    audio = config.audio
+    try:
+        if audio.wake_word_model and audio.wake_word_model.endswith(".onnx"):
+            return OnnxKeywordModel(audio.wake_word_model)
+        directory = Path(audio.wake_word_model or template_dir(audio.wake_word))
+        if directory.exists() and any(directory.glob("*.npy")):
+            return TemplateKeywordModel.load(directory)
+    except ImportError:
+        logger.error("onnxruntime not installed. Please install 'onnxruntime'.")
+    except Exception as e:
+        logger.error(f"Failed to load wake word model: {e}")
+    return None
+
+
+def template_dir(phrase: str) -> Path:
+    """Where enrolled templates for `phrase` live."""
+    return WAKEWORD_DIR / _slug(phrase)
+
+
+async def enroll(count: int = 3, phrase: Optional[str] = None) -> None:
+    """Record `count` samples of the wake word (or `phrase`) and save them as templates."""
+    from app.audio.recorder import AudioRecorder
+    from app.config import load_config
+
+    config = load_config()
+    recorder = AudioRecorder(config)
+    if phrase:
+        directory = template_dir(phrase)
+    else:
+        directory = Path(config.audio.wake_word_model or template_dir(config.audio.wake_word))
+        phrase = config.audio.wake_word
+    directory.mkdir(parents=True, exist_ok=True)
+    extractor = LogMelExtractor(config.audio.sample_rate)
+
+    saved = 0
+    while saved < count:
+        print(f"Say '{phrase}' ({saved + 1}/{count})...")
+        if not await recorder.listen_until_silence():
+            print("Didn't hear anything, try again.")
+            continue
+        np.save(directory / f"template_{saved}.npy", extractor.features(recorder.last_audio()))
+        saved += 1
+    print(f"Saved {count} templates to {directory}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wake word tools")
+    parser.add_argument("command", choices=["enroll"])
+    parser.add_argument("--count", type=int, default=3)
+    parser.add_argument("--phrase", help="enroll another keyword (e.g. 'yes', 'no') instead of WAKE_WORD")
+    args = parser.parse_args()
+    asyncio.run(enroll(args.count, args.phrase))
@@ -0,0 +1,559 @@
+"""
+Pipelined voice session for the v-shell CLI.
+
+An interaction runs as a chain of asyncio stages connected by bounded
+queues:
+
+    capture -> STT -> routing -> policy/confirmation -> execution -> rendering
+
+Every queue holds at most QUEUE_SIZE utterances, so a stage that falls
+behind makes the ones before it wait rather than buffering without limit.
+Execution starts each tool as its own task, so a slow `git push` doesn't
+stop a "what's the status" asked right after it. ExecutionOrder keeps
+that safe: writes wait for everything before them, reads only wait for
+earlier writes to the working tree. Results are rendered one at a time,
+as they finish; run_tests also prints its output lines while it runs.
+
+A command that asks for several things ("status, log and the diff") is
+routed to a ToolPlan. Its writes are confirmed together, with one
+question, and its steps run through execute_plan under the same rules.
+Each step is rendered as soon as it is done.
+
+All keyboard input goes through one TerminalInput, so a safety check for
+an earlier command can be answered while the next one is being recorded.
+
+Every stage runs in a tracing span on the utterance's own track, so
+"stats" (typed at the prompt or spoken) shows where the time goes. To see
+why one command is slow, "profile" (or "profile the next command") arms
+app.core.profiling for the next interaction.
+"""
+import asyncio
+import functools
+import itertools
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from rich.console import Console
+from rich.markup import escape
+
+from app.audio.feedback import play_start_listening_sound, play_stop_listening_sound
+from app.audio.vad import VADResult
+from app.cli.terminal import TerminalInput
+from app.cli.ui import (
+    live_transcript,
+    render_git_diff,
+    render_git_log,
+    render_git_status,
+    render_latency_stats,
+    render_simple_block,
+    render_smart_commit,
+    render_test_results,
+    show_error,
+    show_status,
+    show_success,
+)
+from app.core.executor import ExecutionOrder, execute_plan, execute_tool, plan_access
+from app.core.models import PlanStep, STTResult, ToolCall, ToolPlan
+from app.core.policies import DEFAULT_POLICY, TOOL_POLICIES, ToolPolicy
+from app.core.profiling import InteractionProfile
+from app.core.test_impact import app_outputs
+from app.core.tracing import span, tracer
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 2
+MAX_RUNNING_TOOLS = 4
+
+_STOP = object()  # end-of-stream marker passed down the stages
+
+# "show stats", "latency stats", "timings": answered by the session itself
+STATS_REQUEST = re.compile(r"^(show (me )?(the )?)?(latency |timing )?(stats|statistics|timings)\W*$", re.I)
+# "profile the next command"
+PROFILE_REQUEST = re.compile(r"^profile (the )?next (command|one|interaction)\W*$", re.I)
+
+
+@dataclass
+class Utterance:
+    """One spoken command on its way through the pipeline."""
+    seq: int
+    audio_path: str = ""
+    vad: Optional[VADResult] = None
+    stt_result: Optional[STTResult] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    tool_call: Optional[ToolCall] = None
+    plan: Optional[ToolPlan] = None
+    profile: Optional[InteractionProfile] = None
+    rendered: int = 0  # outcomes rendered so far
+
+    @property
+    def text(self) -> str:
+        return self.stt_result.text if self.stt_result else ""
+
+
+@dataclass
+class Outcome:
+    utterance: Utterance
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    step: Optional[PlanStep] = None  # set for the steps of a plan
+
+    @property
+    def tool_call(self) -> ToolCall:
+        return self.step or self.utterance.tool_call
+
+
+def _track(utt: Utterance) -> str:
+    return f"utterance {utt.seq}"
+
+
+def _shown_params(call: ToolCall) -> dict:
+    return {k: v for k, v in call.params.items() if k not in ("confirm_callback", "on_output", "ignore_paths")}
+
+
+class VoiceSession:
+    """Runs the CLI's record → transcribe → route → confirm → execute → render loop as stages."""
+
+    def __init__(self, config, recorder, transcriber, brain, metrics_logger, console: Console,
+                 detector=None, confirm_listener=None, terminal: Optional[TerminalInput] = None):
+        self.config = config
+        self.recorder = recorder
+        self.transcriber = transcriber
+        self.brain = brain
+        self.metrics_logger = metrics_logger
+        self.console = console
+        self.detector = detector
+        self.confirm_listener = confirm_listener
+        self.terminal = terminal or TerminalInput(console)
+
+        self.stt_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        self.route_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        self.policy_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        self.exec_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        self.render_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+
+        self.order = ExecutionOrder()
+        self._tool_slots = asyncio.Semaphore(MAX_RUNNING_TOOLS)
+        self._running: Set[asyncio.Task] = set()
+        self._seq = itertools.count(1)
+        # Utterances that may still ask for a spoken confirmation
+        self._confirming: Set[int] = set()
+        self._mic_free = asyncio.Event()
+        self._mic_free.set()
+        self._profile_next = False
+
+    # -- microphone ownership ----------------------------------------------
+
+    def _hold_mic(self, utt: Utterance) -> None:
+        self._confirming.add(utt.seq)
+        self._mic_free.clear()
+
+    def _release_mic(self, utt: Utterance) -> None:
+        self._confirming.discard(utt.seq)
+        if not self._confirming:
+            self._mic_free.set()
+
+    # -- stages --------------------------------------------------------------
+
+    async def run(self) -> None:
+        """Run until the user quits; in-flight commands are finished first."""
+        tasks = [
+            asyncio.create_task(self._capture()),
+            asyncio.create_task(self._stage(self.stt_q, self.route_q, self._transcribe)),
+            asyncio.create_task(self._stage(self.route_q, self.policy_q, self._route)),
+            asyncio.create_task(self._stage(self.policy_q, self.exec_q, self._confirm)),
+            asyncio.create_task(self._dispatch()),
+            asyncio.create_task(self._render()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks + list(self._running):
+                task.cancel()
+
+    async def _stage(self, inbox: asyncio.Queue, outbox: asyncio.Queue, handler) -> None:
+        """Apply `handler` to each utterance; it returns the utterance to pass on, or None to drop it."""
+        stage = f"session.{handler.__name__.strip('_')}"
+        while (utt := await inbox.get()) is not _STOP:
+            try:
+                with span(stage, track=_track(utt)):
+                    forward = await handler(utt)
+            except Exception as e:
+                logger.exception(f"Stage {handler.__name__} failed")
+                show_error(f"{handler.__name__.strip('_')} failed: {e}")
+                forward = None
+            if forward is None:
+                self._release_mic(utt)
+                self._end_profile(utt)
+            else:
+                await outbox.put(forward)
+        await outbox.put(_STOP)
+
+    async def _capture(self) -> None:
+        auto_silence = self.config.listen_mode in ("auto-silence", "wake-word")
+        listening = False
+        try:
+            while True:
+                if self.confirm_listener:
+                    # Spoken confirmations need the microphone; don't record over them
+                    await self._mic_free.wait()
+                if not (auto_silence and listening):
+                    cmd = (await self._read_control("\nPress Enter to START recording ('stats' for timings, 'profile', 'q' to quit)...",
+                                                    style="bold white")).strip().lower()
+                    if cmd == 'q':
+                        break
+                    if cmd == 'stats':
+                        render_latency_stats(tracer.stats())
+                        continue
+                    if cmd == 'profile':
+                        self._arm_profile()
+                        continue
+                    listening = True
+
+                with span("session.record") as record_span:
+                    utt = await self._record(auto_silence)
+                    if utt is not None:
+                        record_span.track = _track(utt)
+                if utt is not None:
+                    # Profiled from the end of the recording: the user speaking is not the app's time
+                    utt.profile = self._start_profile()
+                    if self.confirm_listener:
+                        self._hold_mic(utt)
+                    await self.stt_q.put(utt)
+        except EOFError:
+            pass
+        finally:
+            await self.stt_q.put(_STOP)
+
+    def _arm_profile(self) -> None:
+        self._profile_next = True
+        self.console.print("[dim]🔬 The next command will be profiled.[/dim]")
+
+    def _start_profile(self) -> Optional[InteractionProfile]:
+        if not (self._profile_next or self.config.profile_interactions):
+            return None
+        profile = InteractionProfile(self.config.profile_dir, self.config.profile_mode)
+        if not profile.start():
+            return None
+        self._profile_next = False
+        return profile
+
+    def _end_profile(self, utt: Utterance) -> None:
+        if utt.profile is not None:
+            profile, utt.profile = utt.profile, None
+            tool = utt.tool_call.tool if utt.tool_call else "none"
+            profile.finish(utt.text, tool, console=self.console)
+
+    def _read_control(self, message: str, style: str):
+        """Recording controls: shown again whenever a confirmation was answered in between."""
+        return self.terminal.read_line(lambda: show_status(message, style=style))
+
+    async def _record(self, auto_silence: bool) -> Optional[Utterance]:
+        recorder = self.recorder
+        if self.detector:
+            show_status(f"💤 Waiting for \"{self.config.audio.wake_word}\"... (Ctrl+C to exit)", style="dim")
+            await recorder.wait_for_wake_word(self.detector)
+        play_start_listening_sound()
+        utt = Utterance(seq=next(self._seq))
+        stream = None
+        if auto_silence:
+            # Enter once; every pause ends an utterance and starts a flow
+            show_status("🎙️  Listening... (pause to finish a command, Ctrl+C to exit)", style="bold yellow")
+            utt.audio_path = await recorder.listen_until_silence()
+        elif self.config.stt_streaming and self.transcriber.supports_streaming:
+            from app.audio.streaming import StreamingTranscriber
+            recorder.start_recording()
+            with live_transcript() as update:
+                speculation = None
+
+                def on_partial(committed: str, tentative: str):
+                    nonlocal speculation
+                    update(committed, tentative)
+                    # Warm up routing on the best guess so far
+                    if speculation is None or speculation.done():
+                        speculation = asyncio.create_task(
+                            self.brain.speculate(f"{committed} {tentative}")
+                        )
+
+                stream = StreamingTranscriber(
+                    self.transcriber,
+                    recorder.buffer,
+                    self.config.audio.sample_rate,
+                    hop_s=self.config.stt_stream_hop_s,
+                    on_partial=on_partial,
+                    trim_tail=self.config.audio.vad_enabled,
+                )
+                stream.start()
+                # Decoding keeps running while we wait for Enter
+                await self.terminal.read_line()
+            utt.audio_path = recorder.stop_recording()
+        else:
+            recorder.start_recording()
+            await self._read_control("🎙️  Recording... Press Enter to STOP.", style="bold yellow")
+            utt.audio_path = recorder.stop_recording()
+        play_stop_listening_sound()
+
+        utt.vad = recorder.last_vad
+        if stream:
+            # The stream reads the recorder's buffer: finish before the next recording reuses it
+            utt.stt_result = await stream.finish()
+        if not utt.audio_path:
+            if not auto_silence:
+                show_error("No speech detected." if utt.vad else "No audio captured.")
+            return None
+        self.console.print(f"[dim]Saved audio: {utt.audio_path}[/dim]")
+        return utt
+
+    async def _transcribe(self, utt: Utterance) -> Optional[Utterance]:
+        # Streaming mode already decoded the audio while recording
+        if utt.stt_result is None:
+            utt.stt_result = await self.transcriber.transcribe(utt.audio_path)
+        stt_result, vad = utt.stt_result, utt.vad
+
+        if stt_result.provider:
+            utt.meta["stt_provider"] = stt_result.provider
+        if stt_result.upload_bytes is not None:
+            utt.meta.update(upload_bytes=stt_result.upload_bytes, upload_ms=stt_result.upload_ms)
+        if vad:
+            stt_result.audio_s = round(vad.original_s, 3)
+            stt_result.decoded_s = round(vad.kept_s, 3)
+            utt.meta.update(audio_s=stt_result.audio_s, decoded_s=stt_result.decoded_s)
+            self.console.print(
+                f"[dim]VAD: decoded {vad.kept_s:.1f}s of {vad.original_s:.1f}s "
+                f"(skipped {vad.trimmed_s:.1f}s of silence)[/dim]"
+            )
+
+        if not stt_result.text:
+            show_error("Could not understand anything, please try again.")
+            return None
+        self.console.print(f"[bold cyan]Heard:[/bold cyan] \"{stt_result.text}\"")
+        return utt
+
+    async def _route(self, utt: Utterance) -> Optional[Utterance]:
+        if STATS_REQUEST.match(utt.text.strip()):
+            render_latency_stats(tracer.stats())
+            return None
+        if PROFILE_REQUEST.match(utt.text.strip()):
+            self._arm_profile()
+            return None
+        routed = await self.brain.process(utt.text)
+        if routed.source:
+            utt.meta["route"] = routed.source
+        if isinstance(routed, ToolPlan):
+            self.console.print(f"[dim]→ Planned {len(routed.steps)} steps:[/dim]")
+            for step in routed.steps:
+                after = f" [dim](after {', '.join(step.depends_on)})[/dim]" if step.depends_on else ""
+                self.console.print(f"[dim]  {step.id}.[/dim] [bold]{step.tool}[/bold] {step.params}{after}")
+            calls = routed.steps
+            utt.plan = routed
+        else:
+            self.console.print(f"[dim]→ Planned action:[/dim] [bold]{routed.tool}[/bold] {routed.params}")
+            if routed.tool == "help":
+                self.console.print(f"[yellow]{routed.explanation}[/yellow]")
+                return None
+            calls = [routed]
+        for tool_call in calls:
+            # Inject confirmation callback for smart commit (safe since in-process)
+            if tool_call.tool == "git.smart_commit_push":
+                tool_call.params["confirm_callback"] = self._confirm_commit_message
+            if tool_call.tool == "git.run_tests":
+                tool_call.params["timeout_s"] = self.config.test_timeout_s
+                if not self.config.test_selection:
+                    tool_call.params["full"] = True
+                tool_call.params["ignore_paths"] = app_outputs(self.config)
+                tool_call.params["on_output"] = functools.partial(self._show_test_output, utt)
+        # A plan is recorded in metrics and rendered under its first step's name
+        utt.tool_call = calls[0]
+        return utt
+
+    async def _ask(self, question: str) -> bool:
+        if self.confirm_listener:
+            # voice_flow pulls in the audio device stack; only needed for voice replies
+            from app.core.voice_flow import get_voice_confirmation
+            return await get_voice_confirmation(
+                question, self.recorder, self.transcriber, self.console, listener=self.confirm_listener
+            )
+        return await self.terminal.confirm(f"[bold red]{question}[/bold red]")
+
+    async def _confirm_commit_message(self, message: str) -> bool:
+        return await self.terminal.confirm(f"[bold yellow]{message}[/bold yellow]")
+
+    def _show_test_output(self, utt: Utterance, line: str, summary) -> None:
+        self.console.print(f"[dim]#{utt.seq} │ {escape(line)}[/dim]", highlight=False)
+
+    async def _confirm(self, utt: Utterance) -> Optional[Utterance]:
+        calls = utt.plan.steps if utt.plan else [utt.tool_call]
+        # One question covers every step of a plan that needs it
+        risky = [
+            call for call in calls
+            if TOOL_POLICIES.get(call.tool, DEFAULT_POLICY).confirmation_required or call.confirmation_required
+        ]
+        if risky and self.config.require_confirmation_writes:
+            if utt.plan:
+                self.console.print("[bold yellow]Safety Check:[/bold yellow] This plan will execute:")
+                for call in risky:
+                    self.console.print(f"  {call.id}. {call.tool} ({_shown_params(call)})")
+            else:
+                self.console.print(
+                    f"[bold yellow]Safety Check:[/bold yellow] About to execute: {utt.tool_call.tool} ({_shown_params(utt.tool_call)})"
+                )
+            if not await self._ask("Are you sure?"):
+                self.console.print("[red]Cancelled by user.[/red]")
+                self.metrics_logger.log(utt.text, utt.tool_call.tool, success=False, error="cancelled_by_user",
+                                        extra=utt.meta or None)
+                return None
+        self._release_mic(utt)
+        return utt
+
+    async def _dispatch(self) -> None:
+        """Start each tool once ExecutionOrder allows it; several may run at once."""
+        while (utt := await self.exec_q.get()) is not _STOP:
+            policy = TOOL_POLICIES.get(utt.tool_call.tool, DEFAULT_POLICY)
+            blockers, done = self.order.admit(plan_access(utt.plan) if utt.plan else policy.access)
+            await self._tool_slots.acquire()
+            task = asyncio.create_task(self._execute(utt, policy, blockers, done))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        if self._running:
+            await asyncio.gather(*list(self._running), return_exceptions=True)
+        await self.render_q.put(_STOP)
+
+    async def _execute(self, utt: Utterance, policy: ToolPolicy,
+                       blockers: List[asyncio.Event], done: asyncio.Event) -> None:
+        tool_call = utt.tool_call
+        try:
+            if any(not e.is_set() for e in blockers):
+                self.console.print(f"[dim]⏳ {tool_call.tool} waits for earlier changes to finish...[/dim]")
+                for event in blockers:
+                    await event.wait()
+            with span("session.execute", track=_track(utt)):
+                if utt.plan:
+                    await self._execute_plan(utt)
+                    return
+                self.console.print(f"[dim]▶ Running {tool_call.tool}...[/dim]")
+                outcome = await self._run_with_retries(utt, policy)
+                self._after_tool(outcome)
+        finally:
+            done.set()
+            self._tool_slots.release()
+        await self.render_q.put(outcome)
+
+    async def _execute_plan(self, utt: Utterance) -> None:
+        """Run the plan's steps, rendering each as it finishes."""
+        self.console.print(f"[dim]▶ Running {len(utt.plan.steps)} steps...[/dim]")
+
+        async def run_step(step: PlanStep) -> dict:
+            outcome = await self._run_with_retries(utt, TOOL_POLICIES.get(step.tool, DEFAULT_POLICY), step)
+            if outcome.error is not None:
+                return {"stdout": "", "stderr": outcome.error, "exit_code": 1, "success": False}
+            return outcome.result
+
+        async def on_step(step: PlanStep, result: dict) -> None:
+            outcome = Outcome(utt, result=result, step=step)
+            self._after_tool(outcome)
+            await self.render_q.put(outcome)
+
+        await execute_plan(utt.plan, run_step=run_step, on_step=on_step)
+
+    def _after_tool(self, outcome: Outcome) -> None:
+        if outcome.result and outcome.result.get("success") and outcome.tool_call.tool == "git.branch":
+            # New branch names should be recognised in the next command
+            self.transcriber.refresh_hotwords()
+
+    async def _run_with_retries(self, utt: Utterance, policy: ToolPolicy,
+                                tool_call: Optional[ToolCall] = None) -> Outcome:
+        tool_call = tool_call or utt.tool_call
+        extra = utt.meta or None
+        attempts = policy.retries + 1
+        for i in range(attempts):
+            try:
+                start_time = asyncio.get_event_loop().time()
+                result_dict = await execute_tool(tool_call, config=self.config, brain=self.brain, console=self.console)
+                duration = (asyncio.get_event_loop().time() - start_time) * 1000
+
+                is_success = result_dict.get("success", False)
+                exit_code = result_dict.get("exit_code", 0)
+                stderr = result_dict.get("stderr", "")
+                log_extra = extra
+                if result_dict.get("lock_wait_ms"):
+                    # Time spent queued behind another write to this repository
+                    log_extra = {**(extra or {}), "lock_wait_ms": result_dict["lock_wait_ms"]}
+                self.metrics_logger.log(
+                    utt.text,
+                    tool_call.tool,
+                    success=is_success,
+                    error=stderr if not is_success else None,
+                    duration_ms=duration,
+                    extra=log_extra,
+                )
+                if not is_success and exit_code in policy.retry_on_exit_codes and i < attempts - 1:
+                    # run_tests failures are results, not errors, but may be retried once
+                    self.console.print(f"[dim]{tool_call.tool} exited with code {exit_code}. Retrying...[/dim]")
+                    await asyncio.sleep(0.5)
+                    continue
+                return Outcome(utt, result=result_dict)
+            except Exception as e:
+                self.metrics_logger.log(utt.text, tool_call.tool, success=False, error=str(e), extra=extra)
+                if i == attempts - 1:
+                    return Outcome(utt, error=str(e))
+        return Outcome(utt, error="no attempts made")
+
+    async def _render(self) -> None:
+        """Print results one at a time, in the order they finish."""
+        while (outcome := await self.render_q.get()) is not _STOP:
+            utt = outcome.utterance
+            try:
+                with span("session.render", track=_track(utt)):
+                    self._render_outcome(outcome)
+            except Exception as e:
+                logger.exception("Rendering failed")
+                show_error(f"Could not render result: {e}")
+            utt.rendered += 1
+            if utt.plan is None or utt.rendered == len(utt.plan.steps):
+                self._end_profile(utt)
+
+    def _render_outcome(self, outcome: Outcome) -> None:
+        utt = outcome.utterance
+        tool = outcome.tool_call.tool
+        step = f" step {outcome.step.id}/{len(utt.plan.steps)}" if outcome.step else ""
+        self.console.print(f"[dim]#{utt.seq}{step} \"{utt.text}\"[/dim]")
+        if outcome.result and outcome.result.get("skipped"):
+            self.console.print(f"[yellow]{tool} skipped: {outcome.result['stderr'].removeprefix('Skipped: ')}[/yellow]")
+            return
+        if outcome.error is not None:
+            show_error(f"Exception during execution: {outcome.error}")
+            return
+
+        result_dict = outcome.result
+        stdout = result_dict.get("stdout", "")
+        stderr = result_dict.get("stderr", "")
+        exit_code = result_dict.get("exit_code", 0)
+
+        if tool == "git.run_tests":
+            # Passing (exit 0) and failing (exit 1) tests are both successful executions
+            render_test_results(result_dict)
+            if exit_code == 0:
+                show_success(f"✓ {tool} passed all tests")
+            else:
+                show_error(f"Tests failed with exit code {exit_code}")
+            return
+
+        if not result_dict.get("success", False):
+            show_error(f"{tool} failed with exit code {exit_code}")
+            if stderr:
+                render_simple_block("Error Details", stderr, border_style="red")
+            return
+
+        if tool == "git.status":
+            render_git_status(stdout)
+        elif tool == "git.log":
+            render_git_log(stdout)
+        elif tool == "git.diff":
+            render_git_diff(stdout)
+        elif tool == "git.smart_commit_push":
+            render_smart_commit(result_dict)
+        else:
+            # Generic rendering for other tools
+            render_simple_block(tool, stdout)
+        show_success(f"✓ {tool} completed successfully")
@@ -0,0 +1,163 @@
+"""
+Async terminal input for the v-shell CLI.
+
+`input()` and `rich.prompt.Confirm.ask` block the thread they run on, and
+on the event loop thread that stops everything else: model warm-up,
+streaming decodes, tools still running for an earlier command. Here one
+daemon thread reads stdin and hands each line to whichever coroutine is
+waiting for it, so prompts are awaited like any other I/O.
+
+Several prompts may be open at once (the "press Enter to record" prompt
+and a safety check for an earlier command, say). A line goes to the
+highest-priority waiter, oldest first, so confirmations are answered
+before the recording controls; the prompt that is next in line is shown
+again once the one in front of it has been answered.
+"""
+import asyncio
+import itertools
+import logging
+import sys
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, TextIO
+
+from rich.console import Console
+from rich.markup import escape
+
+logger = logging.getLogger(__name__)
+
+# Waiter priorities: confirmations are answered before recording controls
+CONTROL = 0
+QUESTION = 1
+
+YES_ANSWERS = {"y", "yes"}
+NO_ANSWERS = {"n", "no"}
+
+
+@dataclass(eq=False)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future
+    prompt: Optional[Callable[[], None]] = None
+
+
+class TerminalInput:
+    """Line-oriented stdin shared by every prompt of a session."""
+
+    def __init__(self, console: Optional[Console] = None, stream: Optional[TextIO] = None):
+        self.console = console or Console()
+        self.stream = stream or sys.stdin
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._waiters: List[_Waiter] = []
+        self._typed_ahead: Deque[str] = deque()
+        self._shown: Optional[_Waiter] = None
+        self._seq = itertools.count()
+        self._eof = False
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._loop = asyncio.get_running_loop()
+            self._thread = threading.Thread(target=self._read_forever, name="stdin-reader", daemon=True)
+            self._thread.start()
+
+    def _read_forever(self) -> None:
+        while True:
+            try:
+                line = self.stream.readline()
+            except Exception as e:
+                logger.error(f"Reading stdin failed: {e}")
+                line = ""
+            try:
+                # readline() returns "" only at end of input
+                self._loop.call_soon_threadsafe(self._deliver, line.rstrip("\r\n") if line else None)
+            except RuntimeError:  # the loop has been closed
+                return
+            if not line:
+                return
+
+    def _top(self) -> Optional[_Waiter]:
+        live = [w for w in self._waiters if not w.future.done()]
+        self._waiters = live
+        return min(live, key=lambda w: (-w.priority, w.seq)) if live else None
+
+    def _deliver(self, line: Optional[str]) -> None:
+        if line is None:
+            self._eof = True
+            for waiter in self._waiters:
+                if not waiter.future.done():
+                    waiter.future.set_exception(EOFError())
+            self._waiters = []
+            return
+        waiter = self._top()
+        if waiter is None:
+            self._typed_ahead.append(line)
+            return
+        self._waiters.remove(waiter)
+        waiter.future.set_result(line)
+        # Runs after the answered coroutine resumes, so a follow-up prompt it opens comes first
+        self._loop.call_soon(self._refresh)
+
+    def _refresh(self) -> None:
+        waiter = self._top()
+        if waiter is not None and waiter is not self._shown:
+            self._show(waiter)
+
+    def _show(self, waiter: _Waiter) -> None:
+        self._shown = waiter
+        if waiter.prompt:
+            waiter.prompt()
+
+    async def read_line(self, prompt: Optional[Callable[[], None]] = None, priority: int = CONTROL) -> str:
+        """
+        Next line of input (without the newline) meant for this caller.
+
+        `prompt` is called to display the question when this waiter is next
+        in line. Raises EOFError once stdin is closed.
+        """
+        self._start()
+        if self._eof:
+            raise EOFError()
+        if self._typed_ahead:
+            if prompt:
+                prompt()
+            return self._typed_ahead.popleft()
+
+        waiter = _Waiter(priority, next(self._seq), self._loop.create_future(), prompt)
+        self._waiters.append(waiter)
+        if self._top() is waiter:
+            self._show(waiter)
+        try:
+            return await waiter.future
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def confirm(self, question: str, default: Optional[bool] = None) -> bool:
+        """
+        Ask a y/n question, like rich's Confirm.ask but without blocking the loop.
+
+        Lines typed before the question was asked don't answer it. Returns
+        False if stdin is closed.
+        """
+        # A stray Enter pressed earlier must not confirm a write
+        self._typed_ahead.clear()
+        choices = "[y/n]" if default is None else ("[Y/n]" if default else "[y/N]")
+
+        def prompt():
+            self.console.print(f"{question} [magenta]{escape(choices)}[/magenta]: ", end="")
+
+        while True:
+            try:
+                answer = (await self.read_line(prompt, priority=QUESTION)).strip().lower()
+            except EOFError:
+                return False
+            if answer in YES_ANSWERS:
+                return True
+            if answer in NO_ANSWERS:
+                return False
+            if not answer and default is not None:
+                return default
+            self.console.print("[prompt.invalid]Please enter Y or N")
@@ -9,6 +9,7 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.spinner import Spinner
 from rich.live import Live
+from rich.text import Text
 from contextlib import contextmanager
 from typing import Optional
 
@@ -42,6 +43,25 @@ def spinner(message: str):
         yield
 
 
+@contextmanager
+def live_transcript(message: str = "🎙️  Recording... Press Enter to STOP."):
+    """
+    Show a recording indicator with the partial transcript underneath.
+
+    Yields an update(committed, tentative) function; committed words are
+    shown in bold, words that may still change are dimmed.
+    """
+    def _render(committed: str = "", tentative: str = "") -> Text:
+        text = Text(message + "\n", style="bold yellow")
+        text.append(committed, style="bold cyan")
+        if tentative:
+            text.append((" " if committed else "") + tentative, style="dim")
+        return text
+
+    with Live(_render(), refresh_per_second=10, console=console, transient=True) as live:
+        yield lambda committed, tentative: live.update(_render(committed, tentative))
+
+
 def render_git_status(raw: str) -> None:
     """
     Render git status output as a Rich table.
@@ -174,3 +194,31 @@ def render_smart_commit(result: dict) -> None:
     
     if push_out:
         render_simple_block("🚀 Git Push", push_out, border_style="blue")
+
+
+def render_latency_stats(stats: dict) -> None:
+    """Render per-stage latency percentiles (see app.core.tracing)."""
+    if not stats:
+        show_status("No timings recorded yet.", style="dim")
+        return
+    table = Table(title="⏱️ Latency by stage (ms)", show_edge=False)
+    table.add_column("stage")
+    for column in ("count", "p50", "p95", "p99", "max"):
+        table.add_column(column, justify="right")
+    for name, row in stats.items():
+        table.add_row(name, str(row["count"]), *(f"{row[c]:.1f}" for c in ("p50", "p95", "p99", "max")))
+    console.print(table)
+
+
+def render_profile(target: Console, meta: dict, path, memory) -> None:
+    """Render the hotspots of a profiled interaction (see app.core.profiling)."""
+    table = Table(title=f"🔬 {meta['tool']} took {meta['duration_ms']:.0f} ms — top hotspots", show_edge=False)
+    table.add_column("function")
+    table.add_column("self ms", justify="right")
+    table.add_column("cumulative ms", justify="right")
+    for row in meta["hotspots"]:
+        table.add_row(row["function"], f"{row['self_ms']:.1f}", f"{row['cumulative_ms']:.1f}")
+    target.print(table)
+    for stat in memory:
+        target.print(f"[dim]  mem {stat}[/dim]")
+    target.print(f"[dim]Profile saved to {path} (peak traced memory {meta['peak_traced_kb']:.0f} KB)[/dim]")
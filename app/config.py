@@ -19,7 +19,14 @@ def load_config(config_path: Optional[Path] = None) -> AppConfig:
         sample_rate=int(os.getenv("AUDIO_SAMPLE_RATE", "16000")),
         channels=int(os.getenv("AUDIO_CHANNELS", "1")),
         duration=int(os.getenv("RECORDING_DURATION", "10")),
+        max_recording_s=int(os.getenv("MAX_RECORDING_S", "120")),
         wake_word=os.getenv("WAKE_WORD", "hey git"),
+        wake_word_model=os.getenv("WAKE_WORD_MODEL") or None,
+        wake_word_threshold=float(os.getenv("WAKE_WORD_THRESHOLD", "0.6")),
+        vad_enabled=os.getenv("VAD_ENABLED", "true").lower() == "true",
+        silence_ms=int(os.getenv("SILENCE_MS", "800")),
+        confirm_silence_ms=int(os.getenv("CONFIRM_SILENCE_MS", "400")),
+        confirm_whisper_model=os.getenv("CONFIRM_WHISPER_MODEL", "tiny.en"),
     )
     
     # Main configuration
@@ -30,11 +37,41 @@ def load_config(config_path: Optional[Path] = None) -> AppConfig:
         groq_model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
         gemini_model=os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
         stt_provider=os.getenv("STT_PROVIDER", "faster-whisper"),
-        whisper_model=os.getenv("WHISPER_MODEL", "base"),
+        whisper_model=os.getenv("WHISPER_MODEL", "auto"),
+        stt_rtf_target=float(os.getenv("STT_RTF_TARGET", "0.3")),
+        stt_hedge_percentile=float(os.getenv("STT_HEDGE_PERCENTILE", "0.9")),
+        stt_upload_format=os.getenv("STT_UPLOAD_FORMAT", "flac"),
+        stt_profile=os.getenv("STT_PROFILE", "auto"),
+        stt_latency_target_ms=int(os.getenv("STT_LATENCY_TARGET_MS", "1500")),
+        stt_streaming=os.getenv("STT_STREAMING", "false").lower() == "true",
+        stt_stream_hop_s=float(os.getenv("STT_STREAM_HOP", "1.0")),
+        ml_workers=int(os.getenv("ML_WORKERS", "0")),
+        ml_worker_threads=int(os.getenv("ML_WORKER_THREADS", "2")),
+        ml_pin_cpus=os.getenv("ML_PIN_CPUS", "false").lower() == "true",
+        model_idle_ttl_s=int(os.getenv("MODEL_IDLE_TTL", "900")),
+        model_memory_budget_mb=int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0")),
+        daemon=os.getenv("GITVOICE_DAEMON", "auto").lower(),
+        daemon_socket=os.getenv("GITVOICE_SOCKET", ""),
         audio=audio_config,
+        listen_mode=os.getenv("LISTEN_MODE", "press-enter"),
+        voice_confirmations=os.getenv("VOICE_CONFIRMATIONS", "false").lower() == "true",
         auto_confirm_read_only=os.getenv("AUTO_CONFIRM_READ_ONLY", "true").lower() == "true",
         require_confirmation_writes=os.getenv("REQUIRE_CONFIRMATION_WRITES", "true").lower() == "true",
         log_level=os.getenv("LOG_LEVEL", "INFO"),
+        metrics_file=os.getenv("METRICS_FILE", "metrics.jsonl"),
+        metrics_max_mb=int(os.getenv("METRICS_MAX_MB", "10")),
+        metrics_rotate_daily=os.getenv("METRICS_ROTATE_DAILY", "false").lower() == "true",
+        metrics_backups=int(os.getenv("METRICS_BACKUPS", "5")),
+        metrics_compress=os.getenv("METRICS_COMPRESS", "true").lower() == "true",
+        metrics_backend=os.getenv("METRICS_BACKEND", "jsonl").lower(),
+        metrics_db=os.getenv("METRICS_DB", "metrics.db"),
+        metrics_retention_days=int(os.getenv("METRICS_RETENTION_DAYS", "90")),
+        trace_file=os.getenv("TRACE_FILE", ""),
+        test_timeout_s=float(os.getenv("TEST_TIMEOUT_S", "600")),
+        test_selection=os.getenv("TEST_SELECTION", "false").lower() == "true",
+        profile_interactions=os.getenv("PROFILE_INTERACTIONS", "false").lower() == "true",
+        profile_mode=os.getenv("PROFILE_MODE", "cprofile").lower(),
+        profile_dir=os.getenv("PROFILE_DIR", "profiles"),
     )
     
     return config
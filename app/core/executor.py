@@ -1,53 +1,60 @@
-import logging
 import asyncio
-from typing import Callable, Awaitable, Any, Dict
-from app.core.models import ToolCall, AppConfig
-
-# Import Git tool functions
-# Note: Using git_ops as the directory name per codebase reality
-from app.core.tools.git_ops.status import git_status
-from app.core.tools.git_ops.diff import git_diff
-from app.core.tools.git_ops.pull import git_pull
-from app.core.tools.git_ops.test_runner import run_tests  
-from app.core.tools.git_ops.commit_push import smart_commit_push, git_commit, git_push
-from app.core.tools.git_ops.branch import git_checkout_branch
-from app.core.tools.git_ops.log import git_log
-from app.core.tools.git_ops.add import git_add_all
-from app.core.tools.git_ops.reset import git_reset
-from app.core.tools.git_ops.fetch import git_fetch
-from app.core.tools.git_ops.remote import git_remote_list
-from app.core.tools.git_ops.stash import git_stash_push, git_stash_pop
-from app.core.tools.git_ops.revert import git_revert
-from app.core.tools.git_ops.merge import git_merge
+import inspect
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from app.core.models import PlanStep, ToolCall, ToolPlan, AppConfig
+from app.core.policies import DEFAULT_POLICY, TOOL_POLICIES
+from app.core.repo_lock import RepoLocks
+from app.core.result_cache import ToolResultCache, fingerprint
+from app.core.tool_specs import NORMALIZERS, TOOL_SPECS, ToolFunc, ToolSpec
+from app.core.tracing import span
 
 logger = logging.getLogger(__name__)
 
-ToolFunc = Callable[..., Awaitable[Any]]
-
-# Tool Registry
-TOOL_REGISTRY: Dict[str, ToolFunc] = {
-    "git.status": git_status,
-    "git.diff": git_diff,
-    "git.pull": git_pull,
-    "git.run_tests": run_tests,
-    "git.smart_commit_push": smart_commit_push,
-    "git.commit": git_commit,
-    "git.push": git_push,
-    "git.branch": git_checkout_branch,
-    "git.log": git_log,
-    "git.add_all": git_add_all,
-    "git.reset": git_reset,
-    "git.fetch": git_fetch,
-    "git.remote_list": git_remote_list,
-    "git.stash_push": git_stash_push,
-    "git.stash_pop": git_stash_pop,
-    "git.revert": git_revert,
-    "git.merge": git_merge,
-}
+# Tool Registry (implementations; see TOOL_SPECS for parameters and policies)
+TOOL_REGISTRY: Dict[str, ToolFunc] = {name: spec.func for name, spec in TOOL_SPECS.items()}
+
+# Results of cacheable (read-only) tools, cleared whenever a write tool runs
+RESULT_CACHE = ToolResultCache()
+
+# Per-repository reader/writer locks around every tool run
+REPO_LOCKS = RepoLocks()
+
+HELP_RESULT = {"stdout": "I can help you with git commands. Try 'git status' or 'commit changes'.", "exit_code": 0, "success": True}
+
+# Injected dependencies that a tool can't run without
+MISSING_DEPENDENCY = {"brain": "Brain (LLM) required for smart commit."}
+
+
+def _failure(message: str) -> dict:
+    return {"stdout": "", "stderr": message, "exit_code": 1, "success": False}
+
+
+def _validation_message(name: str, error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"]) or "params"
+    if first["type"] == "missing":
+        return f"{name} requires a '{field}' parameter"
+    return f"Invalid parameters for {name}: {field}: {first['msg']}"
+
+
+def _normalize(result: Any) -> dict:
+    """Result of a tool without a spec, or not of its declared shape."""
+    if isinstance(result, tuple) and len(result) == 2:
+        return NORMALIZERS["output"](result)
+    if isinstance(result, tuple) and len(result) == 3:
+        return NORMALIZERS["commit"](result)
+    if isinstance(result, dict):
+        return NORMALIZERS["dict"](result)
+    return {"stdout": str(result), "exit_code": 0, "success": True}
+
 
 async def execute_tool(tool_call: ToolCall, config: AppConfig = None, brain=None, console=None, _registry: Dict[str, ToolFunc] = None) -> dict:
     """
-    Dispatch ToolCall via TOOL_REGISTRY.
+    Dispatch ToolCall via TOOL_REGISTRY, validating params against the tool's spec.
     """
     name = tool_call.tool
     params = tool_call.params or {}
@@ -55,84 +62,166 @@ async def execute_tool(tool_call: ToolCall, config: AppConfig = None, brain=None
     logger.info(f"Executing tool: {name} with params: {params}")
 
     try:
-        # 1. Check TOOL_REGISTRY (Unified dispatch)
         registry = _registry if _registry is not None else TOOL_REGISTRY
         func = registry.get(name)
         if func is None:
             # Fallback for help or unknown
             if name == "help":
-                return {"stdout": "I can help you with git commands. Try 'git status' or 'commit changes'.", "exit_code": 0, "success": True}
-            
-            return {"stdout": "", "stderr": f"Unknown tool: {name}", "exit_code": 1, "success": False}
-
-        # Prepare arguments
-        call_params = params.copy()
-        
-        # Inject dependencies if needed
-        # commit_push needs 'brain'
-        if name == "git.smart_commit_push":
-            if not brain:
-                 return {"stdout": "", "stderr": "Brain (LLM) required for smart commit.", "exit_code": 1, "success": False}
-            call_params["brain"] = brain
-            # confirm_callback might be in params (if passed locally) or we might need it? 
-            # Previous executor execution: 
-            # confirm_callback = tool_call.params.get("confirm_callback")
-            # This is already in params, so copy() preserved it.
-
-        if name == "git.branch":
-            branch_name = params.get("name")
-            if not branch_name:
-                 return {"stdout": "", "stderr": "git.branch requires a 'name' parameter", "exit_code": 1, "success": False}
-
-        if name == "git.reset":
-            # Map 'commits' (from LLM) to 'steps' (impl)
-            if "commits" in params:
-                call_params["steps"] = params.pop("commits")
-        
-        if name == "git.log":
-            # Map 'n' (legacy) to 'limit' (current)
-            if "n" in params and "limit" not in params:
-                call_params["limit"] = params.pop("n")
-
-        if name == "git.run_tests":
-             # run_tests now returns a dict with summary, so pass it through
-             # validation logic for success is inside execute_tool return handling
-             pass
-
-        # Execute
-        result = await func(**call_params)
-
-        # Normalize result
-        # Tuple[str, int] -> {"stdout": ..., "exit_code": ...}
-        # Tuple[str, str, int] (commit_push) -> {"commit_message": ..., "stdout": ..., "exit_code": ...}
-        # dict -> return as is
-
-        if isinstance(result, tuple):
-            if len(result) == 2:
-                stdout, code = result
-                return {"stdout": stdout, "exit_code": code, "success": code == 0}
-            elif len(result) == 3:
-                # smart_commit_push returns (commit_msg, stdout, code)
-                msg, stdout, code = result
-                return {
-                    "commit_message": msg,
-                    "stdout": stdout,
-                    "exit_code": code,
-                    "success": code == 0
-                }
-            else:
-                # Unexpected tuple length
-                return {"stdout": str(result), "exit_code": 0, "success": True} # Fallback
-
-        if isinstance(result, dict):
-            result.setdefault("exit_code", 0)
-            if "success" not in result:
-                result["success"] = result["exit_code"] == 0
-            return result
-            
-        # Fallback
-        return {"stdout": str(result), "exit_code": 0, "success": True}
+                return dict(HELP_RESULT)
+            return _failure(f"Unknown tool: {name}")
+
+        spec: ToolSpec = TOOL_SPECS.get(name)
+        if spec is None:
+            return _normalize(await func(**params))
+
+        try:
+            validated = spec.params.model_validate(params)
+        except ValidationError as e:
+            return _failure(_validation_message(name, e))
+        # Only what the caller set: the tool's own defaults apply to the rest
+        call_params = {field: getattr(validated, field) for field in validated.model_fields_set}
+
+        deps = {"brain": brain, "config": config, "console": console}
+        for dep in spec.inject:
+            if deps[dep] is None:
+                return _failure(MISSING_DEPENDENCY.get(dep, f"{name} requires {dep}"))
+            call_params[dep] = deps[dep]
+
+        async def run() -> dict:
+            result = await func(**call_params)
+            try:
+                return spec.normalize(result)
+            except (TypeError, ValueError, AttributeError):
+                # Not the declared shape (a stand-in implementation)
+                return _normalize(result)
+
+        cwd = os.getcwd()
+        exclusive = spec.policy.access == "write"
+        if call_params.get("confirm_callback") is not None:
+            call_params["confirm_callback"] = _unlocked(call_params["confirm_callback"], cwd, exclusive)
+        with span(f"tool.{name}") as tool_span:
+            # Reads (and remote tools) share the repository; writes have it to themselves
+            async with REPO_LOCKS.hold(cwd, exclusive=exclusive) as waited_ms:
+                repo = await asyncio.to_thread(fingerprint, cwd) if spec.cacheable else None
+                if repo is not None:
+                    key = (name, func, json.dumps(validated.model_dump(), sort_keys=True, default=repr), repo)
+                    result = await RESULT_CACHE.get_or_run(key, run)
+                else:
+                    try:
+                        result = await run()
+                    finally:
+                        if spec.policy.access != "read":
+                            RESULT_CACHE.invalidate()
+            tool_span.attrs["lock_wait_ms"] = result["lock_wait_ms"] = round(waited_ms, 1)
+        return result
 
     except Exception as e:
         logger.exception(f"Tool execution failed: {e}")
-        return {"stdout": "", "stderr": str(e), "exit_code": 1, "success": False}
+        return _failure(str(e))
+
+
+def _unlocked(callback: Callable[..., Any], cwd: str, exclusive: bool) -> Callable[..., Awaitable[Any]]:
+    """`callback` run without the repository lock: the user may take a while to answer."""
+    async def confirm(*args: Any) -> Any:
+        async with REPO_LOCKS.released(cwd, exclusive):
+            answer = callback(*args)
+            if inspect.isawaitable(answer):
+                answer = await answer
+        return answer
+    return confirm
+
+
+class ExecutionOrder:
+    """
+    Admits tool executions in arrival order with reader/writer rules.
+
+    - "write" waits for everything admitted before it;
+    - "remote" (push, fetch) waits for earlier writes and remote writes;
+    - "read" waits only for earlier writes to the working tree, so a
+      status asked during a push runs right away.
+    """
+
+    def __init__(self):
+        self._pending: List[Tuple[str, asyncio.Event]] = []
+
+    def admit(self, access: str) -> Tuple[List[asyncio.Event], asyncio.Event]:
+        """Returns (events to wait for, event to set when this execution ends)."""
+        self._pending = [(a, e) for a, e in self._pending if not e.is_set()]
+        if access == "write":
+            blockers = [e for _, e in self._pending]
+        elif access == "remote":
+            blockers = [e for a, e in self._pending if a in ("write", "remote")]
+        else:
+            blockers = [e for a, e in self._pending if a == "write"]
+        done = asyncio.Event()
+        self._pending.append((access, done))
+        return blockers, done
+
+
+def plan_access(plan: ToolPlan) -> str:
+    """How the plan as a whole touches the repository: the strongest of its steps."""
+    accesses = {TOOL_POLICIES.get(tool, DEFAULT_POLICY).access for tool in plan.tools}
+    for access in ("write", "remote"):
+        if access in accesses:
+            return access
+    return "read"
+
+
+async def execute_plan(
+    plan: ToolPlan,
+    config: AppConfig = None,
+    brain=None,
+    console=None,
+    run_step: Optional[Callable[[PlanStep], Awaitable[dict]]] = None,
+    on_step: Optional[Callable[[PlanStep, dict], Awaitable[None]]] = None,
+) -> Dict[str, dict]:
+    """
+    Run a plan's steps as a DAG; returns each step's result by id.
+
+    Steps are admitted in list order through an ExecutionOrder, so
+    independent reads run concurrently and writes one at a time, and each
+    also waits for its depends_on. A step is skipped when one of its
+    dependencies failed, and a write or remote step also when an earlier
+    one did. `run_step` replaces execute_tool (the CLI adds retries and
+    metrics), and `on_step` sees each result as soon as it is ready.
+    """
+    if run_step is None:
+        async def run_step(step: PlanStep) -> dict:
+            return await execute_tool(step, config=config, brain=brain, console=console)
+
+    order = ExecutionOrder()
+    finished: Dict[str, asyncio.Event] = {}
+    results: Dict[str, dict] = {}
+    changes: List[str] = []  # ids of the write and remote steps so far
+
+    async def run(step: PlanStep, blockers: List[asyncio.Event], earlier_changes: List[str]) -> None:
+        result: Optional[dict] = None
+        try:
+            for event in blockers + [finished[dep] for dep in step.depends_on]:
+                await event.wait()
+            failed = [d for d in step.depends_on + earlier_changes if not results.get(d, {}).get("success")]
+            if failed:
+                result = _failure(f"Skipped: step {failed[0]} did not succeed")
+                result["skipped"] = True
+            else:
+                try:
+                    result = await run_step(step)
+                except Exception as e:
+                    logger.exception(f"Plan step {step.id} failed")
+                    result = _failure(str(e))
+            results[step.id] = result
+        finally:
+            finished[step.id].set()
+        # A cancelled step has no result to show
+        if on_step is not None and result is not None:
+            await on_step(step, result)
+
+    tasks = []
+    for step in plan.steps:
+        access = TOOL_POLICIES.get(step.tool, DEFAULT_POLICY).access
+        blockers, finished[step.id] = order.admit(access)
+        tasks.append(asyncio.create_task(run(step, blockers, list(changes) if access != "read" else [])))
+        if access != "read":
+            changes.append(step.id)
+    await asyncio.gather(*tasks)
+    return results
@@ -1,24 +1,108 @@
+"""
+Usage metrics, written to a JSONL file by a background thread.
+
+log() and log_event() only put the entry on a bounded queue, so they cost
+microseconds on the event loop (and are safe from worker threads, e.g. the
+model manager). A writer thread batches entries and appends them through a
+long-lived file handle, flushing after BATCH_SIZE entries or
+flush_interval_s, whichever comes first, and on close() / interpreter exit.
+
+The file is rotated once it would pass max_bytes and, with rotate_daily,
+on the first write of a new day. Rotated files are named
+`metrics.<timestamp>.jsonl` (gzipped unless compress is off), and only the
+newest `backups` are kept.
+
+If the queue is full the entry is dropped rather than blocking the caller;
+the number of drops is written as a `metrics_dropped` event once the writer
+catches up. Every entry carries `schema_version`.
+
+With backend="sqlite" the batches go to a MetricsStore database instead of
+the JSONL file (see app.core.metrics_store); rotation does not apply there,
+old events are removed by its retention policy.
+"""
+import atexit
+import gzip
 import json
 import logging
-from datetime import datetime
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Bump when fields are renamed or change meaning
+SCHEMA_VERSION = 1
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+BATCH_SIZE = 100
+FLUSH_INTERVAL_S = 1.0
+MAX_QUEUE = 10_000
+
+# Queue markers: end the current batch now / then stop the writer
+_FLUSH = object()
+_STOP = object()
+
+
 class MetricsLogger:
     """Logs usage metrics to a JSONL file."""
-    
-    def __init__(self, log_file: str = "metrics.jsonl"):
+
+    def __init__(self,
+                 log_file: str = "metrics.jsonl",
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 rotate_daily: bool = False,
+                 backups: int = DEFAULT_BACKUPS,
+                 compress: bool = True,
+                 flush_interval_s: float = FLUSH_INTERVAL_S,
+                 max_queue: int = MAX_QUEUE,
+                 backend: str = "jsonl",
+                 db_path: str = "metrics.db",
+                 retention_days: int = 90):
         self.log_file = Path(log_file)
-        
-    def log(self, 
-            text: str, 
-            tool: str, 
-            success: bool, 
-            error: Optional[str] = None, 
-            duration_ms: Optional[float] = None):
-        """Log a single interaction event."""
+        self.backend = backend  # jsonl, sqlite
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._store = None
+        self.max_bytes = max_bytes  # 0 = no size limit
+        self.rotate_daily = rotate_daily
+        self.backups = backups
+        self.compress = compress
+        self.flush_interval_s = flush_interval_s
+        self.dropped = 0
+        self._reported_drops = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._file = None
+        self._file_day: Optional[date] = None
+
+    @classmethod
+    def from_config(cls, config) -> "MetricsLogger":
+        return cls(
+            config.metrics_file,
+            max_bytes=config.metrics_max_mb * 1024 * 1024,
+            rotate_daily=config.metrics_rotate_daily,
+            backups=config.metrics_backups,
+            compress=config.metrics_compress,
+            backend=config.metrics_backend,
+            db_path=config.metrics_db,
+            retention_days=config.metrics_retention_days,
+        )
+
+    def log(self,
+            text: str,
+            tool: str,
+            success: bool,
+            error: Optional[str] = None,
+            duration_ms: Optional[float] = None,
+            extra: Optional[Dict[str, Any]] = None):
+        """Log a single interaction event. `extra` fields are merged into the entry."""
         entry = {
             "timestamp": datetime.now().isoformat(),
             "text": text,
@@ -27,9 +111,169 @@ class MetricsLogger:
             "error": error,
             "duration_ms": duration_ms
         }
-        
+        if extra:
+            entry.update(extra)
+        self._write(entry)
+
+    def log_event(self, event: str, **fields: Any):
+        """Log a non-interaction event (e.g. a model load or eviction)."""
+        self._write({"timestamp": datetime.now().isoformat(), "event": event, **fields})
+
+    def _write(self, entry: Dict[str, Any]):
+        entry["schema_version"] = SCHEMA_VERSION
+        if self._closed:
+            # Late events (e.g. from atexit handlers) are written directly
+            with self._lock:
+                self._write_batch([entry])
+                self._close_file()
+            return
+        self._ensure_writer()
         try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(entry) + "\n")
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    # -- writer thread ----------------------------------------------------------
+
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch: List[Any] = [self._queue.get()]
+            # Written flush_interval_s after its first entry at the latest, however steady the stream
+            deadline = time.monotonic() + self.flush_interval_s
+            while batch[-1] is not _FLUSH and batch[-1] is not _STOP and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop = _STOP in batch
+            entries = [e for e in batch if e is not _FLUSH and e is not _STOP]
+            with self._lock:
+                if self.dropped > self._reported_drops:
+                    entries.append({"timestamp": datetime.now().isoformat(), "event": "metrics_dropped",
+                                    "count": self.dropped - self._reported_drops,
+                                    "schema_version": SCHEMA_VERSION})
+                    self._reported_drops = self.dropped
+                self._write_batch(entries)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, entries: List[Dict[str, Any]]):
+        if not entries:
+            return
+        if self.backend == "sqlite":
+            self._insert(entries)
+            return
+        try:
+            data = "".join(json.dumps(e) + "\n" for e in entries)
+            self._maybe_rotate(len(data.encode("utf-8")))
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            self._file.flush()
         except Exception as e:
             logger.error(f"Failed to write metrics: {e}")
+
+    def _insert(self, entries: List[Dict[str, Any]]):
+        try:
+            if self._store is None:
+                from app.core.metrics_store import MetricsStore
+                self._store = MetricsStore(self.db_path, retention_days=self.retention_days)
+            self._store.insert(entries)
+        except Exception as e:
+            logger.error(f"Failed to write metrics to {self.db_path}: {e}")
+
+    # -- files ------------------------------------------------------------------
+
+    def _open(self):
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.log_file, "a", encoding="utf-8")
+        try:
+            self._file_day = date.fromtimestamp(self.log_file.stat().st_mtime)
+        except OSError:
+            self._file_day = date.today()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def _maybe_rotate(self, incoming: int):
+        if self._file is None:
+            if not self.log_file.exists():
+                return
+            self._open()
+        size = self._file.tell()
+        if size == 0:
+            return
+        too_big = self.max_bytes and size + incoming > self.max_bytes
+        new_day = self.rotate_daily and self._file_day != date.today()
+        if too_big or new_day:
+            self._rotate()
+
+    def _rotate(self):
+        self._close_file()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        target = self.log_file.with_name(f"{self.log_file.stem}.{stamp}{self.log_file.suffix}")
+        n = 1
+        while target.exists() or Path(f"{target}.gz").exists():
+            target = self.log_file.with_name(f"{self.log_file.stem}.{stamp}-{n}{self.log_file.suffix}")
+            n += 1
+        os.replace(self.log_file, target)
+        if self.compress:
+            try:
+                with open(target, "rb") as src, gzip.open(f"{target}.gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                target.unlink()
+            except OSError as e:
+                logger.warning(f"Could not compress {target}: {e}")
+        self._prune()
+
+    def rotated_files(self) -> List[Path]:
+        """Rotated metrics files, oldest first."""
+        pattern = f"{self.log_file.stem}.*{self.log_file.suffix}*"
+        rotated = [p for p in self.log_file.parent.glob(pattern) if p != self.log_file]
+        return sorted(rotated, key=lambda p: (p.stat().st_mtime_ns, p.name))
+
+    def _prune(self):
+        rotated = self.rotated_files()
+        for path in rotated[:max(len(rotated) - self.backups, 0)]:
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove old metrics file {path}: {e}")
+
+    # -- lifecycle --------------------------------------------------------------
+
+    def flush(self):
+        """Block until everything logged so far is on disk."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        """Flush and stop the writer (also run at interpreter exit)."""
+        if self._closed:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._closed = True
+        with self._lock:
+            self._close_file()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self._queue.qsize(), "dropped": self.dropped}
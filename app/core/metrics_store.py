@@ -0,0 +1,378 @@
+"""
+SQLite metrics backend (METRICS_BACKEND=sqlite).
+
+MetricsLogger's writer thread hands each batch to MetricsStore.insert().
+The batch goes into one transaction on a WAL-mode database, so `metrics
+report` can read while the CLI writes. The tables are:
+
+- events: one row per entry. The fields every report uses are columns,
+  indexed on timestamp, tool and success; everything else is kept as JSON
+  in `data`;
+- rollup: per day, tool and latency bucket (the log-linear buckets of
+  app.core.tracing.Histogram), the number of commands, failures and LLM
+  fallbacks;
+- failing: per day, tool and utterance (case and whitespace folded), the
+  number of failures.
+
+The two summary tables are updated with every insert, so `metrics report`
+reads a few thousand rows however many events there are. Reports are by
+whole days.
+
+Tool names are normalized on the way in (`run_tests` and `git_status` from
+older versions become `git.run_tests` and `git.status`). Events and rollup
+rows older than METRICS_RETENTION_DAYS are deleted on open and once a day.
+
+    python -m app.core.metrics_store migrate metrics.jsonl metrics.*.jsonl.gz
+    python -m app.core.metrics_store report [--days 7] [--json]
+"""
+import argparse
+import functools
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.tracing import PERCENTILES, Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = "metrics.db"
+DEFAULT_RETENTION_DAYS = 90
+MIGRATE_BATCH = 5000
+# Bucket of commands logged without a duration (cancelled, exceptions)
+NO_DURATION = -1
+# Logged with success=False, but the user said no: not a failure
+CANCELLED = "cancelled_by_user"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    tool TEXT,
+    success INTEGER,
+    duration_ms REAL,
+    error TEXT,
+    text TEXT,
+    route TEXT,
+    schema_version INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_tool_ts ON events (tool, ts);
+CREATE INDEX IF NOT EXISTS events_success_ts ON events (success, ts);
+CREATE TABLE IF NOT EXISTS rollup (
+    day TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    fallbacks INTEGER NOT NULL,
+    -- day last: reports scan in (tool, bucket) order and need no sort
+    PRIMARY KEY (tool, bucket, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS failing (
+    day TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    utterance TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    last_error TEXT,
+    PRIMARY KEY (tool, utterance, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+
+@functools.lru_cache(maxsize=256)
+def canonical_tool(name: Optional[str]) -> Optional[str]:
+    """`git.status` for `git.status`, `git_status` or `status`; unknown names unchanged."""
+    if not name:
+        return name
+    from app.core.tool_specs import TOOL_SPECS
+
+    if name in TOOL_SPECS:
+        return name
+    candidate = "git." + name.removeprefix("git_").removeprefix("git.")
+    return candidate if candidate in TOOL_SPECS else name
+
+
+def _epoch(timestamp: Any) -> float:
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def _row(entry: Dict[str, Any]) -> Tuple:
+    entry = dict(entry)
+    success = entry.pop("success", None)
+    data = {k: v for k, v in entry.items()
+            if k not in ("timestamp", "event", "tool", "duration_ms", "error", "text", "route", "schema_version")}
+    return (
+        _epoch(entry.get("timestamp")),
+        entry.get("event") or "command",
+        canonical_tool(entry.get("tool")),
+        None if success is None else int(bool(success)),
+        entry.get("duration_ms"),
+        entry.get("error"),
+        entry.get("text"),
+        entry.get("route"),
+        entry.get("schema_version"),
+        json.dumps(data, default=repr) if data else None,
+    )
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+class MetricsStore:
+    """Metrics events in a local SQLite database."""
+
+    def __init__(self, path: str = DEFAULT_DB, retention_days: int = DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days  # 0 = keep everything
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Used by MetricsLogger's writer thread, and by the caller after close()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._pruned_at = 0.0
+        self._maybe_prune()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- writes -----------------------------------------------------------------
+
+    def insert(self, entries: Iterable[Dict[str, Any]], skip_existing: bool = False) -> int:
+        """
+        Insert a batch in one transaction; returns the number of rows.
+
+        With skip_existing, entries already stored (same timestamp, kind,
+        tool and text) are left out, so a file can be imported again.
+        """
+        rows = [_row(e) for e in entries]
+        if rows and skip_existing:
+            stored = set(self.conn.execute(
+                "SELECT ts, kind, tool, text FROM events WHERE ts BETWEEN ? AND ?",
+                (min(r[0] for r in rows), max(r[0] for r in rows)),
+            ))
+            rows = [r for r in rows if (r[0], r[1], r[2], r[6]) not in stored]
+        if not rows:
+            return 0
+        rollup: Dict[Tuple, List[int]] = {}
+        failing: Dict[Tuple, List[Any]] = {}
+        for ts, kind, tool, success, duration_ms, error, text, route, _, _ in rows:
+            if kind != "command" or not tool:
+                continue
+            day = _day(ts)
+            bucket = NO_DURATION if duration_ms is None else Histogram.bucket_of(int(duration_ms * 1000))
+            failed = success == 0 and error != CANCELLED
+            counts = rollup.setdefault((day, tool, bucket), [0, 0, 0])
+            counts[0] += 1
+            counts[1] += failed
+            counts[2] += route == "llm"
+            if failed and text and text.strip():
+                entry = failing.setdefault((day, tool, " ".join(text.lower().split())), [0, text, error])
+                entry[0] += 1
+                entry[2] = error
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (ts, kind, tool, success, duration_ms, error, text, route, schema_version, data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            self.conn.executemany(
+                "INSERT INTO rollup (day, tool, bucket, n, failures, fallbacks) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (tool, bucket, day) DO UPDATE SET n = n + excluded.n,"
+                " failures = failures + excluded.failures, fallbacks = fallbacks + excluded.fallbacks",
+                [(*key, *counts) for key, counts in rollup.items()],
+            )
+            self.conn.executemany(
+                "INSERT INTO failing (day, tool, utterance, n, text, last_error) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (tool, utterance, day) DO UPDATE SET n = n + excluded.n,"
+                " last_error = excluded.last_error",
+                [(*key, *entry) for key, entry in failing.items()],
+            )
+        self._maybe_prune()
+        return len(rows)
+
+    def _maybe_prune(self) -> None:
+        if self.retention_days and time.time() - self._pruned_at > 86400:
+            self.prune(self.retention_days)
+
+    def prune(self, retention_days: int) -> int:
+        """Delete events and rollup rows older than `retention_days`; returns the events deleted."""
+        self._pruned_at = time.time()
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM events WHERE ts < ?", (cutoff.timestamp(),)).rowcount
+            for table in ("rollup", "failing"):
+                self.conn.execute(f"DELETE FROM {table} WHERE day < ?", (cutoff.strftime("%Y-%m-%d"),))
+        if deleted:
+            logger.info(f"Pruned {deleted} metrics events older than {retention_days} days")
+        return deleted
+
+    def migrate(self, paths: Iterable[str]) -> Dict[str, int]:
+        """
+        Import JSONL metrics files (plain or .gz); new rows imported per file.
+
+        An unchanged file is skipped. A changed one (the live metrics.jsonl
+        keeps growing, and its lines reappear in the rotated files) is read
+        again, and only the entries not stored yet are inserted.
+        """
+        imported = {}
+        for path in paths:
+            st = os.stat(path)
+            seen = self.conn.execute("SELECT size, mtime_ns FROM imports WHERE path = ?",
+                                     (os.path.abspath(path),)).fetchone()
+            if seen == (st.st_size, st.st_mtime_ns):
+                logger.info(f"{path} was already imported")
+                imported[path] = 0
+                continue
+            rows = 0
+            batch: List[Dict[str, Any]] = []
+            for entry in _read_jsonl(path):
+                batch.append(entry)
+                if len(batch) >= MIGRATE_BATCH:
+                    rows += self.insert(batch, skip_existing=True)
+                    batch = []
+            rows += self.insert(batch, skip_existing=True)
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO imports VALUES (?, ?, ?, ?)",
+                                  (os.path.abspath(path), st.st_size, st.st_mtime_ns, rows))
+            imported[path] = rows
+        return imported
+
+    # -- analytics --------------------------------------------------------------
+
+    def report(self, days: Optional[int] = None, top: int = 10) -> Dict[str, Any]:
+        """Per-tool latency percentiles and rates, plus the most frequent failing utterances."""
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d") if days else ""
+        buckets: Dict[str, Dict[int, int]] = {}
+        totals: Dict[str, List[int]] = {}  # commands, failures, fallbacks
+        for tool, bucket, n, failures, fallbacks in self.conn.execute(
+            "SELECT tool, bucket, SUM(n), SUM(failures), SUM(fallbacks) FROM rollup"
+            " WHERE day >= ? GROUP BY tool, bucket", (since,),
+        ):
+            total = totals.setdefault(tool, [0, 0, 0])
+            total[0] += n
+            total[1] += failures
+            total[2] += fallbacks
+            if bucket != NO_DURATION:
+                buckets.setdefault(tool, {})[bucket] = n
+
+        tools = {}
+        for tool, (n, failures, fallbacks) in sorted(totals.items(), key=lambda item: -item[1][0]):
+            row = {
+                "count": n,
+                "failure_rate": round(failures / n, 4),
+                "fallback_rate": round(fallbacks / n, 4),
+            }
+            histogram = Histogram.from_buckets(buckets.get(tool, {}))
+            for p in PERCENTILES:
+                row[f"p{p}_ms"] = round(histogram.percentile(p) / 1000, 1)
+            tools[tool] = row
+
+        failing = [
+            {"text": text, "tool": tool, "count": count, "error": error}
+            for text, tool, count, error in self.conn.execute(
+                "SELECT MIN(text), tool, SUM(n) AS c, MAX(last_error) FROM failing"
+                " WHERE day >= ? GROUP BY tool, utterance ORDER BY c DESC LIMIT ?",
+                (since, top),
+            )
+        ]
+        return {"since": since or None, "tools": tools, "top_failing": failing}
+
+
+def _read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"{path}:{n}: skipping malformed line")
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    title = f"Commands since {report['since']}" if report["since"] else "All commands"
+    table = Table(title=title, show_edge=False)
+    table.add_column("tool")
+    for column in ("count", "p50 ms", "p95 ms", "p99 ms", "failures", "LLM fallback"):
+        table.add_column(column, justify="right")
+    for tool, row in report["tools"].items():
+        table.add_row(tool, str(row["count"]), *(f"{row[f'p{p}_ms']:.0f}" for p in PERCENTILES),
+                      f"{row['failure_rate']:.1%}", f"{row['fallback_rate']:.1%}")
+    console.print(table)
+
+    if report["top_failing"]:
+        failing = Table(title="Top failing utterances", show_edge=False)
+        failing.add_column("count", justify="right")
+        failing.add_column("tool")
+        failing.add_column("utterance")
+        failing.add_column("error", style="dim", overflow="ellipsis", max_width=60)
+        for row in report["top_failing"]:
+            failing.add_row(str(row["count"]), row["tool"], row["text"], row["error"] or "")
+        console.print(failing)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="GitVoice metrics database")
+    parser.add_argument("--db", help=f"database path (default: METRICS_DB or {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="latency percentiles, failure and fallback rates per tool")
+    report.add_argument("--days", type=int, help="only the last N days")
+    report.add_argument("--top", type=int, default=10, help="failing utterances to list")
+    report.add_argument("--json", action="store_true", help="print JSON")
+    migrate = commands.add_parser("migrate", help="import metrics.jsonl files (entries already stored are skipped)")
+    migrate.add_argument("files", nargs="+")
+    prune = commands.add_parser("prune", help="delete old events now")
+    prune.add_argument("--days", type=int, help="retention (default: METRICS_RETENTION_DAYS)")
+    args = parser.parse_args(argv)
+
+    from app.config import load_config
+
+    config = load_config()
+    logging.basicConfig(level=config.log_level, format="%(levelname)s: %(message)s")
+    store = MetricsStore(args.db or config.metrics_db, retention_days=0)
+    try:
+        if args.command == "report":
+            start = time.perf_counter()
+            result = store.report(days=args.days, top=args.top)
+            if args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                print_report(result)
+                print(f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        elif args.command == "migrate":
+            for path, rows in store.migrate(args.files).items():
+                print(f"{path}: {rows} rows")
+        else:
+            print(f"Deleted {store.prune(args.days or config.metrics_retention_days)} events")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Resident model manager for long-running sessions.
+
+Whisper, the SetFit/mpnet classifier and the yes/no confirmation model
+each cost hundreds of MB, and a session may sit idle next to an IDE for
+hours. Models registered here are loaded on first use, unloaded once idle
+for longer than MODEL_IDLE_TTL or when the process goes over
+MODEL_MEMORY_BUDGET_MB (least recently used first), and reloaded
+transparently on the next call.
+
+Callers hold a ManagedModel handle instead of the model itself. Reloads
+read the same on-disk artifacts as the first load (CTranslate2 model
+directories, safetensors weights that are memory-mapped on load), which
+the OS page cache usually still holds, so they cost far less than a cold
+start. A model is never evicted while a call into it is running, including
+iteration over any generator the call returned (faster-whisper decodes its
+segments lazily, after transcribe() has returned). Loads and evictions are written to metrics with their duration and
+approximate RSS.
+"""
+import asyncio
+import functools
+import gc
+import inspect
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _trim_heap() -> None:
+    """Ask glibc to hand freed arenas back to the OS (no-op elsewhere)."""
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+@dataclass
+class _Entry:
+    loader: Callable[[], Any]
+    unloader: Optional[Callable[[Any], None]]
+    lock: threading.RLock  # re-entrant: a _Pinned may be collected while it is held
+    model: Any = None
+    rss_bytes: int = 0  # RSS growth measured across the last load
+    loads: int = 0
+    last_load_ms: float = 0.0
+    loaded_at: float = 0.0
+    last_used: float = 0.0
+    in_use: int = 0  # calls (and generators they returned) still running
+
+
+class ManagedModel:
+    """
+    Handle to a managed model: attribute access loads it (again) if needed.
+
+    Method calls pin the model until they return, or until a generator they
+    returned is exhausted or closed, and then refresh its idle timer.
+    """
+
+    def __init__(self, manager: "ModelManager", name: str):
+        self._manager = manager
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._manager.get(self._name), attr)
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            model = self._manager.acquire(self._name)
+            release = functools.partial(self._manager.release, self._name)
+            try:
+                result = getattr(model, attr)(*args, **kwargs)
+            except BaseException:
+                release()
+                raise
+            return _hold_until_consumed(result, release)
+
+        return call
+
+    def __repr__(self) -> str:
+        return f"<ManagedModel {self._name}>"
+
+
+class _Pinned:
+    """Iterator that keeps its model pinned until it is exhausted, closed or collected."""
+
+    def __init__(self, iterator, release: Callable[[], None]):
+        self._iterator = iterator
+        self._release: Optional[Callable[[], None]] = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    __del__ = close
+
+
+def _hold_until_consumed(result: Any, release: Callable[[], None]) -> Any:
+    """Release now, or once the generator in `result` (or its tuple) is done."""
+    if inspect.isgenerator(result):
+        return _Pinned(result, release)
+    if isinstance(result, tuple) and any(inspect.isgenerator(item) for item in result):
+        # e.g. faster-whisper's (segments, info); one generator per call
+        return tuple(_Pinned(item, release) if inspect.isgenerator(item) else item
+                     for item in result)
+    release()
+    return result
+
+
+class ModelManager:
+    """Loads, tracks and evicts registered models."""
+
+    def __init__(self, idle_ttl_s: float = 900, memory_budget_mb: int = 0, metrics=None):
+        self.idle_ttl_s = idle_ttl_s  # 0 disables idle eviction
+        self.memory_budget = memory_budget_mb * MB  # 0 = unlimited
+        self.metrics = metrics
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 unloader: Optional[Callable[[Any], None]] = None) -> ManagedModel:
+        """Declare a model (without loading it) and return its handle."""
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(loader, unloader, threading.RLock())
+        return ManagedModel(self, name)
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entries[name].model is not None
+
+    def touch(self, name: str) -> None:
+        self._entries[name].last_used = time.monotonic()
+
+    def acquire(self, name: str) -> Any:
+        """Like get(), but pins the model against eviction until release()."""
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is None:
+                self._load(name, entry)
+            entry.in_use += 1
+            entry.last_used = time.monotonic()
+            model = entry.model
+        if self.memory_budget:
+            self.enforce_budget(keep=name)
+        return model
+
+    def release(self, name: str) -> None:
+        entry = self._entries[name]
+        with entry.lock:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+    def get(self, name: str) -> Any:
+        """The loaded model, loading it first if it isn't resident."""
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is None:
+                self._load(name, entry)
+            entry.last_used = time.monotonic()
+            model = entry.model
+        if self.memory_budget:
+            self.enforce_budget(keep=name)
+        return model
+
+    def _load(self, name: str, entry: _Entry) -> None:
+        rss_before = current_rss()
+        start = time.perf_counter()
+        entry.model = entry.loader()
+        entry.last_load_ms = (time.perf_counter() - start) * 1000
+        entry.rss_bytes = max(0, current_rss() - rss_before)
+        entry.loads += 1
+        entry.loaded_at = time.monotonic()
+        logger.info(
+            f"Loaded model '{name}' in {entry.last_load_ms:.0f} ms "
+            f"(+{entry.rss_bytes / MB:.0f} MB RSS, load #{entry.loads})"
+        )
+        self._log("model_load", name, load_ms=round(entry.last_load_ms, 1),
+                  rss_mb=round(entry.rss_bytes / MB, 1), reload=entry.loads > 1)
+
+    def evict(self, name: str, reason: str = "manual") -> bool:
+        """Unload `name` if it is resident and not being loaded or used right now."""
+        entry = self._entries[name]
+        if not entry.lock.acquire(blocking=False):
+            return False
+        try:
+            if entry.model is None or entry.in_use:
+                return False
+            model, entry.model = entry.model, None
+            if entry.unloader:
+                try:
+                    entry.unloader(model)
+                except Exception as e:
+                    logger.warning(f"Unloading '{name}' failed: {e}")
+            del model
+        finally:
+            entry.lock.release()
+
+        rss_before = current_rss()
+        gc.collect()
+        _trim_heap()
+        freed = max(0, rss_before - current_rss())
+        now = time.monotonic()
+        logger.info(f"Evicted model '{name}' ({reason}), freed ~{freed / MB:.0f} MB")
+        self._log("model_evict", name, reason=reason, freed_mb=round(freed / MB, 1),
+                  resident_s=round(now - entry.loaded_at, 1), idle_s=round(now - entry.last_used, 1))
+        return True
+
+    def sweep(self) -> int:
+        """Evict models idle past the TTL, then enforce the budget. Returns evictions."""
+        evicted = 0
+        if self.idle_ttl_s:
+            now = time.monotonic()
+            for name, entry in list(self._entries.items()):
+                if (entry.model is not None and not entry.in_use
+                        and now - entry.last_used > self.idle_ttl_s):
+                    evicted += self.evict(name, "idle")
+        if self.memory_budget:
+            evicted += self.enforce_budget()
+        return evicted
+
+    def enforce_budget(self, keep: Optional[str] = None) -> int:
+        """Evict least recently used models until the process RSS fits the budget."""
+        evicted = 0
+        while current_rss() > self.memory_budget:
+            candidates = [
+                (entry.last_used, name) for name, entry in self._entries.items()
+                if entry.model is not None and not entry.in_use and name != keep
+            ]
+            if not candidates:
+                break
+            if not self.evict(min(candidates)[1], "budget"):
+                break
+            evicted += 1
+        return evicted
+
+    def start(self, interval: float = 60.0) -> None:
+        """Run sweep() periodically on the current event loop."""
+        async def _loop():
+            while True:
+                await asyncio.sleep(interval)
+                await asyncio.to_thread(self.sweep)
+
+        self._sweep_task = asyncio.create_task(_loop())
+
+    def stop(self) -> None:
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+
+    def stats(self) -> Dict[str, dict]:
+        """Residency and load cost of every registered model."""
+        now = time.monotonic()
+        return {
+            name: {
+                "resident": entry.model is not None,
+                "rss_mb": round(entry.rss_bytes / MB, 1),
+                "loads": entry.loads,
+                "last_load_ms": round(entry.last_load_ms, 1),
+                "idle_s": round(now - entry.last_used, 1) if entry.loads else None,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def _log(self, event: str, name: str, **fields) -> None:
+        if self.metrics is not None:
+            self.metrics.log_event(event, model=name, process_rss_mb=round(current_rss() / MB, 1), **fields)
@@ -1,7 +1,7 @@
 # Data models
 """Pydantic models for GitVoice."""
-from typing import Any, Optional
-from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field, model_validator
 
 # Tool name constants for reference (not enforced by type system)
 # All tool names use dot notation: "git.status", "git.diff", "docker.ps", etc.
@@ -14,6 +14,48 @@ class ToolCall(BaseModel):
     params: dict[str, Any] = Field(default_factory=dict)
     confirmation_required: bool = False
     explanation: Optional[str] = None  # Human-readable explanation of what will happen
+    source: Optional[str] = None  # what routed it: rules, setfit or llm (the fallback)
+
+
+class PlanStep(ToolCall):
+    """One tool call in a ToolPlan."""
+
+    id: str = ""  # defaults to the step's 1-based position
+    depends_on: List[str] = Field(default_factory=list)  # ids of earlier steps
+
+
+class ToolPlan(BaseModel):
+    """
+    Several tool calls from one utterance, e.g. "status, log and the diff".
+
+    Steps are listed in order, and a step may only depend on steps listed
+    before it, so the list is always a valid execution order. Besides
+    explicit depends_on, writes run after every earlier step and reads
+    after earlier writes (see app.core.executor.execute_plan).
+    """
+
+    steps: List[PlanStep]
+    explanation: Optional[str] = None
+    source: Optional[str] = None  # what routed it: rules or llm
+
+    @model_validator(mode="after")
+    def _check_steps(self) -> "ToolPlan":
+        if not self.steps:
+            raise ValueError("a plan needs at least one step")
+        seen = set()
+        for i, step in enumerate(self.steps, start=1):
+            step.id = step.id or str(i)
+            if step.id in seen:
+                raise ValueError(f"duplicate step id {step.id!r}")
+            unknown = [d for d in step.depends_on if d not in seen]
+            if unknown:
+                raise ValueError(f"step {step.id!r} depends on {unknown}, which are not earlier steps")
+            seen.add(step.id)
+        return self
+
+    @property
+    def tools(self) -> List[str]:
+        return [step.tool for step in self.steps]
 class Intent(BaseModel):
     """User's transcribed command with metadata."""
     
@@ -31,6 +73,11 @@ class CommandResult(BaseModel):
 class STTResult(BaseModel):
     """Result of speech-to-text transcription."""
     text: str
+    audio_s: Optional[float] = None  # length of the recording
+    decoded_s: Optional[float] = None  # audio actually sent to the model after VAD
+    provider: Optional[str] = None  # which STT provider produced the text
+    upload_bytes: Optional[int] = None  # cloud STT payload size
+    upload_ms: Optional[float] = None  # cloud STT request latency
 
 class AudioConfig(BaseModel):
     """Audio recording configuration."""
@@ -38,7 +85,14 @@ class AudioConfig(BaseModel):
     sample_rate: int = 16000
     channels: int = 1
     duration: int = 10  # seconds
+    max_recording_s: int = 120  # longest command kept; audio after that is not recorded
     wake_word: str = "hey git"
+    wake_word_model: Optional[str] = None  # .onnx file or template dir (default .models/wakeword/<slug>)
+    wake_word_threshold: float = 0.6  # keyword score needed to trigger
+    vad_enabled: bool = True  # trim silence / drop silent clips before STT
+    silence_ms: int = 800  # trailing silence that ends an utterance in auto-silence mode
+    confirm_silence_ms: int = 400  # trailing silence that ends a spoken yes/no
+    confirm_whisper_model: str = "tiny.en"  # small model for yes/no replies
 class AppConfig(BaseModel):
     """Main application configuration."""
     
@@ -50,11 +104,29 @@ class AppConfig(BaseModel):
     gemini_model: str = "gemini-1.5-flash"
     
     # STT settings
-    stt_provider: str = "faster-whisper"  # faster-whisper, groq
-    whisper_model: str = "base"  # tiny, base, small, medium, large-v2, large-v3
+    stt_provider: str = "faster-whisper"  # faster-whisper, groq, hedged
+    whisper_model: str = "auto"  # auto (host calibration, else base), tiny, base, small, medium, large-v2, large-v3
+    stt_rtf_target: float = 0.3  # calibration: max seconds of compute per second of audio
+    stt_hedge_percentile: float = 0.9  # hedged mode: local latency percentile before firing the cloud request
+    stt_upload_format: str = "flac"  # flac, opus, wav (cloud STT payload encoding)
+    stt_profile: str = "auto"  # auto, fast, balanced, accurate
+    stt_latency_target_ms: int = 1500  # budget for auto-profile retries
+    stt_streaming: bool = False  # decode while recording (faster-whisper only)
+    stt_stream_hop_s: float = 1.0  # seconds of new audio between streaming decodes
+    
+    # ML inference workers (0 = run models in-process on a thread)
+    ml_workers: int = 0  # faster-whisper worker processes
+    ml_worker_threads: int = 2  # CPU threads per worker
+    ml_pin_cpus: bool = False  # pin each worker to its own CPUs (Linux)
+    model_idle_ttl_s: int = 900  # unload in-process models idle this long (0 = never)
+    model_memory_budget_mb: int = 0  # evict LRU models above this process RSS (0 = no budget)
+    daemon: str = "auto"  # auto (use the daemon when it is running), off
+    daemon_socket: str = ""  # Unix socket of the daemon ("" = per-user default)
     
     # Audio settings
     audio: AudioConfig = Field(default_factory=AudioConfig)
+    voice_confirmations: bool = False  # answer safety checks by voice instead of y/n
+    listen_mode: str = "press-enter"  # press-enter, auto-silence, wake-word
     
     # Safety settings
     auto_confirm_read_only: bool = True
@@ -62,3 +134,17 @@ class AppConfig(BaseModel):
     
     # Logging
     log_level: str = "INFO"
+    metrics_file: str = "metrics.jsonl"
+    metrics_max_mb: int = 10  # rotate above this size (0 = no size limit)
+    metrics_rotate_daily: bool = False
+    metrics_backups: int = 5  # rotated files to keep
+    metrics_compress: bool = True  # gzip rotated files
+    metrics_backend: str = "jsonl"  # jsonl, sqlite
+    metrics_db: str = "metrics.db"  # sqlite backend database
+    metrics_retention_days: int = 90  # sqlite backend: delete older events (0 = keep all)
+    trace_file: str = ""  # also write latency spans here, Chrome trace format ("" = off)
+    test_timeout_s: float = 600.0  # run_tests kills the suite after this long (0 = no limit)
+    test_selection: bool = False  # run_tests only runs the tests affected by uncommitted changes
+    profile_interactions: bool = False  # profile every interaction (one at a time)
+    profile_mode: str = "cprofile"  # cprofile, sample
+    profile_dir: str = "profiles"
@@ -1,30 +1,11 @@
-from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import Dict
 
-@dataclass
-class ToolPolicy:
-    confirmation_required: bool
-    retries: int
-    retry_on_exit_codes: List[int] = field(default_factory=list)
+from app.core.tool_specs import TOOL_SPECS, ToolPolicy
 
-TOOL_POLICIES: Dict[str, ToolPolicy] = {
-    "git.status": ToolPolicy(False, 0, []),
-    "git.log": ToolPolicy(False, 0, []),
-    "git.add_all": ToolPolicy(False, 0, []),
-    "git.run_tests": ToolPolicy(False, 1, [1]),
-    "git.diff": ToolPolicy(False, 0, []),
-    "git.pull": ToolPolicy(True, 0, []),
-    "git.smart_commit_push": ToolPolicy(True, 1, [1]),
-    "git.push": ToolPolicy(True, 1, [1]),
-    "git.commit": ToolPolicy(True, 0, []),
-    "git.reset": ToolPolicy(True, 0, []),
-    "git.checkout_branch": ToolPolicy(True, 0, []),
-    "git.create_branch": ToolPolicy(True, 0, []),
-    "git.branch": ToolPolicy(True, 0, []),
-    "git.fetch": ToolPolicy(False, 0, []),
-    "git.remote_list": ToolPolicy(False, 0, []),
-    "git.stash_push": ToolPolicy(True, 0, []),
-    "git.stash_pop": ToolPolicy(True, 0, []),
-    "git.revert": ToolPolicy(True, 0, []),
-    "git.merge": ToolPolicy(True, 0, []),
-}
+# Declared with each tool in app.core.tool_specs
+TOOL_POLICIES: Dict[str, ToolPolicy] = {name: spec.policy for name, spec in TOOL_SPECS.items()}
+
+# Unknown tools are treated as writes: they wait for, and hold up, everything else
+DEFAULT_POLICY = ToolPolicy(False, 0, [], access="write")
+
+__all__ = ["DEFAULT_POLICY", "TOOL_POLICIES", "ToolPolicy"]
@@ -0,0 +1,207 @@
+"""
+Opt-in profiling of single interactions.
+
+Enable it for every command with PROFILE_INTERACTIONS=true, or for the next
+one only by saying "profile the next command" (or typing `profile`). The
+MCP server profiles each tool call when the variable is set.
+
+A profiled interaction, from the end of its recording to its last
+rendered result, gets its own directory under PROFILE_DIR:
+
+    profiles/20261019-142501-git.smart_commit_push/
+        meta.json        utterance, tool, duration, peak traced memory
+        profile.pstats   PROFILE_MODE=cprofile: open with snakeviz / pstats
+        profile.txt      the same, as text (by cumulative time)
+        samples.folded   PROFILE_MODE=sample: collapsed stacks for
+                         flamegraph.pl or speedscope
+        memory.txt       tracemalloc snapshot diff, largest growth first
+
+cProfile is deterministic but only sees the event loop thread. The
+sampler takes a stack sample of every thread each SAMPLE_INTERVAL_S, so it
+also covers work done in asyncio.to_thread, at a much lower overhead.
+Only one interaction is profiled at a time; commands that overlap with it
+while it runs appear in its profile too.
+"""
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL_S = 0.005
+TRACEMALLOC_FRAMES = 10
+HOTSPOTS = 10
+
+# Only one profile can run at a time (cProfile and tracemalloc are process-wide)
+_active = threading.Lock()
+
+
+class StackSampler:
+    """Samples the stacks of all other threads from a background thread."""
+
+    def __init__(self, interval_s: float = SAMPLE_INTERVAL_S):
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def hotspots(self, n: int = HOTSPOTS) -> List[Dict[str, Any]]:
+        """Functions by samples at the top of the stack (self time), idle waits included."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for func in set(frames):
+                total[func] += count
+        ms = self.interval_s * 1000
+        return [{"function": func, "self_ms": round(count * ms, 1), "cumulative_ms": round(total[func] * ms, 1)}
+                for func, count in own.most_common(n)]
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", text).strip("-")[:60] or "interaction"
+
+
+class InteractionProfile:
+    """Profiles one interaction: start() before it, finish() after its result is shown."""
+
+    def __init__(self, out_dir: str = "profiles", mode: str = "cprofile"):
+        self.out_dir = Path(out_dir)
+        self.mode = mode  # cprofile, sample
+        self.started_at: Optional[datetime] = None
+        self._t0 = 0.0
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._own_tracemalloc = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> bool:
+        """False (and nothing happens) if another interaction is being profiled."""
+        if not _active.acquire(blocking=False):
+            logger.info("Another interaction is being profiled; not profiling this one")
+            return False
+        self.started_at = datetime.now()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._own_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._snapshot = tracemalloc.take_snapshot()
+        if self.mode == "sample":
+            self._sampler = StackSampler()
+            self._sampler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._t0 = time.perf_counter()
+        return True
+
+    def _stop(self) -> float:
+        duration_ms = (time.perf_counter() - self._t0) * 1000
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        return duration_ms
+
+    def cancel(self) -> None:
+        """Stop without writing anything (e.g. nothing was recorded)."""
+        self._stop()
+        self._release()
+
+    def _release(self) -> None:
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+        _active.release()
+
+    def finish(self, utterance: str, tool: str, console=None) -> Optional[Path]:
+        """Stop, write the profile directory and print the top hotspots; returns the directory."""
+        duration_ms = self._stop()
+        try:
+            memory = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            self._release()
+
+        path = self.out_dir / f"{self.started_at:%Y%m%d-%H%M%S}-{_slug(tool)}"
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            if self._profiler is not None:
+                self._profiler.dump_stats(path / "profile.pstats")
+                text = io.StringIO()
+                pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(50)
+                (path / "profile.txt").write_text(text.getvalue(), encoding="utf-8")
+                hotspots = _pstats_hotspots(self._profiler)
+            else:
+                (path / "samples.folded").write_text(self._sampler.folded(), encoding="utf-8")
+                hotspots = self._sampler.hotspots()
+            (path / "memory.txt").write_text("".join(f"{stat}\n" for stat in memory[:50]), encoding="utf-8")
+            meta = {
+                "utterance": utterance,
+                "tool": tool,
+                "mode": self.mode,
+                "started_at": self.started_at.isoformat(),
+                "duration_ms": round(duration_ms, 1),
+                "peak_traced_kb": round(peak / 1024, 1),
+                "hotspots": hotspots,
+            }
+            (path / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        except OSError as e:
+            logger.error(f"Could not write profile to {path}: {e}")
+            return None
+
+        if console is not None:
+            from app.cli.ui import render_profile
+            render_profile(console, meta, path, memory[:5])
+        return path
+
+
+def _pstats_hotspots(profiler: cProfile.Profile, n: int = HOTSPOTS) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: -item[1][2])[:n]
+    return [
+        {"function": f"{func} ({Path(file).name}:{line})", "calls": calls,
+         "self_ms": round(own * 1000, 1), "cumulative_ms": round(cumulative * 1000, 1)}
+        for (file, line, func), (_, calls, own, cumulative, _) in rows
+    ]
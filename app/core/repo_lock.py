@@ -0,0 +1,123 @@
+"""
+Per-repository reader/writer locks for execute_tool.
+
+Several MCP agents (or a plan's steps) can drive the same repository at
+once. Read-only tools share a repository's lock. Write tools hold it alone,
+so `git add`, `git commit` and `git stash pop` never race each other for
+.git/index.lock. Remote tools (push, fetch) only touch remote-tracking refs
+and share the lock like reads, so a slow push doesn't hold up a status.
+
+Writers are preferred: once one is waiting, new readers queue behind it,
+so a stream of status polls can't starve a commit. Time spent waiting is
+returned to the caller and summed per repository in stats().
+
+A tool that waits for the user (smart commit's confirmation) gives its
+lock up for that time with released(), and has to check afterwards that
+the repository is still as it left it.
+
+The locks only order this process. Other git processes (an IDE, a second
+GitVoice) can still hold index.lock; run_git retries those failures.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from app.core.result_cache import repo_paths
+
+logger = logging.getLogger(__name__)
+
+# Waits longer than this are logged
+SLOW_WAIT_MS = 100.0
+
+
+class RWLock:
+    """Async reader/writer lock with writer preference."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self._cond = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    async def acquire(self, exclusive: bool) -> None:
+        async with self._cond:
+            if not exclusive:
+                await self._cond.wait_for(lambda: not self._writer and not self._writers_waiting)
+                self._readers += 1
+                return
+            self._writers_waiting += 1
+            try:
+                await self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._writers_waiting -= 1
+                if not self._writers_waiting:
+                    # Readers held back for a writer that gave up (cancelled) can go
+                    self._cond.notify_all()
+            self._writer = True
+
+    async def release(self, exclusive: bool) -> None:
+        async with self._cond:
+            if exclusive:
+                self._writer = False
+            else:
+                self._readers -= 1
+            self._cond.notify_all()
+
+
+class RepoLocks:
+    """One RWLock per repository (keyed by work tree), plus wait statistics."""
+
+    def __init__(self):
+        self._locks: Dict[str, RWLock] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    async def _repo_key(self, cwd: str) -> str:
+        paths = await asyncio.to_thread(repo_paths, cwd)
+        return paths.toplevel if paths is not None else os.path.realpath(cwd)
+
+    def _lock(self, repo: str) -> RWLock:
+        lock = self._locks.get(repo)
+        if lock is None or lock.loop is not asyncio.get_running_loop():
+            lock = self._locks[repo] = RWLock()
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, cwd: str, exclusive: bool) -> AsyncIterator[float]:
+        """Hold the lock of the repository containing `cwd`; yields the wait in ms."""
+        repo = await self._repo_key(cwd)
+        lock = self._lock(repo)
+        start = time.perf_counter()
+        await lock.acquire(exclusive)
+        waited_ms = (time.perf_counter() - start) * 1000
+        self._record(repo, waited_ms)
+        if waited_ms > SLOW_WAIT_MS:
+            logger.info(f"Waited {waited_ms:.0f} ms for the {'write' if exclusive else 'read'} lock on {repo}")
+        try:
+            yield waited_ms
+        finally:
+            await lock.release(exclusive)
+
+    @asynccontextmanager
+    async def released(self, cwd: str, exclusive: bool) -> AsyncIterator[None]:
+        """Let go of a lock taken with hold() for the body, and take it back after."""
+        lock = self._lock(await self._repo_key(cwd))
+        await lock.release(exclusive)
+        try:
+            yield
+        finally:
+            await lock.acquire(exclusive)
+
+    def _record(self, repo: str, waited_ms: float) -> None:
+        stats = self._stats.setdefault(repo, {"acquired": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0})
+        stats["acquired"] += 1
+        stats["wait_ms_total"] += waited_ms
+        stats["wait_ms_max"] = max(stats["wait_ms_max"], waited_ms)
+
+    def stats(self, repo: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        if repo is not None:
+            return dict(self._stats.get(repo, {}))
+        return {r: dict(s) for r, s in self._stats.items()}
@@ -0,0 +1,185 @@
+"""
+Result cache for read-only git tools.
+
+MCP agents call git_status and git_diff in tight loops. A cached result is
+reused only while the repository still looks the same. The repository
+fingerprint is built from:
+
+- the HEAD oid, read from the ref files;
+- the index checksum (the trailer git writes at the end of .git/index);
+- a worktree token: the stat of every tracked file, plus the mtimes of
+  their directories so created and deleted files count too;
+- the stat of packed-refs, config and FETCH_HEAD (remote refs, remotes).
+
+Computing it is a few thousand stat() calls and no git subprocess, except
+`git ls-files` when the index changes. Entries are evicted least recently
+used. Concurrent identical calls share one run. execute_tool clears the
+cache after any write tool, so a result never outlives a change made
+through GitVoice even when the stat data is too coarse to see it.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import subprocess
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 64
+
+
+@dataclass(frozen=True)
+class RepoPaths:
+    toplevel: str
+    git_dir: str
+    common_dir: str
+
+
+_repo_paths: Dict[str, Optional[RepoPaths]] = {}
+# index checksum -> tracked paths and their parent directories
+_tracked: Dict[Tuple[str, bytes], Tuple[List[str], List[str]]] = {}
+
+
+def repo_paths(cwd: str) -> Optional[RepoPaths]:
+    """Work tree and git dirs of the repository containing `cwd` (None outside one)."""
+    if cwd not in _repo_paths:
+        try:
+            proc = subprocess.run(
+                ["git", "rev-parse", "--show-toplevel", "--absolute-git-dir", "--git-common-dir"],
+                capture_output=True, text=True, timeout=2, cwd=cwd,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.debug(f"Not caching git results: {e}")
+            proc = None
+        if proc is None or proc.returncode != 0:
+            _repo_paths[cwd] = None
+        else:
+            toplevel, git_dir, common_dir = proc.stdout.splitlines()[:3]
+            _repo_paths[cwd] = RepoPaths(toplevel, git_dir, os.path.join(git_dir, common_dir))
+    return _repo_paths[cwd]
+
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _stat_token(path: str) -> Tuple[int, int, int]:
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    except OSError:
+        return (0, 0, 0)
+
+
+def head_oid(paths: RepoPaths) -> Optional[str]:
+    head = (_read(os.path.join(paths.git_dir, "HEAD")) or b"").decode(errors="replace").strip()
+    if not head.startswith("ref: "):
+        return head or None
+    ref = head[5:]
+    oid = _read(os.path.join(paths.common_dir, ref))
+    if oid is not None:
+        return oid.decode(errors="replace").strip()
+    for line in (_read(os.path.join(paths.common_dir, "packed-refs")) or b"").decode(errors="replace").splitlines():
+        if line.endswith(" " + ref):
+            return line.split(" ", 1)[0]
+    return None  # unborn branch
+
+
+def index_checksum(paths: RepoPaths) -> bytes:
+    try:
+        with open(os.path.join(paths.git_dir, "index"), "rb") as f:
+            f.seek(-20, os.SEEK_END)
+            return f.read()
+    except OSError:
+        return b""
+
+
+def _tracked_paths(paths: RepoPaths, checksum: bytes) -> Tuple[List[str], List[str]]:
+    key = (paths.toplevel, checksum)
+    if key not in _tracked:
+        proc = subprocess.run(["git", "ls-files", "-z"], capture_output=True, cwd=paths.toplevel, timeout=10)
+        files = [os.path.join(paths.toplevel, p) for p in proc.stdout.decode(errors="replace").split("\0") if p]
+        dirs = sorted({os.path.dirname(p) for p in files} | {paths.toplevel})
+        _tracked.clear()  # only the current index is worth keeping
+        _tracked[key] = (files, dirs)
+    return _tracked[key]
+
+
+def fingerprint(cwd: str) -> Optional[str]:
+    """Digest of the repository state that read-only tools depend on (blocking)."""
+    paths = repo_paths(cwd)
+    if paths is None:
+        return None
+    checksum = index_checksum(paths)
+    files, dirs = _tracked_paths(paths, checksum)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{paths.toplevel}\0{head_oid(paths)}\0".encode())
+    digest.update(checksum)
+    for path in (os.path.join(paths.common_dir, name) for name in ("packed-refs", "config", "FETCH_HEAD")):
+        digest.update(repr(_stat_token(path)).encode())
+    for path in dirs:
+        digest.update(repr(_stat_token(path)).encode())
+    for path in files:
+        digest.update(repr(_stat_token(path)).encode())
+    return digest.hexdigest()
+
+
+class ToolResultCache:
+    """Bounded LRU of tool results with in-flight dedupe."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped by invalidate(); results of runs that started earlier are not stored
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self._in_flight.clear()
+        self._generation += 1
+
+    async def get_or_run(self, key: Hashable, run: Callable[[], Awaitable[dict]]) -> dict:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(self._entries[key])
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return dict(await asyncio.shield(pending))
+
+        self.misses += 1
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await run()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here if no one else was waiting
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        future.set_result(result)
+        if result.get("success") and generation == self._generation and self.max_entries > 0:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
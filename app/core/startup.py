@@ -0,0 +1,183 @@
+"""
+Startup profiling: `python -m app.main --startup-profile`.
+
+Reports how long it takes the CLI to become ready, in two views:
+
+- an import tree like `python -X importtime`, from a wrapper around
+  `__import__`. Each module has its self and cumulative time and the thread
+  that imported it, so imports made by background warm-ups are visible;
+- wall-clock spans around each component's construction and warm-up.
+
+The profiler is stdlib-only so it can be enabled before anything else is
+imported. tests/test_startup.py checks that the heavy libraries stay out
+of the import path, and holds startup to STARTUP_BUDGET_MS times
+STARTUP_BUDGET_SLACK (3 by default, so a loaded machine doesn't fail it;
+set it to 1 to check the budget itself).
+"""
+import builtins
+import importlib.util
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional
+
+# Ready-to-listen budget for the CLI itself, models excluded (they load in the background)
+STARTUP_BUDGET_MS = 1000
+# Must only ever be imported lazily, on first use or by a warm-up thread
+HEAVY_MODULES = (
+    "faster_whisper", "ctranslate2", "torch", "setfit", "transformers", "sentence_transformers",
+    "groq", "google.generativeai", "litellm", "sounddevice", "soundfile", "fastmcp",
+)
+# Imports shorter than this are left out of the printed tree
+REPORT_MIN_MS = 2.0
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    depth: int
+    thread: str
+    start_ms: float
+    cumulative_ms: float = 0.0
+    self_ms: float = 0.0
+
+
+@dataclass
+class Span:
+    name: str
+    thread: str
+    start_ms: float
+    duration_ms: float
+
+
+class StartupProfiler:
+    """Collects import timings and named spans from the moment it is enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self.imports: List[ImportRecord] = []
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_import = None
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        self.t0 = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._traced_import
+
+    def disable(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _traced_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        try:
+            package = (globals or {}).get("__package__") if level else None
+            module = importlib.util.resolve_name("." * level + name, package) if level else name
+        except (ImportError, ValueError):
+            module = name
+        if module in sys.modules or original is None:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = self._local.__dict__.setdefault("stack", [])
+        record = ImportRecord(module, len(stack), threading.current_thread().name, self._now_ms())
+        with self._lock:
+            self.imports.append(record)
+        children = [0.0]
+        stack.append(children)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            stack.pop()
+            record.cumulative_ms = elapsed
+            record.self_ms = max(0.0, elapsed - children[0])
+            if stack:
+                stack[-1][0] += elapsed
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a block of startup work (no-op unless enabled)."""
+        if not self.enabled:
+            yield
+            return
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.spans.append(Span(name, threading.current_thread().name, start, self._now_ms() - start))
+
+    def mark(self, name: str) -> None:
+        """A zero-length span, e.g. the moment the CLI is ready."""
+        if self.enabled:
+            with self._lock:
+                self.spans.append(Span(name, threading.current_thread().name, self._now_ms(), 0.0))
+
+    def heavy_imports(self, thread: Optional[str] = "MainThread") -> List[str]:
+        """HEAVY_MODULES imported (by `thread`, or by any thread if None) so far."""
+        return [
+            r.module for r in self.imports
+            if (thread is None or r.thread == thread)
+            and any(r.module == m or r.module.startswith(m + ".") for m in HEAVY_MODULES)
+        ]
+
+    def to_dict(self) -> Dict[str, object]:
+        ready = next((s.start_ms for s in self.spans if s.name == "ready"), self._now_ms())
+        return {
+            "ready_ms": round(ready, 1),
+            "budget_ms": STARTUP_BUDGET_MS,
+            "spans": [asdict(s) for s in self.spans],
+            "imports": [asdict(r) for r in self.imports],
+            "heavy_imports_main_thread": self.heavy_imports(),
+        }
+
+    def report(self, console, as_json: bool = False) -> None:
+        data = self.to_dict()
+        if as_json:
+            print(json.dumps(data))
+            return
+
+        from rich.table import Table
+
+        tree = Table(title="Imports (-X importtime style)", show_edge=False)
+        tree.add_column("self ms", justify="right")
+        tree.add_column("cumulative ms", justify="right")
+        tree.add_column("module")
+        tree.add_column("thread", style="dim")
+        for r in self.imports:
+            if r.cumulative_ms >= REPORT_MIN_MS:
+                tree.add_row(f"{r.self_ms:.1f}", f"{r.cumulative_ms:.1f}", "  " * r.depth + r.module, r.thread)
+        console.print(tree)
+
+        spans = Table(title="Startup spans", show_edge=False)
+        spans.add_column("span")
+        spans.add_column("start ms", justify="right")
+        spans.add_column("duration ms", justify="right")
+        spans.add_column("thread", style="dim")
+        for s in sorted(self.spans, key=lambda s: s.start_ms):
+            spans.add_row(s.name, f"{s.start_ms:.1f}", f"{s.duration_ms:.1f}", s.thread)
+        console.print(spans)
+
+        style = "green" if data["ready_ms"] <= STARTUP_BUDGET_MS else "bold red"
+        console.print(f"[{style}]Ready in {data['ready_ms']:.0f} ms (budget {STARTUP_BUDGET_MS} ms)[/]")
+        if data["heavy_imports_main_thread"]:
+            console.print(f"[bold red]Heavy modules imported on the main thread:[/] "
+                          f"{', '.join(data['heavy_imports_main_thread'])}")
+
+
+# Shared by app.main and the components it times
+profiler = StartupProfiler()
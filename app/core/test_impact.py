@@ -0,0 +1,340 @@
+"""
+Change-aware test selection for run_tests.
+
+select_tests() finds what changed since HEAD (`git diff HEAD`, i.e. staged
+and unstaged changes, plus new untracked files). It then picks the test files
+that import those files, directly or through other project modules, using a
+static import graph:
+
+- every Python file git knows about (tracked or untracked, not ignored) is
+  parsed with ast for its import statements, including imports inside
+  functions. Relative imports are resolved, and importing a.b.c also counts
+  as importing a/__init__.py and a/b/__init__.py;
+- the graph is cached in .git/gitvoice/test-impact.json. A file is parsed
+  again only when its mtime or size changed.
+
+Files the app itself writes while it runs (metrics, trace, profiles; see
+app_outputs()) are not counted as changes: every voice command appends to
+metrics.jsonl, which would otherwise force the full suite each time.
+
+Instead of a selection, the full suite runs whenever one could miss
+something:
+
+- a conftest.py or a pytest or packaging config file (CONFIG_PATTERNS)
+  changed;
+- any other non-Python file changed, since tests may read it;
+- a conftest imports a changed module;
+- nothing changed at all;
+- git can't tell what changed.
+
+Imports made at run time (importlib, __import__, plugins) are invisible to
+the graph.
+
+After each run, record_durations() stores each test file's time and test
+count from pytest's JUnit XML. The next selection uses them to say how
+many tests it skipped and roughly how much time that saved.
+"""
+import ast
+import json
+import logging
+import os
+import posixpath
+import re
+import subprocess
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+from app.core.result_cache import RepoPaths, repo_paths
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached data changes shape
+CACHE_VERSION = 1
+GIT_TIMEOUT_S = 10
+# A change to any of these can affect every test
+CONFIG_PATTERNS = ("conftest.py", "pytest.ini", "pyproject.toml", "setup.cfg", "setup.py", "tox.ini",
+                   "noxfile.py", ".coveragerc", "requirements*.txt", "Pipfile*", "poetry.lock", "uv.lock")
+# Changes that can't affect a test
+IGNORED_SUFFIXES = (".md", ".rst")
+TEST_FILE = re.compile(r"(?:^|/)(?:test_[^/]*|[^/]*_test)\.py$")
+
+
+def module_names(path: str) -> List[str]:
+    """Dotted names a repository file is importable as (`src/` layouts included)."""
+    parts = path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    names = [".".join(parts)] if parts else []
+    if len(parts) > 1 and parts[0] == "src":
+        names.append(".".join(parts[1:]))
+    return names
+
+
+def parse_imports(source: bytes, path: str) -> List[str]:
+    """Absolute names of every module (or module attribute) `path` imports."""
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError):
+        return []
+    package = path.split("/")[:-1]
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            if node.level:
+                if node.level - 1 > len(package):
+                    continue
+                base = ".".join(package[:len(package) - node.level + 1])
+                module = ".".join(p for p in (base, module) if p)
+            if module:
+                names.add(module)
+            # `from a import b` may import the submodule a.b
+            names.update(".".join(p for p in (module, alias.name) if p) for alias in node.names if alias.name != "*")
+    return sorted(names)
+
+
+@dataclass
+class Selection:
+    tests: Optional[List[str]]  # repository-relative test files to run; None = the full suite
+    reason: str
+    total_files: int = 0
+    skipped_tests: int = 0  # tests in the skipped files, as of their last run
+    saved_s: float = 0.0    # and the time they took then
+
+    @property
+    def skipped_files(self) -> int:
+        return self.total_files - len(self.tests) if self.tests is not None else 0
+
+    def describe(self) -> str:
+        if self.tests is None:
+            return f"Test selection: full suite ({self.reason})"
+        skipped = [f"skipped {self.skipped_files} files"]
+        if self.skipped_tests:
+            skipped.append(f"{self.skipped_tests} tests")
+        if self.saved_s:
+            skipped.append(f"~{self.saved_s:.0f}s saved" if self.saved_s >= 1 else "<1s saved")
+        return f"Test selection: {len(self.tests)} of {self.total_files} test files {self.reason} ({', '.join(skipped)})"
+
+
+class ImportGraph:
+    """Imports of every Python file in a repository, plus test file durations, cached on disk."""
+
+    def __init__(self, root: str, cache_path: str):
+        self.root = root
+        self.cache_path = cache_path
+        self.files: Dict[str, Tuple[int, int, List[str]]] = {}  # path -> (mtime_ns, size, imports)
+        self.durations: Dict[str, Tuple[float, int]] = {}       # test file -> (seconds, tests)
+        self._load()
+
+    @classmethod
+    def for_repo(cls, paths: RepoPaths) -> "ImportGraph":
+        return cls(paths.toplevel, os.path.join(paths.git_dir, "gitvoice", "test-impact.json"))
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable import graph cache {self.cache_path}: {e}")
+            return
+        if data.get("version") == CACHE_VERSION:
+            self.files = {path: tuple(entry) for path, entry in data["files"].items()}
+            self.durations = {path: tuple(entry) for path, entry in data["durations"].items()}
+
+    def save(self) -> None:
+        data = {"version": CACHE_VERSION, "files": self.files, "durations": self.durations}
+        tmp = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save the import graph cache: {e}")
+
+    def update(self, paths: Iterable[str]) -> int:
+        """Bring the graph in line with `paths` (the repository's Python files); returns how many were parsed."""
+        files: Dict[str, Tuple[int, int, List[str]]] = {}
+        parsed = 0
+        for path in paths:
+            full = os.path.join(self.root, path)
+            try:
+                st = os.stat(full)
+                cached = self.files.get(path)
+                if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                    files[path] = cached
+                    continue
+                with open(full, "rb") as f:
+                    source = f.read()
+            except OSError:
+                continue  # deleted from the work tree
+            files[path] = (st.st_mtime_ns, st.st_size, parse_imports(source, path))
+            parsed += 1
+        self.files = files
+        return parsed
+
+    def importers(self, extra: Iterable[str] = ()) -> Dict[str, Set[str]]:
+        """file -> the files that import it; `extra` (e.g. deleted files) can be imported too."""
+        modules: Dict[str, str] = {}
+        for path in [*self.files, *extra]:
+            for name in module_names(path):
+                modules[name] = path
+        importers: Dict[str, Set[str]] = defaultdict(set)
+        for path, (_, _, imports) in self.files.items():
+            for name in imports:
+                parts = name.split(".")
+                # a.b.c runs a/__init__.py and a/b/__init__.py first
+                for i in range(1, len(parts) + 1):
+                    target = modules.get(".".join(parts[:i]))
+                    if target is not None and target != path:
+                        importers[target].add(path)
+        return importers
+
+    def affected(self, changed: Iterable[str]) -> Set[str]:
+        """The changed files and every file that imports one of them, transitively."""
+        changed = list(changed)
+        importers = self.importers(extra=changed)
+        seen = set(changed)
+        queue = deque(changed)
+        while queue:
+            for importer in importers.get(queue.popleft(), ()):
+                if importer not in seen:
+                    seen.add(importer)
+                    queue.append(importer)
+        return seen
+
+
+def _git_paths(root: str, *args: str) -> Optional[List[str]]:
+    try:
+        proc = subprocess.run(["git", args[0], "-z", *args[1:]], capture_output=True, cwd=root, timeout=GIT_TIMEOUT_S)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"git {args[0]} failed: {e}")
+        return None
+    if proc.returncode != 0:
+        logger.info(f"git {args[0]} failed: {proc.stderr.decode(errors='replace').strip()}")
+        return None
+    return [p for p in proc.stdout.decode("utf-8", errors="surrogateescape").split("\0") if p]
+
+
+def changed_files(root: str) -> Optional[List[str]]:
+    """Files changed since HEAD, staged or not, and new untracked files (None if git can't tell)."""
+    diff = _git_paths(root, "diff", "HEAD", "--name-only", "--no-renames")
+    untracked = _git_paths(root, "ls-files", "--others", "--exclude-standard")
+    if diff is None or untracked is None:
+        return None
+    return sorted(set(diff + untracked))
+
+
+def app_outputs(config) -> List[str]:
+    """Absolute glob patterns of the files GitVoice writes while it runs, per `config`."""
+    patterns = []
+    if config.metrics_file:
+        log = os.path.abspath(config.metrics_file)
+        stem, suffix = os.path.splitext(log)
+        patterns += [log, f"{stem}.*{suffix}*"]  # and its rotated copies, maybe gzipped
+    if config.metrics_db:
+        patterns.append(os.path.abspath(config.metrics_db) + "*")  # with -wal, -shm, -journal
+    if config.trace_file:
+        patterns.append(os.path.abspath(config.trace_file))
+    if config.profile_dir:
+        patterns.append(os.path.join(os.path.abspath(config.profile_dir), "*"))
+    return patterns
+
+
+def _repo_patterns(root: str, patterns: Iterable[str]) -> List[str]:
+    """`patterns` made relative to the repository root; those outside it are dropped."""
+    relative = []
+    for pattern in patterns:
+        head, tail = os.path.split(pattern)
+        path = os.path.relpath(os.path.join(os.path.realpath(head), tail), root).replace(os.sep, "/")
+        if path != ".." and not path.startswith("../"):
+            relative.append(path)
+    return relative
+
+
+def select_tests(cwd: str, ignore: Iterable[str] = ()) -> Selection:
+    """
+    The test files affected by the uncommitted changes of the repository containing `cwd`.
+
+    Changed files matching an `ignore` glob (absolute, e.g. from app_outputs())
+    don't count as changes.
+    """
+    paths = repo_paths(cwd)
+    if paths is None:
+        return Selection(None, "not in a git repository")
+    changed = changed_files(paths.toplevel)
+    if changed is None:
+        return Selection(None, "git could not list the changes")
+    ignored = _repo_patterns(os.path.realpath(paths.toplevel), ignore)
+    changed = [p for p in changed if not any(fnmatch(p, pattern) for pattern in ignored)]
+    if not changed:
+        return Selection(None, "no changes since HEAD")
+    for path in changed:
+        name = posixpath.basename(path)
+        if any(fnmatch(name, pattern) for pattern in CONFIG_PATTERNS):
+            return Selection(None, f"{path} changed")
+        if not path.endswith((".py", *IGNORED_SUFFIXES)):
+            return Selection(None, f"{path} changed and tests may read it")
+
+    python_files = _git_paths(paths.toplevel, "ls-files", "--cached", "--others", "--exclude-standard", "--", "*.py")
+    if python_files is None:
+        return Selection(None, "git could not list the Python files")
+    graph = ImportGraph.for_repo(paths)
+    parsed = graph.update(python_files)
+    if parsed:
+        graph.save()
+    logger.info(f"Import graph: {len(graph.files)} files, {parsed} parsed")
+
+    changed_py = [p for p in changed if p.endswith(".py")]
+    affected = graph.affected(changed_py)
+    conftest = next((p for p in sorted(affected) if posixpath.basename(p) == "conftest.py"), None)
+    if conftest is not None:
+        return Selection(None, f"{conftest} imports a changed module")
+
+    tests = sorted(p for p in graph.files if TEST_FILE.search(p))
+    selected = [p for p in tests if p in affected]
+    skipped = [graph.durations[p] for p in tests if p not in affected and p in graph.durations]
+    reason = f"affected by {len(changed_py)} changed file{'s' if len(changed_py) != 1 else ''}"
+    return Selection(selected, reason, total_files=len(tests),
+                     skipped_tests=sum(n for _, n in skipped), saved_s=sum(s for s, _ in skipped))
+
+
+def record_durations(cwd: str, junit_xml: str) -> None:
+    """Remember each test file's time and test count from a pytest JUnit XML report."""
+    paths = repo_paths(cwd)
+    if paths is None:
+        return
+    try:
+        report = ElementTree.parse(junit_xml).getroot()
+    except (OSError, ElementTree.ParseError) as e:
+        logger.debug(f"No test durations to record: {e}")
+        return
+    files: Dict[str, Optional[str]] = {}
+
+    def test_file(classname: str) -> Optional[str]:
+        # The test's module, then its class if any: tests.test_a.TestB
+        if classname not in files:
+            parts = classname.split(".")
+            candidates = ("/".join(parts[:i]) + ".py" for i in range(len(parts), 0, -1))
+            files[classname] = next((c for c in candidates if os.path.isfile(os.path.join(paths.toplevel, c))), None)
+        return files[classname]
+
+    totals: Dict[str, List[float]] = {}
+    for case in report.iter("testcase"):
+        path = test_file(case.get("classname", ""))
+        if path is None:
+            continue
+        total = totals.setdefault(path, [0.0, 0])
+        total[0] += float(case.get("time") or 0)
+        total[1] += 1
+    if totals:
+        graph = ImportGraph.for_repo(paths)
+        graph.durations.update({path: (round(s, 3), int(n)) for path, (s, n) in totals.items()})
+        graph.save()
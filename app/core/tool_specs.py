@@ -0,0 +1,243 @@
+"""
+Declarative tool specs.
+
+One ToolSpec per tool says everything the rest of the app needs to know
+about it:
+
+- the implementation and a pydantic model for its parameters. The model is
+  built once at import; it also carries the aliases older callers and the
+  LLM use (`n` for `limit`, `commits` for `steps`);
+- the dependencies execute_tool injects (e.g. `brain`);
+- its ToolPolicy: read/write/remote access, confirmation and retries;
+- the shape of its return value, so results are normalized without
+  inspecting them;
+- whether its results may be cached (app.core.result_cache).
+
+TOOL_POLICIES, the LLM prompt (tool_prompt) and the MCP tools are all
+generated from TOOL_SPECS. To add a tool, add a spec here.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, Type
+
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+from pydantic.fields import FieldInfo
+from pydantic.json_schema import SkipJsonSchema
+
+from app.core.tools.git_ops.add import git_add_all
+from app.core.tools.git_ops.branch import git_checkout_branch
+from app.core.tools.git_ops.commit_push import git_commit, git_push, smart_commit_push
+from app.core.tools.git_ops.diff import git_diff
+from app.core.tools.git_ops.fetch import git_fetch
+from app.core.tools.git_ops.log import git_log
+from app.core.tools.git_ops.merge import git_merge
+from app.core.tools.git_ops.pull import git_pull
+from app.core.tools.git_ops.remote import git_remote_list
+from app.core.tools.git_ops.reset import git_reset
+from app.core.tools.git_ops.revert import git_revert
+from app.core.tools.git_ops.stash import git_stash_pop, git_stash_push
+from app.core.tools.git_ops.status import git_status
+from app.core.tools.git_ops.test_runner import run_tests
+
+ToolFunc = Callable[..., Awaitable[Any]]
+
+
+@dataclass
+class ToolPolicy:
+    confirmation_required: bool
+    retries: int
+    retry_on_exit_codes: List[int] = field(default_factory=list)
+    # read: no repo changes; write: working tree / index / HEAD;
+    # remote: only remote or remote-tracking refs (push, fetch)
+    access: str = "read"
+
+
+# -- return shapes --------------------------------------------------------------
+
+def _from_output(result: Tuple[str, int]) -> dict:
+    stdout, code = result
+    return {"stdout": stdout, "exit_code": code, "success": code == 0}
+
+
+def _from_commit(result: Tuple[str, str, int]) -> dict:
+    msg, stdout, code = result
+    return {"commit_message": msg, "stdout": stdout, "exit_code": code, "success": code == 0}
+
+
+def _from_dict(result: dict) -> dict:
+    result.setdefault("exit_code", 0)
+    result.setdefault("success", result["exit_code"] == 0)
+    return result
+
+
+NORMALIZERS: Dict[str, Callable[[Any], dict]] = {
+    "output": _from_output,  # (stdout, exit_code)
+    "commit": _from_commit,  # (commit_message, stdout, exit_code)
+    "dict": _from_dict,      # already a result dict
+}
+
+
+# -- parameter models -----------------------------------------------------------
+
+class ToolParams(BaseModel):
+    """Base for parameter models; parameters a tool doesn't take are dropped."""
+
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
+
+
+class NoParams(ToolParams):
+    pass
+
+
+class LogParams(ToolParams):
+    limit: int = Field(20, validation_alias=AliasChoices("limit", "n"), description="default 20")
+
+
+class DiffParams(ToolParams):
+    path: Optional[str] = Field(None, description="optional")
+    since_origin_main: bool = Field(False, description="boolean")
+
+
+class CommitParams(ToolParams):
+    message: str = Field(description="required")
+
+
+class PushParams(ToolParams):
+    remote: str = Field("origin", description="default origin")
+    branch: str = Field("", description="optional")
+
+
+class PullParams(ToolParams):
+    remote: Optional[str] = Field(None, description="default origin")
+    branch: Optional[str] = Field(None, description="optional")
+
+
+class FetchParams(ToolParams):
+    remote: Optional[str] = Field(None, description="optional")
+    extra_args: SkipJsonSchema[Optional[List[str]]] = None
+
+
+class StashPushParams(ToolParams):
+    message: Optional[str] = Field(None, description="optional")
+
+
+class RevertParams(ToolParams):
+    commit: Optional[str] = Field(None, description="optional, defaults to HEAD")
+
+
+class MergeParams(ToolParams):
+    branch: str = Field(description="required")
+
+
+class ResetParams(ToolParams):
+    mode: Literal["soft", "mixed", "hard"] = Field("hard", description="soft, mixed, hard")
+    steps: int = Field(1, validation_alias=AliasChoices("commits", "steps"), description="default 1, max 3")
+
+
+class BranchParams(ToolParams):
+    name: str = Field(description="required")
+    create: bool = Field(False, description="boolean, default false")
+
+
+class RunTestsParams(ToolParams):
+    full: bool = Field(False, description="boolean, default false (true: not only tests affected by changes)")
+    command: SkipJsonSchema[Optional[str]] = None
+    # Set by the voice CLI and the MCP server from the config, with a live output sink
+    timeout_s: SkipJsonSchema[Optional[float]] = None
+    on_output: SkipJsonSchema[Optional[Callable[..., Any]]] = None
+    ignore_paths: SkipJsonSchema[Optional[List[str]]] = None
+
+
+class SmartCommitParams(ToolParams):
+    auto_stage: bool = Field(True, description="boolean, default true")
+    push: bool = Field(True, description="boolean, default true")
+    # Set by the voice CLI, never by the LLM or MCP clients
+    confirm_callback: SkipJsonSchema[Optional[Callable[..., Any]]] = None
+
+
+@dataclass
+class ToolSpec:
+    name: str
+    func: ToolFunc
+    description: str
+    policy: ToolPolicy
+    params: Type[ToolParams] = NoParams
+    returns: str = "output"
+    # execute_tool keyword arguments passed through to the tool
+    inject: Tuple[str, ...] = ()
+    # Extra spoken forms for the STT hotword prompt
+    phrases: Tuple[str, ...] = ()
+    # Exposed as this MCP tool (None: voice CLI only)
+    mcp_name: Optional[str] = None
+    # Read-only and a pure function of the repository state: results are cached
+    cacheable: bool = False
+
+    def __post_init__(self):
+        self.normalize = NORMALIZERS[self.returns]
+
+
+_SPECS = [
+    ToolSpec("git.status", git_status, "Check status",
+             ToolPolicy(False, 0, []), mcp_name="git_status", cacheable=True),
+    ToolSpec("git.log", git_log, "Show commit history",
+             ToolPolicy(False, 0, []), params=LogParams, cacheable=True),
+    ToolSpec("git.diff", git_diff, "Show changes",
+             ToolPolicy(False, 0, []), params=DiffParams, mcp_name="git_diff", cacheable=True),
+    ToolSpec("git.add_all", git_add_all, "Stage all changes",
+             ToolPolicy(False, 0, [], access="write")),
+    ToolSpec("git.commit", git_commit, "Commit changes",
+             ToolPolicy(True, 0, [], access="write"), params=CommitParams),
+    ToolSpec("git.push", git_push, "Push to remote",
+             ToolPolicy(True, 1, [1], access="remote"), params=PushParams),
+    ToolSpec("git.pull", git_pull, "Pull from remote",
+             ToolPolicy(True, 0, [], access="write"), params=PullParams, mcp_name="git_pull"),
+    ToolSpec("git.fetch", git_fetch, "Fetch updates from remote",
+             ToolPolicy(False, 0, [], access="remote"), params=FetchParams),
+    ToolSpec("git.remote_list", git_remote_list, "List configured remotes",
+             ToolPolicy(False, 0, []), cacheable=True),
+    ToolSpec("git.stash_push", git_stash_push, "Stash current changes",
+             ToolPolicy(True, 0, [], access="write"), params=StashPushParams),
+    ToolSpec("git.stash_pop", git_stash_pop, "Apply and drop most recent stash",
+             ToolPolicy(True, 0, [], access="write")),
+    ToolSpec("git.revert", git_revert, "Revert a commit safely",
+             ToolPolicy(True, 0, [], access="write"), params=RevertParams),
+    ToolSpec("git.merge", git_merge, "Merge a branch",
+             ToolPolicy(True, 0, [], access="write"), params=MergeParams),
+    ToolSpec("git.reset", git_reset, "Reset changes",
+             ToolPolicy(True, 0, [], access="write"), params=ResetParams),
+    ToolSpec("git.branch", git_checkout_branch, "Create or switch branches",
+             ToolPolicy(True, 0, [], access="write"), params=BranchParams,
+             phrases=("checkout branch", "create branch")),
+    ToolSpec("git.run_tests", run_tests, "Run the project's test suite",
+             ToolPolicy(False, 1, [1]), params=RunTestsParams, returns="dict", mcp_name="run_tests"),
+    ToolSpec("git.smart_commit_push", smart_commit_push,
+             "Automatically stage, commit (with generated message), and push",
+             ToolPolicy(True, 1, [1], access="write"), params=SmartCommitParams, returns="commit",
+             inject=("brain",), mcp_name="smart_commit_push"),
+]
+
+TOOL_SPECS: Dict[str, ToolSpec] = {spec.name: spec for spec in _SPECS}
+
+
+def public_params(spec: ToolSpec) -> Dict[str, FieldInfo]:
+    """Parameters the LLM and MCP clients may set (not the CLI-only ones)."""
+    return {
+        name: info for name, info in spec.params.model_fields.items()
+        if not any(isinstance(m, SkipJsonSchema) for m in info.metadata)
+    }
+
+
+def param_hint(spec: ToolSpec) -> str:
+    """`limit [default 20], path [optional]` for the LLM prompt ("" if no public params)."""
+    return ", ".join(
+        f"{name} [{info.description}]" if info.description else name
+        for name, info in public_params(spec).items()
+    )
+
+
+def tool_prompt() -> str:
+    """The "Available tools" list of the LLM system prompt."""
+    lines = []
+    for spec in TOOL_SPECS.values():
+        hint = param_hint(spec)
+        lines.append(f"- {spec.name}: {spec.description}" + (f" (params: {hint})" if hint else ""))
+    return "\n".join(lines)
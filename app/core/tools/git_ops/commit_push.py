@@ -1,4 +1,5 @@
 import asyncio
+import inspect
 import logging
 from typing import Tuple, Any, Optional
 from .utils import run_git
@@ -87,8 +88,16 @@ async def smart_commit_push(
 
         # Confirmation Step
         if confirm_callback:
-            if not confirm_callback(commit_message):
+            confirmed = confirm_callback(commit_message)
+            if inspect.isawaitable(confirmed):
+                # The CLI asks without blocking the event loop
+                confirmed = await confirmed
+            if not confirmed:
                 return commit_message, "Smart commit cancelled by user.", 1
+            # The repository lock is released while the user answers
+            staged_now, _ = await run_git(["diff", "--staged"])
+            if staged_now != diff_cached:
+                return commit_message, "Staged changes changed while waiting for confirmation; nothing committed.", 1
         
         # 4. Commit
         _, commit_code = await run_git(["commit", "-m", commit_message])
@@ -1,41 +1,245 @@
-from typing import Dict, Optional
+"""
+Run the project's tests without blocking the event loop.
+
+The command runs as an asyncio subprocess in its own process group. Its
+output (stdout and stderr, interleaved) is read as it is produced: every
+line goes to `on_output`, if given, together with a TestSummary that is
+updated from pytest's (or unittest's) progress lines, so the CLI and the
+MCP client see how the run is going long before it ends.
+
+Only the first HEAD_LINES and the last TAIL_LINES lines are kept for the
+result, so a huge suite can't fill memory. After timeout_s the whole
+process group is killed (test workers and servers started by the suite
+included) and the result is a timeout with whatever was seen so far.
+
+The default command (pytest) only runs the test files affected by the
+uncommitted changes, unless `full` is set; see app.core.test_impact. When
+none are affected, nothing runs and the result is marked skipped, not passed.
+Callers set `full` unless TEST_SELECTION is on.
+"""
+import asyncio
+import codecs
+import dataclasses
+import inspect
+import logging
+import os
+import re
+import signal
 import subprocess
 import sys
+import tempfile
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.result_cache import repo_paths
+from app.core.test_impact import Selection, record_durations, select_tests
+from app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_S = 600.0
+HEAD_LINES = 100
+TAIL_LINES = 400
+MAX_FAILURES = 50
+# Time the suite gets to exit after SIGTERM before it is killed
+KILL_GRACE_S = 5.0
+TIMEOUT_EXIT_CODE = 124  # as timeout(1)
+NO_TESTS_COLLECTED = 5  # pytest's exit code
+CHUNK_SIZE = 64 * 1024
+
+# pytest: "collected 42 items", "tests/test_a.py ..F.s  [ 42%]" ("..F.s [ 42%]" with -q),
+# "tests/test_a.py::test_b PASSED  [ 42%]" (-v), "FAILED tests/test_a.py::test_b - ..."
+COLLECTED = re.compile(r"^collected (\d+) items?")
+PROGRESS = re.compile(r"^(?:\S+\s+)?([.FEsxX]+)\s*\[\s*(\d+)%\]$")
+VERBOSE = re.compile(r"^\S+::\S+ (PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b.*?(?:\[\s*(\d+)%\])?$")
+FAILED = re.compile(r"^(?:FAILED|ERROR) (\S+)")
+# "==== 1 failed, 41 passed in 3.21s ====" (no rules with -q), "=== no tests ran in 0.01s ==="
+PYTEST_FINAL = re.compile(r"^=*\s*(\d.*\b(?:passed|failed|errors?|skipped|deselected)\b.* in [\d.]+s.*?|no tests ran in [\d.]+s)\s*=*$")
+# unittest: "Ran 42 tests in 3.210s", then "OK" or "FAILED (failures=1)"
+UNITTEST_RAN = re.compile(r"^Ran (\d+) tests? in ")
+UNITTEST_RESULT = re.compile(r"^(OK|FAILED)\b.*$")
+
+_OUTCOMES = {".": "passed", "F": "failed", "E": "errors", "s": "skipped", "x": "skipped", "X": "passed",
+             "PASSED": "passed", "FAILED": "failed", "ERROR": "errors", "SKIPPED": "skipped",
+             "XFAIL": "skipped", "XPASS": "passed"}
+
+
+@dataclass
+class TestSummary:
+    """What is known about the run so far, from the output lines seen."""
+    __test__ = False  # not a pytest test class
+
+    collected: Optional[int] = None
+    passed: int = 0
+    failed: int = 0
+    errors: int = 0
+    skipped: int = 0
+    percent: Optional[int] = None
+    failures: List[str] = field(default_factory=list)
+    final: Optional[str] = None  # the runner's own summary line
+    _ran: Optional[str] = None
+
+    def feed(self, line: str) -> bool:
+        """Update from one output line; True if anything changed."""
+        line = line.strip()
+        if m := PROGRESS.match(line):
+            for outcome in m.group(1):
+                self._count(outcome)
+            self.percent = int(m.group(2))
+        elif m := VERBOSE.match(line):
+            self._count(m.group(1))
+            if m.group(2):
+                self.percent = int(m.group(2))
+        elif m := FAILED.match(line):
+            if m.group(1) not in self.failures and len(self.failures) < MAX_FAILURES:
+                self.failures.append(m.group(1))
+        elif m := COLLECTED.match(line):
+            self.collected = int(m.group(1))
+        elif m := PYTEST_FINAL.match(line):
+            self.final = m.group(1)
+        elif m := UNITTEST_RAN.match(line):
+            self._ran = line
+        elif self._ran and (m := UNITTEST_RESULT.match(line)):
+            self.final = f"{self._ran}: {line}"
+        else:
+            return False
+        return True
+
+    def _count(self, outcome: str) -> None:
+        name = _OUTCOMES[outcome]
+        setattr(self, name, getattr(self, name) + 1)
+
+    def headline(self) -> str:
+        """The final summary line, or the counts so far."""
+        if self.final:
+            return self.final
+        counts = [f"{n} {name}" for name, n in (("failed", self.failed), ("errors", self.errors),
+                                                 ("passed", self.passed), ("skipped", self.skipped)) if n]
+        text = ", ".join(counts) or "no results yet"
+        if self.percent is not None:
+            text += f" ({self.percent}%)"
+        return text
+
+
+class OutputBuffer:
+    """Keeps the first `head` and the last `tail` lines of the output."""
+
+    def __init__(self, head: int = HEAD_LINES, tail: int = TAIL_LINES):
+        self.head_limit = head
+        self.head: List[str] = []
+        self.tail: deque = deque(maxlen=tail)
+        self.total = 0
+
+    def append(self, line: str) -> None:
+        self.total += 1
+        if len(self.head) < self.head_limit:
+            self.head.append(line)
+        else:
+            self.tail.append(line)
+
+    @property
+    def omitted(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        lines = list(self.head)
+        if self.omitted:
+            lines.append(f"... {self.omitted} lines omitted ...")
+        lines.extend(self.tail)
+        return "\n".join(lines)
+
+
+OutputCallback = Callable[[str, TestSummary], Any]
+
 
-async def run_tests(command: Optional[str] = None) -> Dict[str, object]:
+@traced("run_tests")
+async def run_tests(command: Optional[str] = None,
+                    full: bool = False,
+                    timeout_s: Optional[float] = DEFAULT_TIMEOUT_S,
+                    on_output: Optional[OutputCallback] = None,
+                    ignore_paths: Optional[List[str]] = None) -> Dict[str, object]:
     """
     Run tests using the configured command (e.g. 'pytest').
 
+    Without a command, pytest runs only the test files affected by the
+    uncommitted changes (app.core.test_impact) unless `full` is set.
+    `on_output(line, summary)` (sync or async) is called for every output
+    line as it arrives. timeout_s of None or 0 means no time limit.
+    Changes to files matching `ignore_paths` (absolute globs, the app's own
+    outputs) don't affect the selection.
+
     Returns:
         {
-            "stdout": full text output,
-            "exit_code": int,
-            "summary": short human-readable summary
+            "stdout": first and last lines of the output,
+            "exit_code": int (124 on timeout),
+            "summary": short human-readable summary,
+            "failures": ids of the failed tests,
+            "timed_out": bool,
+            "omitted_lines": lines dropped from the middle of stdout,
+            "selection": what was selected and skipped (default command only),
+            "skipped": True (and "success": False) if selection left nothing to run
         }
     """
+    output = OutputBuffer(HEAD_LINES, TAIL_LINES)
+    summary = TestSummary()
+
+    async def emit(line: str) -> None:
+        output.append(line)
+        summary.feed(line)
+        if on_output is None:
+            return
+        try:
+            result = on_output(line, summary)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Test output callback failed: {e}")
+
+    cwd = os.getcwd()
+    selection: Optional[Selection] = None
+    junit: Optional[str] = None
     if command:
         cmd = command.split()
     else:
         # Safer default: run pytest via current python interpreter
         cmd = [sys.executable, "-m", "pytest"]
+        if not full:
+            selection = await asyncio.to_thread(select_tests, cwd, ignore_paths or ())
+            if selection.tests == []:
+                return _nothing_ran("No tests are affected by the changes", selection)
+            if selection.tests:
+                root = repo_paths(cwd).toplevel
+                cmd += [os.path.relpath(os.path.join(root, path), cwd) for path in selection.tests]
+        # Per-file durations, so later selections can tell how much time they save
+        fd, junit = tempfile.mkstemp(prefix="gitvoice-junit-", suffix=".xml")
+        os.close(fd)
+        cmd.append(f"--junitxml={junit}")
 
-    # Using subprocess.run directly as tests often need specific environment/config 
-    # and might not just be a simple git command.
     try:
-        # Force utf-8 encoding to handle emoji/special chars on Windows
-        proc = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
-        stdout = proc.stdout
-        if proc.stderr:
-            stdout += "\n" + proc.stderr
-        
-        exit_code = proc.returncode
-        summary = "All tests passed." if exit_code == 0 else f"Tests failed (exit code {exit_code})."
-        
-        return {
-            "stdout": stdout,
-            "exit_code": exit_code,
-            "summary": summary
-        }
+        if selection is not None:
+            await emit(selection.describe())
+        return await _run(cmd, timeout_s, output, summary, emit, selection, cwd, junit)
+    finally:
+        if junit is not None:
+            try:
+                os.unlink(junit)
+            except OSError:
+                pass
+
+
+async def _run(cmd: List[str], timeout_s: Optional[float], output: OutputBuffer, summary: TestSummary,
+               emit: Callable[[str], Awaitable[None]], selection: Optional[Selection], cwd: str,
+               junit: Optional[str]) -> Dict[str, object]:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            # Line by line, not in 8 KB blocks, now that stdout is a pipe
+            env={**os.environ, "PYTHONUNBUFFERED": "1"},
+            **_new_process_group(),
+        )
     except Exception as e:
         return {
             "stdout": str(e),
@@ -43,4 +247,95 @@ async def run_tests(command: Optional[str] = None) -> Dict[str, object]:
             "summary": f"Execution failed: {str(e)}"
         }
 
+    async def pump() -> int:
+        # Force utf-8 to handle emoji/special chars on Windows
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        while chunk := await proc.stdout.read(CHUNK_SIZE):
+            *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                await emit(line.rstrip("\r"))
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            await emit(pending.rstrip("\r"))
+        return await proc.wait()
+
+    timed_out = False
+    try:
+        exit_code = await asyncio.wait_for(pump(), timeout_s or None)
+    except asyncio.TimeoutError:
+        timed_out = True
+        logger.warning(f"Tests timed out after {timeout_s:g}s; killing the process group")
+        await _kill_group(proc)
+        exit_code = TIMEOUT_EXIT_CODE
+    except asyncio.CancelledError:
+        await _kill_group(proc)
+        raise
+
+    if selection is not None and exit_code == NO_TESTS_COLLECTED:
+        # The affected files matched test_*.py but hold no tests
+        return {**_nothing_ran("The affected test files hold no tests", selection), "stdout": output.text()}
+    if timed_out:
+        text = f"Tests timed out after {timeout_s:g}s ({summary.headline()})."
+    elif exit_code == 0:
+        text = f"All tests passed ({summary.final})." if summary.final else "All tests passed."
+    else:
+        text = f"Tests failed (exit code {exit_code})" + (f": {summary.final}." if summary.final else ".")
+    if junit is not None and not timed_out:
+        await asyncio.to_thread(record_durations, cwd, junit)
+
+    result = {
+        "stdout": output.text(),
+        "exit_code": exit_code,
+        "summary": text,
+        "failures": summary.failures,
+        "timed_out": timed_out,
+        "omitted_lines": output.omitted,
+    }
+    if selection is not None:
+        result["summary"] += f" {selection.describe()}."
+        result["selection"] = _selection_fields(selection)
+    return result
+
+
+def _nothing_ran(reason: str, selection: Selection) -> Dict[str, object]:
+    # Not a pass: the executor's "skipped" shape, so it isn't shown as green
+    text = f"{reason}. {selection.describe()}."
+    return {"stdout": text, "stderr": f"Skipped: {text}", "exit_code": NO_TESTS_COLLECTED, "success": False,
+            "skipped": True, "summary": text, "selection": _selection_fields(selection)}
+
+
+def _selection_fields(selection: Selection) -> Dict[str, object]:
+    return {**dataclasses.asdict(selection), "skipped_files": selection.skipped_files,
+            "saved_s": round(selection.saved_s, 1)}
 
+
+def _new_process_group() -> Dict[str, Any]:
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+async def _kill_group(proc: asyncio.subprocess.Process) -> None:
+    """Stop the suite and everything it started: SIGTERM, then SIGKILL after KILL_GRACE_S."""
+    try:
+        if os.name == "nt":
+            # /T takes the whole process tree
+            killer = await asyncio.create_subprocess_exec(
+                "taskkill", "/F", "/T", "/PID", str(proc.pid),
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+            )
+            await killer.wait()
+        else:
+            # The group outlives its leader, so signal it even if pytest itself has exited
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(proc.wait(), KILL_GRACE_S)
+            except asyncio.TimeoutError:
+                pass
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass  # already gone
+    except Exception as e:
+        logger.error(f"Could not kill the test process group: {e}")
+    await proc.wait()
@@ -1,17 +1,43 @@
 import asyncio
 import logging
+import re
 from typing import List, Tuple
 
+from app.core.tracing import span
+
 logger = logging.getLogger(__name__)
 
+# Another git process holds the index (or a ref) lock: "Unable to create '.../index.lock': File exists."
+LOCK_CONTENTION = re.compile(r"Unable to create '[^']*\.lock': File exists")
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY_S = 0.05  # doubled after each attempt, ~1.5 s in total
+
 async def run_git(args: List[str]) -> Tuple[str, int]:
     """
     Run a git command with the given arguments asynchronously.
 
+    A command that failed only because another git process held a lock
+    file did nothing, so it is retried with backoff before the failure is
+    reported.
+
     Returns:
         stdout_or_stderr: str
         exit_code: int
     """
+    delay = LOCK_RETRY_DELAY_S
+    with span(f"run_git.{args[0] if args else ''}") as git_span:
+        output, code = await _run_git_once(args)
+        for _ in range(LOCK_RETRIES):
+            if code == 0 or not LOCK_CONTENTION.search(output):
+                break
+            logger.warning(f"git {args[0] if args else ''} hit lock contention, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            delay *= 2
+            output, code = await _run_git_once(args)
+        git_span.attrs["exit_code"] = code
+    return output, code
+
+async def _run_git_once(args: List[str]) -> Tuple[str, int]:
     cmd = ["git", *args]
     logger.info("Running git command: %s", " ".join(cmd))
     
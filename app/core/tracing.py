@@ -0,0 +1,235 @@
+"""
+Latency spans for every stage of a voice command.
+
+    with span("stt.transcribe"):
+        ...
+
+    @traced("brain.llm")
+    async def _process_llm(...): ...
+
+Each finished span is recorded in a per-name Histogram (log-linear buckets,
+HDR-style, better than 2% precision). stats() gives the p50/p95/p99 of each
+one; the CLI shows them when you type or say "stats".
+
+Spans nest through a contextvar, so they nest across `await` and
+asyncio.to_thread too. Each span is drawn on a track: either the one
+passed to span() or its parent's track. The voice session puts each
+utterance on its own track, "utterance 3". With TRACE_FILE set, every span
+is also written there in Chrome's trace event format. Open the file in
+chrome://tracing, https://ui.perfetto.dev or speedscope.
+
+Recording a span costs a few microseconds; nothing is written unless a
+trace file is configured.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Values keep SUB_BUCKET_BITS significant bits: relative error below 1/64
+SUB_BUCKET_BITS = 7
+PERCENTILES = (50, 95, 99)
+# Trace events buffered before they are appended to the trace file
+TRACE_BUFFER = 1000
+
+
+class Histogram:
+    """Log-linear latency histogram in microseconds."""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket_of(value_us: int) -> int:
+        shift = max(value_us.bit_length() - SUB_BUCKET_BITS, 0)
+        return (shift << SUB_BUCKET_BITS) | (value_us >> shift)
+
+    @staticmethod
+    def bucket_value(bucket: int) -> int:
+        shift, mantissa = bucket >> SUB_BUCKET_BITS, bucket & ((1 << SUB_BUCKET_BITS) - 1)
+        return (mantissa << shift) + ((1 << shift) >> 1)  # middle of the bucket
+
+    @classmethod
+    def from_buckets(cls, counts: Dict[int, int]) -> "Histogram":
+        """Rebuilt from bucket counts (e.g. the metrics rollup); mean and max are approximate."""
+        histogram = cls()
+        histogram.counts = dict(counts)
+        histogram.count = sum(counts.values())
+        histogram.total_us = sum(cls.bucket_value(b) * n for b, n in counts.items())
+        histogram.max_us = max((cls.bucket_value(b) for b in counts), default=0)
+        return histogram
+
+    def record(self, value_us: int) -> None:
+        value_us = max(int(value_us), 0)
+        bucket = self.bucket_of(value_us)
+        with self._lock:
+            self.counts[bucket] = self.counts.get(bucket, 0) + 1
+            self.count += 1
+            self.total_us += value_us
+            self.max_us = max(self.max_us, value_us)
+
+    def percentile(self, p: float) -> float:
+        """The p-th percentile in microseconds (0 if empty)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(p / 100 * self.count, 1)
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                if seen >= rank:
+                    return float(min(self.bucket_value(bucket), self.max_us))
+            return float(self.max_us)
+
+    def summary(self) -> Dict[str, float]:
+        """count, mean, max and PERCENTILES, in milliseconds."""
+        result = {"count": self.count, "mean": round(self.total_us / self.count / 1000, 2) if self.count else 0.0}
+        for p in PERCENTILES:
+            result[f"p{p}"] = round(self.percentile(p) / 1000, 2)
+        result["max"] = round(self.max_us / 1000, 2)
+        return result
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    track: str
+    start_us: float
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+_current: contextvars.ContextVar[Optional[SpanRecord]] = contextvars.ContextVar("span", default=None)
+
+
+class Tracer:
+    """Histograms of span durations plus the optional trace file exporter."""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.trace_path: Optional[str] = None
+        self._events: List[dict] = []
+        self._tracks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._started_file = False
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e6
+
+    @contextmanager
+    def span(self, name: str, track: Optional[str] = None, **attrs: Any) -> Iterator[SpanRecord]:
+        """Time a block; nested spans inherit its track."""
+        parent = _current.get()
+        if track is None:
+            track = parent.track if parent else threading.current_thread().name
+        record = SpanRecord(name, track, self._now_us(), attrs)
+        token = _current.set(record)
+        try:
+            yield record
+        finally:
+            _current.reset(token)
+            self._finish(record, self._now_us() - record.start_us)
+
+    def _finish(self, record: SpanRecord, duration_us: float) -> None:
+        histogram = self.histograms.get(record.name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(record.name, Histogram())
+        histogram.record(int(duration_us))
+        if self.trace_path is None:
+            return
+        with self._lock:
+            tid = self._tracks.get(record.track)
+            if tid is None:
+                tid = self._tracks[record.track] = len(self._tracks) + 1
+                self._events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                                     "args": {"name": record.track}})
+            self._events.append({
+                "name": record.name, "cat": record.name.split(".", 1)[0], "ph": "X",
+                "ts": round(record.start_us, 1), "dur": round(duration_us, 1),
+                "pid": os.getpid(), "tid": tid, "args": record.attrs,
+            })
+            full = len(self._events) >= TRACE_BUFFER
+        if full:
+            self.flush()
+
+    def traced(self, name: str) -> Callable:
+        """Decorator: run every call of a sync or async function in a span."""
+        def decorate(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Latency summary (ms) of every span name, slowest p95 first."""
+        summaries = {name: h.summary() for name, h in list(self.histograms.items())}
+        return dict(sorted(summaries.items(), key=lambda item: -item[1]["p95"]))
+
+    def reset(self) -> None:
+        self.histograms.clear()
+
+    # -- trace file -------------------------------------------------------------
+
+    def export_to(self, path: str) -> None:
+        """Also write every span to `path` (Chrome trace event format)."""
+        self.flush()
+        self.trace_path = path
+        self._started_file = False
+        self._tracks.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            events, self._events = self._events, []
+            path = self.trace_path
+            if not events or path is None:
+                return
+            # The JSON array format may be left unterminated, so the file can grow by appending
+            prefix = "[\n" if not self._started_file else ""
+            self._started_file = True
+        try:
+            with open(path, "w" if prefix else "a", encoding="utf-8") as f:
+                f.write(prefix + "".join(json.dumps(e) + ",\n" for e in events))
+        except OSError as e:
+            logger.error(f"Failed to write trace file: {e}")
+
+    def close(self) -> None:
+        """Flush and terminate the JSON array; later spans are not exported."""
+        self.flush()
+        path, self.trace_path = self.trace_path, None
+        if path is None or not self._started_file:
+            return
+        try:
+            with open(path, "rb+") as f:
+                f.seek(-2, os.SEEK_END)  # the last event's ",\n"
+                f.truncate()
+                f.write(b"\n]\n")
+        except OSError as e:
+            logger.error(f"Failed to finish trace file: {e}")
+
+
+# Shared by everything that records spans
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
@@ -1,6 +1,8 @@
 import logging
 import asyncio
+from typing import Optional
 from rich.console import Console
+from app.audio.confirm import ConfirmationListener
 from app.audio.recorder import AudioRecorder
 from app.audio.stt import Transcriber
 
@@ -11,15 +13,22 @@ async def get_voice_confirmation(
     recorder: AudioRecorder,
     transcriber: Transcriber,
     console: Console,
-    retries: int = 2
+    retries: int = 2,
+    listener: Optional[ConfirmationListener] = None,
 ) -> bool:
     """
     Ask the user a yes/no question using text (and optional TTS),
     then listen to a short voice reply and interpret it as yes/no.
 
+    Recording stops as soon as the reply ends, and the reply is classified
+    by the ConfirmationListener's fast path instead of the command model.
+    Pass a long-lived `listener` to keep its models warm between calls.
+
     Returns True for yes, False for no.
     """
-    
+    if listener is None:
+        listener = ConfirmationListener(transcriber.config, recorder, transcriber)
+
     for attempt in range(retries + 1):
         # 1. Print prompt
         if attempt == 0:
@@ -27,40 +36,25 @@ async def get_voice_confirmation(
             console.print("[dim](Say 'yes', 'sure', 'do it' OR 'no', 'stop', 'cancel')[/dim]")
         else:
             console.print(f"[yellow]I didn't catch that. {prompt} (Attempt {attempt}/{retries})[/yellow]")
-        
-        # 2. Record short audio (3 seconds)
-        try:
-            console.print("[red]Recording answer (3s)...[/red]")
-            audio_path = recorder.record_once(duration=3)
-        except Exception as e:
-            logger.error(f"Recording failed: {e}")
-            console.print(f"[bold red]Recording failed: {e}[/bold red]")
-            return False
 
-        # 3. Transcribe
+        # 2. Record the reply until it ends, and classify it
         try:
-            with console.status("[dim]Listening...[/dim]"):
-                stt_result = await transcriber.transcribe(audio_path)
-                text = stt_result.text.strip().lower()
-                console.print(f"[dim]Heard: '{text}'[/dim]")
+            console.print("[red]Listening for your answer...[/red]")
+            answer = await listener.listen()
         except Exception as e:
-            logger.error(f"Transcription failed: {e}")
-            console.print(f"[bold red]Transcription failed: {e}[/bold red]")
+            logger.error(f"Voice confirmation failed: {e}")
+            console.print(f"[bold red]Voice confirmation failed: {e}[/bold red]")
             return False
 
-        # 4. Interpret answer
-        yes_keywords = ["yes", "yeah", "yep", "sure", "do it", "ok", "okay", "go ahead", "confirm"]
-        no_keywords = ["no", "nope", "nah", "stop", "cancel", "abort", "don't", "wait"]
+        if listener.last_text:
+            console.print(f"[dim]Heard: '{listener.last_text}' ({listener.last_latency_ms:.0f} ms)[/dim]")
+        if answer is not None:
+            return answer
 
-        if any(keyword in text for keyword in yes_keywords):
-            return True
-        elif any(keyword in text for keyword in no_keywords):
-            return False
-        
         # If unclear, loop again
         if attempt < retries:
             console.print("[yellow]Sorry, I didn't understand. Please say 'yes' or 'no'.[/yellow]")
-    
+
     # Default to False if max retries reached
     console.print("[bold red]Voice confirmation failed. Defaulting to NO.[/bold red]")
     return False
@@ -0,0 +1,420 @@
+"""
+Out-of-process worker pool for CPU-bound model inference.
+
+faster-whisper and SetFit hold the GIL for most of a decode, so even a
+thread offload makes the spinner stutter and stalls other MCP requests.
+A WorkerPool hosts one model instance per process; audio is handed over
+through shared memory instead of being pickled.
+
+The model is built in the worker by a factory given as "module:attr"
+(imported in the child, so the parent never loads the model). Each worker
+may be pinned to its own CPU set with a fixed thread count.
+
+A call that times out is not retried: the worker is replaced, since it may
+still be computing, and the TimeoutError is raised. Calls carrying audio get
+call_timeout plus timeout_per_audio_s for each second of audio. A worker
+that fails to start is restarted after a backoff that doubles each time,
+and after MAX_START_FAILURES failures in a row the pool stops trying.
+"""
+import asyncio
+import atexit
+import importlib
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+MAX_START_FAILURES = 5
+START_BACKOFF_S = 5.0  # before the restart after a failed start; doubled each time
+MAX_START_BACKOFF_S = 300.0
+
+
+class WorkerError(RuntimeError):
+    """The remote call raised; message carries the worker-side exception."""
+
+
+class WorkerCrashedError(RuntimeError):
+    """The worker process died while handling a request."""
+
+
+class WorkerStartError(WorkerError):
+    """The worker could not build its model, or is waiting out a restart backoff."""
+
+
+def _resolve(path: str):
+    module, _, attr = path.partition(":")
+    obj = importlib.import_module(module)
+    for part in attr.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _worker_main(conn, factory: str, init_args: tuple, threads: int, cpus: Optional[List[int]]):
+    """Entry point of a worker process: build the model, then serve requests until EOF."""
+    if threads:
+        for var in THREAD_ENV_VARS:
+            os.environ[var] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            logger.warning(f"Could not pin worker to CPUs {cpus}: {e}")
+
+    try:
+        target = _resolve(factory)(*init_args)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", os.getpid()))
+
+    from multiprocessing import resource_tracker
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if msg is None:
+            break
+        req_id, method, args, shm_spec = msg
+        shm = None
+        try:
+            if method == "ping":
+                result = "pong"
+            else:
+                if shm_spec:
+                    name, shape, dtype = shm_spec
+                    shm = shared_memory.SharedMemory(name=name)
+                    # The parent owns (and unlinks) the segment.
+                    resource_tracker.unregister(shm._name, "shared_memory")
+                    args = (np.ndarray(shape, dtype=dtype, buffer=shm.buf), *args)
+                result = getattr(target, method)(*args)
+            conn.send((req_id, True, result))
+        except Exception as e:
+            conn.send((req_id, False, f"{type(e).__name__}: {e}"))
+        finally:
+            args = None
+            if shm is not None:
+                shm.close()
+
+
+class _Worker:
+    def __init__(self, index: int, process=None, conn=None):
+        self.index = index
+        self.process = process  # None until started (restarts after a failed start are lazy)
+        self.conn = conn
+        self.ready = False
+        self.pid: Optional[int] = None
+
+
+class WorkerPool:
+    """
+    A fixed number of model-hosting processes with a blocking and an async API.
+
+    `call_sync` is thread-safe and may be used from worker threads;
+    `call` wraps it for the event loop. Dead or hung workers are replaced;
+    a request whose worker died is retried once, one that timed out is not.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: str,
+        init_args: Sequence[Any] = (),
+        size: int = 1,
+        threads: int = 1,
+        pin_cpus: bool = False,
+        cpu_offset: int = 0,
+        startup_timeout: float = 300.0,
+        call_timeout: float = 60.0,
+        timeout_per_audio_s: float = 2.0,
+        sample_rate: int = 16000,
+    ):
+        self.name = name
+        self.factory = factory
+        self.init_args = tuple(init_args)
+        self.size = max(1, size)
+        self.threads = threads
+        self.pin_cpus = pin_cpus
+        self.cpu_offset = cpu_offset
+        self.startup_timeout = startup_timeout
+        self.call_timeout = call_timeout
+        self.timeout_per_audio_s = timeout_per_audio_s
+        self.sample_rate = sample_rate
+        self.restarts = 0
+        self.start_failures = 0  # in a row
+        self._restart_at = 0.0
+
+        self._ctx = mp.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._req_id = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._health_task: Optional[asyncio.Task] = None
+
+        for i in range(self.size):
+            worker = self._spawn(i)
+            self._workers.append(worker)
+            self._idle.put(worker)
+        atexit.register(self.close)
+
+    def _cpus_for(self, index: int) -> Optional[List[int]]:
+        if not self.pin_cpus:
+            return None
+        count = os.cpu_count() or 1
+        first = self.cpu_offset + index * self.threads
+        return sorted({(first + k) % count for k in range(self.threads)})
+
+    def _spawn(self, index: int) -> _Worker:
+        return self._start(_Worker(index))
+
+    def _start(self, worker: _Worker) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.factory, self.init_args, self.threads, self._cpus_for(worker.index)),
+            name=f"{self.name}-worker-{worker.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        logger.info(f"Started {self.name} worker {worker.index} (pid {process.pid})")
+        worker.process, worker.conn = process, parent_conn
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        self._kill(worker)
+        self.restarts += 1
+        logger.warning(f"Restarting {self.name} worker {worker.index} (restart #{self.restarts})")
+        fresh = _Worker(worker.index)
+        if not self.start_failures:
+            # Otherwise _wait_ready starts it, once the backoff is over
+            self._start(fresh)
+        self._workers[worker.index] = fresh
+        return fresh
+
+    @staticmethod
+    def _kill(worker: _Worker) -> None:
+        if worker.process is None:
+            return
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+
+    def _wait_ready(self, worker: _Worker) -> None:
+        if worker.ready:
+            return
+        if worker.process is None:
+            if self.start_failures >= MAX_START_FAILURES:
+                raise WorkerStartError(f"{self.name} worker failed to start {self.start_failures} times; giving up")
+            wait = self._restart_at - time.monotonic()
+            if wait > 0:
+                raise WorkerStartError(f"{self.name} worker failed to start; next attempt in {wait:.0f}s")
+            self._start(worker)
+        try:
+            if not worker.conn.poll(self.startup_timeout):
+                self._start_failed(worker, f"did not start within {self.startup_timeout}s")
+            status, detail = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._start_failed(worker, f"exited during startup ({e or type(e).__name__})")
+        if status != "ready":
+            self._start_failed(worker, detail)
+        worker.ready, worker.pid = True, detail
+        self.start_failures = 0
+
+    def _start_failed(self, worker: _Worker, reason: str) -> None:
+        """Stop `worker` and schedule its restart after a backoff; always raises WorkerStartError."""
+        self._kill(worker)
+        worker.process = worker.conn = None
+        self.start_failures += 1
+        backoff = min(START_BACKOFF_S * 2 ** (self.start_failures - 1), MAX_START_BACKOFF_S)
+        self._restart_at = time.monotonic() + backoff
+        raise WorkerStartError(f"{self.name} worker failed to start: {reason}")
+
+    def _timeout_for(self, audio: Optional[np.ndarray]) -> float:
+        if audio is None:
+            return self.call_timeout
+        return self.call_timeout + len(audio) / self.sample_rate * self.timeout_per_audio_s
+
+    def _roundtrip(self, worker: _Worker, method: str, args: tuple,
+                   shm_spec: Optional[Tuple], timeout: float) -> Any:
+        self._wait_ready(worker)
+        with self._lock:
+            self._req_id += 1
+            req_id = self._req_id
+        worker.conn.send((req_id, method, args, shm_spec))
+        if not worker.conn.poll(timeout):
+            raise TimeoutError(f"{self.name}.{method} timed out after {timeout}s")
+        got_id, ok, result = worker.conn.recv()
+        if got_id != req_id:
+            raise WorkerCrashedError(f"{self.name} worker answered out of order")
+        if not ok:
+            raise WorkerError(result)
+        return result
+
+    def call_sync(self, method: str, *args, audio: Optional[np.ndarray] = None,
+                  timeout: Optional[float] = None) -> Any:
+        """
+        Run `method(*args)` on the hosted model, blocking the calling thread.
+
+        If `audio` is given it is copied once into shared memory and passed
+        to the method as its first argument. Without a `timeout`, the call
+        gets call_timeout plus timeout_per_audio_s per second of audio.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} pool is closed")
+        timeout = timeout or self._timeout_for(audio)
+        shm = None
+        shm_spec = None
+        if audio is not None:
+            audio = np.ascontiguousarray(audio)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, audio.nbytes))
+            np.ndarray(audio.shape, dtype=audio.dtype, buffer=shm.buf)[...] = audio
+            shm_spec = (shm.name, audio.shape, audio.dtype.str)
+
+        worker = self._idle.get()
+        try:
+            for attempt in range(2):
+                try:
+                    return self._roundtrip(worker, method, args, shm_spec, timeout)
+                except TimeoutError:
+                    # Still busy, or hung: a retry would most likely time out too
+                    worker = self._replace(worker)
+                    raise
+                except (EOFError, BrokenPipeError, ConnectionResetError, OSError, WorkerCrashedError) as e:
+                    worker = self._replace(worker)
+                    if attempt == 1:
+                        raise WorkerCrashedError(f"{self.name}.{method} failed: {e}") from e
+                    logger.warning(f"{self.name} worker failed ({e}); retrying on a fresh worker")
+        finally:
+            self._idle.put(worker)
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    async def call(self, method: str, *args, audio: Optional[np.ndarray] = None,
+                   timeout: Optional[float] = None) -> Any:
+        """Async wrapper: the event loop keeps running while the worker computes."""
+        return await asyncio.to_thread(self.call_sync, method, *args, audio=audio, timeout=timeout)
+
+    def health_check(self, timeout: float = 5.0) -> int:
+        """Ping every idle worker and replace the dead or unresponsive ones. Returns restarts."""
+        restarted = 0
+        for _ in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if worker.process is None:
+                    pass  # waiting out a restart backoff
+                elif not worker.ready:
+                    if not worker.process.is_alive():
+                        self._wait_ready(worker)  # records the failed start
+                elif not worker.process.is_alive():
+                    raise WorkerCrashedError("process exited")
+                else:
+                    self._roundtrip(worker, "ping", (), None, timeout)
+            except WorkerStartError as e:
+                logger.warning(str(e))
+            except Exception as e:
+                logger.warning(f"{self.name} worker {worker.index} failed health check: {e}")
+                worker = self._replace(worker)
+                restarted += 1
+            finally:
+                self._idle.put(worker)
+        return restarted
+
+    def start_health_checks(self, interval: float = 30.0) -> None:
+        """Run health_check() periodically on the current event loop."""
+        async def _loop():
+            while not self._closed:
+                await asyncio.sleep(interval)
+                await asyncio.to_thread(self.health_check)
+
+        self._health_task = asyncio.create_task(_loop())
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._health_task:
+            self._health_task.cancel()
+        started = [w for w in self._workers if w.process is not None]
+        for worker in started:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        deadline = time.monotonic() + 5
+        for worker in started:
+            worker.process.join(timeout=max(0.0, deadline - time.monotonic()))
+            self._kill(worker)
+
+
+class WhisperWorker:
+    """Model hosted by the "whisper" pool: a local faster-whisper Transcriber."""
+
+    def __init__(self, config_data: dict):
+        from app.audio.stt import Transcriber
+        from app.core.models import AppConfig
+
+        config = AppConfig(**config_data)
+        config.stt_provider = "faster-whisper"
+        config.ml_workers = 0
+        self.transcriber = Transcriber(config)
+        if self.transcriber.whisper_model is None:
+            raise RuntimeError("faster-whisper model could not be loaded")
+
+    def whisper_text(self, audio: np.ndarray) -> str:
+        return self.transcriber._whisper_text(audio)
+
+    def decode_words(self, audio: np.ndarray):
+        return self.transcriber.decode_words(audio)
+
+
+class IntentWorker:
+    """Model hosted by the "intent" pool: the SetFit classifier."""
+
+    def __init__(self):
+        from app.intent.setfit_router import SetFitIntentClassifier
+
+        self.classifier = SetFitIntentClassifier()
+        self.classifier.load()
+
+    def predict_intent(self, text: str) -> Tuple[str, float]:
+        return self.classifier.predict_intent(text)
+
+
+def build_ml_pools(config) -> Tuple[Optional[WorkerPool], Optional[WorkerPool]]:
+    """Create (whisper_pool, intent_pool) per config, or (None, None) for in-process inference."""
+    if config.ml_workers <= 0:
+        return None, None
+    whisper_pool = None
+    if config.stt_provider in ("faster-whisper", "hedged"):
+        whisper_pool = WorkerPool(
+            "whisper", "app.core.workers:WhisperWorker", (config.model_dump(),),
+            size=config.ml_workers, threads=config.ml_worker_threads, pin_cpus=config.ml_pin_cpus,
+            sample_rate=config.audio.sample_rate,
+        )
+    # The intent model gets the CPUs after the whisper workers' when pinning
+    intent_pool = WorkerPool(
+        "intent", "app.core.workers:IntentWorker",
+        size=1, threads=config.ml_worker_threads, pin_cpus=config.ml_pin_cpus,
+        cpu_offset=config.ml_workers * config.ml_worker_threads,
+    )
+    return whisper_pool, intent_pool
@@ -0,0 +1 @@
+# Resident daemon package
@@ -0,0 +1,248 @@
+"""
+Thin client for the GitVoice daemon.
+
+RemoteTranscriber and RemoteBrain stand in for Transcriber and Brain
+wherever the CLI and the MCP server use them, forwarding each call over
+the daemon socket. They follow the local classes' failure behaviour: an
+unreachable daemon is logged and yields an empty transcript or a "help"
+ToolCall rather than an exception. Given `reconnect` and `fallback`, they
+reconnect once the connection is lost, or else run in-process.
+"""
+import asyncio
+import itertools
+import logging
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+import numpy as np
+
+from app.core.models import AppConfig, STTResult, ToolCall, ToolPlan
+from app.daemon.protocol import (
+    MAX_MESSAGE_BYTES,
+    DaemonError,
+    decode,
+    encode,
+    pack_audio,
+    socket_path,
+)
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT_S = 0.5
+
+
+class DaemonClient:
+    """One socket connection; concurrent requests are matched to replies by id."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: Path):
+        self.path = path
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._closed: Optional[str] = None
+        self._read_task = asyncio.create_task(self._read_replies())
+
+    @property
+    def closed(self) -> bool:
+        """True once the connection is lost or closed; requests then fail at once."""
+        return self._closed is not None
+
+    @classmethod
+    async def connect(cls, path: Optional[Path] = None, timeout: float = CONNECT_TIMEOUT_S) -> "DaemonClient":
+        path = Path(path or socket_path())
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(str(path), limit=MAX_MESSAGE_BYTES), timeout=timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise DaemonError(f"No GitVoice daemon at {path}: {e}") from e
+        return cls(reader, writer, path)
+
+    async def request(self, op: str, **params: Any) -> Any:
+        if self._closed:
+            raise DaemonError(self._closed)
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(encode({"id": request_id, "op": op, "params": params}))
+            await self._writer.drain()
+            return await future
+        except ConnectionError as e:
+            self._pending.pop(request_id, None)
+            self._fail_pending(f"Lost connection to the GitVoice daemon: {e}")
+            raise DaemonError(self._closed) from e
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_replies(self) -> None:
+        reason = "GitVoice daemon closed the connection"
+        try:
+            while line := await self._reader.readline():
+                try:
+                    reply = decode(line)
+                except ValueError as e:
+                    logger.warning(f"Ignoring malformed daemon reply: {e}")
+                    continue
+                future = self._pending.get(reply["id"])
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(DaemonError(reply["error"]))
+                else:
+                    future.set_result(reply.get("result"))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            reason = f"Lost connection to the GitVoice daemon: {e}"
+        self._fail_pending(reason)
+
+    def _fail_pending(self, reason: str) -> None:
+        self._closed = reason
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(DaemonError(reason))
+
+    async def close(self) -> None:
+        self._read_task.cancel()
+        self._fail_pending("Daemon client closed")
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+async def connect_daemon(config: AppConfig) -> Optional[DaemonClient]:
+    """A client for the running daemon, or None (GITVOICE_DAEMON=off, or none running)."""
+    if config.daemon == "off":
+        return None
+    try:
+        client = await DaemonClient.connect(socket_path(config.daemon_socket))
+        await asyncio.wait_for(client.request("ping"), timeout=CONNECT_TIMEOUT_S)
+        return client
+    except (DaemonError, asyncio.TimeoutError) as e:
+        logger.debug(f"Not using the daemon: {e}")
+        return None
+
+
+class _DaemonBacked:
+    """
+    Shared by the Remote* classes: what to do once the daemon connection is lost.
+
+    `reconnect` (e.g. connect_daemon) is tried first, so a restarted daemon
+    is picked up again. Failing that, `fallback` builds the in-process
+    equivalent, once, off the event loop. Neither is used for errors the
+    daemon reports over a live connection.
+    """
+
+    def __init__(self, client: DaemonClient,
+                 fallback: Optional[Callable[[], Any]] = None,
+                 reconnect: Optional[Callable[[], Awaitable[Optional[DaemonClient]]]] = None):
+        self.client = client
+        self._fallback = fallback
+        self._reconnect = reconnect
+        self._local = None
+
+    @property
+    def connected(self) -> bool:
+        return not self.client.closed
+
+    async def _request(self, op: str, **params: Any) -> Any:
+        """client.request, sent again over a new connection if the daemon is back."""
+        try:
+            return await self.client.request(op, **params)
+        except DaemonError:
+            if self.connected or self._reconnect is None:
+                raise
+            client = await self._reconnect()
+            if client is None:
+                raise
+            logger.info(f"Reconnected to the GitVoice daemon at {client.path}")
+            self.client = client
+            return await client.request(op, **params)
+
+    async def _local_model(self):
+        """The in-process stand-in, if the connection is lost and there is a fallback."""
+        if self._fallback is None or self.connected:
+            return None
+        if self._local is None:
+            logger.warning(f"Lost the GitVoice daemon; {type(self).__name__} runs in-process")
+            self._local = await asyncio.to_thread(self._fallback)
+        return self._local
+
+
+class RemoteTranscriber(_DaemonBacked):
+    """Transcriber interface backed by the daemon's warm Whisper / Groq client."""
+
+    # Streaming decodes read the recorder's buffer in-process
+    supports_streaming = False
+    has_local = False
+
+    def __init__(self, client: DaemonClient, config: AppConfig,
+                 fallback: Optional[Callable[[], Any]] = None,
+                 reconnect: Optional[Callable[[], Awaitable[Optional[DaemonClient]]]] = None):
+        super().__init__(client, fallback, reconnect)
+        self.config = config
+        self.repo = os.getcwd()
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def transcribe(self, audio_input: Union[str, bytes, np.ndarray]) -> STTResult:
+        if audio_input is None or len(audio_input) == 0:
+            logger.warning("Empty audio input received.")
+            return STTResult(text="")
+        if isinstance(audio_input, str):
+            audio = {"audio_path": os.path.abspath(audio_input)}
+        elif isinstance(audio_input, np.ndarray):
+            audio = {"audio_b64": pack_audio((np.clip(audio_input, -1.0, 1.0) * 32767).astype(np.int16).tobytes())}
+        else:
+            audio = {"audio_b64": pack_audio(audio_input)}
+        try:
+            return STTResult(**await self._request("transcribe", repo=self.repo, **audio))
+        except DaemonError as e:
+            if local := await self._local_model():
+                return await local.transcribe(audio_input)
+            logger.error(f"Transcription failed: {e}")
+            return STTResult(text="")
+
+    def refresh_hotwords(self) -> None:
+        async def _refresh():
+            try:
+                await self._request("refresh_hotwords", repo=self.repo)
+            except DaemonError as e:
+                if local := await self._local_model():
+                    return await asyncio.to_thread(local.refresh_hotwords)
+                logger.warning(f"Could not refresh daemon hotwords: {e}")
+
+        self._refresh = asyncio.get_running_loop().create_task(_refresh())
+
+
+class RemoteBrain(_DaemonBacked):
+    """Brain interface backed by the daemon's classifier and LLM clients."""
+
+    async def process(self, text: str) -> Union[ToolCall, ToolPlan]:
+        try:
+            result = await self._request("process", text=text)
+            return ToolPlan(**result) if "steps" in result else ToolCall(**result)
+        except DaemonError as e:
+            if local := await self._local_model():
+                return await local.process(text)
+            logger.error(f"Intent routing failed: {e}")
+            return ToolCall(tool="help", explanation=f"The GitVoice daemon could not route that: {e}")
+
+    async def speculate(self, text: str) -> None:
+        try:
+            await self._request("speculate", text=text)
+        except DaemonError as e:
+            if local := await self._local_model():
+                return await local.speculate(text)
+            logger.debug(f"Speculative classification skipped: {e}")
+
+    async def generate_commit_message(self, diff: str) -> str:
+        try:
+            return await self._request("commit_message", diff=diff)
+        except DaemonError as e:
+            if local := await self._local_model():
+                return await asyncio.to_thread(local.generate_commit_message, diff)
+            logger.error(f"Failed to generate commit message: {e}")
+            return "Update"
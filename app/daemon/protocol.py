@@ -0,0 +1,67 @@
+"""
+Wire protocol between the GitVoice daemon and its clients.
+
+Newline-delimited JSON over a Unix domain socket. A request is
+
+    {"id": 7, "op": "transcribe", "params": {"audio_path": "/tmp/x.wav"}}
+
+and its reply carries the same id and either "result" or "error". One
+connection may have several requests in flight; replies come back as each
+request finishes, not necessarily in order.
+"""
+import base64
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+PROTOCOL_VERSION = 1
+# Audio sent inline (base64 PCM) can make a single message fairly large
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+OPS = (
+    "ping",             # -> {"pid", "version", "uptime_s"}
+    "transcribe",       # audio_path | audio_b64 (int16 PCM), repo -> STTResult
+    "process",          # text -> ToolCall | ToolPlan
+    "speculate",        # text -> None
+    "commit_message",   # diff -> str
+    "refresh_hotwords", # repo -> None
+    "stats",            # -> {"models": {...}}
+    "shutdown",         # -> None
+)
+
+
+class DaemonError(RuntimeError):
+    """The daemon is unreachable, or it could not handle the request."""
+
+
+def default_socket_path() -> Path:
+    """Per-user socket: $XDG_RUNTIME_DIR/gitvoice.sock, else /tmp/gitvoice-<uid>.sock."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "gitvoice.sock"
+    return Path(tempfile.gettempdir()) / f"gitvoice-{os.getuid()}.sock"
+
+
+def socket_path(configured: Optional[str] = None) -> Path:
+    return Path(configured).expanduser() if configured else default_socket_path()
+
+
+def encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def decode(line: bytes) -> Dict[str, Any]:
+    message = json.loads(line)
+    if not isinstance(message, dict) or "id" not in message:
+        raise ValueError("not a protocol message")
+    return message
+
+
+def pack_audio(pcm: bytes) -> str:
+    return base64.b64encode(pcm).decode("ascii")
+
+
+def unpack_audio(data: str) -> bytes:
+    return base64.b64decode(data)
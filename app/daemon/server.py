@@ -0,0 +1,280 @@
+"""
+GitVoice daemon: keeps the models warm between CLI and MCP sessions.
+
+A cold `gitvoice` start imports torch and SetFit, loads faster-whisper and
+builds the LLM clients before it can take a command. The daemon does that
+once and then serves transcription, intent routing and commit messages
+over a Unix domain socket (see app.daemon.protocol). The voice CLI and the
+MCP server connect to it when it is running and fall back to loading
+everything themselves when it isn't.
+
+Git commands still run in the client, in the client's repository; the
+daemon only needs the repository path to build branch-name hotwords.
+
+    python -m app.daemon.server            # run in the foreground
+    python -m app.daemon.server --status   # is it up? what is loaded?
+    python -m app.daemon.server --stop
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app import __version__
+from app.daemon.protocol import (
+    MAX_MESSAGE_BYTES,
+    PROTOCOL_VERSION,
+    DaemonError,
+    decode,
+    encode,
+    socket_path,
+    unpack_audio,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Daemon:
+    """Serves one Transcriber and one Brain to any number of local clients."""
+
+    def __init__(self, transcriber, brain, path: Path, models=None, on_close: Optional[Callable[[], None]] = None):
+        self.transcriber = transcriber
+        self.brain = brain
+        self.models = models
+        self.path = Path(path)
+        self.on_close = on_close
+        self.started = time.monotonic()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._stopped = asyncio.Event()
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+            "ping": self._ping,
+            "transcribe": self._transcribe,
+            "process": self._process,
+            "speculate": self._speculate,
+            "commit_message": self._commit_message,
+            "refresh_hotwords": self._refresh_hotwords,
+            "stats": self._stats,
+            "shutdown": self._shutdown,
+        }
+
+    async def start(self) -> None:
+        """Bind the socket; fails if another daemon is already serving it."""
+        if self.path.exists():
+            if await _is_alive(self.path):
+                raise DaemonError(f"A daemon is already listening on {self.path}")
+            self.path.unlink()  # left behind by a daemon that crashed
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Other users must not drive our git repos: the socket is created 0600, never briefly open
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._serve_client, path=str(self.path),
+                                                           limit=MAX_MESSAGE_BYTES)
+        finally:
+            os.umask(umask)
+        logger.info(f"GitVoice daemon listening on {self.path}")
+
+    async def serve_forever(self) -> None:
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.close()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            if self.on_close:
+                self.on_close()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks = set()
+        self._clients.add(writer)
+
+        async def respond(request: Dict[str, Any]) -> None:
+            reply = await self.handle(request)
+            async with write_lock:
+                writer.write(encode(reply))
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = decode(line)
+                except ValueError as e:
+                    logger.warning(f"Dropping malformed request: {e}")
+                    continue
+                # Requests run concurrently: a long transcription doesn't hold up routing
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.warning(f"Client connection dropped: {e}")
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._clients.discard(writer)
+            writer.close()
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one request and build its reply."""
+        handler = self._handlers.get(request.get("op"))
+        if handler is None:
+            return {"id": request["id"], "error": f"Unknown op: {request.get('op')}"}
+        try:
+            return {"id": request["id"], "result": await handler(request.get("params") or {})}
+        except Exception as e:
+            logger.exception(f"Daemon op {request.get('op')} failed")
+            return {"id": request["id"], "error": str(e)}
+
+    # -- ops -------------------------------------------------------------------
+
+    async def _ping(self, params) -> dict:
+        return {"pid": os.getpid(), "version": __version__, "protocol": PROTOCOL_VERSION,
+                "uptime_s": round(time.monotonic() - self.started, 1)}
+
+    async def _transcribe(self, params) -> dict:
+        from app.audio.stt import current_repo
+
+        audio = params.get("audio_path") or unpack_audio(params.get("audio_b64", ""))
+        # Runs in this request's own task, so the repo only applies to this decode
+        current_repo.set(params.get("repo"))
+        return (await self.transcriber.transcribe(audio)).model_dump()
+
+    async def _process(self, params) -> dict:
+        return (await self.brain.process(params["text"])).model_dump()
+
+    async def _speculate(self, params) -> None:
+        await self.brain.speculate(params["text"])
+
+    async def _commit_message(self, params) -> str:
+        return await asyncio.to_thread(self.brain.generate_commit_message, params["diff"])
+
+    async def _refresh_hotwords(self, params) -> None:
+        from app.audio.stt import current_repo
+
+        current_repo.set(params.get("repo"))
+        self.transcriber.refresh_hotwords()
+
+    async def _stats(self, params) -> dict:
+        from app.core.tracing import tracer
+
+        return {"models": self.models.stats() if self.models is not None else {}, "latency": tracer.stats()}
+
+    async def _shutdown(self, params) -> None:
+        # Reply first, then stop
+        asyncio.get_running_loop().call_soon(self.stop)
+
+
+async def _is_alive(path: Path) -> bool:
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(str(path)), timeout=0.5)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+async def _run(config) -> None:
+    from app.audio.stt import Transcriber
+    from app.core.metrics import MetricsLogger
+    from app.core.model_manager import ModelManager
+    from app.core.tracing import tracer
+    from app.core.workers import build_ml_pools
+    from app.llm.router import Brain
+
+    start = time.perf_counter()
+    if config.trace_file:
+        tracer.export_to(config.trace_file)
+    metrics_logger = MetricsLogger.from_config(config)
+    whisper_pool, intent_pool = build_ml_pools(config)
+    pools = [p for p in (whisper_pool, intent_pool) if p is not None]
+    models = ModelManager(config.model_idle_ttl_s, config.model_memory_budget_mb, metrics=metrics_logger)
+    transcriber = Transcriber(config, pool=whisper_pool, models=models)
+    brain = Brain(config, intent_pool=intent_pool, models=models)
+
+    def cleanup():
+        models.stop()
+        metrics_logger.log_event("model_residency", models=models.stats())
+        metrics_logger.close()
+        tracer.close()
+        for pool in pools:
+            pool.close()
+
+    daemon = Daemon(transcriber, brain, socket_path(config.daemon_socket), models=models, on_close=cleanup)
+    await daemon.start()
+    # Load the models now, side by side, rather than on the first command
+    await asyncio.gather(asyncio.to_thread(transcriber.warm_up), asyncio.to_thread(brain.warm_up))
+    for pool in pools:
+        pool.start_health_checks()
+    models.start()
+    logger.info(f"GitVoice daemon ready in {time.perf_counter() - start:.1f}s (pid {os.getpid()})")
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, daemon.stop)
+    await daemon.serve_forever()
+
+
+async def _control(path: Path, op: str) -> int:
+    from app.daemon.client import DaemonClient
+
+    try:
+        client = await DaemonClient.connect(path)
+    except DaemonError as e:
+        print(e)
+        return 1
+    try:
+        result = await client.request(op)
+        if op == "ping":
+            stats = await client.request("stats")
+            result["models"] = stats["models"]
+            result["latency"] = stats.get("latency", {})
+        print(json.dumps(result, indent=2) if result is not None else "Daemon stopping.")
+    finally:
+        await client.close()
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GitVoice resident model daemon")
+    parser.add_argument("--socket", help="Unix socket path (default: GITVOICE_SOCKET or a per-user path)")
+    parser.add_argument("--status", action="store_true", help="show whether the daemon is running")
+    parser.add_argument("--stop", action="store_true", help="ask a running daemon to exit")
+    args = parser.parse_args()
+
+    from app.config import load_config
+
+    config = load_config()
+    logging.basicConfig(level=config.log_level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    path = socket_path(args.socket or config.daemon_socket)
+    if args.status or args.stop:
+        sys.exit(asyncio.run(_control(path, "shutdown" if args.stop else "ping")))
+    if args.socket:
+        config.daemon_socket = args.socket
+    try:
+        asyncio.run(_run(config))
+    except DaemonError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,23 @@
+import asyncio
 import logging
 import json
-from typing import Optional
-from app.core.models import AppConfig, ToolCall
+import re
+from typing import List, Optional, Union
+from pydantic import ValidationError
+from app.core.models import AppConfig, PlanStep, ToolCall, ToolPlan
+from app.core.policies import DEFAULT_POLICY, TOOL_POLICIES
 from app.core.retry import with_retries
+from app.core.tool_specs import tool_prompt
+from app.core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
-SYSTEM_PROMPT = """
+SYSTEM_PROMPT_TEMPLATE = """
 You are a Git assistant. Your job is to map natural language commands to specific Git tools.
-You must return a SINGLE JSON object matching the ToolCall schema. Do not return a list.
+You must return a SINGLE JSON object: a ToolCall, or a ToolPlan when the user asks for several separate actions. Do not return a list.
 
 Available tools:
-- git.status: Check status
-- git.log: Show commit history (params: limit [default 20])
-- git.diff: Show changes (params: path [optional], since_origin_main [boolean])
-- git.add_all: Stage all changes
-- git.commit: Commit changes (params: message [required])
-- git.push: Push to remote (params: remote [default origin], branch [optional])
-- git.pull: Pull from remote (params: remote [default origin], branch [optional])
-- git.fetch: Fetch updates from remote (params: remote [optional])
-- git.remote_list: List configured remotes (no params)
-- git.stash_push: Stash current changes (params: message [optional])
-- git.stash_pop: Apply and drop most recent stash (no params)
-- git.revert: Revert a commit safely (params: commit [optional, defaults to HEAD])
-- git.merge: Merge a branch (params: branch [required])
-- git.reset: Reset changes (params: mode [soft, mixed, hard], steps [default 1, max 3])
-- git.branch: Create or switch branches (params: name [required], create [boolean, default false])
-- git.run_tests: Run the project's test suite
-- git.smart_commit_push: Automatically stage, commit (with generated message), and push
+{tools}
 - help: If the intent is unclear or not git related
 
 Rules:
@@ -38,7 +28,7 @@ Rules:
 - For "switch branch" or "checkout", use git.branch (create=false).
 - For "create branch" or "new branch", use git.branch (create=true).
 - For "what did I do", use git.status or git.log.
-- For "run tests" or "test my code", use git.run_tests.
+- For "run tests" or "test my code", use git.run_tests. For "run all the tests" or "the full suite", set full=true.
 - For "smart commit" or "commit and push", use git.smart_commit_push.
 - For "pull" or "update code", use git.pull.
 - For "fetch" or "fetch latest", use git.fetch.
@@ -48,8 +38,8 @@ Rules:
 - For "revert commit" or "undo with revert", use git.revert.
 - For "merge branch", use git.merge with branch parameter.
 - If the user asks to "fix conflicts", use 'help' for now as it's not fully implemented.
-- If the user mentions more than one Git action in a single utterance (e.g. status + add/commit/push), you MUST return a single tool: git.smart_commit_push with appropriate parameters. Never return git.status or git.add or git.commit alone for such compound commands.
-- For compound commands like "status and commit", "add and push", or "do everything", use git.smart_commit_push.
+- For compound commands like "status and commit", "add and push", "commit and push" or "do everything", use git.smart_commit_push. Never return git.status or git.add_all or git.commit alone for such commands.
+- For several other actions in one utterance (e.g. "show the status, the log and the diff", "fetch and then merge origin/main"), return a ToolPlan with one step per action, in the order they should happen.
 
 Robustness Rules:
 - Interpret "get", "gate", "kit", "bit" as "git".
@@ -65,24 +55,103 @@ Output JSON format:
     "confirmation_required": boolean,
     "explanation": "brief explanation"
 }
+or, for several actions:
+{
+    "steps": [
+        {"id": "1", "tool": "tool_name", "params": { ... }, "confirmation_required": boolean},
+        {"id": "2", "tool": "tool_name", "params": { ... }, "confirmation_required": boolean, "depends_on": ["1"]}
+    ],
+    "explanation": "brief explanation"
+}
+Use depends_on only when a step needs an earlier one to succeed first (a step may only depend on steps listed before it).
 Set confirmation_required = true for: commit, push, pull, reset, checkout (if switching branches might lose work), smart_commit_push, stash_push, stash_pop, revert, merge.
 """
 
+# "run all the tests", "the whole suite", "test everything": run_tests with full=True
+FULL_SUITE = re.compile(r"\b(all|every|everything|whole|full|entire)\b", re.I)
+
+# Always confirmed, whatever the LLM says
+DANGEROUS_TOOLS = ["git.smart_commit_push", "git.push", "git.pull", "git.reset", "git.commit"]
+
+# Tool list generated from the tool specs
+SYSTEM_PROMPT = SYSTEM_PROMPT_TEMPLATE.replace("{tools}", tool_prompt())
+
+# Read-only tools that may be asked for together ("status, log and the diff")
+READ_KEYWORDS = {
+    "git.status": r"\bstatus\b",
+    "git.log": r"\b(log|logs|history)\b",
+    "git.diff": r"\bdiff\b",
+    "git.remote_list": r"\bremotes\b",
+}
+# Any of these means the utterance is not just reads
+WRITE_WORDS = r"\b(add|stage|commit|push|pull|fetch|reset|undo|merge|rebase|stash|revert|branch|checkout|switch|test|tests)\b"
+
+def _parse_llm_output(data) -> Union[ToolCall, ToolPlan]:
+    """A ToolCall, or a ToolPlan when the LLM returned several steps (a one-step plan is just its step)."""
+    if isinstance(data, list):
+        if not data:
+            return ToolCall(tool="help", explanation="Empty response from LLM.")
+        data = {"steps": data} if len(data) > 1 else data[0]
+    if isinstance(data, dict) and "steps" in data:
+        plan = ToolPlan(**data)
+        if len(plan.steps) > 1:
+            return plan
+        data = plan.steps[0].model_dump(include=set(ToolCall.model_fields))
+    return ToolCall(**data)
+
+
+def _load_classifier():
+    from app.intent.setfit_router import SetFitIntentClassifier
+    classifier = SetFitIntentClassifier()
+    classifier.load()
+    return classifier
+
+
 class Brain:
     """Interprets user intent using LLMs."""
     
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, intent_pool=None, models=None):
         self.config = config
+        # Optional WorkerPool hosting the SetFit model out of process
+        self.intent_pool = intent_pool
+        # Optional ModelManager that unloads the in-process classifier while idle
+        self.models = models
         self.provider = config.llm_provider
-        self.groq_client = None
-        self.gemini_model = None
+        # LLM clients are built on first use (or by warm_up): their SDKs are slow to import
+        self._groq_client = None
+        self._gemini_model = None
+        self._llm_initialized = False
+        # SetFit predictions made on partial transcripts, keyed by normalized text
+        self._speculative: dict = {}
         
         logger.info(f"Initializing Brain with provider: {self.provider}")
-        
+
+    @property
+    def groq_client(self):
+        self._init_llm_client()
+        return self._groq_client
+
+    @groq_client.setter
+    def groq_client(self, client):
+        self._groq_client = client
+
+    @property
+    def gemini_model(self):
+        self._init_llm_client()
+        return self._gemini_model
+
+    @gemini_model.setter
+    def gemini_model(self, model):
+        self._gemini_model = model
+
+    def _init_llm_client(self) -> None:
+        if self._llm_initialized or self._groq_client is not None or self._gemini_model is not None:
+            return
+        self._llm_initialized = True
         if self.provider == "groq":
             try:
                 from groq import Groq
-                self.groq_client = Groq(api_key=config.groq_api_key)
+                self._groq_client = Groq(api_key=self.config.groq_api_key)
             except ImportError:
                 logger.error("Groq library not installed.")
             except Exception as e:
@@ -91,15 +160,30 @@ class Brain:
         elif self.provider == "gemini":
             try:
                 import google.generativeai as genai
-                genai.configure(api_key=config.gemini_api_key)
-                self.gemini_model = genai.GenerativeModel(config.gemini_model)
+                genai.configure(api_key=self.config.gemini_api_key)
+                self._gemini_model = genai.GenerativeModel(self.config.gemini_model)
             except ImportError:
                 logger.error("Google Generative AI library not installed.")
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini client: {e}")
 
-    async def process(self, text: str) -> ToolCall:
-        """Process natural language text into a structured ToolCall."""
+    def warm_up(self) -> None:
+        """Build the LLM client and load the intent classifier now (blocking, for a background thread)."""
+        self._init_llm_client()
+        if self.intent_pool is not None:
+            return
+        try:
+            classifier = self._get_classifier()
+            if self.models is not None:
+                self.models.get("intent")
+            elif classifier.model is None:
+                classifier.load()
+        except Exception as e:
+            logger.warning(f"Intent classifier warm-up failed: {e}")
+
+    @traced("brain.process")
+    async def process(self, text: str) -> Union[ToolCall, ToolPlan]:
+        """Process natural language text into a ToolCall, or a ToolPlan for several actions."""
         if not text:
             return ToolCall(tool="help", explanation="I didn't hear anything.")
             
@@ -114,35 +198,77 @@ class Brain:
                 tool="git.smart_commit_push", 
                 params={"auto_stage": True, "push": True}, 
                 confirmation_required=True,
-                explanation="Detected compound command."
+                explanation="Detected compound command.",
+                source="rules",
             )
 
+        # Several read-only requests ("status, log and the diff") need no model at all
+        plan = self._read_plan(text)
+        if plan is not None:
+            logger.info(f"Deterministic guard: Detected read-only plan -> {plan.tools}")
+            plan.source = "rules"
+            return plan
+
         # 1. Try SetFit Classifier (Fast & Local)
         try:
-            from app.intent.setfit_router import SetFitIntentClassifier
-            # Lazy load singleton-ish
-            if not hasattr(self, '_classifier'):
-                self._classifier = SetFitIntentClassifier()
-            
-            label, confidence = self._classifier.predict_intent(text)
+            prediction = self._speculative.pop(text.strip().lower(), None)
+            if prediction is None:
+                prediction = await self._predict_intent(text)
+            label, confidence = prediction
             logger.info(f"SetFit prediction: {label} ({confidence:.2f})")
             
             if confidence >= 0.6 and label != "help":
                 confirm = label in ["git.smart_commit_push", "git.pull", "git.push", "git.commit", "git.reset"]
-                tool_call = ToolCall(tool=label, params={}, confirmation_required=confirm)
+                tool_call = ToolCall(tool=label, params={}, confirmation_required=confirm, source="setfit")
                 
                 # Heuristic parameter extraction for branch name if missing
                 tool_call = self._ensure_branch_params(tool_call, text)
+                tool_call = self._ensure_test_params(tool_call, text)
                 
                 return tool_call
         except Exception as e:
             logger.warning(f"SetFit classification failed (falling back to LLM): {e}")
 
         # 2. Fallback to LLM
-        return await self._process_llm(text)
+        routed = await self._process_llm(text)
+        routed.source = "llm"
+        return routed
 
-    async def _process_llm(self, text: str) -> ToolCall:
-        async def _call_llm() -> ToolCall:
+    def _get_classifier(self):
+        # Lazy load singleton-ish
+        if not hasattr(self, '_classifier'):
+            if self.models is not None:
+                self._classifier = self.models.register("intent", _load_classifier)
+            else:
+                from app.intent.setfit_router import SetFitIntentClassifier
+                self._classifier = SetFitIntentClassifier()
+        return self._classifier
+
+    @traced("brain.setfit")
+    async def _predict_intent(self, text: str):
+        """SetFit prediction without blocking the event loop."""
+        if self.intent_pool is not None:
+            return tuple(await self.intent_pool.call("predict_intent", text))
+        return await asyncio.to_thread(self._get_classifier().predict_intent, text)
+
+    async def speculate(self, text: str) -> None:
+        """
+        Classify a partial transcript ahead of time (SetFit only, never the LLM).
+
+        Called while the user is still speaking: it warms the classifier and
+        caches the prediction so process() can skip it if the final text matches.
+        """
+        key = text.strip().lower()
+        if not key or key in self._speculative:
+            return
+        try:
+            self._speculative = {key: await self._predict_intent(text)}
+        except Exception as e:
+            logger.debug(f"Speculative classification skipped: {e}")
+
+    @traced("brain.llm")
+    async def _process_llm(self, text: str) -> Union[ToolCall, ToolPlan]:
+        async def _call_llm() -> Union[ToolCall, ToolPlan]:
             if self.provider == "groq" and self.groq_client:
                 completion = self.groq_client.chat.completions.create(
                     model=self.config.groq_model,
@@ -153,20 +279,14 @@ class Brain:
                     response_format={"type": "json_object"}
                 )
                 content = completion.choices[0].message.content
-                data = json.loads(content)
-                if isinstance(data, list):
-                    if not data:
-                        return ToolCall(tool="help", explanation="Empty response from LLM.")
-                    data = data[0]
-                return ToolCall(**data)
+                return _parse_llm_output(json.loads(content))
             
             elif self.provider == "gemini" and self.gemini_model:
                 response = self.gemini_model.generate_content(
                     f"{SYSTEM_PROMPT}\n\nUser: {text}",
                     generation_config={"response_mime_type": "application/json"}
                 )
-                data = json.loads(response.text)
-                return ToolCall(**data)
+                return _parse_llm_output(json.loads(response.text))
             
             else:
                 raise ValueError("No valid LLM provider configured.")
@@ -177,8 +297,14 @@ class Brain:
             
             # Heuristic Safety Override
             dangerous_keywords = ["commit", "push", "pull", "reset", "discard"]
-            if any(k in text.lower() for k in dangerous_keywords) or \
-               tool_call.tool in ["git.smart_commit_push", "git.push", "git.pull", "git.reset", "git.commit"]:
+            said_dangerous = any(k in text.lower() for k in dangerous_keywords)
+            if isinstance(tool_call, ToolPlan):
+                # Per step: a dangerous word covers every step that writes, whichever the LLM picked
+                for step in tool_call.steps:
+                    writes = TOOL_POLICIES.get(step.tool, DEFAULT_POLICY).access == "write"
+                    if step.tool in DANGEROUS_TOOLS or (said_dangerous and writes):
+                        step.confirmation_required = True
+            elif said_dangerous or tool_call.tool in DANGEROUS_TOOLS:
                 tool_call.confirmation_required = True
                 
             return tool_call
@@ -187,6 +313,23 @@ class Brain:
             logger.error(f"Intent parsing failed after retries: {e}")
             return ToolCall(tool="help", explanation=f"I couldn't understand that. Error: {e}")
 
+    def _read_plan(self, text: str) -> Optional[ToolPlan]:
+        """A plan of read-only steps when the text asks for two or more of them and nothing else."""
+        t = text.lower()
+        if re.search(WRITE_WORDS, t):
+            return None
+        found = []
+        for tool, pattern in READ_KEYWORDS.items():
+            match = re.search(pattern, t)
+            if match:
+                found.append((match.start(), tool))
+        if len(found) < 2:
+            return None
+        return ToolPlan(
+            steps=[PlanStep(tool=tool) for _, tool in sorted(found)],
+            explanation="Detected several read-only requests.",
+        )
+
     def _should_force_smart_commit_push(self, text: str) -> bool:
         """Check if text contains multiple Git actions implying a smart commit."""
         t = text.lower()
@@ -242,3 +385,8 @@ class Brain:
             tool_call.params["name"] = name
             
         return tool_call
+
+    def _ensure_test_params(self, tool_call: ToolCall, raw_text: str) -> ToolCall:
+        if tool_call.tool == "git.run_tests" and FULL_SUITE.search(raw_text):
+            tool_call.params["full"] = True
+        return tool_call
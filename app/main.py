@@ -1,30 +1,27 @@
+import sys
+
+# Enabled before anything else is imported so the whole import tree is timed
+from app.core.startup import profiler
+
+PROFILE_ARG = next((a for a in sys.argv[1:] if a.startswith("--startup-profile")), None)
+if PROFILE_ARG:
+    profiler.enable()
+
 import asyncio
 import logging
-import sys
+import threading
 from rich.console import Console
-from rich.prompt import Confirm
 from rich.panel import Panel
 from app.config import load_config
 from app.audio.recorder import AudioRecorder
-from app.audio.stt import Transcriber
-from app.audio.feedback import play_start_listening_sound, play_stop_listening_sound
-from app.llm.router import Brain
-from app.core.executor import execute_tool
-from app.core.models import ToolCall
+from app.audio.wakeword import WakeWordDetector, load_keyword_model
+from app.audio.confirm import ConfirmationListener
 from app.core.metrics import MetricsLogger
-from app.core.policies import TOOL_POLICIES, ToolPolicy
-from app.cli.ui import (
-    show_status,
-    show_error,
-    show_success,
-    spinner,
-    render_git_status,
-    render_git_log,
-    render_git_diff,
-    render_test_results,
-    render_smart_commit,
-    render_simple_block,
-)
+from app.core.model_manager import ModelManager
+from app.core.tracing import tracer
+from app.daemon.client import RemoteBrain, RemoteTranscriber, connect_daemon
+from app.cli.session import VoiceSession
+from app.cli.ui import show_error
 
 # Configure logging
 logging.basicConfig(
@@ -36,13 +33,52 @@ logger = logging.getLogger("gitvoice")
 
 console = Console()
 
+
+def load_local_models(config, models):
+    """Transcriber and Brain in this process (no daemon running); slow the first time."""
+    from app.audio.stt import Transcriber
+    from app.core.workers import build_ml_pools
+    from app.llm.router import Brain
+
+    # Models live in worker processes when ML_WORKERS > 0
+    whisper_pool, intent_pool = build_ml_pools(config)
+    transcriber = Transcriber(config, pool=whisper_pool, models=models)
+    brain = Brain(config, intent_pool=intent_pool, models=models)
+    return transcriber, brain, [p for p in (whisper_pool, intent_pool) if p is not None]
+
+
+def lazy_local_models(config, models):
+    """load_local_models(), run once on first call: for a daemon that goes away mid-session."""
+    lock = threading.Lock()
+    loaded = []
+
+    def get():
+        # Called from worker threads, possibly by the transcriber and the brain at once
+        with lock:
+            if not loaded:
+                loaded.append(load_local_models(config, models))
+        return loaded[0]
+    return get
+
+
+async def warm_up(fn, name: str) -> None:
+    def _timed():
+        with profiler.span(name):
+            fn()
+
+    await asyncio.to_thread(_timed)
+
+
 async def main():
     console.print(Panel.fit("[bold green]GitVoice[/bold green] - Hands-Free Git Assistant", border_style="green"))
     
     # Load config
     try:
-        config = load_config()
+        with profiler.span("config"):
+            config = load_config()
         logging.getLogger().setLevel(config.log_level)
+        if config.trace_file:
+            tracer.export_to(config.trace_file)
     except Exception as e:
         console.print(f"[bold red]Configuration error:[/bold red] {e}")
         return
@@ -50,161 +86,94 @@ async def main():
     # Initialize components
     with console.status("[bold green]Initializing components...[/bold green]"):
         try:
-            recorder = AudioRecorder(config)
-            transcriber = Transcriber(config)
-            brain = Brain(config)
-            metrics_logger = MetricsLogger()
+            with profiler.span("recorder"):
+                recorder = AudioRecorder(config)
+            metrics_logger = MetricsLogger.from_config(config)
+            # In-process models are unloaded while idle and reloaded on demand
+            models = ModelManager(config.model_idle_ttl_s, config.model_memory_budget_mb, metrics=metrics_logger)
+            # A running daemon already has the models loaded
+            with profiler.span("daemon_connect"):
+                daemon = await connect_daemon(config)
+            with profiler.span("components"):
+                if daemon:
+                    local = lazy_local_models(config, models)
+                    reconnect = lambda: connect_daemon(config)  # noqa: E731
+                    transcriber = RemoteTranscriber(daemon, config, fallback=lambda: local()[0], reconnect=reconnect)
+                    brain = RemoteBrain(daemon, fallback=lambda: local()[1], reconnect=reconnect)
+                    pools = []
+                else:
+                    transcriber, brain, pools = load_local_models(config, models)
         except Exception as e:
             console.print(f"[bold red]Initialization failed:[/bold red] {e}")
             return
 
+    if daemon:
+        console.print(f"[dim]Using the GitVoice daemon at {daemon.path}[/dim]")
+    else:
+        console.print("[dim]Tip: start `python -m app.daemon.server` once to keep models loaded between runs.[/dim]")
+    if transcriber.has_local and transcriber.whisper_settings.source == "default":
+        console.print("[dim]Tip: run `python -m app.audio.calibration` to pick the best Whisper model for this machine.[/dim]")
+
+    for pool in pools:
+        pool.start_health_checks()
+    models.start()
+
+    # Audio backend and models load off the main thread while the session starts
+    warm_ups = [warm_up(recorder.warm_up, "warm_up.recorder")]
+    if not daemon:
+        warm_ups += [warm_up(transcriber.warm_up, "warm_up.transcriber"), warm_up(brain.warm_up, "warm_up.brain")]
+    warming = asyncio.gather(*warm_ups)
+
+    confirm_listener = None
+    if config.voice_confirmations:
+        confirm_listener = ConfirmationListener(config, recorder, transcriber, models=models)
+        # Load the yes/no model in the background so the first check is fast
+        asyncio.create_task(asyncio.to_thread(confirm_listener.warm_up))
+
     console.print("[dim]Press Ctrl+C to exit[/dim]")
     
-    async def run_tool_with_policy(tool_call: ToolCall, raw_text: str):
-        # Handle string tool names by checking if they are in Enum or just defaulting
-        policy = TOOL_POLICIES.get(tool_call.tool, ToolPolicy(False, 0, []))
-        
-        # 1. Human Confirmation
-        if (policy.confirmation_required or tool_call.confirmation_required) and config.require_confirmation_writes:
-            console.print(f"[bold yellow]Safety Check:[/bold yellow] About to execute: {tool_call.tool} ({tool_call.params})")
-            if not Confirm.ask(f"[bold red]Are you sure?[/bold red]"):
-                console.print("[red]Cancelled by user.[/red]")
-                metrics_logger.log(raw_text, tool_call.tool, success=False, error="cancelled_by_user")
-                return
-
-        # 2. Generic Retry
-        attempts = policy.retries + 1
-        for i in range(attempts):
-            try:
-                start_time = asyncio.get_event_loop().time()
-                
-                # Call stateless executor with spinner
-                with spinner(f"Executing {tool_call.tool}..."):
-                    result_dict = await execute_tool(tool_call, config=config, brain=brain, console=console)
-                
-                end_time = asyncio.get_event_loop().time()
-                duration = (end_time - start_time) * 1000
-
-                is_success = result_dict.get("success", False) # execute_tool now returns dict
-                exit_code = result_dict.get("exit_code", 0)
-                stdout = result_dict.get("stdout", "")
-                stderr = result_dict.get("stderr", "")
-                
-                should_retry = False
-                
-                if not is_success:
-                    if exit_code in policy.retry_on_exit_codes:
-                        should_retry = True
-                
-                metrics_logger.log(
-                    raw_text, 
-                    tool_call.tool, 
-                    success=is_success, 
-                    error=stderr if not is_success else None,
-                    duration_ms=duration
-                )
-
-                if is_success:
-                    # Render output based on tool type
-                    tool = tool_call.tool
-                    
-                    if tool == "git.status":
-                        render_git_status(stdout)
-                    elif tool == "git.log":
-                        render_git_log(stdout)
-                    elif tool == "git.diff":
-                        render_git_diff(stdout)
-                    elif tool == "git.run_tests":
-                        # For run_tests, we render inside here regardless of success/failure
-                        # because passing tests (exit 0) vs failed tests (exit 1) are both "successful" tool executions
-                        render_test_results(result_dict)
-                        
-                        # We override the success message logic for tests
-                        exit_code = result_dict.get("exit_code", 0)
-                        if exit_code == 0:
-                            show_success(f"✓ {tool} passed all tests")
-                        else:
-                            show_error(f"Tests failed with exit code {exit_code}")
-                        return
-                    elif tool == "git.smart_commit_push":
-                        render_smart_commit(result_dict)
-                    else:
-                        # Generic rendering for other tools
-                        render_simple_block(tool, stdout)
-                    
-                    show_success(f"✓ {tool} completed successfully")
-                    return
-                
-                if should_retry and i < attempts - 1:
-                    show_error(f"Command failed with code {exit_code}. Retrying...")
-                    await asyncio.sleep(0.5)
-                    continue
-                
-                # Final failure for non-test tools
-                show_error(f"{tool_call.tool} failed with exit code {exit_code}")
-                if stderr:
-                    render_simple_block("Error Details", stderr, border_style="red")
-                return
-
-            except Exception as e:
-                show_error(f"Exception during execution: {e}")
-                metrics_logger.log(raw_text, tool_call.tool, success=False, error=str(e))
-                if i == attempts - 1:
-                    return
+    detector = None
+    if config.listen_mode == "wake-word":
+        model = load_keyword_model(config)
+        if model is None:
+            show_error(
+                "No wake word model found. Run `python -m app.audio.wakeword enroll` "
+                "or set WAKE_WORD_MODEL. Falling back to auto-silence mode."
+            )
+        else:
+            detector = WakeWordDetector(
+                model, config.audio.sample_rate, threshold=config.audio.wake_word_threshold
+            )
 
+    session = VoiceSession(
+        config, recorder, transcriber, brain, metrics_logger, console,
+        detector=detector, confirm_listener=confirm_listener,
+    )
+    profiler.mark("ready")
     try:
-        while True:
-            show_status("\nPress Enter to START recording (or 'q' to quit)...", style="bold white")
-            cmd = input().strip().lower()
-            if cmd == 'q':
-                break
-            
-            # 1. Start Recording
-            play_start_listening_sound()
-            recorder.start_recording()
-            show_status("🎙️  Recording... Press Enter to STOP.", style="bold yellow")
-            input()
-            audio_path = recorder.stop_recording()
-            play_stop_listening_sound()
-            
-            if not audio_path:
-                show_error("No audio captured.")
-                continue
-
-            console.print(f"[dim]Saved audio: {audio_path}[/dim]")
-            
-            # 2. Transcribe
-            with spinner("Transcribing audio..."):
-                stt_result = await transcriber.transcribe(audio_path)
-            
-            if not stt_result.text:
-                show_error("Could not understand anything, please try again.")
-                continue
-                
-            console.print(f"[bold cyan]Heard:[/bold cyan] \"{stt_result.text}\"")
-            
-            # 3. Brain
-            with spinner("Thinking..."):
-                tool_call = await brain.process(stt_result.text)
-            
-            console.print(f"[dim]→ Planned action:[/dim] [bold]{tool_call.tool}[/bold] {tool_call.params}")
-            
-            if tool_call.tool == "help": # Check string literal
-                console.print(f"[yellow]{tool_call.explanation}[/yellow]")
-                continue
-            
-            # 4. Execute with Policy
-            # Inject confirmation callback for smart commit (safe since in-process)
-            if tool_call.tool == "git.smart_commit_push":
-                tool_call.params["confirm_callback"] = lambda msg: Confirm.ask(f"[bold yellow]{msg}[/bold yellow]")
-                
-            await run_tool_with_policy(tool_call, stt_result.text)
-                    
+        if PROFILE_ARG:
+            await warming
+            profiler.report(console, as_json=PROFILE_ARG.endswith("=json"))
+            return
+        await session.run()
     except KeyboardInterrupt:
         console.print("\n[bold blue]GitVoice stopping...[/bold blue]")
     except Exception as e:
         console.print(f"\n[bold red]Unexpected error:[/bold red] {e}")
         logger.exception("Unexpected error in main loop")
+    finally:
+        models.stop()
+        metrics_logger.log_event("model_residency", models=models.stats())
+        metrics_logger.close()
+        tracer.close()
+        for pool in pools:
+            pool.close()
+        if daemon:
+            await daemon.close()
 
-if __name__ == "__main__":
+def run():
     asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
@@ -1,9 +1,15 @@
+import inspect
 from fastmcp import FastMCP
-from typing import Optional
+from fastmcp.server.dependencies import get_context as get_request_context
+from rich.console import Console
+from mcp.types import ToolAnnotations
 from app.core.executor import execute_tool
 from app.core.models import ToolCall, AppConfig
-from app.llm.router import Brain # Needed for smart_commit_push
+from app.core.profiling import InteractionProfile
+from app.core.test_impact import app_outputs
+from app.core.tool_specs import TOOL_SPECS, ToolSpec, public_params
 from app.config import load_config
+from app.daemon.client import RemoteBrain, connect_daemon
 
 # Initialize FastMCP server
 server = FastMCP("gitvoice")
@@ -11,62 +17,89 @@ server = FastMCP("gitvoice")
 # Lazy load config and brain to avoid startup cost issues or side effects
 _config = None
 _brain = None
+_local_brain = None
 
-def get_context():
+def _in_process_brain():
+    global _local_brain
+    if _local_brain is None:
+        from app.llm.router import Brain  # Needed for smart_commit_push
+        _local_brain = Brain(_config)
+    return _local_brain
+
+async def get_context():
     global _config, _brain
     if not _config:
         _config = load_config()
+    if isinstance(_brain, RemoteBrain) and not _brain.connected:
+        # The daemon went away (restarted, or stopped): reconnect, or route in-process
+        _brain = None
     if not _brain:
-        _brain = Brain(_config)
+        # Share the daemon's warm models when it is running
+        daemon = await connect_daemon(_config)
+        _brain = RemoteBrain(daemon, fallback=_in_process_brain) if daemon else _in_process_brain()
     return _config, _brain
 
-@server.tool()
-async def git_status() -> dict:
-    """Show concise git status for the current repository."""
-    config, brain = get_context()
-    tc = ToolCall(tool="git.status", params={}, confirmation_required=False)
-    # execute_tool logic returns dict
-    return await execute_tool(tc, config=config, brain=brain)
+def _test_output_to_client():
+    """on_output for run_tests: each line as a log message, the pytest percentage as progress."""
+    try:
+        ctx = get_request_context()
+    except RuntimeError:
+        return None
+    last = {"percent": None}
 
-@server.tool()
-async def run_tests() -> dict:
-    """Run the project test suite using pytest."""
-    config, brain = get_context()
-    tc = ToolCall(tool="git.run_tests", params={}, confirmation_required=False)
-    return await execute_tool(tc, config=config, brain=brain)
+    async def on_output(line, summary):
+        await ctx.info(line)
+        if summary.percent is not None and summary.percent != last["percent"]:
+            last["percent"] = summary.percent
+            await ctx.report_progress(summary.percent, 100, summary.headline())
+    return on_output
 
-@server.tool()
-async def git_diff(path: Optional[str] = None) -> dict:
-    """Show git diff since last commit."""
-    config, brain = get_context()
-    tc = ToolCall(tool="git.diff", params={"path": path}, confirmation_required=False)
-    return await execute_tool(tc, config=config, brain=brain)
+def _mcp_tool(spec: ToolSpec):
+    """An MCP tool for `spec`; its arguments and description come from the spec."""
+    async def tool(**params) -> dict:
+        config, brain = await get_context()
+        call_params = dict(params)
+        if spec.name == "git.run_tests":
+            # Stream the run to the client instead of going quiet until it ends
+            call_params["timeout_s"] = config.test_timeout_s
+            if not config.test_selection:
+                call_params["full"] = True
+            call_params["ignore_paths"] = app_outputs(config)
+            call_params["on_output"] = _test_output_to_client()
+        # No confirm_callback: MCP clients confirm with the user before calling write tools
+        tc = ToolCall(tool=spec.name, params=call_params, confirmation_required=False)
+        profile = InteractionProfile(config.profile_dir, config.profile_mode) if config.profile_interactions else None
+        if profile is None or not profile.start():
+            return await execute_tool(tc, config=config, brain=brain)
+        try:
+            return await execute_tool(tc, config=config, brain=brain)
+        finally:
+            # stdout carries the MCP protocol
+            profile.finish(f"{spec.mcp_name}({params})", spec.name, console=Console(stderr=True))
 
-@server.tool()
-async def smart_commit_push(auto_stage: bool = True, push: bool = True) -> dict:
-    """
-    Stage changes, generate a commit message, commit, and (optionally) push.
-    Clients are expected to obtain human confirmation before calling this tool.
-    """
-    config, brain = get_context()
-    # Confirm callback needs to be handled by client side or assumed confirmed if calling this tool
-    # For MCP, we assume the agent/IDE handles "Do you want to run smart_commit?"
-    # execute_tool expects a callback if we want safety, OR we can pass None and implicitly trust tool call.
-    # The new prompt says "Clients are expected to obtain human confirmation".
-    # So we pass None for callback, which means NO CHECK inside the tool function itself if implemented that way?
-    # Wait, smart_commit_push implementation: if confirm_callback provided, it asks. If NOT provided, it proceeds?
-    # checking code: `if confirm_callback: if not callback(): return cancel`
-    # So if None, it proceeds automatically. This is correct for MCP where agent confirms.
-    
-    tc = ToolCall(tool="git.smart_commit_push", params={"auto_stage": auto_stage, "push": push}, confirmation_required=False)
-    return await execute_tool(tc, config=config, brain=brain)
+    params = public_params(spec)
+    tool.__name__ = spec.mcp_name
+    tool.__annotations__ = {**{name: info.annotation for name, info in params.items()}, "return": dict}
+    tool.__signature__ = inspect.Signature(
+        [
+            inspect.Parameter(
+                name, inspect.Parameter.KEYWORD_ONLY, annotation=info.annotation,
+                default=inspect.Parameter.empty if info.is_required() else info.default,
+            )
+            for name, info in params.items()
+        ],
+        return_annotation=dict,
+    )
+    description = spec.description + "."
+    if spec.policy.confirmation_required:
+        description += " Clients are expected to obtain human confirmation before calling this tool."
+    annotations = ToolAnnotations(readOnlyHint=spec.policy.access == "read")
+    return server.tool(name=spec.mcp_name, description=description, annotations=annotations)(tool)
 
-@server.tool()
-async def git_pull(remote: Optional[str] = None, branch: Optional[str] = None) -> dict:
-    """Pull latest changes from the remote."""
-    config, brain = get_context()
-    tc = ToolCall(tool="git.pull", params={"remote": remote, "branch": branch}, confirmation_required=False)
-    return await execute_tool(tc, config=config, brain=brain)
+# git_status, git_diff, git_pull, run_tests, smart_commit_push
+for _spec in TOOL_SPECS.values():
+    if _spec.mcp_name:
+        globals()[_spec.mcp_name] = _mcp_tool(_spec)
 
 def main():
     server.run()
@@ -0,0 +1,70 @@
+"""
+Benchmark: execute_tool dispatch overhead per call.
+
+Every tool is replaced by a stub that returns immediately in its declared
+shape, so the timings are only execute_tool's own work: the registry
+lookup, parameter validation against the tool's spec, dependency injection
+and result normalization. "validate" is the parameter model alone.
+
+Usage:
+    python -m benchmarks.bench_dispatch [--calls 20000]
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.executor import execute_tool
+from app.core.models import ToolCall
+from app.core.tool_specs import TOOL_SPECS
+
+RESULTS = {
+    "output": ("ok", 0),
+    "commit": ("chore: bench", "ok", 0),
+    "dict": {"stdout": "ok", "exit_code": 0},
+}
+
+CALLS = [
+    ToolCall(tool="git.status"),
+    ToolCall(tool="git.log", params={"n": 5}),
+    ToolCall(tool="git.diff", params={"path": "app/main.py", "since_origin_main": True}),
+    ToolCall(tool="git.reset", params={"mode": "soft", "commits": "2"}),
+    ToolCall(tool="git.branch", params={"name": "feature", "create": True}),
+    ToolCall(tool="git.smart_commit_push", params={"auto_stage": True, "push": False}),
+]
+
+
+def _stub(returns: str):
+    async def tool(**kwargs):
+        result = RESULTS[returns]
+        return dict(result) if isinstance(result, dict) else result
+    return tool
+
+
+async def run(calls: int) -> None:
+    registry = {name: _stub(spec.returns) for name, spec in TOOL_SPECS.items()}
+    brain = object()
+
+    print(f"{'tool':<24}{'dispatch us':>12}{'validate us':>12}")
+    for tool_call in CALLS:
+        spec = TOOL_SPECS[tool_call.tool]
+        start = time.perf_counter()
+        for _ in range(calls):
+            await execute_tool(tool_call, brain=brain, _registry=registry)
+        dispatch = (time.perf_counter() - start) / calls * 1e6
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            spec.params.model_validate(tool_call.params)
+        validate = (time.perf_counter() - start) / calls * 1e6
+        print(f"{tool_call.tool:<24}{dispatch:>12.2f}{validate:>12.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="execute_tool dispatch overhead")
+    parser.add_argument("--calls", type=int, default=20000, help="calls per tool")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: `metrics report` over a large SQLite metrics database.
+
+Fills a temporary database with synthetic commands spread over the last
+30 days (in migration-sized batches), then times MetricsStore.report() for
+all time and for the last 7 days, and one writer-sized insert.
+
+Usage:
+    python -m benchmarks.bench_metrics_report [--rows 1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.core.metrics import BATCH_SIZE
+from app.core.metrics_store import MIGRATE_BATCH, MetricsStore
+
+TOOLS = ["git.status", "git.diff", "git.log", "git.smart_commit_push", "git.push", "git.pull", "git.run_tests"]
+
+
+def _entries(n: int, rng: random.Random):
+    now = datetime.now()
+    for _ in range(n):
+        tool = rng.choice(TOOLS)
+        ok = rng.random() > 0.05
+        yield {
+            "timestamp": (now - timedelta(seconds=rng.uniform(0, 30 * 86400))).isoformat(),
+            "text": f"please {tool.split('.')[1].replace('_', ' ')} {rng.randint(0, 50)}",
+            "tool": tool,
+            "success": ok,
+            "error": None if ok else "exit code 1",
+            "duration_ms": rng.lognormvariate(5, 1),
+            "route": "llm" if rng.random() < 0.1 else "setfit",
+            "schema_version": 1,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="metrics report over a large database")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MetricsStore(os.path.join(tmp, "metrics.db"), retention_days=0)
+        rng = random.Random(0)
+        start = time.perf_counter()
+        batch = []
+        for entry in _entries(args.rows, rng):
+            batch.append(entry)
+            if len(batch) == MIGRATE_BATCH:
+                store.insert(batch)
+                batch = []
+        store.insert(batch)
+        insert_s = time.perf_counter() - start
+        print(f"inserted {args.rows} rows in {insert_s:.1f}s ({args.rows / insert_s:,.0f} rows/s)")
+
+        for days in (None, 7):
+            start = time.perf_counter()
+            report = store.report(days=days)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"report (days={days}): {elapsed:.1f} ms, {len(report['tools'])} tools")
+
+        batch = list(_entries(BATCH_SIZE, rng))
+        start = time.perf_counter()
+        store.insert(batch)
+        print(f"insert of {BATCH_SIZE} entries: {(time.perf_counter() - start) * 1000:.1f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
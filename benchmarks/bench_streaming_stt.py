@@ -0,0 +1,77 @@
+"""
+Benchmark: time from "stop recording" to final text, batch vs streaming.
+
+Replays a WAV file into an AudioRingBuffer at real-time pace (as the
+sounddevice callback would), then measures how long each mode takes to
+produce the final transcript once playback "stops".
+
+Usage:
+    python -m benchmarks.bench_streaming_stt path/to/command.wav [--runs 3]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+import soundfile as sf
+
+from app.audio.ring_buffer import AudioRingBuffer
+from app.audio.streaming import StreamingTranscriber
+from app.audio.stt import Transcriber
+from app.config import load_config
+
+BLOCK = 1024
+
+
+async def _replay(buffer: AudioRingBuffer, audio: np.ndarray, sample_rate: int) -> None:
+    for i in range(0, len(audio), BLOCK):
+        buffer.write(audio[i:i + BLOCK].reshape(-1, 1))
+        await asyncio.sleep(BLOCK / sample_rate)
+
+
+async def run_batch(transcriber: Transcriber, audio: np.ndarray, sample_rate: int) -> float:
+    buffer = AudioRingBuffer(len(audio) + BLOCK)
+    await _replay(buffer, audio, sample_rate)
+    start = time.perf_counter()
+    await transcriber.transcribe(buffer.mono().copy())
+    return time.perf_counter() - start
+
+
+async def run_streaming(transcriber: Transcriber, audio: np.ndarray, sample_rate: int,
+                        hop_s: float) -> float:
+    buffer = AudioRingBuffer(len(audio) + BLOCK)
+    stream = StreamingTranscriber(transcriber, buffer, sample_rate, hop_s=hop_s)
+    stream.start()
+    await _replay(buffer, audio, sample_rate)
+    start = time.perf_counter()
+    await stream.finish()
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("wav")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--hop", type=float, default=1.0)
+    args = parser.parse_args()
+
+    config = load_config()
+    config.stt_provider = "faster-whisper"
+    transcriber = Transcriber(config)
+    if not transcriber.supports_streaming:
+        raise SystemExit("faster-whisper model not available")
+
+    audio, sample_rate = sf.read(args.wav, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    print(f"Clip: {len(audio) / sample_rate:.2f}s @ {sample_rate} Hz, model={config.whisper_model}")
+
+    batch = [await run_batch(transcriber, audio, sample_rate) for _ in range(args.runs)]
+    streaming = [await run_streaming(transcriber, audio, sample_rate, args.hop) for _ in range(args.runs)]
+
+    print(f"stop->text batch:     median {statistics.median(batch) * 1000:7.1f} ms")
+    print(f"stop->text streaming: median {statistics.median(streaming) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark: wake word false accepts per hour and CPU cost of the listener.
+
+Streams noise through WakeWordDetector in 100 ms chunks (as the live
+listener does) and reports detections per hour of audio and CPU time as a
+percentage of one core.
+
+Noise fixtures are WAV files from --noise-dir (record your own office,
+fan, keyboard and TV noise). Without it, seeded synthetic fixtures are
+generated: white, pink and brown noise, keyboard-like clicks and a
+speech-like babble of modulated harmonic tones.
+
+Usage:
+    python -m benchmarks.bench_wakeword [--templates DIR] [--noise-dir DIR] [--minutes 10]
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import soundfile as sf
+
+from app.audio.wakeword import LogMelExtractor, TemplateKeywordModel, WakeWordDetector
+
+SR = 16000
+CHUNK = SR // 10
+
+
+def _colored(rng, n, exponent):
+    spectrum = np.fft.rfft(rng.standard_normal(n))
+    freqs = np.fft.rfftfreq(n)
+    freqs[0] = freqs[1]
+    noise = np.fft.irfft(spectrum / freqs ** (exponent / 2), n)
+    return noise / np.abs(noise).max()
+
+
+def _clicks(rng, n):
+    audio = rng.standard_normal(n) * 0.002
+    for pos in rng.integers(0, n - 400, size=n // SR * 6):
+        audio[pos:pos + 400] += rng.standard_normal(400) * np.exp(-np.arange(400) / 60) * 0.4
+    return audio
+
+
+def _babble(rng, n):
+    t = np.arange(n) / SR
+    audio = np.zeros(n)
+    for _ in range(6):
+        f0 = rng.uniform(90, 250)
+        syllables = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 6) * t + rng.uniform(0, 6))
+        for h in range(1, 8):
+            audio += np.sin(2 * np.pi * f0 * h * t) * syllables / h
+    return audio / np.abs(audio).max()
+
+
+def synthetic_fixtures(minutes: float) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(1234)
+    n = int(minutes * 60 * SR / 5)
+    return {
+        "white": rng.standard_normal(n) * 0.05,
+        "pink": _colored(rng, n, 1.0) * 0.3,
+        "brown": _colored(rng, n, 2.0) * 0.3,
+        "keyboard": _clicks(rng, n),
+        "babble": _babble(rng, n) * 0.3,
+    }
+
+
+def load_fixtures(directory: Path) -> Dict[str, np.ndarray]:
+    fixtures = {}
+    for path in sorted(directory.glob("*.wav")):
+        audio, rate = sf.read(path, dtype="float32", always_2d=True)
+        if rate != SR:
+            raise SystemExit(f"{path.name}: expected {SR} Hz, got {rate}")
+        fixtures[path.stem] = audio.mean(axis=1)
+    return fixtures
+
+
+def synthetic_template() -> np.ndarray:
+    t = np.arange(int(0.35 * SR)) / SR
+    up = np.sin(2 * np.pi * (300 * t + 900 * t ** 2))
+    down = np.sin(2 * np.pi * (1400 * t - 1200 * t ** 2))
+    keyword = (np.concatenate([up, np.zeros(800), down]) * 0.3).astype(np.float32)
+    return LogMelExtractor(SR).features(keyword)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Wake word false-accept / CPU benchmark")
+    parser.add_argument("--templates", type=Path, help="enrolled template dir (.npy files)")
+    parser.add_argument("--noise-dir", type=Path, help="directory of 16 kHz WAV noise recordings")
+    parser.add_argument("--minutes", type=float, default=10.0, help="synthetic noise length")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    if args.templates:
+        model = TemplateKeywordModel.load(args.templates)
+    else:
+        model = TemplateKeywordModel([synthetic_template()])
+    fixtures = load_fixtures(args.noise_dir) if args.noise_dir else synthetic_fixtures(args.minutes)
+
+    print(f"{'fixture':<12}{'audio':>9}{'FA':>5}{'FA/hour':>10}{'scored':>8}{'CPU %':>8}")
+    total_s = total_cpu = total_fa = 0.0
+    for name, audio in fixtures.items():
+        audio = audio.astype(np.float32)
+        detector = WakeWordDetector(model, SR, threshold=args.threshold)
+        false_accepts = 0
+        cpu_start = time.process_time()
+        for i in range(0, len(audio), CHUNK):
+            if detector.process(audio[i:i + CHUNK]) is not None:
+                false_accepts += 1
+        cpu = time.process_time() - cpu_start
+        seconds = len(audio) / SR
+        total_s, total_cpu, total_fa = total_s + seconds, total_cpu + cpu, total_fa + false_accepts
+        print(f"{name:<12}{seconds:>8.0f}s{false_accepts:>5}{false_accepts / seconds * 3600:>10.2f}"
+              f"{detector.scored_windows:>8}{cpu / seconds * 100:>8.2f}")
+
+    print(f"{'total':<12}{total_s:>8.0f}s{int(total_fa):>5}{total_fa / total_s * 3600:>10.2f}"
+          f"{'':>8}{total_cpu / total_s * 100:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
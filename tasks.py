@@ -11,6 +11,12 @@ def dev() -> int:
 def mcp() -> int:
     return _run("python -m app.mcp.server")
 
+def daemon() -> int:
+    return _run("python -m app.daemon.server")
+
+def calibrate() -> int:
+    return _run("python -m app.audio.calibration")
+
 def test() -> int:
     return _run("python -m pytest")
 
@@ -23,10 +29,12 @@ def format() -> int:
 if __name__ == "__main__":
     # simple CLI: python tasks.py dev|mcp|test
     if len(sys.argv) < 2:
-        print("Usage: python tasks.py [dev|mcp|test|lint|format]")
+        print("Usage: python tasks.py [dev|mcp|daemon|calibrate|test|lint|format]")
         print("Commands:")
         print("  dev    - Run the voice CLI")
         print("  mcp    - Run the MCP server")
+        print("  daemon - Keep models loaded for fast CLI/MCP starts")
+        print("  calibrate - Pick Whisper model/compute settings for this machine")
         print("  test   - Run tests")
         print("  lint   - Lint code with ruff")
         print("  format - Format code with ruff")
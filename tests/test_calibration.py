@@ -0,0 +1,98 @@
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.audio import calibration
+from app.audio.calibration import (
+    WhisperSettings,
+    calibrate,
+    load_calibration,
+    load_clips,
+    resolve_whisper_settings,
+    save_calibration,
+)
+from app.audio.decoding import PROFILES, ProfileSelector
+
+# Simulated seconds of compute per second of audio, by model size
+SIZE_COST = {"tiny": 0.04, "base": 0.08, "small": 0.32}
+
+
+class FakeModel:
+    """Takes a decode time that depends on the settings."""
+
+    def __init__(self, size, compute_type, threads, workers):
+        if compute_type == "float32" and size == "small":
+            raise RuntimeError("out of memory")
+        self.cost = SIZE_COST[size] / threads * (0.5 if compute_type == "int8" else 1.0)
+
+    def transcribe(self, audio, **kwargs):
+        time.sleep(self.cost * len(audio) / 16000)
+        return iter([]), None
+
+
+CLIPS = [np.zeros(8000, dtype=np.float32)] * 2
+
+
+def _calibrate(rtf_target, **kwargs):
+    return calibrate(
+        CLIPS, rtf_target, model_sizes=("tiny", "base", "small"),
+        compute_types=("int8", "float32"), thread_counts=(1, 2),
+        model_factory=FakeModel, report=lambda line: None, **kwargs,
+    )
+
+
+def test_picks_largest_model_meeting_target():
+    record = _calibrate(rtf_target=0.1)
+    choice = record["choice"]
+    assert choice["model_size"] == "small"
+    assert (choice["compute_type"], choice["cpu_threads"]) == ("int8", 2)
+    # One candidate failed to load and is simply left out
+    assert len(record["results"]) == 10
+    assert set(record["best_per_size"]) == {"tiny", "base", "small"}
+
+
+def test_stops_at_first_size_over_target():
+    record = _calibrate(rtf_target=0.015)
+    assert record["choice"]["model_size"] == "tiny"
+    assert "small" not in record["best_per_size"]
+
+
+def test_falls_back_to_fastest_when_nothing_meets_target():
+    record = _calibrate(rtf_target=0.0001)
+    assert record["choice"]["model_size"] == "tiny"
+
+
+def test_round_trip_and_resolution(tmp_path):
+    path = tmp_path / "calibration.json"
+    save_calibration(_calibrate(rtf_target=0.1), path)
+
+    auto = resolve_whisper_settings("auto", path)
+    assert auto.model_size == "small" and auto.source == "calibration"
+    explicit = resolve_whisper_settings("tiny", path)
+    assert explicit.model_size == "tiny" and explicit.compute_type == "int8"
+    assert resolve_whisper_settings("large-v3", path) == WhisperSettings("large-v3", source="config")
+
+
+def test_uncalibrated_or_other_host_defaults_to_base(tmp_path, monkeypatch):
+    path = tmp_path / "calibration.json"
+    assert resolve_whisper_settings("auto", path) == WhisperSettings("base")
+
+    save_calibration(_calibrate(rtf_target=0.1), path)
+    monkeypatch.setattr(calibration, "host_fingerprint", lambda: {"node": "elsewhere"})
+    assert load_calibration(path) is None
+    assert resolve_whisper_settings("auto", path).model_size == "base"
+
+
+def test_load_clips_prefers_recordings(tmp_path):
+    assert len(load_clips(tmp_path / "missing")) == 3  # synthetic
+    sf.write(str(tmp_path / "cmd.wav"), np.zeros((48000, 2), dtype=np.float32), 48000)
+    clips = load_clips(tmp_path)
+    assert len(clips) == 1 and clips[0].shape == (16000,)
+
+
+def test_selector_uses_calibrated_rtf():
+    selector = ProfileSelector(1500)
+    selector.calibrate(PROFILES["fast"].default_rtf * 2)
+    assert selector.rtf["accurate"] == pytest.approx(PROFILES["accurate"].default_rtf * 2)
@@ -0,0 +1,112 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.audio.cloud_stt import CloudTranscriber, encode_audio, resample, to_mono
+from app.audio.stt import Transcriber
+from app.core.models import AppConfig
+
+
+class _FakeGroq(BaseHTTPRequestHandler):
+    """Local stand-in for the Groq transcription endpoint."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.path, self.headers.get("Content-Type", ""), body))
+        reply = b"git status"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_groq():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeGroq)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _tone(seconds=1.0, rate=48000, channels=2):
+    t = np.arange(int(seconds * rate)) / rate
+    mono = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    return np.repeat(mono[:, None], channels, axis=1)
+
+
+def _uploaded_audio(body: bytes) -> bytes:
+    """Pull the file part out of a multipart body."""
+    start = body.index(b"\r\n\r\n", body.index(b'name="file"')) + 4
+    end = body.index(b"\r\n--", start)
+    return body[start:end]
+
+
+def test_resample_preserves_tone():
+    audio = to_mono(_tone())
+    out = resample(audio, 48000, 16000)
+    assert len(out) == 16000
+    peak_hz = np.argmax(np.abs(np.fft.rfft(out))) * 16000 / len(out)
+    assert abs(peak_hz - 440) < 2
+    assert np.isclose(np.abs(out).max(), 0.3, atol=0.02)
+
+
+@pytest.mark.parametrize("fmt", ["flac", "opus"])
+def test_encoded_payload_is_smaller_than_pcm(fmt):
+    audio = resample(to_mono(_tone()), 48000, 16000)
+    payload, filename = encode_audio(audio, 16000, fmt)
+    assert len(payload) < audio.size * 2
+    decoded, rate = sf.read(io.BytesIO(payload), dtype="float32")
+    assert rate in (16000, 48000)  # Opus always decodes at 48 kHz
+    assert filename.endswith(".flac" if fmt == "flac" else ".ogg")
+
+
+@pytest.mark.asyncio
+async def test_uploads_compressed_mono_16k(fake_groq, tmp_path):
+    path = tmp_path / "cmd.wav"
+    sf.write(str(path), _tone(), 48000)
+    cloud = CloudTranscriber("test-key", base_url=f"http://127.0.0.1:{fake_groq.server_port}")
+    try:
+        assert await cloud.transcribe(str(path), 16000) == "git status"
+        text, stats = await cloud.transcribe_with_stats(_tone(rate=16000, channels=1)[:, 0], 16000)
+        assert text == "git status"
+    finally:
+        await cloud.aclose()
+
+    assert len(fake_groq.requests) == 2
+    request_path, content_type, body = fake_groq.requests[0]
+    assert request_path.endswith("/audio/transcriptions")
+    assert content_type.startswith("multipart/form-data")
+    audio, rate = sf.read(io.BytesIO(_uploaded_audio(body)), dtype="float32")
+    assert rate == 16000 and audio.ndim == 1 and len(audio) == 16000
+
+    assert stats.format == "flac"
+    assert stats.payload_bytes < stats.pcm_bytes
+    assert stats.upload_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_transcriber_reports_upload_stats(fake_groq):
+    config = AppConfig(stt_provider="groq", groq_api_key="test-key", stt_upload_format="opus")
+    transcriber = Transcriber(config)
+    transcriber.cloud = CloudTranscriber(
+        "test-key", upload_format="opus", base_url=f"http://127.0.0.1:{fake_groq.server_port}"
+    )
+    pcm = (_tone(rate=16000, channels=1)[:, 0] * 32767).astype(np.int16).tobytes()
+
+    result = await transcriber.transcribe(pcm)
+
+    assert result.text == "git status"
+    assert 0 < result.upload_bytes < len(pcm) / 4
+    assert result.upload_ms > 0
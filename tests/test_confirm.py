@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+import app.audio.wakeword as wakeword
+from app.audio.confirm import ConfirmationListener, interpret_yes_no, load_confirmation_keywords
+from app.audio.wakeword import LogMelExtractor, template_dir
+from app.core.models import AppConfig, STTResult
+
+SR = 16000
+
+
+def _sweep(f0, f1, seconds=0.4):
+    t = np.arange(int(seconds * SR)) / SR
+    return (np.sin(2 * np.pi * (f0 * t + (f1 - f0) / (2 * seconds) * t ** 2)) * 0.3).astype(np.float32)
+
+
+YES = _sweep(300, 1500)  # synthetic "yes": rising tone
+NO = _sweep(1500, 300)  # synthetic "no": falling tone
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("Yes.", True),
+    ("yeah, go ahead", True),
+    ("Sure, do it!", True),
+    ("No.", False),
+    ("Cancel", False),
+    ("No, don't do it", False),
+    ("do not push", False),
+    ("I don’t know", False),
+    ("I know", None),
+    ("token", None),
+    ("", None),
+])
+def test_interpret_yes_no(text, expected):
+    assert interpret_yes_no(text) is expected
+
+
+@pytest.fixture
+def enrolled(tmp_path, monkeypatch):
+    monkeypatch.setattr(wakeword, "WAKEWORD_DIR", tmp_path)
+    extractor = LogMelExtractor(SR)
+    for phrase, audio in (("yes", YES), ("no", NO)):
+        directory = template_dir(phrase)
+        directory.mkdir(parents=True)
+        np.save(directory / "template_0.npy", extractor.features(audio))
+    return tmp_path
+
+
+def _listener(recorder=None, transcriber=None):
+    return ConfirmationListener(AppConfig(), recorder or Mock(), transcriber)
+
+
+def test_keywords_need_both_answers(tmp_path, monkeypatch):
+    monkeypatch.setattr(wakeword, "WAKEWORD_DIR", tmp_path)
+    template_dir("yes").mkdir(parents=True)
+    np.save(template_dir("yes") / "template_0.npy", LogMelExtractor(SR).features(YES))
+    assert load_confirmation_keywords() == {}
+
+
+def test_keyword_match(enrolled):
+    listener = _listener()
+    assert set(listener.keywords) == {True, False}
+    assert listener.match_keywords(YES) is True
+    assert listener.match_keywords(NO) is False
+    assert listener.match_keywords(np.zeros(SR // 2, dtype=np.float32)) is None
+
+
+@pytest.mark.asyncio
+async def test_keywords_skip_whisper(enrolled):
+    listener = _listener()
+    listener.tiny_text = Mock()
+    assert await listener.recognize(YES) is True
+    assert listener.last_method == "keywords"
+    listener.tiny_text.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_transcriber_without_tiny_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(wakeword, "WAKEWORD_DIR", tmp_path)
+    transcriber = Mock()
+    transcriber.transcribe = AsyncMock(return_value=STTResult(text="Nope."))
+    listener = _listener(transcriber=transcriber)
+    listener._tiny_failed = True
+
+    assert await listener.recognize(NO) is False
+    assert listener.last_method == "transcriber"
+    assert listener.last_text == "Nope."
+
+
+@pytest.mark.asyncio
+async def test_listen_uses_short_endpointing(enrolled):
+    recorder = Mock()
+    recorder.listen_until_silence = AsyncMock(return_value="reply.wav")
+    recorder.last_audio.return_value = YES
+    listener = _listener(recorder)
+
+    assert await listener.listen() is True
+    recorder.listen_until_silence.assert_awaited_once_with(silence_ms=400, max_s=3.0)
+
+
+@pytest.mark.asyncio
+async def test_listen_returns_none_on_silence(enrolled):
+    recorder = Mock()
+    recorder.listen_until_silence = AsyncMock(return_value="")
+    assert await _listener(recorder).listen() is None
@@ -0,0 +1,197 @@
+import asyncio
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, Mock
+
+from app.audio.stt import current_repo
+from app.core.models import AppConfig, STTResult, ToolCall, ToolPlan
+from app.daemon.client import DaemonClient, RemoteBrain, RemoteTranscriber, connect_daemon
+from app.daemon.protocol import DaemonError
+from app.daemon.server import Daemon
+
+
+class FakeTranscriber:
+    def __init__(self):
+        self.calls = []
+        self.refreshed = []
+
+    async def transcribe(self, audio):
+        self.calls.append((audio, current_repo.get()))
+        if isinstance(audio, bytes):
+            await asyncio.sleep(0.1)  # slower than routing
+            return STTResult(text=f"{len(audio) // 2} samples")
+        return STTResult(text="git status", provider="local")
+
+    def refresh_hotwords(self):
+        self.refreshed.append(current_repo.get())
+
+
+@pytest.fixture
+def brain():
+    brain = Mock()
+    brain.process = AsyncMock(side_effect=lambda text: ToolCall(tool="git.status", params={"heard": text}))
+    brain.speculate = AsyncMock()
+    brain.generate_commit_message = Mock(return_value="feat: add daemon")
+    return brain
+
+
+@pytest_asyncio.fixture
+async def daemon(tmp_path, brain):
+    models = Mock()
+    models.stats.return_value = {"whisper": {"resident": True}}
+    daemon = Daemon(FakeTranscriber(), brain, tmp_path / "d.sock", models=models)
+    await daemon.start()
+    yield daemon
+    await daemon.close()
+
+
+@pytest_asyncio.fixture
+async def client(daemon):
+    client = await DaemonClient.connect(daemon.path)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_round_trip(daemon, client, tmp_path):
+    assert (await client.request("ping"))["protocol"] == 1
+    assert (await client.request("stats"))["models"]["whisper"]["resident"]
+
+    transcriber = RemoteTranscriber(client, AppConfig())
+    transcriber.repo = str(tmp_path)
+    result = await transcriber.transcribe("clip.wav")
+    assert result == STTResult(text="git status", provider="local")
+    audio_path, repo = daemon.transcriber.calls[0]
+    assert audio_path.endswith("clip.wav") and audio_path.startswith("/")
+    assert repo == str(tmp_path)
+
+    brain = RemoteBrain(client)
+    assert await brain.process("status please") == ToolCall(tool="git.status", params={"heard": "status please"})
+    assert await brain.generate_commit_message("diff --git a/x b/x") == "feat: add daemon"
+    await brain.speculate("stat")
+    daemon.brain.speculate.assert_awaited_once_with("stat")
+
+
+@pytest.mark.asyncio
+async def test_plans_cross_the_socket(client, brain):
+    brain.process.side_effect = None
+    brain.process.return_value = ToolPlan(steps=[{"tool": "git.status"}, {"tool": "git.log", "depends_on": ["1"]}])
+    plan = await RemoteBrain(client).process("status and log")
+    assert plan == brain.process.return_value
+
+
+@pytest.mark.asyncio
+async def test_requests_are_answered_as_they_finish(client):
+    transcriber = RemoteTranscriber(client, AppConfig())
+    brain = RemoteBrain(client)
+    finished = []
+
+    async def track(name, coro):
+        await coro
+        finished.append(name)
+
+    await asyncio.gather(
+        track("transcribe", transcriber.transcribe(np.zeros(1600, dtype=np.float32))),
+        track("process", brain.process("status")),
+    )
+    assert finished == ["process", "transcribe"]
+
+
+@pytest.mark.asyncio
+async def test_hotword_refresh_is_per_repo(daemon, client):
+    transcriber = RemoteTranscriber(client, AppConfig())
+    transcriber.refresh_hotwords()
+    await transcriber._refresh
+    assert daemon.transcriber.refreshed == [transcriber.repo]
+
+
+@pytest.mark.asyncio
+async def test_errors_and_lost_daemon(daemon, client, brain):
+    brain.process.side_effect = RuntimeError("classifier exploded")
+    with pytest.raises(DaemonError, match="classifier exploded"):
+        await client.request("process", text="status")
+    with pytest.raises(DaemonError, match="Unknown op"):
+        await client.request("launch_rockets")
+
+    await client.request("shutdown")
+    await asyncio.wait_for(daemon.serve_forever(), timeout=2)
+    assert not daemon.path.exists()
+    # Thin clients degrade like the local classes do
+    assert (await RemoteBrain(client).process("status")).tool == "help"
+    assert (await RemoteTranscriber(client, AppConfig()).transcribe("clip.wav")).text == ""
+
+
+@pytest.mark.asyncio
+async def test_lost_daemon_falls_back_to_in_process_brain(daemon, client):
+    local = Mock()
+    local.process = AsyncMock(return_value=ToolCall(tool="git.log"))
+    local.generate_commit_message = Mock(return_value="fix: local")
+    remote = RemoteBrain(client, fallback=lambda: local)
+    assert (await remote.process("status")).tool == "git.status"
+    local.process.assert_not_called()
+
+    await client.request("shutdown")
+    await asyncio.wait_for(daemon.serve_forever(), timeout=2)
+    assert (await remote.process("status")).tool == "git.log"
+    assert not remote.connected
+    assert await remote.generate_commit_message("diff") == "fix: local"
+
+
+@pytest.mark.asyncio
+async def test_cli_clients_reconnect_to_a_restarted_daemon_or_run_locally(daemon, client, brain):
+    local_stt = Mock()
+    local_stt.transcribe = AsyncMock(return_value=STTResult(text="local text"))
+    reconnect = AsyncMock(return_value=None)
+    transcriber = RemoteTranscriber(client, AppConfig(), fallback=lambda: local_stt, reconnect=reconnect)
+    remote = RemoteBrain(client, reconnect=lambda: DaemonClient.connect(daemon.path))
+
+    await client.request("shutdown")
+    await asyncio.wait_for(daemon.serve_forever(), timeout=2)
+    # No daemon to go back to: transcribed in-process
+    assert (await transcriber.transcribe(b"\x00\x01" * 8)).text == "local text"
+    reconnect.assert_awaited_once()
+
+    restarted = Daemon(FakeTranscriber(), brain, daemon.path)
+    await restarted.start()
+    try:
+        assert (await remote.process("status")).tool == "git.status"
+        assert remote.connected and remote.client is not client
+    finally:
+        await remote.client.close()
+        await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_mcp_context_reconnects_after_the_daemon_is_lost(daemon, client, monkeypatch):
+    from app.mcp import server
+    config = AppConfig(daemon_socket=str(daemon.path))
+    monkeypatch.setattr(server, "_config", config)
+    monkeypatch.setattr(server, "_brain", RemoteBrain(client))
+    await client.close()
+    _, brain = await server.get_context()
+    assert isinstance(brain, RemoteBrain) and brain.connected and brain.client is not client
+    await brain.client.close()
+
+
+@pytest.mark.asyncio
+async def test_single_daemon_per_socket(daemon, tmp_path, brain):
+    with pytest.raises(DaemonError, match="already listening"):
+        await Daemon(FakeTranscriber(), brain, daemon.path).start()
+
+    stale = tmp_path / "stale.sock"
+    stale.write_text("")  # left behind by a crash
+    replacement = Daemon(FakeTranscriber(), brain, stale)
+    await replacement.start()
+    assert (stale.stat().st_mode & 0o777) == 0o600
+    await replacement.close()
+
+
+@pytest.mark.asyncio
+async def test_connect_daemon_falls_back(daemon, tmp_path):
+    assert await connect_daemon(AppConfig(daemon="off", daemon_socket=str(daemon.path))) is None
+    assert await connect_daemon(AppConfig(daemon_socket=str(tmp_path / "none.sock"))) is None
+    client = await connect_daemon(AppConfig(daemon_socket=str(daemon.path)))
+    assert client is not None
+    await client.close()
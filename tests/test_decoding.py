@@ -0,0 +1,84 @@
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import Mock
+from app.audio.decoding import PROFILES, ProfileSelector, build_hotword_prompt
+from app.audio import stt
+from app.audio.stt import Transcriber, current_repo
+from app.core.models import AppConfig
+
+
+def _segments(text, logprob):
+    return [SimpleNamespace(text=text, avg_logprob=logprob)], SimpleNamespace(
+        language="en", language_probability=1.0
+    )
+
+
+def _transcriber(profile="auto", latency_ms=1500):
+    t = Transcriber(AppConfig(stt_provider="none", stt_profile=profile, stt_latency_target_ms=latency_ms))
+    t.provider = "faster-whisper"
+    t.whisper_model = Mock()
+    t._hotword_prompt = "Git voice commands: status."
+    return t
+
+
+def test_hotword_prompt_includes_tools_and_branches():
+    prompt = build_hotword_prompt(["main", "feature/login"])
+    assert "status" in prompt
+    assert "smart commit push" in prompt
+    assert "feature/login" in prompt
+
+
+def test_hotword_prompt_follows_current_repo(monkeypatch):
+    monkeypatch.setattr(stt, "list_branches", lambda cwd=None: [f"branch-of-{cwd}"])
+    t = _transcriber()
+    token = current_repo.set("/repos/a")
+    try:
+        assert "branch-of-/repos/a" in t.hotword_prompt
+    finally:
+        current_repo.reset(token)
+    assert t.hotword_prompt == "Git voice commands: status."
+
+
+def test_selector_escalates_within_budget():
+    selector = ProfileSelector(latency_target_ms=1000)
+    assert selector.escalation(clip_s=1.0, spent_s=0.1).name == "accurate"
+    # Long clip: only the cheaper retry fits
+    assert selector.escalation(clip_s=3.0, spent_s=0.1).name == "balanced"
+    assert selector.escalation(clip_s=10.0, spent_s=0.1) is None
+
+
+def test_selector_learns_from_observed_decodes():
+    selector = ProfileSelector(latency_target_ms=1000, smoothing=1.0)
+    selector.observe("accurate", clip_s=2.0, elapsed_s=4.0)
+    assert selector.rtf["accurate"] == 2.0
+
+
+def test_confident_greedy_result_is_not_retried():
+    t = _transcriber()
+    t.whisper_model.transcribe.return_value = _segments("git status", -0.2)
+
+    assert t._whisper_text(np.zeros(16000, dtype=np.float32)) == "git status"
+    t.whisper_model.transcribe.assert_called_once()
+    kwargs = t.whisper_model.transcribe.call_args.kwargs
+    assert kwargs["beam_size"] == 1
+    assert kwargs["initial_prompt"] == "Git voice commands: status."
+
+
+def test_low_confidence_retries_with_wider_beam():
+    t = _transcriber()
+    t.whisper_model.transcribe.side_effect = [
+        _segments("get stash pup", -1.2),
+        _segments("git stash pop", -0.3),
+    ]
+
+    assert t._whisper_text(np.zeros(16000, dtype=np.float32)) == "git stash pop"
+    beams = [c.kwargs["beam_size"] for c in t.whisper_model.transcribe.call_args_list]
+    assert beams == [1, PROFILES["accurate"].beam_size]
+
+
+def test_fixed_profile_decodes_once():
+    t = _transcriber(profile="balanced")
+    t.whisper_model.transcribe.return_value = _segments("git log", -1.5)
+
+    assert t._whisper_text(np.zeros(16000, dtype=np.float32)) == "git log"
+    assert t.whisper_model.transcribe.call_args.kwargs["beam_size"] == 3
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
-from app.core.executor import execute_tool
-from app.core.models import ToolCall, AppConfig
+import asyncio
+from app.core.executor import execute_plan, execute_tool, plan_access
+from app.core.models import ToolCall, ToolPlan, AppConfig
 
 @pytest.fixture
 def mock_tools():
@@ -183,3 +184,116 @@ async def test_execute_run_tests_summary(mock_config, mock_tools):
     }
     result = await execute_tool(tool_call, config=mock_config, _registry=mock_tools)
     assert result["summary"] == "Tests failed"
+
+@pytest.mark.asyncio
+async def test_execute_maps_aliases_and_coerces(mock_config, mock_tools):
+    mock_tools["git.reset"].return_value = ("HEAD is now...", 0)
+    mock_tools["git.log"].return_value = ("commit 123", 0)
+
+    await execute_tool(ToolCall(tool="git.reset", params={"commits": "2", "mode": "soft"}), config=mock_config, _registry=mock_tools)
+    mock_tools["git.reset"].assert_called_with(mode="soft", steps=2)
+
+    # Unknown params are dropped; only what was given is passed on
+    await execute_tool(ToolCall(tool="git.log", params={"n": 5, "verbose": True}), config=mock_config, _registry=mock_tools)
+    mock_tools["git.log"].assert_called_with(limit=5)
+
+@pytest.mark.asyncio
+async def test_execute_rejects_invalid_params(mock_config, mock_tools):
+    result = await execute_tool(ToolCall(tool="git.reset", params={"mode": "nuke"}), config=mock_config, _registry=mock_tools)
+    assert not result["success"]
+    assert result["stderr"].startswith("Invalid parameters for git.reset: mode:")
+    mock_tools["git.reset"].assert_not_called()
+
+@pytest.mark.asyncio
+async def test_execute_requires_injected_brain(mock_config, mock_tools):
+    result = await execute_tool(ToolCall(tool="git.smart_commit_push"), config=mock_config, _registry=mock_tools)
+    assert not result["success"]
+    assert "Brain (LLM) required" in result["stderr"]
+
+def test_specs_drive_policies_and_prompt():
+    from app.core.policies import TOOL_POLICIES
+    from app.core.tool_specs import TOOL_SPECS
+    from app.llm.router import SYSTEM_PROMPT
+
+    assert set(TOOL_POLICIES) == set(TOOL_SPECS)
+    assert TOOL_POLICIES["git.push"].access == "remote"
+    assert "- git.log: Show commit history (params: limit [default 20])" in SYSTEM_PROMPT
+    # CLI-only parameters are not offered to the LLM
+    assert "confirm_callback" not in SYSTEM_PROMPT and "extra_args" not in SYSTEM_PROMPT
+
+
+@pytest.mark.asyncio
+async def test_execute_plan_runs_reads_concurrently_and_writes_in_order(mock_tools):
+    events = []
+
+    def tool(name, delay, code=0):
+        async def run(**kwargs):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+            return ("", code)
+        return run
+
+    registry = {"git.status": tool("status", 0.05), "git.log": tool("log", 0.01),
+                "git.add_all": tool("add", 0), "git.commit": tool("commit", 0, code=1), "git.push": tool("push", 0)}
+    plan = ToolPlan(steps=[
+        {"tool": "git.status"}, {"tool": "git.log"}, {"tool": "git.add_all"},
+        {"tool": "git.commit", "params": {"message": "x"}}, {"tool": "git.push"},
+    ])
+    assert plan_access(plan) == "write"
+
+    async def run_step(step):
+        return await execute_tool(step, _registry=registry)
+
+    seen = []
+
+    async def on_step(step, result):
+        seen.append(step.id)
+
+    results = await execute_plan(plan, run_step=run_step, on_step=on_step)
+    assert set(events[:2]) == {"start status", "start log"}  # reads overlap
+    assert events.index("start add") > events.index("end status")  # the write waits for both
+    assert not results["4"]["success"]
+    assert results["5"]["skipped"] and "push" not in " ".join(events)  # after a failed write
+    assert seen[2:] == ["3", "4", "5"]
+
+
+@pytest.mark.asyncio
+async def test_execute_plan_skips_dependents_of_failed_steps(mock_tools):
+    mock_tools["git.fetch"].return_value = ("could not resolve host", 128)
+    mock_tools["git.merge"].return_value = ("", 0)
+    mock_tools["git.status"].return_value = ("On branch main", 0)
+    plan = ToolPlan(steps=[
+        {"id": "fetch", "tool": "git.fetch"},
+        {"tool": "git.merge", "params": {"branch": "origin/main"}, "depends_on": ["fetch"]},
+        {"tool": "git.status"},
+    ])
+
+    async def run_step(step):
+        return await execute_tool(step, _registry=mock_tools)
+
+    results = await execute_plan(plan, run_step=run_step)
+    assert results["2"]["skipped"] and "step fetch" in results["2"]["stderr"]
+    assert results["3"]["success"]
+    mock_tools["git.merge"].assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_plan_reports_no_result_for_the_running_step():
+    plan = ToolPlan(steps=[{"tool": "git.status"}, {"tool": "git.log"}])
+    started = asyncio.Event()
+    seen = []
+
+    async def run_step(step):
+        started.set()
+        await asyncio.sleep(10)
+
+    async def on_step(step, result):
+        seen.append(step.id)
+
+    task = asyncio.create_task(execute_plan(plan, run_step=run_step, on_step=on_step))
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert seen == []
@@ -0,0 +1,124 @@
+import asyncio
+
+import numpy as np
+import pytest
+from unittest.mock import Mock
+
+from app.audio.cloud_stt import UploadStats
+from app.audio.hedging import CLOUD, LOCAL, LatencyHistory
+from app.audio.stt import Transcriber
+from app.core.models import AppConfig
+
+AUDIO = np.zeros(16000, dtype=np.float32)
+
+
+def _history(local, cloud):
+    history = LatencyHistory()
+    for s in local:
+        history.observe(LOCAL, s)
+    for s in cloud:
+        history.observe(CLOUD, s)
+    return history
+
+
+def test_hedge_delay_races_immediately_without_history():
+    assert LatencyHistory().hedge_delay_s() == 0.0
+    assert _history([1.0] * 5, [0.5] * 2).hedge_delay_s() == 0.0
+
+
+def test_hedge_delay_follows_latency_history():
+    # Cloud usually faster: race right away
+    assert _history([1.0] * 10, [0.4] * 10).hedge_delay_s() == 0.0
+    # Local usually faster: only hedge once local passes its p90
+    local = [0.3] * 9 + [2.0]
+    assert _history(local, [0.8] * 10).hedge_delay_s(0.9) == pytest.approx(np.quantile(local, 0.9))
+
+
+def test_cancelled_losers_only_raise_the_estimate():
+    history = _history([], [1.0] * 5)
+    history.observe_cancelled(CLOUD, 0.2)
+    assert history.count(CLOUD) == 5
+    history.observe_cancelled(CLOUD, 3.0)
+    assert history.count(CLOUD) == 6
+
+
+def _hedged(local_s, local_text, cloud_s, cloud_text, history=None):
+    transcriber = Transcriber(AppConfig(stt_provider="groq", groq_api_key="test-key"))
+    transcriber.provider = "hedged"
+    transcriber.whisper_model = Mock()
+    if history:
+        transcriber.latency = history
+    calls = {"local": 0, "cloud": 0, "cloud_cancelled": False}
+
+    async def local(audio):
+        calls["local"] += 1
+        await asyncio.sleep(local_s)
+        if isinstance(local_text, Exception):
+            raise local_text
+        return local_text
+
+    async def cloud(audio, sample_rate):
+        calls["cloud"] += 1
+        try:
+            await asyncio.sleep(cloud_s)
+        except asyncio.CancelledError:
+            calls["cloud_cancelled"] = True
+            raise
+        return cloud_text, UploadStats("flac", 1000, 32000, 1.0, cloud_s * 1000)
+
+    transcriber._local_text = local
+    transcriber.cloud.transcribe_with_stats = cloud
+    return transcriber, calls
+
+
+@pytest.mark.asyncio
+async def test_fastest_provider_wins_and_loser_is_cancelled():
+    transcriber, calls = _hedged(0.01, "git status", 0.5, "cloud text")
+    result = await transcriber.transcribe(AUDIO)
+    assert result.text == "git status"
+    assert result.provider == "faster-whisper"
+    await asyncio.sleep(0)  # let the cancellation land
+    assert calls["cloud_cancelled"]
+
+    transcriber, calls = _hedged(0.5, "local text", 0.01, "git log")
+    result = await transcriber.transcribe(AUDIO)
+    assert result.text == "git log"
+    assert result.provider == "groq"
+    assert result.upload_bytes == 1000
+
+
+@pytest.mark.asyncio
+async def test_empty_or_failed_result_falls_through_to_other_provider():
+    transcriber, _ = _hedged(0.01, "", 0.05, "git pull")
+    assert (await transcriber.transcribe(AUDIO)).text == "git pull"
+
+    transcriber, _ = _hedged(0.01, RuntimeError("model crashed"), 0.05, "git pull")
+    assert (await transcriber.transcribe(AUDIO)).text == "git pull"
+
+    transcriber, _ = _hedged(0.01, "", 0.01, "")
+    assert (await transcriber.transcribe(AUDIO)).text == ""
+
+
+@pytest.mark.asyncio
+async def test_cloud_request_waits_for_hedge_delay():
+    # Local is reliably fast, so the cloud request is held back and never sent
+    history = _history([0.2] * 10, [0.5] * 10)
+    transcriber, calls = _hedged(0.01, "git status", 0.01, "cloud text", history)
+    assert (await transcriber.transcribe(AUDIO)).text == "git status"
+    assert calls["cloud"] == 0
+    assert transcriber.latency.count(LOCAL) == 11
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cloud_requests_keep_their_own_upload_stats():
+    transcriber = Transcriber(AppConfig(stt_provider="groq", groq_api_key="test-key"))
+
+    async def cloud(audio, sample_rate):
+        # The longer clip finishes second, while the first result is already out
+        await asyncio.sleep(len(audio) / 160000)
+        return f"{len(audio)} samples", UploadStats("flac", len(audio), len(audio) * 2, 1.0, 1.0)
+
+    transcriber.cloud.transcribe_with_stats = cloud
+    short, long = await asyncio.gather(transcriber.transcribe(AUDIO[:1600]), transcriber.transcribe(AUDIO))
+    assert (short.text, short.upload_bytes) == ("1600 samples", 1600)
+    assert (long.text, long.upload_bytes) == ("16000 samples", 16000)
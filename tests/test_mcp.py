@@ -46,6 +46,15 @@ def test_mcp_server_imports():
     assert hasattr(server, 'git_status')
 
 
+@pytest.mark.asyncio
+async def test_mcp_tools_come_from_specs():
+    from app.mcp import server
+    tools = {tool.name: tool for tool in await server.server.list_tools()}
+    assert set(tools) == {"git_status", "git_diff", "git_pull", "run_tests", "smart_commit_push"}
+    assert set(tools["smart_commit_push"].parameters["properties"]) == {"auto_stage", "push"}
+    assert "human confirmation" in tools["smart_commit_push"].description
+
+
 @pytest.mark.asyncio
 async def test_mcp_git_status_via_executor(mock_config, mock_git_modules):
     """Test git.status tool call that MCP would dispatch."""
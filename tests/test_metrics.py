@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+import time
+
+from app.core.metrics import SCHEMA_VERSION, MetricsLogger
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_entries_are_batched_and_versioned(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics = MetricsLogger(str(path))
+    metrics.log("check status", "git.status", success=True, duration_ms=12.5, extra={"lock_wait_ms": 3.0})
+    metrics.log_event("model_load", model="intent")
+    metrics.flush()
+
+    first, second = _lines(path)
+    assert first["tool"] == "git.status" and first["lock_wait_ms"] == 3.0
+    assert second["event"] == "model_load"
+    assert first["schema_version"] == second["schema_version"] == SCHEMA_VERSION
+
+    metrics.close()
+    # Events logged after shutdown still reach the file
+    metrics.log_event("model_residency", models={})
+    assert _lines(path)[-1]["event"] == "model_residency"
+
+
+def test_size_rotation_compresses_and_prunes(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics = MetricsLogger(str(path), max_bytes=300, backups=2)
+    for i in range(6):
+        metrics.log(f"command {i}", "git.status", success=True, extra={"pad": "x" * 150})
+        metrics.flush()
+    metrics.close()
+
+    rotated = metrics.rotated_files()
+    assert len(rotated) == 2
+    assert all(p.suffix == ".gz" for p in rotated)
+    with gzip.open(rotated[-1], "rt") as f:
+        assert json.loads(f.readline())["text"] == "command 4"
+    assert [e["text"] for e in _lines(path)] == ["command 5"]
+
+
+def test_daily_rotation(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    path.write_text(json.dumps({"event": "old"}) + "\n")
+    yesterday = time.time() - 86400
+    os.utime(path, (yesterday, yesterday))
+
+    metrics = MetricsLogger(str(path), rotate_daily=True, compress=False)
+    metrics.log_event("new")
+    metrics.close()
+
+    (rotated,) = metrics.rotated_files()
+    assert _lines(rotated) == [{"event": "old"}]
+    assert [e["event"] for e in _lines(path)] == ["new"]
+
+
+def test_overflow_is_dropped_and_counted(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics = MetricsLogger(str(path), max_queue=2)
+    metrics._ensure_writer = lambda: None  # writer not started: the queue fills up
+    for i in range(3):
+        metrics.log_event("tick", i=i)
+    assert metrics.stats() == {"queued": 2, "dropped": 1}
+
+    del metrics._ensure_writer
+    metrics._ensure_writer()
+    metrics.flush()
+    events = _lines(path)
+    assert [e.get("i") for e in events[:2]] == [0, 1]
+    assert events[2]["event"] == "metrics_dropped" and events[2]["count"] == 1
+    metrics.close()
+
+
+def test_steady_trickle_is_written_within_the_flush_interval(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics = MetricsLogger(str(path), flush_interval_s=0.2)
+    # Closer together than the interval, and far fewer than a batch
+    for i in range(12):
+        metrics.log_event("tick", i=i)
+        time.sleep(0.05)
+    try:
+        assert path.exists() and len(_lines(path)) >= 4
+    finally:
+        metrics.close()
+    assert len(_lines(path)) == 12
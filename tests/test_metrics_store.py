@@ -0,0 +1,98 @@
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+
+from app.core.metrics import MetricsLogger
+from app.core.metrics_store import MetricsStore, canonical_tool
+
+
+def _command(tool, duration_ms, success=True, text="check status", days_ago=0, **extra):
+    ts = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    return {"timestamp": ts, "text": text, "tool": tool, "success": success,
+            "error": None if success else "boom", "duration_ms": duration_ms, **extra}
+
+
+def test_logger_writes_to_sqlite_in_wal_mode(tmp_path):
+    db = tmp_path / "metrics.db"
+    metrics = MetricsLogger(backend="sqlite", db_path=str(db))
+    metrics.log("check status", "git.status", success=True, duration_ms=40.0, extra={"route": "setfit"})
+    metrics.log_event("model_load", model="intent")
+    metrics.close()
+
+    store = MetricsStore(str(db))
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    rows = store.conn.execute("SELECT kind, tool, success, route, schema_version, data FROM events").fetchall()
+    assert rows == [("command", "git.status", 1, "setfit", 1, None),
+                    ("model_load", None, None, None, 1, '{"model": "intent"}')]
+
+
+def test_report_percentiles_rates_and_failing_utterances(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    entries = [_command("git.status", float(ms)) for ms in range(1, 101)]
+    entries += [_command("git.push", 900.0, success=False, text="push it") for _ in range(3)]
+    entries += [_command("git.push", 800.0, route="llm"),
+                _command("git.push", None, success=False, text="push", error="cancelled_by_user")]
+    store.insert(entries)
+
+    report = store.report()
+    status, push = report["tools"]["git.status"], report["tools"]["git.push"]
+    assert status["count"] == 100 and status["failure_rate"] == 0
+    assert abs(status["p50_ms"] - 50) <= 1 and abs(status["p99_ms"] - 99) <= 2
+    # Cancelled by the user is not a failure
+    assert push["count"] == 5 and push["failure_rate"] == 0.6 and push["fallback_rate"] == 0.2
+    assert report["top_failing"] == [{"text": "push it", "tool": "git.push", "count": 3, "error": "boom"}]
+
+
+def test_migrate_normalizes_names_and_runs_once(tmp_path):
+    legacy = tmp_path / "metrics.jsonl"
+    legacy.write_text("\n".join(json.dumps(e) for e in [
+        _command("run_tests", 3000.0, days_ago=1),
+        _command("git_status", 70.0, days_ago=1),
+        _command("smart_commit_push", 1200.0),
+    ]) + "\nnot json\n")
+    rotated = tmp_path / "metrics.20260101-000000.jsonl.gz"
+    with gzip.open(rotated, "wt") as f:
+        f.write(json.dumps(_command("git.status", 60.0, days_ago=2)) + "\n")
+
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    assert store.migrate([str(legacy), str(rotated)]) == {str(legacy): 3, str(rotated): 1}
+    assert store.migrate([str(legacy)]) == {str(legacy): 0}
+    assert set(store.report()["tools"]) == {"git.run_tests", "git.status", "git.smart_commit_push"}
+    assert store.report()["tools"]["git.status"]["count"] == 2
+    assert store.report(days=1)["tools"]["git.status"]["count"] == 1
+    assert canonical_tool("unknown_tool") == "unknown_tool"
+
+
+def test_migrate_again_after_the_file_grew(tmp_path):
+    live = tmp_path / "metrics.jsonl"
+    commands = [_command("git.status", 10.0 * i) for i in range(1, 5)]
+    live.write_text("".join(json.dumps(e) + "\n" for e in commands[:3]))
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    assert store.migrate([str(live)]) == {str(live): 3}
+
+    with open(live, "a") as f:
+        f.write(json.dumps(commands[3]) + "\n")
+    assert store.migrate([str(live)]) == {str(live): 1}
+    # Rotated later: the same lines again, under another name
+    rotated = tmp_path / "metrics.20260101-000000.jsonl.gz"
+    with gzip.open(rotated, "wt") as f:
+        f.write(live.read_text())
+    assert store.migrate([str(rotated)]) == {str(rotated): 0}
+
+    assert store.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 4
+    assert store.report()["tools"]["git.status"]["count"] == 4
+
+
+def test_retention_deletes_old_events(tmp_path):
+    db = str(tmp_path / "metrics.db")
+    store = MetricsStore(db, retention_days=0)
+    store.insert([_command("git.status", 10.0, days_ago=40), _command("git.status", 20.0)])
+    assert store.prune(30) == 1
+    assert store.report()["tools"]["git.status"]["count"] == 1
+
+    # Pruned again on open
+    store.insert([_command("git.log", 10.0, days_ago=40)])
+    store.close()
+    store = MetricsStore(db, retention_days=30)
+    assert store.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 1
@@ -0,0 +1,147 @@
+import json
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from app.core import model_manager
+from app.core.metrics import MetricsLogger
+from app.core.model_manager import ModelManager
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+    def predict(self, text):
+        return f"{self.name}:{text}"
+
+    def transcribe(self, audio):
+        # Lazy like faster-whisper: segments are produced while iterating
+        return (f"{self.name}:{chunk}" for chunk in audio), {"language": "en"}
+
+
+def _manager(monkeypatch, rss=None, **kwargs):
+    rss = rss if rss is not None else [100 * model_manager.MB]
+    monkeypatch.setattr(model_manager, "current_rss", lambda: rss[0])
+    return ModelManager(**kwargs), rss
+
+
+def test_handle_loads_lazily_and_reloads_after_eviction(monkeypatch):
+    manager, _ = _manager(monkeypatch)
+    loader = Mock(side_effect=lambda: FakeModel("whisper"))
+    handle = manager.register("whisper", loader)
+    loader.assert_not_called()
+
+    assert handle.predict("a") == "whisper:a"
+    assert handle.name == "whisper"
+    assert loader.call_count == 1
+
+    assert manager.evict("whisper")
+    assert not manager.is_loaded("whisper")
+    assert handle.predict("b") == "whisper:b"
+    assert loader.call_count == 2
+    assert manager.stats()["whisper"]["loads"] == 2
+
+
+def test_sweep_evicts_idle_models(monkeypatch):
+    manager, _ = _manager(monkeypatch, idle_ttl_s=0.05)
+    unloader = Mock()
+    busy = manager.register("busy", lambda: FakeModel("busy"))
+    idle = manager.register("idle", lambda: FakeModel("idle"), unloader)
+    idle.predict("x")
+    busy.predict("x")
+    time.sleep(0.06)
+    busy.predict("y")
+
+    assert manager.sweep() == 1
+    assert manager.is_loaded("busy") and not manager.is_loaded("idle")
+    unloader.assert_called_once()
+
+
+def test_budget_evicts_least_recently_used(monkeypatch):
+    rss = [0]
+    manager, rss = _manager(monkeypatch, rss=rss, memory_budget_mb=250)
+
+    def loader(name, size_mb):
+        def load():
+            rss[0] += size_mb * model_manager.MB
+            return FakeModel(name)
+        return load
+
+    def unloader(size_mb):
+        def unload(model):
+            rss[0] -= size_mb * model_manager.MB
+        return unload
+
+    a = manager.register("a", loader("a", 100), unloader(100))
+    b = manager.register("b", loader("b", 100), unloader(100))
+    c = manager.register("c", loader("c", 100), unloader(100))
+    a.predict(1)
+    b.predict(1)
+    a.predict(2)  # b is now least recently used
+    c.predict(1)
+
+    assert manager.is_loaded("a") and manager.is_loaded("c")
+    assert not manager.is_loaded("b")
+    assert manager.stats()["c"]["rss_mb"] == 100
+
+
+def test_models_in_use_are_not_evicted(monkeypatch):
+    rss = [500 * model_manager.MB]
+    manager, rss = _manager(monkeypatch, rss=rss, idle_ttl_s=0.01, memory_budget_mb=250)
+    whisper = manager.register("whisper", lambda: FakeModel("whisper"))
+
+    segments, info = whisper.transcribe(["a", "b"])
+    assert info == {"language": "en"}
+    time.sleep(0.02)
+    assert manager.sweep() == 0
+    assert not manager.evict("whisper")
+    assert manager.enforce_budget() == 0
+    assert manager.is_loaded("whisper")
+    assert list(segments) == ["whisper:a", "whisper:b"]
+
+    assert manager.evict("whisper")
+
+
+def test_abandoned_generators_unpin_their_model(monkeypatch):
+    manager, _ = _manager(monkeypatch)
+    whisper = manager.register("whisper", lambda: FakeModel("whisper"))
+
+    segments, _ = whisper.transcribe(["a", "b"])
+    assert next(segments) == "whisper:a"
+    assert not manager.evict("whisper")
+    del segments
+    assert manager.evict("whisper")
+
+
+def test_load_and_evict_are_logged(monkeypatch, tmp_path):
+    metrics = MetricsLogger(str(tmp_path / "metrics.jsonl"))
+    manager, _ = _manager(monkeypatch, metrics=metrics)
+    manager.register("intent", lambda: FakeModel("intent")).predict("x")
+    manager.evict("intent", "idle")
+    manager.get("intent")
+    metrics.flush()
+
+    events = [json.loads(line) for line in (tmp_path / "metrics.jsonl").read_text().splitlines()]
+    assert [e["event"] for e in events] == ["model_load", "model_evict", "model_load"]
+    assert events[0]["model"] == "intent" and "load_ms" in events[0]
+    assert events[1]["reason"] == "idle" and "resident_s" in events[1]
+    assert events[2]["reload"] is True
+
+
+@pytest.mark.asyncio
+async def test_brain_classifier_is_managed(monkeypatch):
+    from app.llm import router
+
+    manager, _ = _manager(monkeypatch)
+    classifier = Mock()
+    classifier.predict_intent.return_value = ("git.status", 0.9)
+    monkeypatch.setattr(router, "_load_classifier", lambda: classifier)
+    brain = router.Brain(Mock(llm_provider="none"), models=manager)
+
+    assert await brain._predict_intent("status") == ("git.status", 0.9)
+    assert manager.is_loaded("intent")
+    manager.evict("intent")
+    assert await brain._predict_intent("status") == ("git.status", 0.9)
+    assert manager.stats()["intent"]["loads"] == 2
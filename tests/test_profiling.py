@@ -0,0 +1,52 @@
+import json
+import threading
+import time
+
+from app.core.profiling import InteractionProfile
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def test_cprofile_writes_profile_directory(tmp_path):
+    profile = InteractionProfile(str(tmp_path), mode="cprofile")
+    assert profile.start()
+    _busy(0.05)
+    data = [bytearray(1024) for _ in range(100)]
+    path = profile.finish("check status", "git.status")
+
+    assert path.parent == tmp_path and path.name.endswith("-git.status")
+    assert {p.name for p in path.iterdir()} == {"meta.json", "profile.pstats", "profile.txt", "memory.txt"}
+    meta = json.loads((path / "meta.json").read_text())
+    assert meta["tool"] == "git.status" and meta["duration_ms"] >= 50
+    assert any("_busy" in row["function"] for row in meta["hotspots"])
+    assert "test_profiling.py" in (path / "memory.txt").read_text()
+    del data
+
+
+def test_sampler_sees_worker_threads(tmp_path):
+    profile = InteractionProfile(str(tmp_path), mode="sample")
+    assert profile.start()
+    worker = threading.Thread(target=_busy, args=(0.2,), name="worker")
+    worker.start()
+    worker.join()
+    path = profile.finish("run tests", "run_tests")
+
+    folded = (path / "samples.folded").read_text()
+    assert any(line.startswith("worker;") and "_busy" in line for line in folded.splitlines())
+
+
+def test_one_profile_at_a_time(tmp_path):
+    first = InteractionProfile(str(tmp_path))
+    second = InteractionProfile(str(tmp_path))
+    assert first.start()
+    assert not second.start()
+    first.cancel()
+    assert list(tmp_path.iterdir()) == []
+    assert second.start()
+    second.cancel()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core import executor
+from app.core.executor import execute_tool
+from app.core.models import ToolCall
+from app.core.repo_lock import RepoLocks
+from app.core.tools.git_ops import utils
+
+
+@pytest.mark.asyncio
+async def test_readers_share_and_writers_are_exclusive(tmp_path):
+    locks = RepoLocks()
+    events = []
+
+    async def hold(name, exclusive, delay):
+        async with locks.hold(str(tmp_path), exclusive):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+
+    async def later(delay, coro):
+        await asyncio.sleep(delay)
+        await coro
+
+    await asyncio.gather(hold("read1", False, 0.05), hold("read2", False, 0.05),
+                         later(0.01, hold("write", True, 0.01)), later(0.02, hold("read3", False, 0)))
+    assert sorted(events[:2]) == ["start read1", "start read2"]
+    # The waiting writer goes before read3, which arrived after it
+    assert events[4:] == ["start write", "end write", "start read3", "end read3"]
+    stats = locks.stats(os.path.realpath(tmp_path))
+    assert stats["acquired"] == 4 and stats["wait_ms_max"] >= 20
+
+
+@pytest.mark.asyncio
+async def test_cancelled_writer_releases_waiting_readers(tmp_path):
+    locks = RepoLocks()
+    async with locks.hold(str(tmp_path), False):
+        writer = asyncio.create_task(locks.hold(str(tmp_path), True).__aenter__())
+        await asyncio.sleep(0.01)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        async with locks.hold(str(tmp_path), False) as waited_ms:
+            assert waited_ms < 50
+
+
+@pytest.mark.asyncio
+async def test_execute_tool_serializes_writes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(executor, "REPO_LOCKS", RepoLocks())
+    running = []
+    overlaps = []
+
+    async def write(**kwargs):
+        running.append(1)
+        overlaps.append(len(running))
+        await asyncio.sleep(0.1)
+        running.pop()
+        return ("", 0)
+
+    registry = {"git.add_all": write, "git.stash_pop": write}
+    results = await asyncio.gather(
+        execute_tool(ToolCall(tool="git.add_all"), _registry=registry),
+        execute_tool(ToolCall(tool="git.stash_pop"), _registry=registry),
+    )
+    assert overlaps == [1, 1]
+    # Whichever call got the lock second waited for the first
+    assert max(r["lock_wait_ms"] for r in results) >= 50
+
+
+@pytest.mark.asyncio
+async def test_confirmation_is_awaited_without_the_lock(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(executor, "REPO_LOCKS", RepoLocks())
+    answer = asyncio.Event()
+
+    async def commit(brain, confirm_callback=None, **kwargs):
+        assert await confirm_callback("fix: x")
+        return ("fix: x", "committed", 0)
+
+    async def add_all(**kwargs):
+        answer.set()  # runs while the commit waits for the user
+        return ("", 0)
+
+    async def confirm(message):
+        await answer.wait()
+        return True
+
+    registry = {"git.smart_commit_push": commit, "git.add_all": add_all}
+    commit_task = asyncio.create_task(execute_tool(
+        ToolCall(tool="git.smart_commit_push", params={"confirm_callback": confirm}), brain=object(), _registry=registry))
+    await asyncio.sleep(0.01)
+    add = await asyncio.wait_for(execute_tool(ToolCall(tool="git.add_all"), _registry=registry), timeout=1)
+    assert add["success"] and (await commit_task)["success"]
+
+
+@pytest.mark.asyncio
+async def test_run_git_retries_index_lock_contention(monkeypatch):
+    busy = ("fatal: Unable to create '/repo/.git/index.lock': File exists.", 128)
+    once = AsyncMock(side_effect=[busy, busy, ("", 0)])
+    monkeypatch.setattr(utils, "_run_git_once", once)
+    monkeypatch.setattr(utils, "LOCK_RETRY_DELAY_S", 0)
+    assert await utils.run_git(["add", "-A"]) == ("", 0)
+    assert once.await_count == 3
+
+    # Other failures are reported straight away
+    once = AsyncMock(return_value=("fatal: not a git repository", 128))
+    monkeypatch.setattr(utils, "_run_git_once", once)
+    assert (await utils.run_git(["status"]))[1] == 128
+    assert once.await_count == 1
@@ -0,0 +1,110 @@
+import asyncio
+import subprocess
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core import executor
+from app.core.executor import execute_tool
+from app.core.models import ToolCall
+from app.core.result_cache import ToolResultCache, fingerprint
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    d = tmp_path / "repo"
+    d.mkdir()
+    _git(d, "init", "-q")
+    _git(d, "config", "user.email", "test@example.com")
+    _git(d, "config", "user.name", "Test User")
+    (d / "a.txt").write_text("one\n")
+    _git(d, "add", "a.txt")
+    _git(d, "commit", "-q", "-m", "init")
+    return d
+
+
+def test_fingerprint_tracks_head_index_and_worktree(repo_dir):
+    seen = [fingerprint(str(repo_dir))]
+    assert fingerprint(str(repo_dir)) == seen[0]
+
+    (repo_dir / "a.txt").write_text("one\ntwo\n")  # worktree edit
+    seen.append(fingerprint(str(repo_dir)))
+    (repo_dir / "b.txt").write_text("new\n")  # untracked file
+    seen.append(fingerprint(str(repo_dir)))
+    _git(repo_dir, "add", "-A")  # index
+    seen.append(fingerprint(str(repo_dir)))
+    _git(repo_dir, "commit", "-q", "-m", "second")  # HEAD
+    seen.append(fingerprint(str(repo_dir)))
+    assert len(set(seen)) == len(seen)
+
+
+def test_fingerprint_outside_a_repository(tmp_path):
+    assert fingerprint(str(tmp_path)) is None
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_in_flight_dedupe():
+    cache = ToolResultCache(max_entries=2)
+    runs = []
+
+    async def run(name, delay=0.0):
+        runs.append(name)
+        await asyncio.sleep(delay)
+        return {"stdout": name, "success": True}
+
+    results = await asyncio.gather(*(cache.get_or_run("a", lambda: run("a", 0.05)) for _ in range(3)))
+    assert [r["stdout"] for r in results] == ["a"] * 3 and runs == ["a"]
+
+    await cache.get_or_run("b", lambda: run("b"))
+    await cache.get_or_run("a", lambda: run("a"))  # refreshes a
+    await cache.get_or_run("c", lambda: run("c"))  # evicts b
+    await cache.get_or_run("b", lambda: run("b"))
+    assert runs == ["a", "b", "c", "b"]
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_and_invalidated_runs_are_not_stored():
+    cache = ToolResultCache()
+    await cache.get_or_run("fail", AsyncMock(return_value={"success": False}))
+    assert len(cache) == 0
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {"stdout": "stale", "success": True}
+
+    task = asyncio.create_task(cache.get_or_run("status", slow))
+    await asyncio.sleep(0)
+    cache.invalidate()  # a write tool ran meanwhile
+    assert (await task)["stdout"] == "stale"
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_tool_caches_reads_until_a_write(repo_dir, monkeypatch):
+    monkeypatch.chdir(repo_dir)
+    monkeypatch.setattr(executor, "RESULT_CACHE", ToolResultCache())
+    registry = {
+        "git.status": AsyncMock(return_value=("On branch main", 0)),
+        "git.diff": AsyncMock(return_value=("", 0)),
+        "git.add_all": AsyncMock(return_value=("", 0)),
+    }
+
+    for _ in range(3):
+        assert (await execute_tool(ToolCall(tool="git.status"), _registry=registry))["stdout"] == "On branch main"
+    await execute_tool(ToolCall(tool="git.diff", params={"path": "a.txt"}), _registry=registry)
+    await execute_tool(ToolCall(tool="git.diff", params={"path": "b.txt"}), _registry=registry)
+    assert registry["git.status"].await_count == 1
+    assert registry["git.diff"].await_count == 2
+
+    await execute_tool(ToolCall(tool="git.add_all"), _registry=registry)
+    await execute_tool(ToolCall(tool="git.status"), _registry=registry)
+    assert registry["git.status"].await_count == 2
+
+    (repo_dir / "a.txt").write_text("changed outside GitVoice\n")
+    await execute_tool(ToolCall(tool="git.status"), _registry=registry)
+    assert registry["git.status"].await_count == 3
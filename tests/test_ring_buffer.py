@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from app.audio.ring_buffer import AudioRingBuffer
+
+
+def _block(start, n):
+    return np.arange(start, start + n, dtype=np.float32).reshape(-1, 1)
+
+
+def test_write_and_read_without_wrap_is_a_view():
+    buf = AudioRingBuffer(capacity=10)
+    buf.write(_block(0, 4))
+    buf.write(_block(4, 3))
+
+    out = buf.read()
+    assert buf.total_written == 7
+    assert out[:, 0].tolist() == list(range(7))
+    # No wrap -> zero-copy view onto the preallocated array
+    assert np.shares_memory(out, buf._data)
+    assert buf.overflow_samples == 0
+
+
+def test_wraparound_keeps_newest_and_counts_overflow():
+    buf = AudioRingBuffer(capacity=8)
+    buf.write(_block(0, 6))
+    buf.write(_block(6, 5))  # 3 oldest samples are overwritten
+
+    assert buf.overflow_samples == 3
+    assert buf.oldest_available == 3
+    assert len(buf.segments()) == 2
+    assert buf.read()[:, 0].tolist() == list(range(3, 11))
+
+
+def test_block_larger_than_capacity():
+    buf = AudioRingBuffer(capacity=4)
+    buf.write(_block(0, 2))
+    buf.write(_block(2, 6))
+
+    assert buf.overflow_samples == 4
+    assert buf.read()[:, 0].tolist() == [4, 5, 6, 7]
+
+
+def test_oversized_write_after_an_unaligned_one_stays_in_order():
+    buf = AudioRingBuffer(capacity=10)
+    buf.write(_block(0, 3))
+    buf.write(_block(100, 12))
+    assert buf.read()[:, 0].tolist() == list(range(102, 112))
+    assert buf.overflow_samples == 5
+
+    buf.write(_block(200, 10))  # exactly one buffer, from an unaligned position
+    assert buf.read()[:, 0].tolist() == list(range(200, 210))
+    assert buf.read(start=buf.total_written - 3)[:, 0].tolist() == [207, 208, 209]
+
+
+def test_incremental_reads_by_absolute_position():
+    buf = AudioRingBuffer(capacity=16)
+    buf.write(_block(0, 5))
+    cursor = buf.total_written
+    buf.write(_block(5, 4))
+
+    assert buf.read(cursor)[:, 0].tolist() == [5, 6, 7, 8]
+    assert buf.latest(2)[:, 0].tolist() == [7, 8]
+
+
+def test_reset_reuses_storage():
+    buf = AudioRingBuffer.for_duration(0.5, sample_rate=16, channels=2)
+    storage = buf._data
+    buf.write(np.ones((8, 2), dtype=np.float32))
+    buf.reset()
+
+    assert buf.total_written == 0
+    assert buf.read().shape == (0, 2)
+    assert buf._data is storage
+
+
+def test_mono_downmix():
+    buf = AudioRingBuffer(capacity=4, channels=2)
+    buf.write(np.array([[0.0, 1.0], [1.0, 1.0]], dtype=np.float32))
+    assert buf.mono().tolist() == [0.5, 1.0]
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        AudioRingBuffer(capacity=0)
+
+
+def test_recording_past_the_limit_keeps_its_start(tmp_path, monkeypatch):
+    from app.audio.recorder import AudioRecorder
+    from app.core.models import AppConfig, AudioConfig
+
+    monkeypatch.chdir(tmp_path)
+    recorder = AudioRecorder(AppConfig(audio=AudioConfig(sample_rate=10, max_recording_s=1)))
+    for start in range(0, 25, 5):
+        recorder._callback(_block(start, 5), 5, None, None)
+
+    np.testing.assert_array_equal(recorder.buffer.read()[:, 0], np.arange(10))
+    assert recorder.truncated_samples == 15 and recorder.buffer.overflow_samples == 0
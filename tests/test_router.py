@@ -132,3 +132,55 @@ async def test_ensure_branch_params_heuristics(brain):
     updated = brain._ensure_branch_params(call3, "create branch")
     assert "name" not in updated.params
 
+
+@pytest.mark.asyncio
+async def test_ensure_test_params_full_suite(brain):
+    updated = brain._ensure_test_params(ToolCall(tool="git.run_tests", params={}), "run all the tests")
+    assert updated.params["full"] is True
+    updated = brain._ensure_test_params(ToolCall(tool="git.run_tests", params={}), "run the tests")
+    assert "full" not in updated.params
+
+
+@pytest.mark.asyncio
+async def test_routed_commands_report_their_source(brain):
+    # Reported in metrics, where "llm" counts as a fallback
+    brain._predict_intent = AsyncMock(return_value=("git.status", 0.95))
+    assert (await brain.process("status")).source == "setfit"
+
+    brain._predict_intent = AsyncMock(return_value=("help", 0.4))
+    brain._process_llm = AsyncMock(return_value=ToolCall(tool="git.log", params={"n": 5}))
+    assert (await brain.process("show logs")).source == "llm"
+
+    assert (await brain.process("git status, git add, git commit and git push")).source == "rules"
+
+@pytest.mark.asyncio
+async def test_several_reads_become_a_plan_without_models(brain):
+    brain._predict_intent = AsyncMock()
+    plan = await brain.process("show the status, the recent log and the diff")
+    assert plan.tools == ["git.status", "git.log", "git.diff"]
+    assert plan.source == "rules"
+    brain._predict_intent.assert_not_called()
+    # A write anywhere in the sentence leaves it to the classifier / LLM
+    assert brain._read_plan("show the log and the diff, then push") is None
+
+@pytest.mark.asyncio
+async def test_llm_plan_output(brain):
+    brain.provider = "groq"
+    content = ('{"steps": [{"id": "1", "tool": "git.fetch"}, {"id": "2", "tool": "git.push", '
+               '"depends_on": ["1"]}]}')
+    brain.groq_client.chat.completions.create.return_value.choices = [Mock(message=Mock(content=content))]
+    plan = await brain._process_llm("fetch and then push")
+    assert plan.tools == ["git.fetch", "git.push"]
+    assert plan.steps[1].depends_on == ["1"]
+    # The safety override applies per step
+    assert plan.steps[1].confirmation_required and not plan.steps[0].confirmation_required
+
+@pytest.mark.asyncio
+async def test_llm_plan_dangerous_words_mark_every_write_step(brain):
+    brain.provider = "groq"
+    # The LLM mapped "discard" to a stash and a checkout, neither of them in DANGEROUS_TOOLS
+    content = ('{"steps": [{"id": "1", "tool": "git.status"}, {"id": "2", "tool": "git.stash_push"}, '
+               '{"id": "3", "tool": "git.branch", "params": {"name": "main"}}]}')
+    brain.groq_client.chat.completions.create.return_value.choices = [Mock(message=Mock(content=content))]
+    plan = await brain._process_llm("discard my changes and go back to main")
+    assert [step.confirmation_required for step in plan.steps] == [False, True, True]
@@ -0,0 +1,208 @@
+import asyncio
+import io
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+from rich.console import Console
+
+import app.cli.session as session_mod
+from app.cli.session import ExecutionOrder, VoiceSession
+from app.core.models import AppConfig, STTResult, ToolCall, ToolPlan
+
+
+@pytest.mark.asyncio
+async def test_reads_only_wait_for_earlier_writes():
+    order = ExecutionOrder()
+    push_blockers, push_done = order.admit("remote")
+    status_blockers, status_done = order.admit("read")
+    assert push_blockers == [] and status_blockers == []
+
+    commit_blockers, commit_done = order.admit("write")
+    assert commit_blockers == [push_done, status_done]
+    log_blockers, _ = order.admit("read")
+    assert log_blockers == [commit_done]
+    fetch_blockers, _ = order.admit("remote")
+    assert push_done in fetch_blockers and commit_done in fetch_blockers
+
+
+@pytest.mark.asyncio
+async def test_finished_executions_are_forgotten():
+    order = ExecutionOrder()
+    _, done = order.admit("write")
+    done.set()
+    assert order.admit("read")[0] == []
+
+
+def _session(commands, execute, monkeypatch, **config):
+    """A press-enter session speaking `commands`, one per recording."""
+    config = AppConfig(**{"require_confirmation_writes": False, **config})
+    paths = [f"utt{i}.wav" for i in range(len(commands))]
+    texts = dict(zip(paths, commands))
+
+    recorder = Mock(last_vad=None)
+    recorder.stop_recording.side_effect = paths
+    transcriber = Mock(supports_streaming=False)
+    transcriber.transcribe = AsyncMock(side_effect=lambda path: STTResult(text=texts[path]))
+    brain = Mock()
+    brain.process = AsyncMock(side_effect=lambda text: ToolCall(tool=text))
+
+    terminal = Mock()
+    # Enter to start and stop each recording, then quit
+    terminal.read_line = AsyncMock(side_effect=[""] * 2 * len(commands) + ["q"])
+    terminal.confirm = AsyncMock(return_value=True)
+    monkeypatch.setattr(session_mod, "play_start_listening_sound", lambda: None)
+    monkeypatch.setattr(session_mod, "play_stop_listening_sound", lambda: None)
+    monkeypatch.setattr(session_mod, "execute_tool", execute)
+    return VoiceSession(config, recorder, transcriber, brain, Mock(), Console(file=io.StringIO()),
+                        terminal=terminal)
+
+
+@pytest.mark.asyncio
+async def test_status_runs_during_slow_push(monkeypatch):
+    events = []
+    status_ran = asyncio.Event()
+
+    async def execute(tool_call, **kwargs):
+        events.append(f"start {tool_call.tool}")
+        if tool_call.tool == "git.push":
+            # Would time out if the status were queued behind the push
+            await asyncio.wait_for(status_ran.wait(), timeout=2)
+        if tool_call.tool == "git.status":
+            status_ran.set()
+        events.append(f"end {tool_call.tool}")
+        return {"success": True, "stdout": "", "stderr": "", "exit_code": 0}
+
+    session = _session(["git.push", "git.status"], execute, monkeypatch)
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    assert events == ["start git.push", "start git.status", "end git.status", "end git.push"]
+    assert session.metrics_logger.log.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_reads_wait_for_writes(monkeypatch):
+    events = []
+
+    async def execute(tool_call, **kwargs):
+        events.append(f"start {tool_call.tool}")
+        await asyncio.sleep(0.05 if tool_call.tool == "git.commit" else 0)
+        events.append(f"end {tool_call.tool}")
+        return {"success": True, "stdout": "", "stderr": "", "exit_code": 0}
+
+    session = _session(["git.commit", "git.status"], execute, monkeypatch)
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    assert events == ["start git.commit", "end git.commit", "start git.status", "end git.status"]
+
+
+@pytest.mark.asyncio
+async def test_stats_request_shows_stage_latencies(monkeypatch):
+    execute = AsyncMock(return_value={"success": True, "stdout": "", "stderr": "", "exit_code": 0})
+    shown = []
+    monkeypatch.setattr(session_mod, "render_latency_stats", shown.append)
+    session_mod.tracer.reset()
+    session = _session(["git.status", "show latency stats"], execute, monkeypatch)
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    # Answered by the session: not routed or executed
+    session.brain.process.assert_awaited_once_with("git.status")
+    assert execute.await_count == 1
+    (stats,) = shown
+    assert {"session.record", "session.transcribe", "session.route"} <= set(stats)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_confirmation_skips_execution(monkeypatch):
+    execute = AsyncMock()
+    session = _session(["git.push"], execute, monkeypatch, require_confirmation_writes=True)
+    session.terminal.confirm.return_value = False
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    execute.assert_not_called()
+    session.terminal.confirm.assert_awaited_once()
+    assert session.metrics_logger.log.call_args.kwargs["error"] == "cancelled_by_user"
+
+
+@pytest.mark.asyncio
+async def test_smart_commit_asks_through_terminal(monkeypatch):
+    seen = {}
+
+    async def execute(tool_call, **kwargs):
+        seen["confirmed"] = await tool_call.params["confirm_callback"]("feat: add x")
+        return {"success": True, "stdout": "", "stderr": "", "exit_code": 0}
+
+    session = _session(["git.smart_commit_push"], execute, monkeypatch)
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    assert seen["confirmed"] is True
+    assert "feat: add x" in session.terminal.confirm.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_plan_runs_reads_together_and_confirms_writes_once(monkeypatch):
+    events = []
+    both_reads = asyncio.Barrier(2)
+
+    async def execute(tool_call, **kwargs):
+        events.append(f"start {tool_call.tool}")
+        if tool_call.tool in ("git.status", "git.diff"):
+            await asyncio.wait_for(both_reads.wait(), timeout=2)  # only passes if they overlap
+        events.append(f"end {tool_call.tool}")
+        return {"success": True, "stdout": "", "stderr": "", "exit_code": 0}
+
+    session = _session(["plan"], execute, monkeypatch, require_confirmation_writes=True)
+    session.brain.process = AsyncMock(return_value=ToolPlan(steps=[
+        {"tool": "git.status"}, {"tool": "git.diff"}, {"tool": "git.commit", "params": {"message": "x"}},
+        {"tool": "git.push"},
+    ]))
+    rendered = []
+    monkeypatch.setattr(session, "_render_outcome", lambda outcome: rendered.append(outcome.tool_call.tool))
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    session.terminal.confirm.assert_awaited_once()
+    assert events[:2] == ["start git.status", "start git.diff"]
+    assert events[-4:] == ["start git.commit", "end git.commit", "start git.push", "end git.push"]
+    assert rendered[-2:] == ["git.commit", "git.push"] and len(rendered) == 4
+    assert session.metrics_logger.log.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_declined_plan_runs_nothing(monkeypatch):
+    execute = AsyncMock()
+    session = _session(["plan"], execute, monkeypatch, require_confirmation_writes=True)
+    session.brain.process = AsyncMock(return_value=ToolPlan(steps=[{"tool": "git.status"}, {"tool": "git.push"}]))
+    session.terminal.confirm.return_value = False
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    execute.assert_not_called()
+    assert session.metrics_logger.log.call_args.kwargs["error"] == "cancelled_by_user"
+
+
+@pytest.mark.asyncio
+async def test_profile_command_profiles_only_the_next_command(monkeypatch, tmp_path):
+    execute = AsyncMock(return_value={"success": True, "stdout": "", "stderr": "", "exit_code": 0})
+    session = _session(["git.status", "git.log"], execute, monkeypatch, profile_dir=str(tmp_path))
+    session.terminal.read_line.side_effect = ["profile", "", "", "", "", "q"]
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    assert execute.await_count == 2
+    (profile,) = tmp_path.iterdir()
+    assert profile.name.endswith("-git.status")
+    assert session_mod.PROFILE_REQUEST.match("Profile the next command.")
+
+
+@pytest.mark.asyncio
+async def test_run_tests_streams_output_to_the_console(monkeypatch):
+    seen = {}
+
+    async def execute(tool_call, **kwargs):
+        seen["timeout_s"] = tool_call.params["timeout_s"]
+        tool_call.params["on_output"]("tests/test_a.py [bold]..[/bold]  [100%]", None)
+        return {"success": True, "stdout": "", "stderr": "", "exit_code": 0, "summary": "All tests passed."}
+
+    session = _session(["git.run_tests"], execute, monkeypatch, test_timeout_s=30)
+    await asyncio.wait_for(session.run(), timeout=5)
+
+    assert seen["timeout_s"] == 30
+    output = session.console.file.getvalue()
+    assert "#1 │ tests/test_a.py [bold]..[/bold]  [100%]" in output
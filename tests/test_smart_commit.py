@@ -38,3 +38,34 @@ async def test_smart_commit_push_no_changes():
         
         assert result["success"] is False
         assert "No changes to commit" in result["stdout"]
+
+@pytest.mark.asyncio
+async def test_smart_commit_awaits_async_confirmation():
+    from app.core.tools.git_ops.commit_push import smart_commit_push
+
+    git = AsyncMock(side_effect=lambda args: ("diff --git a/x b/x", 0))
+    confirm = AsyncMock(return_value=False)
+    with patch("app.core.tools.git_ops.commit_push.run_git", git):
+        message, stdout, code = await smart_commit_push(
+            AsyncMock(generate_commit_message=AsyncMock(return_value="fix: x")), push=False, confirm_callback=confirm
+        )
+
+    confirm.assert_awaited_once_with("fix: x")
+    assert code == 1 and "cancelled" in stdout
+    assert ["commit", "-m", "fix: x"] not in [c.args[0] for c in git.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_smart_commit_aborts_if_staged_changes_moved_during_confirmation():
+    from app.core.tools.git_ops.commit_push import smart_commit_push
+
+    diffs = iter(["diff --git a/x b/x", "diff --git a/x b/x", "diff --git a/x b/x\n+more"])
+    git = AsyncMock(side_effect=lambda args: (next(diffs), 0) if args[:2] == ["diff", "--staged"] else ("", 0))
+    with patch("app.core.tools.git_ops.commit_push.run_git", git):
+        message, stdout, code = await smart_commit_push(
+            AsyncMock(generate_commit_message=AsyncMock(return_value="fix: x")), push=False,
+            confirm_callback=AsyncMock(return_value=True)
+        )
+
+    assert code == 1 and "nothing committed" in stdout
+    assert ["commit", "-m", "fix: x"] not in [c.args[0] for c in git.call_args_list]
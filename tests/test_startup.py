@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.core.startup import STARTUP_BUDGET_MS, ImportRecord, StartupProfiler
+
+ROOT = Path(__file__).resolve().parent.parent
+# The CLI test allows this multiple of STARTUP_BUDGET_MS: enough for a loaded CI machine, far
+# below what an eager model or client import costs. STARTUP_BUDGET_SLACK=1 checks the budget itself.
+BUDGET_SLACK = float(os.getenv("STARTUP_BUDGET_SLACK", "3"))
+
+
+def test_profiler_records_import_tree_and_spans():
+    sys.modules.pop("json.tool", None)
+    profiler = StartupProfiler()
+    profiler.enable()
+    try:
+        with profiler.span("components"):
+            import json.tool  # noqa: F401
+        worker = threading.Thread(target=lambda: profiler.mark("background"), name="warm")
+        worker.start()
+        worker.join()
+        profiler.mark("ready")
+    finally:
+        profiler.disable()
+
+    record = next(r for r in profiler.imports if r.module == "json.tool")
+    assert record.thread == "MainThread"
+    assert record.cumulative_ms >= record.self_ms >= 0
+    names = [(s.name, s.thread) for s in profiler.spans]
+    assert names == [("components", "MainThread"), ("background", "warm"), ("ready", "MainThread")]
+    data = profiler.to_dict()
+    assert data["ready_ms"] == round(profiler.spans[-1].start_ms, 1)
+    assert data["heavy_imports_main_thread"] == []
+
+
+def test_heavy_imports_are_flagged_per_thread():
+    profiler = StartupProfiler()
+    profiler.imports.append(ImportRecord("groq._client", 1, "MainThread", 0.0))
+    profiler.imports.append(ImportRecord("faster_whisper", 0, "asyncio_0", 0.0))
+    profiler.imports.append(ImportRecord("groqish", 0, "MainThread", 0.0))
+    assert profiler.heavy_imports() == ["groq._client"]
+    assert profiler.heavy_imports(thread=None) == ["groq._client", "faster_whisper"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="relies on the POSIX daemon socket")
+def test_cli_starts_within_budget(tmp_path):
+    # Cloud providers, so groq is on the import path unless it is kept lazy
+    env = {**os.environ, "STT_PROVIDER": "groq", "LLM_PROVIDER": "groq", "GROQ_API_KEY": "test-key",
+           "GITVOICE_DAEMON": "off",
+           # Nothing written to the working tree on exit
+           "METRICS_FILE": str(tmp_path / "metrics.jsonl"), "METRICS_DB": str(tmp_path / "metrics.db"),
+           "TRACE_FILE": str(tmp_path / "trace.json"), "PROFILE_DIR": str(tmp_path / "profiles")}
+    result = subprocess.run(
+        [sys.executable, "-m", "app.main", "--startup-profile=json"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["heavy_imports_main_thread"] == []
+    assert 0 < report["ready_ms"] <= STARTUP_BUDGET_MS * BUDGET_SLACK
+    # ...but the warm-ups did build the client, in the background
+    assert any(r["module"] == "groq" and r["thread"] != "MainThread" for r in report["imports"])
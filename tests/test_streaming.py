@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from app.audio.ring_buffer import AudioRingBuffer
+from app.audio.streaming import StreamingTranscriber, agreed_prefix
+
+SR = 100
+
+
+def _words(*items):
+    return [(w, s, e) for w, s, e in items]
+
+
+def test_agreed_prefix_ignores_case_and_punctuation():
+    prev = _words(("Git", 0.0, 0.2), ("status", 0.2, 0.5))
+    cur = _words(("git", 0.0, 0.2), ("status,", 0.2, 0.5), ("please", 0.5, 0.9))
+    assert agreed_prefix(prev, cur) == 2
+    assert agreed_prefix([], cur) == 0
+
+
+@pytest.mark.asyncio
+async def test_commits_stable_prefix_and_finalizes_tail():
+    buf = AudioRingBuffer(capacity=10 * SR)
+    buf.write(np.zeros((2 * SR, 1), dtype=np.float32))
+
+    transcriber = Mock()
+    transcriber.decode_words.side_effect = [
+        _words(("show", 0.0, 0.3), ("the", 0.3, 0.4)),
+        _words(("show", 0.0, 0.3), ("the", 0.3, 0.4), ("log", 0.4, 0.8)),
+        # Final tail, decoded from the committed position onwards
+        _words(("log", 0.0, 0.4)),
+    ]
+    partials = []
+    stream = StreamingTranscriber(
+        transcriber, buf, SR, on_partial=lambda c, t: partials.append((c, t)), trim_tail=False
+    )
+
+    await stream._step()
+    assert stream.committed == []
+
+    buf.write(np.zeros((SR, 1), dtype=np.float32))
+    await stream._step()
+    assert stream.committed_text == "show the"
+    assert stream._commit_pos == int(0.4 * SR)
+    assert partials[-1] == ("show the", "log")
+
+    result = await stream.finish()
+    assert result.text == "show the log"
+    # Only audio after the committed words is decoded at finalize time
+    tail_audio = transcriber.decode_words.call_args_list[-1].args[0]
+    assert tail_audio.shape[0] == 3 * SR - int(0.4 * SR)
+
+
+@pytest.mark.asyncio
+async def test_background_loop_stops_on_finish():
+    buf = AudioRingBuffer(capacity=SR)
+    transcriber = Mock()
+    transcriber.decode_words.return_value = []
+    stream = StreamingTranscriber(transcriber, buf, SR, hop_s=0.01)
+    stream.start()
+    result = await stream.finish()
+    assert result.text == ""
+    assert stream._task is None
+
+
+@pytest.mark.asyncio
+async def test_silent_tail_is_not_decoded():
+    buf = AudioRingBuffer(capacity=2 * SR)
+    buf.write(np.zeros((SR, 1), dtype=np.float32))
+    transcriber = Mock()
+    stream = StreamingTranscriber(transcriber, buf, SR)
+    result = await stream.finish()
+    assert result.text == ""
+    transcriber.decode_words.assert_not_called()
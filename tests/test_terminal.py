@@ -0,0 +1,104 @@
+import asyncio
+import io
+import os
+
+import pytest
+from rich.console import Console
+
+from app.cli.terminal import QUESTION, TerminalInput
+
+
+@pytest.fixture
+def pipe():
+    """A TerminalInput reading from a pipe, and a function that types into it."""
+    read_fd, write_fd = os.pipe()
+    stream = os.fdopen(read_fd, "r")
+    output = io.StringIO()
+    terminal = TerminalInput(Console(file=output), stream=stream)
+
+    def type_line(text):
+        os.write(write_fd, f"{text}\n".encode())
+
+    yield terminal, type_line, output
+    try:
+        os.close(write_fd)
+    except OSError:
+        pass
+
+
+async def _until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_loop_keeps_running_while_waiting(pipe):
+    terminal, type_line, _ = pipe
+    ticks = 0
+
+    async def background():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(background())
+    reader = asyncio.create_task(terminal.read_line())
+    await _until(lambda: ticks > 5)
+    assert not reader.done()
+    type_line("hello")
+    assert await asyncio.wait_for(reader, 2) == "hello"
+    task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_questions_come_before_controls(pipe):
+    terminal, type_line, output = pipe
+    shown = []
+    control = asyncio.create_task(terminal.read_line(lambda: shown.append("press enter")))
+    await _until(lambda: shown)
+    question = asyncio.create_task(terminal.confirm("Push?"))
+    await _until(lambda: "Push?" in output.getvalue())
+
+    type_line("y")
+    assert await asyncio.wait_for(question, 2) is True
+    assert not control.done()
+    # The waiting control prompt is shown again once the question is answered
+    await _until(lambda: len(shown) == 2)
+
+    type_line("")
+    assert await asyncio.wait_for(control, 2) == ""
+
+
+@pytest.mark.asyncio
+async def test_confirm_repeats_until_valid(pipe):
+    terminal, type_line, output = pipe
+    question = asyncio.create_task(terminal.confirm("Reset?"))
+    type_line("maybe")
+    type_line("no")
+    assert await asyncio.wait_for(question, 2) is False
+    assert "Please enter Y or N" in output.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_typed_ahead_lines_do_not_confirm(pipe):
+    terminal, type_line, _ = pipe
+    terminal._start()
+    type_line("y")
+    await _until(lambda: terminal._typed_ahead)
+    question = asyncio.create_task(terminal.confirm("Commit?", default=False))
+    await asyncio.sleep(0.05)
+    assert not question.done()
+    type_line("")
+    assert await asyncio.wait_for(question, 2) is False
+
+
+@pytest.mark.asyncio
+async def test_end_of_input():
+    terminal = TerminalInput(Console(file=io.StringIO()), stream=io.StringIO("q\n"))
+    assert await terminal.read_line() == "q"
+    with pytest.raises(EOFError):
+        await asyncio.wait_for(terminal.read_line(priority=QUESTION), 2)
+    assert await terminal.confirm("Push?") is False
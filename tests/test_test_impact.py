@@ -0,0 +1,137 @@
+import subprocess
+import textwrap
+
+import pytest
+
+from app.core.models import AppConfig
+from app.core.test_impact import ImportGraph, app_outputs, parse_imports, record_durations, select_tests
+from app.core.tools.git_ops.test_runner import run_tests
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def _write(root, path, text):
+    (root / path).parent.mkdir(parents=True, exist_ok=True)
+    (root / path).write_text(textwrap.dedent(text))
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    d = tmp_path / "repo"
+    d.mkdir()
+    _git(d, "init", "-q")
+    _git(d, "config", "user.email", "test@example.com")
+    _git(d, "config", "user.name", "Test User")
+    _write(d, "pkg/__init__.py", "")
+    _write(d, "pkg/a.py", "VALUE = 1\n")
+    _write(d, "pkg/b.py", "from .a import VALUE\n")
+    _write(d, "pkg/c.py", "def helper():\n    from pkg import a\n    return 2\n")
+    _write(d, "tests/conftest.py", "")
+    _write(d, "tests/test_b.py", "from pkg.b import VALUE\n\ndef test_b():\n    assert VALUE == 1\n")
+    _write(d, "tests/test_c.py", "import pkg.c\n\ndef test_c():\n    assert pkg.c.helper() == 2\n")
+    _write(d, "tests/test_d.py", "def test_d():\n    pass\n")
+    _write(d, "README.md", "# pkg\n")
+    _git(d, "add", "-A")
+    _git(d, "commit", "-q", "-m", "init")
+    return d
+
+
+def test_imports_are_resolved():
+    source = b"import os\nfrom . import a\nfrom ..core.x import y\n\ndef f():\n    import pkg.lazy\n"
+    assert parse_imports(source, "app/cli/m.py") == ["app.cli", "app.cli.a", "app.core.x", "app.core.x.y",
+                                                      "os", "pkg.lazy"]
+
+
+def test_selects_tests_that_import_the_change(repo_dir):
+    assert select_tests(str(repo_dir)).reason == "no changes since HEAD"
+
+    _write(repo_dir, "pkg/a.py", "VALUE = 1  # edited\n")
+    _write(repo_dir, "README.md", "# pkg, documented\n")
+    selection = select_tests(str(repo_dir))
+    # test_b through pkg.b, test_c through the import inside pkg.c.helper
+    assert selection.tests == ["tests/test_b.py", "tests/test_c.py"]
+    assert selection.skipped_files == 1
+
+    _write(repo_dir, "tests/test_e.py", "def test_e():\n    pass\n")  # untracked
+    assert select_tests(str(repo_dir)).tests == ["tests/test_b.py", "tests/test_c.py", "tests/test_e.py"]
+
+    _write(repo_dir, "tests/conftest.py", "import pytest\n")
+    assert select_tests(str(repo_dir)).tests is None
+    _git(repo_dir, "checkout", "tests/conftest.py")
+    _write(repo_dir, "data.json", "{}")
+    assert select_tests(str(repo_dir)).reason == "data.json changed and tests may read it"
+
+
+def test_app_outputs_are_not_changes(repo_dir):
+    _write(repo_dir, "metrics.jsonl", "")
+    _git(repo_dir, "add", "metrics.jsonl")
+    _git(repo_dir, "commit", "-q", "-m", "metrics")
+    config = AppConfig(metrics_file=str(repo_dir / "metrics.jsonl"), metrics_db=str(repo_dir / "metrics.db"),
+                       trace_file=str(repo_dir / "trace.json"), profile_dir=str(repo_dir / "profiles"))
+    _write(repo_dir, "metrics.jsonl", '{"tool": "git.status"}\n')
+    for output in ("metrics.20260101-000000.jsonl.gz", "metrics.db", "metrics.db-wal", "trace.json",
+                   "profiles/1-git.status/profile.txt"):
+        _write(repo_dir, output, "x")
+    _write(repo_dir, "pkg/a.py", "VALUE = 1  # edited\n")
+
+    assert select_tests(str(repo_dir)).tests is None  # full suite
+    selection = select_tests(str(repo_dir), app_outputs(config))
+    assert selection.tests == ["tests/test_b.py", "tests/test_c.py"]
+
+
+def test_graph_cache_only_parses_changed_files(repo_dir):
+    select_tests(str(repo_dir / "tests"))  # no changes: nothing parsed yet
+    _write(repo_dir, "pkg/a.py", "VALUE = 1  # edited\n")
+    select_tests(str(repo_dir))
+    graph = ImportGraph(str(repo_dir), str(repo_dir / ".git" / "gitvoice" / "test-impact.json"))
+    assert len(graph.files) == 8
+    assert graph.update(graph.files) == 0
+    _write(repo_dir, "pkg/b.py", "from .a import VALUE  # edited\n")
+    assert graph.update(graph.files) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_tests_runs_only_affected_files_and_reports_savings(repo_dir, monkeypatch):
+    monkeypatch.chdir(repo_dir)
+    result = await run_tests(full=True)
+    assert result["exit_code"] == 0 and "passed" in result["summary"]
+    assert "selection" not in result
+
+    _write(repo_dir, "pkg/b.py", "from .a import VALUE  # edited\n")
+    lines = []
+    result = await run_tests(on_output=lambda line, summary: lines.append(line))
+    assert lines[0].startswith("Test selection: 1 of 3 test files affected by 1 changed file (skipped 2 files, 2 tests")
+    assert result["exit_code"] == 0
+    assert "1 passed" in result["summary"]
+    assert result["selection"]["skipped_tests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_run_tests_with_nothing_affected_is_skipped_not_passed(repo_dir, monkeypatch):
+    monkeypatch.chdir(repo_dir)
+    _write(repo_dir, "pkg/unused.py", "X = 1\n")
+    result = await run_tests()
+    assert result["skipped"] is True and result["success"] is False
+    assert result["exit_code"] != 0
+    assert result["summary"].startswith("No tests are affected by the changes.")
+    assert result["selection"]["tests"] == []
+
+
+def test_record_durations_from_junit(repo_dir, tmp_path):
+    junit = tmp_path / "junit.xml"
+    junit.write_text(
+        '<testsuites><testsuite>'
+        '<testcase classname="tests.test_b" name="test_b" time="1.5"/>'
+        '<testcase classname="tests.test_c.TestC" name="test_one" time="2.0"/>'
+        '<testcase classname="tests.test_c.TestC" name="test_two" time="0.5"/>'
+        '</testsuite></testsuites>'
+    )
+    record_durations(str(repo_dir), str(junit))
+
+    _write(repo_dir, "tests/test_d.py", "def test_d():\n    assert True\n")
+    selection = select_tests(str(repo_dir))
+    assert selection.tests == ["tests/test_d.py"]
+    assert (selection.skipped_tests, selection.saved_s) == (3, 4.0)
+    assert selection.describe().endswith("(skipped 2 files, 3 tests, ~4s saved)")
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+import app.core.tools.git_ops.test_runner as test_runner
+from app.core.tools.git_ops.test_runner import TestSummary, run_tests
+
+
+def _script(tmp_path, code):
+    path = tmp_path / "suite.py"
+    path.write_text(textwrap.dedent(code))
+    return f"{sys.executable} {path}"
+
+
+@pytest.mark.asyncio
+async def test_output_streams_while_the_loop_keeps_running(tmp_path):
+    command = _script(tmp_path, """
+        import time
+        print("collected 3 items")
+        print("tests/test_a.py .F  [ 66%]")
+        time.sleep(0.3)
+        print("tests/test_b.py .  [100%]")
+        print("FAILED tests/test_a.py::test_two - assert 1 == 2")
+        print("========= 1 failed, 2 passed in 0.31s =========")
+        raise SystemExit(1)
+    """)
+    seen = []
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    def on_output(line, summary):
+        seen.append((line, summary.headline()))
+
+    task = asyncio.create_task(ticker())
+    result = await run_tests(command, on_output=on_output)
+    task.cancel()
+
+    assert ticks > 10  # the event loop was free during the run
+    assert seen[1] == ("tests/test_a.py .F  [ 66%]", "1 failed, 1 passed (66%)")
+    assert result["exit_code"] == 1 and not result["timed_out"]
+    assert result["summary"] == "Tests failed (exit code 1): 1 failed, 2 passed in 0.31s."
+    assert result["failures"] == ["tests/test_a.py::test_two"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(os.name == "nt", reason="process groups are POSIX")
+async def test_timeout_kills_the_process_group(tmp_path):
+    command = _script(tmp_path, """
+        import subprocess, sys, time
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        print(child.pid)
+        time.sleep(30)
+    """)
+    start = time.perf_counter()
+    result = await run_tests(command, timeout_s=1)
+
+    assert time.perf_counter() - start < 5
+    assert result["timed_out"] and result["exit_code"] == test_runner.TIMEOUT_EXIT_CODE
+    assert result["summary"].startswith("Tests timed out after 1s")
+    child = int(result["stdout"].splitlines()[0])
+    for _ in range(50):
+        try:
+            os.kill(child, 0)
+        except ProcessLookupError:
+            break
+        await asyncio.sleep(0.05)
+    else:
+        pytest.fail("the suite's child process survived the timeout")
+
+
+@pytest.mark.asyncio
+async def test_only_head_and_tail_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(test_runner, "HEAD_LINES", 3)
+    monkeypatch.setattr(test_runner, "TAIL_LINES", 2)
+    command = _script(tmp_path, """
+        for i in range(1000):
+            print(f"line {i}")
+    """)
+    result = await run_tests(command)
+
+    assert result["exit_code"] == 0 and result["summary"] == "All tests passed."
+    assert result["omitted_lines"] == 995
+    assert result["stdout"].splitlines() == ["line 0", "line 1", "line 2", "... 995 lines omitted ...",
+                                             "line 998", "line 999"]
+
+
+def test_summary_from_verbose_and_unittest_output():
+    summary = TestSummary()
+    for line in ["tests/test_a.py::test_one PASSED       [ 50%]",
+                 "tests/test_a.py::test_two SKIPPED (no db) [100%]"]:
+        summary.feed(line)
+    assert (summary.passed, summary.skipped, summary.percent) == (1, 1, 100)
+
+    summary = TestSummary()
+    for line in ["...", "Ran 3 tests in 0.002s", "", "OK"]:
+        summary.feed(line)
+    assert summary.headline() == "Ran 3 tests in 0.002s: OK"
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from app.core.tracing import Histogram, Tracer
+
+
+def test_histogram_percentiles_are_close():
+    histogram = Histogram()
+    values = list(range(1, 100_001))
+    random.Random(0).shuffle(values)
+    for v in values:
+        histogram.record(v)
+
+    for p in (50, 95, 99):
+        assert histogram.percentile(p) == pytest.approx(p * 1000, rel=0.02)
+    summary = histogram.summary()
+    assert summary["count"] == 100_000 and summary["max"] == 100.0
+    assert Histogram().summary()["p99"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_await_and_threads(tmp_path):
+    tracer = Tracer()
+    trace = tmp_path / "trace.json"
+    tracer.export_to(str(trace))
+
+    def blocking():
+        with tracer.span("inner.thread"):
+            pass
+
+    @tracer.traced("inner.async")
+    async def child():
+        await asyncio.sleep(0.01)
+
+    with tracer.span("outer", track="utterance 1", tool="git.status"):
+        await child()
+        await asyncio.to_thread(blocking)
+    with tracer.span("outer"):
+        pass
+    tracer.close()
+
+    stats = tracer.stats()
+    assert stats["outer"]["count"] == 2
+    assert stats["inner.async"]["p50"] >= 10
+
+    events = json.loads(trace.read_text())
+    tracks = {e["tid"]: e["args"]["name"] for e in events if e["ph"] == "M"}
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    # Children are drawn on their parent's track, inside it
+    for name in ("inner.async", "inner.thread"):
+        assert tracks[spans[name]["tid"]] == "utterance 1"
+    outer = next(e for e in events if e["name"] == "outer" and e["args"])
+    assert outer["args"] == {"tool": "git.status"}
+    assert outer["ts"] <= spans["inner.async"]["ts"]
+    assert spans["inner.thread"]["ts"] + spans["inner.thread"]["dur"] <= outer["ts"] + outer["dur"]
@@ -0,0 +1,83 @@
+import numpy as np
+from app.audio.vad import Endpointer, speech_mask, trim_silence
+
+SR = 16000
+rng = np.random.default_rng(0)
+
+
+def _noise(seconds, level=0.001):
+    return (rng.standard_normal(int(seconds * SR)) * level).astype(np.float32)
+
+
+def _voice(seconds, level=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (np.sin(2 * np.pi * 220 * t) * level).astype(np.float32)
+
+
+def test_trims_leading_and_trailing_silence():
+    audio = np.concatenate([_noise(2.0), _voice(1.0), _noise(1.5)])
+    result = trim_silence(audio, SR, pad_ms=100, pre_roll_ms=100)
+
+    assert result.is_speech
+    assert result.original_s == 4.5
+    assert 1.0 <= result.kept_s <= 1.3
+    assert abs(result.start / SR - 1.9) < 0.05
+    assert result.trimmed_s > 3.0
+    # The trimmed clip is a view onto the recorder's buffer
+    assert np.shares_memory(result.audio, audio)
+
+
+def test_silence_only_clip_is_dropped():
+    result = trim_silence(_noise(3.0), SR)
+    assert not result.is_speech
+    assert result.kept_s == 0
+    assert len(result.audio) == 0
+
+
+def test_pre_roll_keeps_context_before_the_first_word():
+    audio = np.concatenate([_noise(2.0), _voice(1.0), _noise(1.5)])
+    result = trim_silence(audio, SR)
+    assert 1.65 <= result.start / SR <= 1.75
+
+
+def test_quiet_microphone_speech_is_kept():
+    # Speech ~13 dB over a noisy floor: below the old -35 dBFS cap
+    audio = np.concatenate([_noise(2.0, level=0.003), _voice(1.0, level=0.02), _noise(1.0, level=0.003)])
+    result = trim_silence(audio, SR)
+    assert result.is_speech
+    assert abs(result.start / SR - 1.7) < 0.05
+    assert result.end / SR > 3.0
+
+
+def test_doubtful_clip_is_kept_whole_not_dropped():
+    # Too little detected speech to trim around, but clearly not silence
+    audio = np.concatenate([_noise(1.0), _voice(0.06), _noise(1.0)])
+    result = trim_silence(audio, SR)
+    assert result.is_speech
+    assert result.start == 0 and result.end == len(audio)
+
+
+def test_all_speech_clip_is_kept_whole():
+    audio = _voice(2.0)
+    result = trim_silence(audio, SR)
+    assert result.is_speech
+    assert result.kept_s == 2.0
+
+
+def test_speech_mask_handles_short_input():
+    assert speech_mask(np.zeros(10, dtype=np.float32), SR).size == 0
+
+
+def test_endpointer_waits_for_trailing_silence():
+    ep = Endpointer(SR, silence_ms=500)
+    assert not ep.update(_noise(1.0))
+    assert not ep.update(_voice(0.8))
+    assert ep.heard_speech
+    assert not ep.update(_noise(0.3))
+    # Chunks that don't align with frame boundaries are carried over
+    assert ep.update(_noise(0.2537))
+
+
+def test_endpointer_ignores_silence_without_speech():
+    ep = Endpointer(SR, silence_ms=200)
+    assert not ep.update(_noise(2.0))
@@ -0,0 +1,72 @@
+import numpy as np
+from app.audio.wakeword import (
+    LogMelExtractor,
+    TemplateKeywordModel,
+    WakeWordDetector,
+    dtw_similarity,
+    _normalize,
+    mel_filterbank,
+)
+
+SR = 16000
+rng = np.random.default_rng(1)
+
+
+def _keyword():
+    """Two-syllable synthetic 'wake word': rising then falling tone."""
+    t = np.arange(int(0.35 * SR)) / SR
+    up = np.sin(2 * np.pi * (300 * t + 900 * t ** 2))
+    down = np.sin(2 * np.pi * (1400 * t - 1200 * t ** 2))
+    return (np.concatenate([up, np.zeros(800), down]) * 0.3).astype(np.float32)
+
+
+def _noise(seconds, level=0.002):
+    return (rng.standard_normal(int(seconds * SR)) * level).astype(np.float32)
+
+
+def _feed(detector, audio, chunk=1600):
+    hits = []
+    for i in range(0, len(audio), chunk):
+        score = detector.process(audio[i:i + chunk])
+        if score is not None:
+            hits.append(i / SR)
+    return hits
+
+
+def test_mel_filterbank_shape():
+    fb = mel_filterbank(SR, 512, 40)
+    assert fb.shape == (40, 257)
+    assert (fb >= 0).all()
+
+
+def test_streaming_features_match_whole_clip():
+    audio = _noise(1.0, level=0.1)
+    extractor = LogMelExtractor(SR)
+    streamed = np.concatenate([extractor.process(audio[i:i + 777]) for i in range(0, len(audio), 777)])
+    whole = extractor.features(audio)
+    assert streamed.shape == whole.shape == (98, 40)
+    assert np.allclose(streamed, whole, atol=1e-4)
+
+
+def test_dtw_identical_is_perfect_match():
+    feats = _normalize(LogMelExtractor(SR).features(_keyword()))
+    assert dtw_similarity(feats, feats) > 0.99
+
+
+def test_detects_keyword_and_ignores_noise():
+    template = LogMelExtractor(SR).features(_keyword())
+    detector = WakeWordDetector(TemplateKeywordModel([template]), SR, threshold=0.6)
+
+    assert _feed(detector, _noise(3.0)) == []
+    keyword = _keyword()
+    audio = np.concatenate([_noise(1.0), keyword + _noise(len(keyword) / SR), _noise(1.0)])
+    hits = _feed(detector, audio)
+    assert len(hits) == 1
+    assert 1.0 < hits[0] < 2.5
+
+
+def test_silence_is_never_scored():
+    template = LogMelExtractor(SR).features(_keyword())
+    detector = WakeWordDetector(TemplateKeywordModel([template]), SR)
+    _feed(detector, np.zeros(5 * SR, dtype=np.float32))
+    assert detector.scored_windows == 0
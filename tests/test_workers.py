@@ -0,0 +1,99 @@
+import os
+import time
+import numpy as np
+import pytest
+from app.core.workers import WorkerError, WorkerPool, WorkerStartError
+
+
+class EchoModel:
+    """Stand-in model; built inside the worker process."""
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+
+    def total(self, audio):
+        return float(audio.sum() * self.scale)
+
+    def pid(self):
+        return os.getpid()
+
+    def fail(self):
+        raise ValueError("boom")
+
+    def crash(self):
+        os._exit(1)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class BrokenModel:
+    def __init__(self):
+        raise ImportError("no model here")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    p = WorkerPool("echo", "tests.test_workers:EchoModel", (2.0,), size=1, startup_timeout=30)
+    yield p
+    p.close()
+
+
+def test_audio_goes_through_shared_memory(pool):
+    audio = np.ones(16000, dtype=np.float32)
+    assert pool.call_sync("total", audio=audio) == 32000.0
+    assert pool.call_sync("pid") != os.getpid()
+
+
+def test_remote_exception_is_surfaced(pool):
+    with pytest.raises(WorkerError, match="ValueError: boom"):
+        pool.call_sync("fail")
+    # The worker survives a model-level error
+    assert pool.call_sync("total", audio=np.ones(4, dtype=np.float32)) == 8.0
+
+
+@pytest.mark.asyncio
+async def test_async_call(pool):
+    assert await pool.call("total", audio=np.arange(4, dtype=np.float32)) == 12.0
+
+
+def test_crashed_worker_is_restarted(pool):
+    before = pool.call_sync("pid")
+    restarts = pool.restarts
+    with pytest.raises(Exception):
+        pool.call_sync("crash")
+    assert pool.restarts > restarts
+    assert pool.call_sync("pid") != before
+    assert pool.health_check() == 0
+
+
+def test_timed_out_call_is_not_retried(pool):
+    restarts = pool.restarts
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.call_sync("sleep", 5, timeout=0.5)
+    # One attempt, and the busy worker was replaced rather than reused
+    assert time.monotonic() - started < 4
+    assert pool.restarts == restarts + 1
+    assert pool.call_sync("total", audio=np.ones(2, dtype=np.float32)) == 4.0
+
+
+def test_timeout_scales_with_audio_length(pool):
+    assert pool._timeout_for(None) == pool.call_timeout
+    ten_seconds = np.zeros(10 * pool.sample_rate, dtype=np.float32)
+    assert pool._timeout_for(ten_seconds) == pool.call_timeout + 10 * pool.timeout_per_audio_s
+
+
+def test_failed_start_backs_off():
+    pool = WorkerPool("broken", "tests.test_workers:BrokenModel", startup_timeout=30)
+    try:
+        with pytest.raises(WorkerStartError, match="ImportError: no model here"):
+            pool.call_sync("pid")
+        assert pool.start_failures == 1
+        # No new process until the backoff is over
+        with pytest.raises(WorkerStartError, match="next attempt in"):
+            pool.call_sync("pid")
+        assert pool.health_check() == 0
+        assert pool._workers[0].process is None
+    finally:
+        pool.close()